@@ -1,10 +1,13 @@
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Union
 import cv2
 import numpy as np
 from ..utils.logging_config import get_logger
+from .pattern_detection import ChessboardDetector, detect_chessboard
+logger = get_logger(__name__)
 class CalibrationManager:
     def __init__(self):
         self.logger = get_logger(__name__)
@@ -19,6 +22,9 @@ class CalibrationManager:
         self.square_size = 25.0
         self.calibration_flags = cv2.CALIB_RATIONAL_MODEL
         self.criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+        # Shared detection cache: re-running calibration on the same frames,
+        # e.g. after dropping outliers, skips the corner search
+        self.detector = ChessboardDetector(self.criteria)
     def capture_calibration_images(
         self, device_client=None, num_images: int = 20
     ) -> bool:
@@ -58,14 +64,9 @@ class CalibrationManager:
                 if len(image.shape) == 3
                 else image
             )
-            ret, corners = cv2.findChessboardCorners(grey, self.chessboard_size, None)
-            if ret:
-                corners = cv2.cornerSubPix(
-                    grey, corners, (11, 11), (-1, -1), self.criteria
-                )
-                return True, corners
-            else:
-                return False, None
+            return detect_chessboard(
+                grey, self.chessboard_size, self.criteria, self.detector.coarse_width
+            )
         elif pattern_type == "circles":
             grey = (
                 cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -354,16 +355,29 @@ class CalibrationManager:
             self.logger.info(
                 f"[DEBUG_LOG] Found {len(rgb_files)} RGB images and {len(thermal_files)} thermal images"
             )
-            for rgb_file in rgb_files:
-                img = cv2.imread(rgb_file)
+            # imread releases the GIL, so decoding overlaps across threads while
+            # the corner search runs in the detector's worker processes
+            with ThreadPoolExecutor(max_workers=self.detector.workers) as pool:
+                loaded_rgb = pool.map(cv2.imread, rgb_files)
+                loaded_thermal = pool.map(cv2.imread, thermal_files)
+                rgb_detections = self.detector.detect_files(rgb_files, self.chessboard_size)
+                thermal_detections = self.detector.detect_files(
+                    thermal_files, self.chessboard_size
+                )
+                loaded_rgb = list(loaded_rgb)
+                loaded_thermal = list(loaded_thermal)
+            for rgb_file, img, detection in zip(rgb_files, loaded_rgb, rgb_detections):
                 if img is not None:
                     rgb_images.append(img)
+                    self.detector.prime(img, self.chessboard_size, detection)
                 else:
                     self.logger.warning(f" Could not load RGB image: {rgb_file}")
-            for thermal_file in thermal_files:
-                img = cv2.imread(thermal_file)
+            for thermal_file, img, detection in zip(
+                thermal_files, loaded_thermal, thermal_detections
+            ):
                 if img is not None:
                     thermal_images.append(img)
+                    self.detector.prime(img, self.chessboard_size, detection)
                 else:
                     self.logger.warning(f" Could not load thermal image: {thermal_file}")
             return rgb_images, thermal_images
@@ -393,8 +407,8 @@ class CalibrationManager:
             rgb_image_points = []
             rgb_object_points = []
             valid_rgb_images = []
-            for i, img in enumerate(rgb_images):
-                success, corners = self.detect_calibration_pattern(img, pattern_type)
+            rgb_detections = self._detect_patterns(rgb_images, pattern_type)
+            for i, (img, (success, corners)) in enumerate(zip(rgb_images, rgb_detections)):
                 if success:
                     rgb_image_points.append(corners)
                     rgb_object_points.append(object_points_3d)
@@ -428,10 +442,12 @@ class CalibrationManager:
                         thermal_image_points = []
                         thermal_object_points = []
                         valid_thermal_images = []
-                        for i, img in enumerate(thermal_images):
-                            success, corners = self.detect_calibration_pattern(
-                                img, pattern_type
-                            )
+                        thermal_detections = self._detect_patterns(
+                            thermal_images, pattern_type
+                        )
+                        for i, (img, (success, corners)) in enumerate(
+                            zip(thermal_images, thermal_detections)
+                        ):
                             if success:
                                 thermal_image_points.append(corners)
                                 thermal_object_points.append(object_points_3d)
@@ -488,6 +504,12 @@ class CalibrationManager:
         except Exception as e:
             self.logger.error(f" Exception during calibration workflow: {e}")
             return results
+    def _detect_patterns(
+        self, images: List[np.ndarray], pattern_type: str = "chessboard"
+    ) -> List[Tuple[bool, Optional[np.ndarray]]]:
+        if pattern_type == "chessboard":
+            return self.detector.detect_many(images, self.chessboard_size)
+        return [self.detect_calibration_pattern(img, pattern_type) for img in images]
     @property
     def pattern_size(self):
         return self.chessboard_size
@@ -498,7 +520,7 @@ class CalibrationManager:
 def create_calibration_pattern_points(
     pattern_size: Tuple[int, int], square_size: float
 ) -> np.ndarray:
-    self.logger.info(
+    logger.info(
         f"[DEBUG_LOG] Creating calibration pattern points {pattern_size} with square size {square_size}mm"
     )
     pattern_points = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
@@ -509,18 +531,18 @@ def create_calibration_pattern_points(
     return pattern_points
 def validate_calibration_images(images: List[np.ndarray], min_images: int = 10) -> bool:
     if len(images) < min_images:
-        self.logger.error(f" Insufficient calibration images: {len(images)} < {min_images}")
+        logger.error(f" Insufficient calibration images: {len(images)} < {min_images}")
         return False
     if not images:
         return False
     first_shape = images[0].shape
     for i, img in enumerate(images[1:], 1):
         if img.shape != first_shape:
-            self.logger.info(
+            logger.info(
                 f"[ERROR] Image shape mismatch at index {i}: {img.shape} != {first_shape}"
             )
             return False
-    self.logger.debug(f" Calibration image validation passed: {len(images)} images")
+    logger.debug(f" Calibration image validation passed: {len(images)} images")
     return True
 def draw_calibration_pattern(
     image: np.ndarray,
@@ -7,6 +7,7 @@ import numpy as np
 from ..utils.logging_config import get_logger
 from .calibration_processor import CalibrationProcessor
 from .calibration_result import CalibrationResult
+from .thermal_fusion import ThermalFusionEngine
 logger = get_logger(__name__)
 
 # Import the unified CalibrationManager from calibration.py to avoid duplication
@@ -26,6 +27,10 @@ class CalibrationManager(UnifiedCalibrationManager):
         self.captured_images = {}
         self.captured_frames = []
         self.calibration_results = {}
+        self.fusion_engines: Dict[str, ThermalFusionEngine] = {}
+        # Warp resolution for overlays: 1.0 is full resolution, None picks a
+        # reduced one from the thermal sensor size
+        self.overlay_scale: Optional[float] = 1.0
         self.pattern_type = "chessboard"
         self.min_images = 10
         self.is_capturing = False
@@ -168,6 +173,7 @@ class CalibrationManager(UnifiedCalibrationManager):
                 )
                 if result.is_valid():
                     self.calibration_results[dev_id] = result
+                    self.invalidate_fusion_cache(dev_id)
                     self._save_calibration_result(dev_id, result)
                     computation_results["device_results"][dev_id] = {
                         "success": True,
@@ -207,13 +213,12 @@ class CalibrationManager(UnifiedCalibrationManager):
         rgb_image_points = []
         thermal_image_points = []
         valid_object_points = []
-        for i, (rgb_img, thermal_img) in enumerate(zip(rgb_images, thermal_images)):
-            rgb_success, rgb_corners = self.processor.detect_chessboard_corners(
-                rgb_img, self.chessboard_size
-            )
-            thermal_success, thermal_corners = self.processor.detect_chessboard_corners(
-                thermal_img, self.chessboard_size
-            )
+        frame_count = min(len(rgb_images), len(thermal_images))
+        rgb_detections = self.detector.detect_many(rgb_images[:frame_count], self.chessboard_size)
+        thermal_detections = self.detector.detect_many(thermal_images[:frame_count], self.chessboard_size)
+        for i, ((rgb_success, rgb_corners), (thermal_success, thermal_corners)) in enumerate(
+            zip(rgb_detections, thermal_detections)
+        ):
             if rgb_success and thermal_success:
                 rgb_image_points.append(rgb_corners)
                 thermal_image_points.append(thermal_corners)
@@ -338,30 +343,43 @@ class CalibrationManager(UnifiedCalibrationManager):
             result = CalibrationResult.load_from_file(calibration_file)
             if result:
                 self.calibration_results[device_id] = result
+                self.invalidate_fusion_cache(device_id)
                 logger.debug(f" Calibration result loaded for {device_id}")
                 return True
         except Exception as e:
             logger.debug(f" Failed to load calibration for {device_id}: {e}")
         return False
+    def invalidate_fusion_cache(self, device_id: str = None):
+        if device_id is None:
+            self.fusion_engines.clear()
+        else:
+            self.fusion_engines.pop(device_id, None)
+    def get_fusion_engine(self, device_id: str) -> Optional[ThermalFusionEngine]:
+        result = self.calibration_results.get(device_id)
+        if not result or result.homography_matrix is None:
+            return None
+        engine = self.fusion_engines.get(device_id)
+        if engine is None or engine.result is not result or engine.scale != self.overlay_scale:
+            engine = ThermalFusionEngine(result, scale=self.overlay_scale)
+            self.fusion_engines[device_id] = engine
+        return engine
     def apply_thermal_overlay(
         self,
         device_id: str,
         rgb_image: np.ndarray,
         thermal_image: np.ndarray,
         alpha: float = 0.3,
+        out: Optional[np.ndarray] = None,
     ) -> Optional[np.ndarray]:
-        result = self.calibration_results.get(device_id)
-        if not result or result.homography_matrix is None:
-            return None
         try:
-            thermal_warped = cv2.warpPerspective(
-                thermal_image,
-                result.homography_matrix,
-                (rgb_image.shape[1], rgb_image.shape[0]),
-            )
-            thermal_colored = cv2.applyColorMap(thermal_warped, cv2.COLORMAP_JET)
-            overlay = cv2.addWeighted(rgb_image, 1.0 - alpha, thermal_colored, alpha, 0)
-            return overlay
+            engine = self.get_fusion_engine(device_id)
+            if engine is None:
+                return None
+            engine.alpha = alpha
+            if out is not None:
+                return engine.fuse(rgb_image, thermal_image, out=out)
+            # The engine reuses one output buffer per device; callers keep their own frame
+            return engine.fuse(rgb_image, thermal_image).copy()
         except Exception as e:
             logger.debug(f" Overlay error for {device_id}: {e}")
             return None
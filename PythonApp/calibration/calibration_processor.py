@@ -2,6 +2,7 @@ from typing import List, Optional, Tuple
 import cv2
 import numpy as np
 from ..utils.logging_config import get_logger
+from .pattern_detection import detect_chessboard, to_grey
 class CalibrationProcessor:
     def __init__(self):
         self.logger = get_logger(__name__)
@@ -12,6 +13,8 @@ class CalibrationProcessor:
             30,
             0.001,
         )
+        # Images wider than this are searched downscaled first
+        self.coarse_width = 1024
         self.calibration_flags = (
             cv2.CALIB_RATIONAL_MODEL
             | cv2.CALIB_THIN_PRISM_MODEL
@@ -21,22 +24,9 @@ class CalibrationProcessor:
     def detect_chessboard_corners(
         self, image: np.ndarray, pattern_size: Tuple[int, int]
     ) -> Tuple[bool, Optional[np.ndarray]]:
-        if len(image.shape) == 3:
-            grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            grey = image.copy()
-        ret, corners = cv2.findChessboardCorners(
-            grey,
-            pattern_size,
-            cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE,
+        return detect_chessboard(
+            to_grey(image), pattern_size, self.corner_criteria, self.coarse_width
         )
-        if ret:
-            corners = cv2.cornerSubPix(
-                grey, corners, (11, 11), (-1, -1), self.corner_criteria
-            )
-            return True, corners
-        else:
-            return False, None
     def detect_circles_grid(
         self, image: np.ndarray, pattern_size: Tuple[int, int]
     ) -> Tuple[bool, Optional[np.ndarray]]:
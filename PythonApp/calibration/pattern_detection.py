@@ -0,0 +1,185 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+DEFAULT_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+DETECTION_FLAGS = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE
+Detection = Tuple[bool, Optional[np.ndarray]]
+def to_grey(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+def detect_chessboard(
+    grey: np.ndarray,
+    pattern_size: Tuple[int, int],
+    criteria=DEFAULT_CRITERIA,
+    coarse_width: Optional[int] = 1024,
+    win_size: Tuple[int, int] = (11, 11),
+) -> Detection:
+    """Find and refine chessboard corners, coarse-to-fine.
+
+    Images wider than ``coarse_width`` are first searched downscaled with
+    ``CALIB_CB_FAST_CHECK``, so frames without a board are rejected in a
+    fraction of the full-resolution cost. When the board is found the corners
+    are scaled back and refined with ``cornerSubPix`` on a crop around the
+    board only. Smaller images, or ``coarse_width=None``, are searched at full
+    resolution as before. Corners are returned as ``(N, 1, 2)`` float32, the
+    layout OpenCV 4 produces, whatever the installed OpenCV version returns.
+    """
+    height, width = grey.shape[:2]
+    if not coarse_width or width <= coarse_width:
+        found, corners = cv2.findChessboardCorners(grey, pattern_size, DETECTION_FLAGS)
+        if not found:
+            return False, None
+        return True, cv2.cornerSubPix(grey, corners, win_size, (-1, -1), criteria).reshape(-1, 1, 2)
+    scale = coarse_width / width
+    small = cv2.resize(grey, (coarse_width, max(1, int(round(height * scale)))), interpolation=cv2.INTER_AREA)
+    found, coarse = cv2.findChessboardCorners(small, pattern_size, DETECTION_FLAGS + cv2.CALIB_CB_FAST_CHECK)
+    if not found:
+        return False, None
+    # Map pixel centres back to full resolution
+    corners = ((coarse.reshape(-1, 1, 2).astype(np.float64) + 0.5) / scale - 0.5).astype(np.float32)
+    # The search window must cover the coarse error (about one downscaled
+    # pixel) without reaching the neighbouring corners
+    spacing = np.min(np.linalg.norm(np.diff(corners.reshape(pattern_size[1], pattern_size[0], 2), axis=1), axis=2))
+    half = int(max(win_size[0], min(np.ceil(2.0 / scale), spacing * 0.4)))
+    margin = half + 2
+    x0, y0 = np.maximum(np.floor(corners.reshape(-1, 2).min(axis=0)).astype(int) - margin, 0)
+    x1, y1 = np.minimum(np.ceil(corners.reshape(-1, 2).max(axis=0)).astype(int) + margin + 1, (width, height))
+    offset = np.array([x0, y0], dtype=np.float32)
+    region = np.ascontiguousarray(grey[y0:y1, x0:x1])
+    refined = cv2.cornerSubPix(region, corners - offset, (half, half), (-1, -1), criteria)
+    return True, (refined + offset).reshape(-1, 1, 2)
+def _digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+def image_digest(image: np.ndarray) -> str:
+    image = np.ascontiguousarray(image)
+    return _digest(memoryview(image).cast("B")) + f"-{image.dtype.str}-{'x'.join(map(str, image.shape))}"
+def file_digest(path: Union[str, Path]) -> str:
+    with open(path, "rb") as f:
+        return _digest(f.read())
+class DetectionCache:
+    """In-memory LRU of pattern detections keyed by image content.
+
+    Keys combine the image (or file) digest with the detection parameters, so
+    re-running a calibration on the same frames, e.g. after excluding
+    outliers, does not repeat any corner search.
+    """
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[bool, Optional[np.ndarray], Optional[Tuple[int, int]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    def put(self, key: Hashable, entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    def __len__(self) -> int:
+        return len(self._entries)
+def _detect_file(path: str, pattern_size: Tuple[int, int], criteria, coarse_width: Optional[int]):
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return False, None, None
+    found, corners = detect_chessboard(image, pattern_size, criteria, coarse_width)
+    return found, corners, (image.shape[1], image.shape[0])
+class ChessboardDetector:
+    """Runs coarse-to-fine chessboard detection over image sets in parallel.
+
+    In-memory frames are searched on a thread pool: OpenCV releases the GIL
+    inside ``findChessboardCorners``, and shipping 4K frames to worker
+    processes would cost more than it saves. Image files are decoded and
+    searched in a process pool, so only the corners come back to the caller;
+    ``prime`` lets those results stand in for the same frames once decoded.
+    Results are cached by content digest in a ``DetectionCache``.
+    """
+    def __init__(
+        self,
+        criteria=DEFAULT_CRITERIA,
+        coarse_width: Optional[int] = 1024,
+        workers: Optional[int] = None,
+        cache: Optional[DetectionCache] = None,
+    ):
+        self.criteria = criteria
+        self.coarse_width = coarse_width
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.cache = cache if cache is not None else DetectionCache()
+    def _key(self, digest: str, pattern_size: Tuple[int, int]):
+        return digest, tuple(pattern_size), self.coarse_width, tuple(self.criteria)
+    def detect(self, image: np.ndarray, pattern_size: Tuple[int, int]) -> Detection:
+        key = self._key(image_digest(image), pattern_size)
+        entry = self.cache.get(key)
+        if entry is None:
+            found, corners = detect_chessboard(to_grey(image), pattern_size, self.criteria, self.coarse_width)
+            entry = found, corners, (image.shape[1], image.shape[0])
+            self.cache.put(key, entry)
+        return entry[0], None if entry[1] is None else entry[1].copy()
+    def prime(self, image: np.ndarray, pattern_size: Tuple[int, int], entry) -> None:
+        """Record a ``detect_files`` result as the detection for the decoded ``image``."""
+        self.cache.put(self._key(image_digest(image), pattern_size), entry)
+    def detect_many(self, images: Sequence[np.ndarray], pattern_size: Tuple[int, int]) -> List[Detection]:
+        if len(images) <= 1 or self.workers <= 1:
+            return [self.detect(image, pattern_size) for image in images]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chessboard") as pool:
+            return list(pool.map(lambda image: self.detect(image, pattern_size), images))
+    def detect_files(
+        self, paths: Sequence[Union[str, Path]], pattern_size: Tuple[int, int], use_processes: bool = True
+    ) -> List[Tuple[bool, Optional[np.ndarray], Optional[Tuple[int, int]]]]:
+        """Detect the board in image files; returns ``(found, corners, image_size)``.
+
+        Unreadable files are reported as ``(False, None, None)``.
+        """
+        paths = [str(path) for path in paths]
+        keys: List[Any] = []
+        for path in paths:
+            try:
+                keys.append(self._key(file_digest(path), pattern_size))
+            except OSError as e:
+                logger.warning(f" Could not read calibration image {path}: {e}")
+                keys.append(None)
+        results: Dict[int, Any] = {}
+        pending = []
+        for index, key in enumerate(keys):
+            entry = self.cache.get(key) if key is not None else (False, None, None)
+            if entry is None:
+                pending.append(index)
+            else:
+                results[index] = entry
+        if pending:
+            args = [(paths[i], tuple(pattern_size), self.criteria, self.coarse_width) for i in pending]
+            if use_processes and len(pending) > 1 and self.workers > 1:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), mp_context=context) as pool:
+                    detected = list(pool.map(_detect_file, *zip(*args)))
+            else:
+                detected = [_detect_file(*arg) for arg in args]
+            for index, entry in zip(pending, detected):
+                if entry[2] is None:
+                    logger.warning(f" Could not load calibration image: {paths[index]}")
+                else:
+                    self.cache.put(keys[index], entry)
+                results[index] = entry
+        return [
+            (found, None if corners is None else corners.copy(), size)
+            for found, corners, size in (results[i] for i in range(len(paths)))
+        ]
@@ -0,0 +1,136 @@
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from ..utils.logging_config import get_logger
+from .calibration_result import CalibrationResult
+logger = get_logger(__name__)
+def colormap_lut(colormap: int = cv2.COLORMAP_JET) -> np.ndarray:
+    """The 256-entry BGR table ``cv2.applyColorMap`` uses for ``colormap``."""
+    return cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), colormap)
+class ThermalFusionEngine:
+    """Overlays thermal frames on RGB frames using remap tables built once.
+
+    For a calibration result this computes, per pair of frame sizes, where
+    each RGB pixel samples the thermal image: the inverse homography, and, with
+    ``undistort``, the thermal lens model folded into the same table. A frame
+    then costs one ``cv2.remap``, a lookup in a 256-entry colour table and a
+    blend, all into buffers owned by the engine, with no per-frame allocation.
+
+    Only the bounding box of the thermal footprint in the RGB frame is warped
+    and colourised; the rest of the colour layer holds the colour of an empty
+    thermal pixel, which is what ``warpPerspective`` + ``applyColorMap`` give
+    there. With ``scale`` < 1 the footprint is warped at reduced resolution
+    and only that region is upsampled before blending; ``scale=None`` picks
+    the reduction from the thermal resolution, since thermal sensors have far
+    fewer pixels than the RGB frames they are drawn over.
+
+    ``fuse`` returns its output buffer, which is overwritten by the next call.
+    An engine is not thread-safe; use one per stream.
+    """
+    def __init__(self, result: CalibrationResult, alpha: float = 0.3, colormap: int = cv2.COLORMAP_JET, scale: Optional[float] = 1.0, undistort: bool = False):
+        if result.homography_matrix is None:
+            raise ValueError(f"Calibration for {result.device_id} has no homography")
+        if scale is not None and not 0.0 < scale <= 1.0:
+            raise ValueError("scale must be in (0, 1] or None")
+        self.result = result
+        self.alpha = alpha
+        self.scale = scale
+        self.undistort = (
+            undistort
+            and result.thermal_camera_matrix is not None
+            and result.thermal_distortion_coeffs is not None
+        )
+        self.lut = colormap_lut(colormap)
+        self._inverse_homography = np.linalg.inv(np.asarray(result.homography_matrix, dtype=np.float64))
+        self._sizes: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None
+        self.roi: Optional[Tuple[int, int, int, int]] = None
+    def _source_coordinates(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        h = self._inverse_homography
+        w = h[2, 0] * xs + h[2, 1] * ys + h[2, 2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            map_x = ((h[0, 0] * xs + h[0, 1] * ys + h[0, 2]) / w).astype(np.float32)
+            map_y = ((h[1, 0] * xs + h[1, 1] * ys + h[1, 2]) / w).astype(np.float32)
+        if self.undistort:
+            # The homography output is an ideal (undistorted) thermal pixel;
+            # projecting it through the lens model gives the raw pixel, the
+            # same mapping cv2.initUndistortRectifyMap tabulates, but without
+            # that table's clamping at the frame edges
+            camera_matrix = np.asarray(self.result.thermal_camera_matrix, dtype=np.float64)
+            fx, fy, cx, cy = camera_matrix[0, 0], camera_matrix[1, 1], camera_matrix[0, 2], camera_matrix[1, 2]
+            rays = np.stack([(map_x.ravel() - cx) / fx, (map_y.ravel() - cy) / fy, np.ones(map_x.size)], axis=1)
+            raw, _ = cv2.projectPoints(
+                np.nan_to_num(rays, nan=-1e6, posinf=-1e6, neginf=-1e6), np.zeros(3), np.zeros(3),
+                camera_matrix, np.asarray(self.result.thermal_distortion_coeffs, dtype=np.float64),
+            )
+            raw = raw.reshape(map_x.shape + (2,)).astype(np.float32)
+            map_x, map_y = np.ascontiguousarray(raw[..., 0]), np.ascontiguousarray(raw[..., 1])
+        return map_x, map_y
+    def _footprint(self, rgb_size: Tuple[int, int], thermal_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        width, height = rgb_size
+        xs, ys = np.meshgrid(np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64))
+        map_x, map_y = self._source_coordinates(xs, ys)
+        inside = (map_x > -1) & (map_x < thermal_size[0]) & (map_y > -1) & (map_y < thermal_size[1])
+        rows = np.flatnonzero(inside.any(axis=1))
+        cols = np.flatnonzero(inside.any(axis=0))
+        if not len(rows):
+            return None
+        return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+    def _scale_for(self, roi_size: Tuple[int, int], thermal_size: Tuple[int, int]) -> float:
+        if self.scale is not None:
+            return self.scale
+        # Warping on a grid finer than about twice the thermal resolution only
+        # interpolates between the same source pixels, so upsample past that
+        scale = 2.0 * max(thermal_size[0] / roi_size[0], thermal_size[1] / roi_size[1])
+        return 1.0 if scale > 0.75 else scale
+    def prepare(self, rgb_shape: Tuple[int, ...], thermal_shape: Tuple[int, ...]):
+        """Build remap tables and buffers for these frame shapes."""
+        rgb_size = (rgb_shape[1], rgb_shape[0])
+        thermal_size = (thermal_shape[1], thermal_shape[0])
+        if self._sizes == (rgb_size, thermal_size):
+            return
+        self.roi = self._footprint(rgb_size, thermal_size)
+        self._colored = np.empty((rgb_size[1], rgb_size[0], 3), dtype=np.uint8)
+        self._colored[:] = self.lut[0, 0]
+        self._output = np.empty_like(self._colored)
+        self._gray = np.empty((thermal_size[1], thermal_size[0]), dtype=np.uint8)
+        self._upsampled = None
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            roi_w, roi_h = x1 - x0, y1 - y0
+            scale = self._scale_for((roi_w, roi_h), thermal_size)
+            map_w = max(1, int(round(roi_w * scale)))
+            map_h = max(1, int(round(roi_h * scale)))
+            # Pixel centres of the (possibly reduced) grid in RGB coordinates
+            xs = x0 + (np.arange(map_w, dtype=np.float64) + 0.5) * (roi_w / map_w) - 0.5
+            ys = y0 + (np.arange(map_h, dtype=np.float64) + 0.5) * (roi_h / map_h) - 0.5
+            # Float tables: with this OpenCV build fixed-point (CV_16SC2) remap
+            # tables benchmarked slower than CV_32FC1 ones
+            self._map_x, self._map_y = self._source_coordinates(*np.meshgrid(xs, ys))
+            self._warped = np.empty((map_h, map_w), dtype=np.uint8)
+            if (map_w, map_h) != (roi_w, roi_h):
+                self._upsampled = np.empty((roi_h, roi_w), dtype=np.uint8)
+        self._sizes = (rgb_size, thermal_size)
+        logger.debug(f"Thermal fusion tables built for {self.result.device_id}: rgb {rgb_size}, thermal {thermal_size}, roi {self.roi}")
+    def fuse(self, rgb_image: np.ndarray, thermal_image: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Blend the colourised, warped ``thermal_image`` over ``rgb_image``.
+
+        ``out`` may be ``rgb_image`` itself to blend in place; by default the
+        engine's own buffer is used.
+        """
+        if thermal_image.dtype != np.uint8:
+            raise ValueError(f"Thermal frames must be 8-bit, got {thermal_image.dtype}")
+        self.prepare(rgb_image.shape, thermal_image.shape)
+        if self.roi is not None:
+            gray = thermal_image
+            if thermal_image.ndim == 3:
+                gray = cv2.cvtColor(thermal_image, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            x0, y0, x1, y1 = self.roi
+            warped = cv2.remap(gray, self._map_x, self._map_y, cv2.INTER_LINEAR, dst=self._warped, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+            if self._upsampled is not None:
+                # Upsample intensities, not colours, so the colour map sees
+                # the same interpolated values as on the full-resolution path
+                warped = cv2.resize(warped, (x1 - x0, y1 - y0), dst=self._upsampled, interpolation=cv2.INTER_LINEAR)
+            cv2.applyColorMap(warped, self.lut, dst=self._colored[y0:y1, x0:x1])
+        if out is None:
+            out = self._output
+        return cv2.addWeighted(rgb_image, 1.0 - self.alpha, self._colored, self.alpha, 0, dst=out)
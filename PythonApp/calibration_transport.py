@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import struct
+from typing import Any, Dict, Optional, Tuple
+FRAME_PREFIX = struct.Struct("!II")
+MAX_HEADER_BYTES = 1 << 20
+MAX_ATTACHMENT_BYTES = 64 << 20
+Frame = Tuple[Dict[str, Any], Optional[bytes]]
+class FrameError(Exception):
+    pass
+class MalformedFrame(FrameError):
+    pass
+def encode_frame(message: Dict[str, Any], attachment: Optional[bytes] = None) -> bytes:
+    """Serialise one frame: u32 header length, u32 attachment length, JSON header, raw attachment.
+
+    Binary payloads such as JPEG captures travel as the attachment rather than
+    as base64 inside the JSON header.
+    """
+    header = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    attachment = attachment or b""
+    return FRAME_PREFIX.pack(len(header), len(attachment)) + header + bytes(attachment)
+async def read_frame(
+    reader: asyncio.StreamReader,
+    max_header: int = MAX_HEADER_BYTES,
+    max_attachment: int = MAX_ATTACHMENT_BYTES,
+) -> Optional[Frame]:
+    """Read one complete frame however it was split across TCP segments.
+
+    Returns None on a clean end of stream. Frames over the size limits, or a
+    stream that ends mid-frame, raise ``FrameError``; a header that is not a
+    JSON object raises ``MalformedFrame`` once the whole frame has been
+    consumed, so the stream stays in sync.
+    """
+    try:
+        prefix = await reader.readexactly(FRAME_PREFIX.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise FrameError("Connection closed inside a frame prefix") from e
+    header_length, attachment_length = FRAME_PREFIX.unpack(prefix)
+    if header_length > max_header:
+        raise FrameError(f"Frame header of {header_length} bytes exceeds {max_header}")
+    if attachment_length > max_attachment:
+        raise FrameError(f"Frame attachment of {attachment_length} bytes exceeds {max_attachment}")
+    try:
+        header = await reader.readexactly(header_length)
+        attachment = await reader.readexactly(attachment_length) if attachment_length else None
+    except asyncio.IncompleteReadError as e:
+        raise FrameError(f"Connection closed after {len(e.partial)} of {e.expected} frame bytes") from e
+    try:
+        message = json.loads(header.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise MalformedFrame(f"Invalid frame header: {e}") from e
+    if not isinstance(message, dict):
+        raise MalformedFrame(f"Frame header is a JSON {type(message).__name__}, not an object")
+    return message, attachment
+class FramedConnection:
+    """A framed peer whose outgoing frames go through a bounded queue.
+
+    A writer task drains the queue. ``send`` waits once ``max_pending``
+    frames are queued, so a slow device pushes back on its producers instead
+    of growing memory. Must be created inside the event loop.
+    """
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        max_pending: int = 32,
+        max_header: int = MAX_HEADER_BYTES,
+        max_attachment: int = MAX_ATTACHMENT_BYTES,
+        logger=None,
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.max_header = max_header
+        self.max_attachment = max_attachment
+        self.logger = logger or logging.getLogger(__name__)
+        self.peername = writer.get_extra_info("peername")
+        self.outbox: "asyncio.Queue[Frame]" = asyncio.Queue(maxsize=max_pending)
+        self.closed = False
+        self._writer_task = asyncio.get_running_loop().create_task(self._drain_outbox())
+    async def receive(self) -> Optional[Frame]:
+        return await read_frame(self.reader, self.max_header, self.max_attachment)
+    async def send(self, message: Dict[str, Any], attachment: Optional[bytes] = None):
+        if self.closed:
+            raise ConnectionError(f"Connection to {self.peername} is closed")
+        await self.outbox.put((message, attachment))
+    async def _drain_outbox(self):
+        try:
+            while True:
+                message, attachment = await self.outbox.get()
+                header = json.dumps(message, separators=(",", ":")).encode("utf-8")
+                self.writer.write(FRAME_PREFIX.pack(len(header), len(attachment or b"")) + header)
+                if attachment:
+                    self.writer.write(attachment)
+                await self.writer.drain()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error writing to {self.peername}: {e}")
+            self.closed = True
+    async def close(self):
+        self.closed = True
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        try:
+            self.writer.close()
+            await self.writer.wait_closed()
+        except Exception:
+            pass
@@ -0,0 +1,268 @@
+import atexit
+import copy
+import json
+import os
+import shutil
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+ChangeCallback = Callable[[str, Any, Any], None]
+Migration = Callable[[Dict[str, Any]], Dict[str, Any]]
+_MISSING = object()
+_open_stores: "weakref.WeakSet[JsonConfigStore]" = weakref.WeakSet()
+class ConfigStoreError(Exception):
+    pass
+class JsonConfigStore:
+    """In-memory authoritative JSON document with debounced, atomic persistence.
+
+    Reads and writes go to the in-memory copy; a writer thread coalesces bursts
+    of changes and persists them ``debounce`` seconds after the last one (but
+    no later than ``max_delay`` after the first). Each flush writes a temp file,
+    fsyncs it and renames it over the document, keeping ``backups`` previous
+    versions as ``<name>.bak<N>``, so a crash mid-flush leaves the last complete
+    version loadable. Documents are stored as ``{"schema_version", "data"}``;
+    unversioned legacy files are treated as version 0 and brought forward with
+    the registered ``migrations``.
+    """
+    def __init__(
+        self,
+        path,
+        schema_version: int = 1,
+        migrations: Optional[Dict[int, Migration]] = None,
+        debounce: float = 0.25,
+        max_delay: float = 2.0,
+        backups: int = 3,
+        indent: Optional[int] = 2,
+    ):
+        self.path = Path(path)
+        self.schema_version = schema_version
+        self.migrations = dict(migrations or {})
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.backups = backups
+        self.indent = indent
+        self._data: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._dirty_since: Optional[float] = None
+        self._last_change: Optional[float] = None
+        self._version = 0
+        self._flushed_version = 0
+        self._subscribers: List[Tuple[Optional[str], ChangeCallback]] = []
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self.flush_count = 0
+        self.loaded_from: Optional[Path] = None
+        self.load()
+        _open_stores.add(self)
+    def load(self) -> Dict[str, Any]:
+        for candidate in [self.path] + self.backup_paths():
+            if not candidate.exists():
+                continue
+            try:
+                with open(candidate, "r") as f:
+                    document = json.load(f)
+                data = self._migrate(document)
+            except (OSError, ValueError, ConfigStoreError) as e:
+                logger.warning(f"Could not load {candidate}: {e}")
+                continue
+            with self._lock:
+                self._data = data
+                self.loaded_from = candidate
+            if candidate != self.path:
+                logger.warning(f"Recovered {self.path.name} from backup {candidate.name}")
+            return self.snapshot()
+        with self._lock:
+            self._data = {}
+            self.loaded_from = None
+        return {}
+    def backup_paths(self) -> List[Path]:
+        return [self.path.with_name(f"{self.path.name}.bak{i}") for i in range(1, self.backups + 1)]
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return copy.deepcopy(self._data.get(key, default))
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._data)
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._data)
+    def set(self, key: str, value: Any):
+        self.update({key: value})
+    def update(self, values: Dict[str, Any]):
+        changes = []
+        with self._lock:
+            for key, value in values.items():
+                old = self._data.get(key, _MISSING)
+                if old is not _MISSING and old == value:
+                    continue
+                self._data[key] = copy.deepcopy(value)
+                changes.append((key, None if old is _MISSING else old, value))
+            if changes:
+                self._mark_dirty()
+        self._notify(changes)
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            old = self._data.pop(key)
+            self._mark_dirty()
+        self._notify([(key, old, None)])
+        return True
+    def replace(self, data: Dict[str, Any]):
+        changes = []
+        with self._lock:
+            for key in set(self._data) | set(data):
+                old = self._data.get(key)
+                new = data.get(key)
+                if key not in data or key not in self._data or old != new:
+                    changes.append((key, old, new))
+            if changes:
+                self._data = copy.deepcopy(data)
+                self._mark_dirty()
+        self._notify(changes)
+    def subscribe(self, callback: ChangeCallback, key: Optional[str] = None) -> Callable[[], None]:
+        entry = (key, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+    @property
+    def dirty(self) -> bool:
+        with self._lock:
+            return self._version != self._flushed_version
+    def flush(self) -> bool:
+        with self._flush_lock:
+            with self._lock:
+                if self._version == self._flushed_version:
+                    return False
+                version = self._version
+                document = {"schema_version": self.schema_version, "data": self._data}
+                payload = json.dumps(document, indent=self.indent, default=str)
+            self._write_atomic(payload)
+            with self._lock:
+                self._flushed_version = version
+                self._dirty_since = None if self._version == version else self._last_change
+                self.flush_count += 1
+            return True
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout=5.0)
+        self.flush()
+        _open_stores.discard(self)
+    def _mark_dirty(self):
+        now = time.monotonic()
+        self._version += 1
+        self._last_change = now
+        if self._dirty_since is None:
+            self._dirty_since = now
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(
+                target=self._run, name=f"ConfigWriter-{self.path.name}", daemon=True
+            )
+            self._writer.start()
+        self._wakeup.notify_all()
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and self._version == self._flushed_version:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = min(self._last_change + self.debounce, self._dirty_since + self.max_delay)
+                if now < due:
+                    self._wakeup.wait(due - now)
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error persisting {self.path}: {e}")
+                with self._lock:
+                    self._wakeup.wait(self.debounce)
+    def _write_atomic(self, payload: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            self._write_payload(f, payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if self.path.exists() and self.backups > 0:
+            self._rotate_backups()
+        os.replace(tmp_path, self.path)
+        self._fsync_directory()
+    def _write_payload(self, f, payload: str):
+        f.write(payload)
+    def _rotate_backups(self):
+        backups = self.backup_paths()
+        for older, newer in zip(reversed(backups[1:]), reversed(backups[:-1])):
+            if newer.exists():
+                os.replace(newer, older)
+        staging = backups[0].with_name(backups[0].name + ".tmp")
+        try:
+            if staging.exists():
+                staging.unlink()
+            os.link(self.path, staging)
+        except OSError:
+            shutil.copy2(self.path, staging)
+        os.replace(staging, backups[0])
+    def _fsync_directory(self):
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        try:
+            fd = os.open(self.path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    def _migrate(self, document: Any) -> Dict[str, Any]:
+        if isinstance(document, dict) and "schema_version" in document and "data" in document:
+            version, data = int(document["schema_version"]), document["data"]
+        else:
+            version, data = 0, document
+        if version > self.schema_version:
+            raise ConfigStoreError(
+                f"{self.path.name} has schema version {version}, newer than supported {self.schema_version}"
+            )
+        while version < self.schema_version:
+            migration = self.migrations.get(version)
+            if migration is not None:
+                data = migration(data)
+            version += 1
+        if not isinstance(data, dict):
+            raise ConfigStoreError(f"{self.path.name} does not contain a JSON object")
+        return data
+    def _notify(self, changes: List[Tuple[str, Any, Any]]):
+        if not changes:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for key, old, new in changes:
+            for wanted, callback in subscribers:
+                if wanted is not None and wanted != key:
+                    continue
+                try:
+                    callback(key, old, new)
+                except Exception as e:
+                    logger.error(f"Error in config change subscriber: {e}")
+@atexit.register
+def _flush_open_stores():
+    for store in list(_open_stores):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Error flushing {store.path} at exit: {e}")
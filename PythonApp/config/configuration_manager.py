@@ -3,8 +3,10 @@ import os
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from ..utils.logging_config import get_logger
+from .config_store import ChangeCallback, JsonConfigStore
+CONFIG_SCHEMA_VERSION = 1
 @dataclass
 class DeviceConfig:
     device_id: str
@@ -24,7 +26,7 @@ class SessionConfig:
     created_timestamp: str
     modified_timestamp: str
 class ConfigurationManager:
-    def __init__(self, config_dir: Optional[str] = None):
+    def __init__(self, config_dir: Optional[str] = None, write_delay: float = 0.25):
         self.logger = get_logger(__name__)
         if config_dir:
             self.config_dir = Path(config_dir)
@@ -35,6 +37,17 @@ class ConfigurationManager:
         self.device_config_file = self.config_dir / "device_configs.json"
         self.session_config_file = self.config_dir / "session_configs.json"
         self.app_settings_file = self.config_dir / "app_settings.json"
+        self.stores: Dict[str, JsonConfigStore] = {
+            "devices": JsonConfigStore(
+                self.device_config_file, CONFIG_SCHEMA_VERSION, debounce=write_delay
+            ),
+            "sessions": JsonConfigStore(
+                self.session_config_file, CONFIG_SCHEMA_VERSION, debounce=write_delay
+            ),
+            "app_settings": JsonConfigStore(
+                self.app_settings_file, CONFIG_SCHEMA_VERSION, debounce=write_delay
+            ),
+        }
         self.device_configs: Dict[str, DeviceConfig] = {}
         self.session_configs: Dict[str, SessionConfig] = {}
         self.app_settings: Dict[str, Any] = {}
@@ -45,7 +58,7 @@ class ConfigurationManager:
     def save_device_configuration(self, config: DeviceConfig) -> bool:
         try:
             self.device_configs[config.device_id] = config
-            self._save_device_configs()
+            self.stores["devices"].set(config.device_id, asdict(config))
             self.logger.info(f"Saved device configuration for {config.device_id}")
             return True
         except Exception as e:
@@ -61,7 +74,7 @@ class ConfigurationManager:
         try:
             if device_id in self.device_configs:
                 del self.device_configs[device_id]
-                self._save_device_configs()
+                self.stores["devices"].delete(device_id)
                 self.logger.info(f"Removed device configuration for {device_id}")
                 return True
             return False
@@ -72,7 +85,7 @@ class ConfigurationManager:
         try:
             config.modified_timestamp = datetime.now().isoformat()
             self.session_configs[config.session_id] = config
-            self._save_session_configs()
+            self.stores["sessions"].set(config.session_id, asdict(config))
             self.logger.info(f"Saved session configuration for {config.session_id}")
             return True
         except Exception as e:
@@ -153,7 +166,7 @@ class ConfigurationManager:
     def update_app_setting(self, key: str, value: Any) -> bool:
         try:
             self.app_settings[key] = value
-            self._save_app_settings()
+            self.stores["app_settings"].set(key, value)
             self.logger.debug(f"Updated app setting: {key} = {value}")
             return True
         except Exception as e:
@@ -161,6 +174,16 @@ class ConfigurationManager:
             return False
     def get_app_setting(self, key: str, default: Any = None) -> Any:
         return self.app_settings.get(key, default)
+    def subscribe(
+        self, section: str, callback: ChangeCallback, key: Optional[str] = None
+    ) -> Callable[[], None]:
+        return self.stores[section].subscribe(callback, key)
+    def flush(self):
+        for store in self.stores.values():
+            store.flush()
+    def close(self):
+        for store in self.stores.values():
+            store.close()
     def create_session_config_from_devices(
         self, session_id: str, device_ids: List[str]
     ) -> Optional[SessionConfig]:
@@ -197,9 +220,8 @@ class ConfigurationManager:
         self._load_app_settings()
     def _load_device_configs(self):
         try:
-            if self.device_config_file.exists():
-                with open(self.device_config_file, "r") as f:
-                    data = json.load(f)
+            data = self.stores["devices"].snapshot()
+            if data:
                 for device_id, config_data in data.items():
                     config = DeviceConfig(**config_data)
                     self.device_configs[device_id] = config
@@ -210,9 +232,8 @@ class ConfigurationManager:
             self.logger.error(f"Error loading device configurations: {e}")
     def _load_session_configs(self):
         try:
-            if self.session_config_file.exists():
-                with open(self.session_config_file, "r") as f:
-                    data = json.load(f)
+            data = self.stores["sessions"].snapshot()
+            if data:
                 for session_id, config_data in data.items():
                     device_configs = []
                     for device_data in config_data["device_configs"]:
@@ -234,9 +255,8 @@ class ConfigurationManager:
             self.logger.error(f"Error loading session configurations: {e}")
     def _load_app_settings(self):
         try:
-            if self.app_settings_file.exists():
-                with open(self.app_settings_file, "r") as f:
-                    self.app_settings = json.load(f)
+            self.app_settings = self.stores["app_settings"].snapshot()
+            if self.app_settings:
                 self.logger.info("Loaded application settings")
         except Exception as e:
             self.logger.error(f"Error loading application settings: {e}")
@@ -245,8 +265,7 @@ class ConfigurationManager:
             data = {}
             for device_id, config in self.device_configs.items():
                 data[device_id] = asdict(config)
-            with open(self.device_config_file, "w") as f:
-                json.dump(data, f, indent=2)
+            self.stores["devices"].replace(data)
         except Exception as e:
             self.logger.error(f"Error saving device configurations: {e}")
     def _save_session_configs(self):
@@ -254,13 +273,11 @@ class ConfigurationManager:
             data = {}
             for session_id, config in self.session_configs.items():
                 data[session_id] = asdict(config)
-            with open(self.session_config_file, "w") as f:
-                json.dump(data, f, indent=2)
+            self.stores["sessions"].replace(data)
         except Exception as e:
             self.logger.error(f"Error saving session configurations: {e}")
     def _save_app_settings(self):
         try:
-            with open(self.app_settings_file, "w") as f:
-                json.dump(self.app_settings, f, indent=2)
+            self.stores["app_settings"].replace(self.app_settings)
         except Exception as e:
             self.logger.error(f"Error saving application settings: {e}")
\ No newline at end of file
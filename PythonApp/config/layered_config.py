@@ -0,0 +1,338 @@
+"""
+Layered configuration with validation, file watching and hot reload.
+
+Effective values are resolved from an ordered stack of layers (for example
+defaults, a site file, a per-session override and environment variables);
+later layers win. Keys are flat dotted paths such as ``network.streaming_port``.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+ChangeCallback = Callable[[str, Any, Any], None]
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a configuration value has the wrong type or is out of range."""
+    pass
+
+
+@dataclass
+class ValueRule:
+    """Range or choice constraint for keys matching ``pattern``."""
+    pattern: str
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Optional[Tuple[Any, ...]] = None
+
+    def check(self, key: str, value: Any):
+        if self.choices is not None and value not in self.choices:
+            raise ConfigValidationError(f"{key}={value!r} is not one of {list(self.choices)}")
+        if self.minimum is not None and value < self.minimum:
+            raise ConfigValidationError(f"{key}={value!r} is below minimum {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ConfigValidationError(f"{key}={value!r} is above maximum {self.maximum}")
+
+
+@dataclass
+class ConfigLayer:
+    """One source of configuration values."""
+    name: str
+    values: Dict[str, Any] = field(default_factory=dict)
+    source: Optional[str] = None
+    mtime: Optional[float] = None
+    errors: List[str] = field(default_factory=list)
+
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested dictionaries into dotted keys."""
+    flat = {}
+    for key, value in data.items():
+        dotted = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, dotted + "."))
+        else:
+            flat[dotted] = value
+    return flat
+
+
+def coerce(key: str, value: Any, template: Any) -> Any:
+    """Convert ``value`` to the type of the default ``template`` value."""
+    if template is None:
+        return value
+    expected = type(template)
+    if isinstance(value, str) and expected is not str:
+        text = value.strip()
+        if expected is bool:
+            lowered = text.lower()
+            if lowered in ("1", "true", "yes", "on"):
+                return True
+            if lowered in ("0", "false", "no", "off"):
+                return False
+            raise ConfigValidationError(f"{key}={value!r} is not a boolean")
+        try:
+            value = json.loads(text) if expected in (list, dict) else expected(text)
+        except (TypeError, ValueError):
+            raise ConfigValidationError(f"{key}={value!r} cannot be converted to {expected.__name__}")
+    if expected is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if expected is bool and not isinstance(value, bool):
+        raise ConfigValidationError(f"{key}={value!r} is not a boolean")
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ConfigValidationError(
+            f"{key}={value!r} has type {type(value).__name__}, expected {expected.__name__}"
+        )
+    return value
+
+
+class LayeredConfig:
+    """Resolves, validates and hot-reloads a stack of configuration layers.
+
+    Every non-default layer is validated once when it is loaded: values are
+    coerced to the type of the default and checked against the ``rules``, and
+    anything invalid or unknown is dropped with an entry in the layer's
+    ``errors``. File-backed layers can be re-checked with ``check_for_changes``
+    or a polling watcher thread. When a reload changes effective values, keys
+    matching ``safe_keys`` are applied immediately; other keys are applied only
+    while no recording is active and are otherwise rejected until the layer
+    changes again.
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, Any],
+        rules: Iterable[ValueRule] = (),
+        safe_keys: Iterable[str] = (),
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.rules = list(rules)
+        self.safe_keys = list(safe_keys)
+        self.layers: List[ConfigLayer] = [ConfigLayer("defaults", dict(defaults))]
+        self.recording_active = False
+        self.rejected_changes: List[Dict[str, Any]] = []
+        self._effective: Dict[str, Tuple[Any, str]] = {}
+        self._subscribers: List[Tuple[Optional[str], ChangeCallback]] = []
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self._effective = self._resolve()
+
+
+    def set_layer(self, name: str, values: Dict[str, Any], source: Optional[str] = None) -> ConfigLayer:
+        """Add or replace a layer; layers are ordered by first insertion."""
+        layer = ConfigLayer(name, source=source)
+        layer.values = self._validate_layer(layer, flatten(values))
+        with self._lock:
+            for index, existing in enumerate(self.layers):
+                if existing.name == name:
+                    layer.mtime = existing.mtime if source == existing.source else None
+                    self.layers[index] = layer
+                    break
+            else:
+                self.layers.append(layer)
+        self._apply_changes()
+        return layer
+
+    def load_file_layer(self, name: str, path) -> ConfigLayer:
+        """Load a JSON file as a layer; a missing file gives an empty layer."""
+        path = Path(path)
+        values: Dict[str, Any] = {}
+        mtime = None
+        errors = []
+        if path.exists():
+            mtime = path.stat().st_mtime
+            try:
+                with open(path, "r") as f:
+                    values = json.load(f)
+            except (OSError, ValueError) as e:
+                errors.append(f"Could not read {path}: {e}")
+        layer = self.set_layer(name, values, source=str(path))
+        layer.mtime = mtime
+        layer.errors.extend(errors)
+        for error in errors:
+            self.logger.error(error)
+        return layer
+
+    def load_env_layer(self, prefix: str, environ: Optional[Dict[str, str]] = None, name: str = "environment") -> ConfigLayer:
+        """Load ``PREFIX__SECTION__KEY=value`` variables as a layer."""
+        environ = os.environ if environ is None else environ
+        values = {}
+        defaults = self.layers[0].values
+        for variable, raw in environ.items():
+            if not variable.startswith(prefix + "__"):
+                continue
+            dotted = variable[len(prefix) + 2:].replace("__", ".").lower()
+            match = next((key for key in defaults if key.lower() == dotted), dotted)
+            values[match] = raw
+        return self.set_layer(name, values, source=f"env:{prefix}")
+
+    def remove_layer(self, name: str):
+        with self._lock:
+            self.layers = [layer for layer in self.layers if layer.name != name or layer.name == "defaults"]
+        self._apply_changes()
+
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._effective.get(key)
+            return default if entry is None else entry[0]
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {key: value for key, (value, _) in self._effective.items()}
+
+    def explain(self, key: str) -> Dict[str, Any]:
+        """Show the effective value of ``key`` and every layer that sets it."""
+        with self._lock:
+            if key not in self._effective:
+                raise KeyError(key)
+            value, layer_name = self._effective[key]
+            chain = [
+                {"layer": layer.name, "source": layer.source, "value": layer.values[key]}
+                for layer in self.layers
+                if key in layer.values
+            ]
+            return {"key": key, "value": value, "layer": layer_name, "chain": chain}
+
+    def diff(self, base_layer: str = "defaults") -> Dict[str, Dict[str, Any]]:
+        """Keys whose effective value differs from ``base_layer``."""
+        with self._lock:
+            base = next(layer for layer in self.layers if layer.name == base_layer)
+            return {
+                key: {"base": base.values.get(key), "effective": value, "layer": layer_name}
+                for key, (value, layer_name) in sorted(self._effective.items())
+                if layer_name != base_layer and base.values.get(key) != value
+            }
+
+    def errors(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {layer.name: list(layer.errors) for layer in self.layers if layer.errors}
+
+
+    def subscribe(self, callback: ChangeCallback, key_pattern: Optional[str] = None) -> Callable[[], None]:
+        """Call ``callback(key, old, new)`` for applied changes matching ``key_pattern``."""
+        entry = (key_pattern, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def is_safe_key(self, key: str) -> bool:
+        return any(fnmatch.fnmatchcase(key, pattern) for pattern in self.safe_keys)
+
+    def set_recording_active(self, active: bool):
+        self.recording_active = active
+        if not active:
+            self._apply_changes()
+
+    def check_for_changes(self) -> bool:
+        """Reload file-backed layers whose modification time changed."""
+        changed = False
+        with self._lock:
+            file_layers = [
+                layer for layer in self.layers
+                if layer.source and not layer.source.startswith("env:")
+            ]
+        for layer in file_layers:
+            path = Path(layer.source)
+            mtime = path.stat().st_mtime if path.exists() else None
+            if mtime != layer.mtime:
+                self.load_file_layer(layer.name, path)
+                changed = True
+        return changed
+
+    def start_watching(self, interval: float = 1.0):
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.check_for_changes()
+                except Exception as e:
+                    self.logger.error(f"Error checking configuration files: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="ConfigWatcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher:
+            self._watcher.join(timeout=5.0)
+            self._watcher = None
+
+
+    def _validate_layer(self, layer: ConfigLayer, values: Dict[str, Any]) -> Dict[str, Any]:
+        defaults = self.layers[0].values
+        valid = {}
+        for key, value in values.items():
+            if key not in defaults:
+                layer.errors.append(f"Unknown configuration key: {key}")
+                continue
+            try:
+                value = coerce(key, value, defaults[key])
+                for rule in self.rules:
+                    if fnmatch.fnmatchcase(key, rule.pattern):
+                        rule.check(key, value)
+            except ConfigValidationError as e:
+                layer.errors.append(str(e))
+                continue
+            valid[key] = value
+        for error in layer.errors:
+            self.logger.warning(f"Configuration layer '{layer.name}': {error}")
+        return valid
+
+    def _resolve(self) -> Dict[str, Tuple[Any, str]]:
+        resolved = {}
+        for layer in self.layers:
+            for key, value in layer.values.items():
+                resolved[key] = (value, layer.name)
+        return resolved
+
+    def _apply_changes(self):
+        notifications = []
+        with self._lock:
+            target = self._resolve()
+            if not self._effective:
+                self._effective = target
+                return
+            for key in sorted(set(target) | set(self._effective)):
+                old = self._effective.get(key, (None, None))
+                new = target.get(key, (None, None))
+                if old[0] == new[0]:
+                    if old[1] != new[1] and key in target:
+                        self._effective[key] = new
+                    continue
+                if self.recording_active and not self.is_safe_key(key):
+                    self.rejected_changes.append(
+                        {"key": key, "current": old[0], "requested": new[0], "layer": new[1]}
+                    )
+                    self.logger.warning(
+                        f"Rejected change to {key} during recording ({old[0]!r} -> {new[0]!r})"
+                    )
+                    continue
+                self._effective[key] = new
+                notifications.append((key, old[0], new[0]))
+            subscribers = list(self._subscribers)
+        for key, old, new in notifications:
+            for pattern, callback in subscribers:
+                if pattern is not None and not fnmatch.fnmatchcase(key, pattern):
+                    continue
+                try:
+                    callback(key, old, new)
+                except Exception as e:
+                    self.logger.error(f"Error in configuration subscriber for {key}: {e}")
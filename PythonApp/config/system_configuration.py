@@ -3,13 +3,22 @@ System Configuration with Thesis-Verified Parameters
 
 This module defines exact configurations that match the thesis documentation
 claims for sampling rates, resolutions, and performance parameters.
+
+Effective values are layered: the dataclass defaults, then an optional site
+file, then a per-session override, then ``MSR_CONFIG__SECTION__KEY``
+environment variables. Runtime keys can be hot-reloaded while recording.
 """
 
+import copy
 import logging
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+import os
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, Union
 from enum import Enum
 
+from .layered_config import ConfigLayer, LayeredConfig, ValueRule
+
 
 class DeviceType(Enum):
     """Supported device types with exact specifications."""
@@ -169,15 +178,62 @@ class DataRecordingConfiguration:
     compression_algorithm: str = "gzip"
 
 
+@dataclass
+class RuntimeConfiguration:
+    """Settings that may be changed while a recording is running."""
+    preview_fps: int = 15
+    log_level: str = "INFO"
+    sample_buffer_size: int = 10000
+    frame_buffer_size: int = 100
+
+
+SITE_CONFIG_ENV = "MSR_SITE_CONFIG"
+ENV_PREFIX = "MSR_CONFIG"
+
+# Keys that are applied immediately on reload, even mid-recording
+HOT_RELOADABLE_KEYS = ("runtime.*",)
+
+CONFIGURATION_RULES = (
+    ValueRule("network.*_port", minimum=1, maximum=65535),
+    ValueRule("network.*_seconds", minimum=0),
+    ValueRule("network.*_ms", minimum=0),
+    ValueRule("network.reconnection_attempts", minimum=0),
+    ValueRule("devices.*.sampling_rate_hz", minimum=0.1, maximum=10000),
+    ValueRule("devices.*.resolution_*", minimum=1),
+    ValueRule("security.tls_version", choices=("TLSv1.2", "TLSv1.3")),
+    ValueRule("security.min_token_length", minimum=16, maximum=4096),
+    ValueRule("security.token_expiry_hours", minimum=1),
+    ValueRule("recording.audio_sample_rate", minimum=8000, maximum=192000),
+    ValueRule("runtime.preview_fps", minimum=1, maximum=60),
+    ValueRule("runtime.log_level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")),
+    ValueRule("runtime.*_buffer_size", minimum=1, maximum=10_000_000),
+)
+
+
 class SystemConfiguration:
-    """Central system configuration manager."""
+    """Central system configuration manager.
+
+    The device, network, security, recording and runtime sections stay plain
+    dataclasses; the layered resolver writes each effective value back onto
+    them, so existing attribute access keeps working. Every layer is validated
+    once when loaded. ``check_for_changes`` (or ``start_watching``) reloads the
+    site and session files; ``runtime.*`` changes are applied and published to
+    subscribers immediately, while other keys are rejected during a recording.
+    ``explain`` and ``diff`` report which layer set each effective value.
+    """
     
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        site_config_path: Optional[Union[str, Path]] = None,
+        session_override: Optional[Union[str, Path, Dict[str, Any]]] = None,
+        environ: Optional[Dict[str, str]] = None,
+    ):
         self.logger = logger or logging.getLogger(__name__)
         self.device_configs = {
-            DeviceType.SHIMMER_GSR_PLUS: ThesisVerifiedConfigurations.SHIMMER_GSR_CONFIG,
-            DeviceType.TOPDON_TC001: ThesisVerifiedConfigurations.THERMAL_CAMERA_CONFIG,
-            DeviceType.ANDROID_RGB_CAMERA: ThesisVerifiedConfigurations.RGB_CAMERA_CONFIG
+            DeviceType.SHIMMER_GSR_PLUS: copy.deepcopy(ThesisVerifiedConfigurations.SHIMMER_GSR_CONFIG),
+            DeviceType.TOPDON_TC001: copy.deepcopy(ThesisVerifiedConfigurations.THERMAL_CAMERA_CONFIG),
+            DeviceType.ANDROID_RGB_CAMERA: copy.deepcopy(ThesisVerifiedConfigurations.RGB_CAMERA_CONFIG)
         }
         self.performance_targets = {
             DeviceType.SHIMMER_GSR_PLUS: ThesisVerifiedConfigurations.SHIMMER_PERFORMANCE,
@@ -187,6 +243,98 @@ class SystemConfiguration:
         self.network = NetworkConfiguration()
         self.security = SecurityConfiguration()
         self.recording = DataRecordingConfiguration()
+        self.runtime = RuntimeConfiguration()
+        
+        environ = os.environ if environ is None else environ
+        self.layers = LayeredConfig(
+            self._section_values(), CONFIGURATION_RULES, HOT_RELOADABLE_KEYS, self.logger
+        )
+        site_config_path = site_config_path or environ.get(SITE_CONFIG_ENV)
+        if site_config_path:
+            self.layers.load_file_layer("site", site_config_path)
+        else:
+            self.layers.set_layer("site", {})
+        self.layers.set_layer("session", {})
+        self.layers.load_env_layer(ENV_PREFIX, environ)
+        self.layers.subscribe(self._apply_value)
+        self.layers.subscribe(self._apply_log_level, "runtime.log_level")
+        if session_override is not None:
+            self.load_session_override(session_override)
+        for key, value in self.layers.as_dict().items():
+            self._apply_value(key, None, value)
+    
+    def _sections(self) -> Dict[str, Any]:
+        sections = {
+            "network": self.network,
+            "security": self.security,
+            "recording": self.recording,
+            "runtime": self.runtime,
+        }
+        for device_type, config in self.device_configs.items():
+            sections[f"devices.{device_type.value}"] = config
+        return sections
+    
+    def _section_values(self) -> Dict[str, Any]:
+        values = {}
+        for prefix, section in self._sections().items():
+            for field_info in fields(section):
+                value = getattr(section, field_info.name)
+                if isinstance(value, Enum):
+                    continue
+                values[f"{prefix}.{field_info.name}"] = copy.deepcopy(value)
+        return values
+    
+    def _apply_value(self, key: str, old: Any, new: Any):
+        prefix, _, name = key.rpartition(".")
+        section = self._sections().get(prefix)
+        if section is not None:
+            setattr(section, name, copy.deepcopy(new))
+    
+    def _apply_log_level(self, key: str, old: Any, new: Any):
+        logging.getLogger().setLevel(new)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get an effective value by dotted key, e.g. ``runtime.preview_fps``."""
+        return self.layers.get(key, default)
+    
+    def subscribe(self, callback: Callable[[str, Any, Any], None], key_pattern: Optional[str] = None) -> Callable[[], None]:
+        """Register ``callback(key, old, new)`` for applied changes; returns an unsubscribe function."""
+        return self.layers.subscribe(callback, key_pattern)
+    
+    def load_session_override(self, override: Union[str, Path, Dict[str, Any]]) -> ConfigLayer:
+        """Apply a per-session override from a JSON file or a nested/dotted dict."""
+        if isinstance(override, dict):
+            return self.layers.set_layer("session", override)
+        return self.layers.load_file_layer("session", override)
+    
+    def clear_session_override(self):
+        self.layers.set_layer("session", {})
+    
+    def set_recording_active(self, active: bool):
+        """While active, reloads only apply hot-reloadable keys; others are rejected."""
+        self.layers.set_recording_active(active)
+    
+    def check_for_changes(self) -> bool:
+        """Reload the site and session files if they changed on disk."""
+        return self.layers.check_for_changes()
+    
+    def start_watching(self, interval: float = 1.0):
+        self.layers.start_watching(interval)
+    
+    def stop_watching(self):
+        self.layers.stop_watching()
+    
+    def explain(self, key: str) -> Dict[str, Any]:
+        """Show the effective value of ``key`` and which layers set it."""
+        return self.layers.explain(key)
+    
+    def diff(self, base_layer: str = "defaults") -> Dict[str, Dict[str, Any]]:
+        """List effective values that differ from ``base_layer``."""
+        return self.layers.diff(base_layer)
+    
+    def get_layer_errors(self) -> Dict[str, List[str]]:
+        """Validation errors found while loading each layer."""
+        return self.layers.errors()
     
     def get_device_config(self, device_type: DeviceType) -> SamplingConfiguration:
         """Get configuration for a specific device type."""
@@ -264,7 +412,8 @@ class SystemConfiguration:
             "performance_targets": {dt.value: targets.__dict__ for dt, targets in self.performance_targets.items()},
             "network": self.network.__dict__,
             "security": self.security.__dict__,
-            "recording": self.recording.__dict__
+            "recording": self.recording.__dict__,
+            "runtime": self.runtime.__dict__
         }
 
 
@@ -1,11 +1,13 @@
-import json
+import asyncio
+import concurrent.futures
 import logging
 import queue
-import socket
 import threading
 import time
+import uuid
 from dataclasses import asdict, dataclass, field
 from enum import Enum
+from types import SimpleNamespace
 from typing import Any, Callable, Dict, List, Optional, Tuple
 import cv2
 import numpy as np
@@ -14,6 +16,12 @@ from calibration_quality_assessment import (
     CalibrationQualityResult,
     PatternType,
 )
+from calibration_transport import (
+    MAX_ATTACHMENT_BYTES,
+    FrameError,
+    FramedConnection,
+    MalformedFrame,
+)
 from real_time_calibration_feedback import MultiCameraCalibrationManager
 class CalibrationPhase(Enum):
     INITIALIZATION = "initialization"
@@ -62,19 +70,33 @@ class CalibrationResponse:
     error_message: Optional[str] = None
     timestamp: float = 0.0
 class CrossDeviceCalibrationCoordinator:
-    def __init__(self, logger=None, coordination_port=8910):
+    def __init__(
+        self,
+        logger=None,
+        coordination_port=8910,
+        host="0.0.0.0",
+        max_pending_frames=32,
+        max_attachment_bytes=MAX_ATTACHMENT_BYTES,
+    ):
         self.logger = logger or logging.getLogger(__name__)
         self.coordination_port = coordination_port
+        self.host = host
+        self.max_pending_frames = max_pending_frames
+        self.max_attachment_bytes = max_attachment_bytes
         self.active_sessions: Dict[str, CalibrationSession] = {}
         self.connected_devices: Dict[str, DeviceCalibrationInfo] = {}
-        self.server_socket: Optional[socket.socket] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server: Optional[asyncio.AbstractServer] = None
         self.server_thread: Optional[threading.Thread] = None
         self.is_running = False
-        self.client_connections: Dict[str, socket.socket] = {}
+        self.client_connections: Dict[str, FramedConnection] = {}
+        self._connections: set = set()
+        self._pending_requests: Dict[str, Dict[str, asyncio.Future]] = {}
         self.quality_assessment = CalibrationQualityAssessment(logger=self.logger)
         self.local_camera_manager = MultiCameraCalibrationManager(logger=self.logger)
         self.session_callbacks: List[Callable[[str, CalibrationPhase], None]] = []
         self.device_callbacks: List[Callable[[DeviceCalibrationInfo], None]] = []
+        self.image_callbacks: List[Callable[[Dict[str, Any], bytes], None]] = []
         self.command_queue = queue.Queue()
         self.response_queue = queue.Queue()
         self.processing_thread: Optional[threading.Thread] = None
@@ -84,16 +106,19 @@ class CrossDeviceCalibrationCoordinator:
             self.logger.info(
                 f"Starting calibration coordination server on port {self.coordination_port}"
             )
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind(("0.0.0.0", self.coordination_port))
-            self.server_socket.listen(10)
+            self.loop = asyncio.new_event_loop()
             self.is_running = True
+            ready = concurrent.futures.Future()
             self.server_thread = threading.Thread(
-                target=self._server_loop, name="CalibrationCoordinator"
+                target=self._run_event_loop, args=(ready,), name="CalibrationCoordinator"
             )
             self.server_thread.daemon = True
             self.server_thread.start()
+            try:
+                ready.result(timeout=10.0)
+            except Exception:
+                self.is_running = False
+                raise
             self.processing_thread = threading.Thread(
                 target=self._processing_loop, name="CalibrationProcessor"
             )
@@ -108,15 +133,13 @@ class CrossDeviceCalibrationCoordinator:
         try:
             self.logger.info("Stopping calibration coordination server")
             self.is_running = False
-            for device_id, client_socket in self.client_connections.items():
+            if self.loop and self.loop.is_running():
                 try:
-                    client_socket.close()
-                except:
-                    pass
+                    asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5.0)
+                except Exception as e:
+                    self.logger.error(f"Error closing client connections: {e}")
+                self.loop.call_soon_threadsafe(self.loop.stop)
             self.client_connections.clear()
-            if self.server_socket:
-                self.server_socket.close()
-                self.server_socket = None
             if self.server_thread and self.server_thread.is_alive():
                 self.server_thread.join(timeout=5.0)
             if self.processing_thread and self.processing_thread.is_alive():
@@ -400,67 +423,95 @@ class CrossDeviceCalibrationCoordinator:
         self.session_callbacks.append(callback)
     def add_device_callback(self, callback: Callable[[DeviceCalibrationInfo], None]):
         self.device_callbacks.append(callback)
-    def _server_loop(self):
+    def add_image_callback(self, callback: Callable[[Dict[str, Any], bytes], None]):
+        self.image_callbacks.append(callback)
+    def _run_event_loop(self, ready: concurrent.futures.Future):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.coordination_port)
+            )
+            self.coordination_port = self.server.sockets[0].getsockname()[1]
+        except Exception as e:
+            ready.set_exception(e)
+            self.loop.close()
+            return
+        ready.set_result(True)
         self.logger.info("Calibration coordination server loop started")
         try:
-            while self.is_running:
-                try:
-                    self.server_socket.settimeout(1.0)
-                    client_socket, client_addr = self.server_socket.accept()
-                    client_thread = threading.Thread(
-                        target=self._handle_client,
-                        args=(client_socket, client_addr),
-                        name=f"CalibrationClient-{client_addr[0]}",
-                    )
-                    client_thread.daemon = True
-                    client_thread.start()
-                except socket.timeout:
-                    continue
-                except socket.error as e:
-                    if self.is_running:
-                        self.logger.error(f"Socket error in server loop: {e}")
-                    break
+            self.loop.run_forever()
         except Exception as e:
             self.logger.error(f"Fatal error in server loop: {e}")
         finally:
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
             self.logger.info("Calibration coordination server loop ended")
-    def _handle_client(
-        self, client_socket: socket.socket, client_addr: Tuple[str, int]
-    ):
+    async def _shutdown(self):
+        if self.server:
+            self.server.close()
+        await asyncio.gather(
+            *(connection.close() for connection in list(self._connections)), return_exceptions=True
+        )
+        for futures in self._pending_requests.values():
+            for future in futures.values():
+                if not future.done():
+                    future.cancel()
+    def _run_coroutine(self, coroutine, timeout: float):
+        if not self.is_running or not self.loop:
+            coroutine.close()
+            raise RuntimeError("Coordination server is not running")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = FramedConnection(
+            reader,
+            writer,
+            max_pending=self.max_pending_frames,
+            max_attachment=self.max_attachment_bytes,
+            logger=self.logger,
+        )
+        client_addr = connection.peername
+        self._connections.add(connection)
         device_id = None
         try:
             while self.is_running:
-                data = client_socket.recv(4096)
-                if not data:
-                    break
                 try:
-                    message = json.loads(data.decode("utf-8"))
-                except json.JSONDecodeError:
-                    self.logger.error(f"Invalid JSON from {client_addr}")
+                    frame = await connection.receive()
+                except MalformedFrame as e:
+                    self.logger.error(f"Invalid frame from {client_addr}: {e}")
                     continue
+                if frame is None:
+                    break
+                message, attachment = frame
                 if message.get("type") == "device_registration":
                     device_id = self._handle_device_registration(
-                        message, client_socket, client_addr
+                        message, connection, client_addr
                     )
                 elif message.get("type") == "calibration_response":
                     self._handle_calibration_response(message)
                 elif message.get("type") == "image_data":
-                    self._handle_image_data(message)
+                    # Decoding runs off the loop; awaiting it keeps the
+                    # images ahead of the response that follows them
+                    await self.loop.run_in_executor(
+                        None, self._handle_image_data, message, attachment
+                    )
+        except FrameError as e:
+            self.logger.error(f"Dropping client {client_addr}: {e}")
         except Exception as e:
             self.logger.error(f"Error handling client {client_addr}: {e}")
         finally:
-            try:
-                client_socket.close()
-                if device_id and device_id in self.client_connections:
-                    del self.client_connections[device_id]
-                    if device_id in self.connected_devices:
-                        self.connected_devices[device_id].status = "disconnected"
-            except:
-                pass
+            self._connections.discard(connection)
+            await connection.close()
+            if device_id and self.client_connections.get(device_id) is connection:
+                del self.client_connections[device_id]
+                if device_id in self.connected_devices:
+                    self.connected_devices[device_id].status = "disconnected"
     def _handle_device_registration(
         self,
         message: Dict[str, Any],
-        client_socket: socket.socket,
+        connection: FramedConnection,
         client_addr: Tuple[str, int],
     ) -> Optional[str]:
         try:
@@ -476,7 +527,7 @@ class CrossDeviceCalibrationCoordinator:
                 last_seen=time.time(),
             )
             self.connected_devices[device_info.device_id] = device_info
-            self.client_connections[device_info.device_id] = client_socket
+            self.client_connections[device_info.device_id] = connection
             self.logger.info(
                 f"Device registered: {device_info.device_name} ({device_info.device_id})"
             )
@@ -500,16 +551,31 @@ class CrossDeviceCalibrationCoordinator:
                 error_message=message.get("error_message"),
                 timestamp=message.get("timestamp", time.time()),
             )
+            future = self._pending_requests.get(message.get("request_id"), {}).get(response.device_id)
+            if future is not None and not future.done():
+                future.set_result(response)
             self.response_queue.put(response)
         except Exception as e:
             self.logger.error(f"Error handling calibration response: {e}")
-    def _handle_image_data(self, message: Dict[str, Any]):
+    def _handle_image_data(self, message: Dict[str, Any], attachment: Optional[bytes] = None):
         try:
-            import base64
-            image_data = base64.b64decode(message["image_data"])
-            image_array = np.frombuffer(image_data, dtype=np.uint8)
-            image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-            quality_data = message.get("quality_result", {})
+            if attachment is None:
+                # Older clients embed the JPEG as base64 in the header
+                import base64
+                attachment = base64.b64decode(message["image_data"])
+            for callback in self.image_callbacks:
+                try:
+                    callback(message, attachment)
+                except Exception as e:
+                    self.logger.error(f"Error in image callback: {e}")
+            image = cv2.imdecode(np.frombuffer(attachment, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                self.logger.error(f"Undecodable image from {message.get('device_id')}")
+                return
+            # Devices report their quality assessment as a plain dictionary
+            quality_data = SimpleNamespace(
+                **{"overall_quality_score": 0.0, **message.get("quality_result", {})}
+            )
             self.add_calibration_image(
                 message["session_id"],
                 message["device_id"],
@@ -551,14 +617,84 @@ class CrossDeviceCalibrationCoordinator:
         self.logger.info(f"Calibration completed on device: {response.device_id}")
     def _broadcast_command(self, command: CalibrationCommand):
         try:
-            command_json = json.dumps(asdict(command))
-            for device_id, client_socket in self.client_connections.items():
-                try:
-                    client_socket.send(command_json.encode("utf-8"))
-                except Exception as e:
-                    self.logger.error(f"Error sending command to {device_id}: {e}")
+            if not self.is_running or not self.loop:
+                return
+            asyncio.run_coroutine_threadsafe(self._send_to_devices(asdict(command)), self.loop)
         except Exception as e:
             self.logger.error(f"Error broadcasting command: {e}")
+    async def _send_to_devices(self, payload: Dict[str, Any]):
+        connections = dict(self.client_connections)
+        results = await asyncio.gather(
+            *(connection.send(payload) for connection in connections.values()),
+            return_exceptions=True,
+        )
+        for device_id, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error sending command to {device_id}: {result}")
+    def request_capture(
+        self,
+        session_id: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        target_device: Optional[str] = None,
+        timeout: float = 10.0,
+    ) -> Optional[Dict[str, Any]]:
+        """Send a capture command to every device at once and collect the replies.
+
+        Returns the responses by device, the devices that failed with their
+        reason, and those that did not answer within ``timeout`` seconds.
+        Images a device sends before its response are already added to the
+        session when this returns.
+        """
+        try:
+            command = CalibrationCommand(
+                command_type="capture_image",
+                session_id=session_id,
+                target_device=target_device,
+                parameters=dict(parameters or {}),
+                timestamp=time.time(),
+            )
+            return self._run_coroutine(self._fan_out(command, timeout), timeout + 5.0)
+        except Exception as e:
+            self.logger.error(f"Error requesting capture: {e}")
+            return None
+    async def _fan_out(self, command: CalibrationCommand, timeout: float) -> Dict[str, Any]:
+        request_id = uuid.uuid4().hex
+        payload = asdict(command)
+        payload["request_id"] = request_id
+        targets = {
+            device_id: connection
+            for device_id, connection in self.client_connections.items()
+            if command.target_device in (None, device_id)
+        }
+        futures = {device_id: self.loop.create_future() for device_id in targets}
+        self._pending_requests[request_id] = futures
+        async def send_and_wait(device_id: str, connection: FramedConnection):
+            await connection.send(payload)
+            return await futures[device_id]
+        try:
+            results = await asyncio.gather(
+                *(
+                    asyncio.wait_for(send_and_wait(device_id, connection), timeout)
+                    for device_id, connection in targets.items()
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            self._pending_requests.pop(request_id, None)
+        summary = {"request_id": request_id, "responses": {}, "failed": {}, "timed_out": []}
+        for device_id, result in zip(targets, results):
+            if isinstance(result, asyncio.TimeoutError):
+                summary["timed_out"].append(device_id)
+            elif isinstance(result, BaseException):
+                summary["failed"][device_id] = str(result) or type(result).__name__
+            else:
+                summary["responses"][device_id] = result
+                if not result.success:
+                    summary["failed"][device_id] = result.error_message or "capture failed"
+        summary["success"] = bool(targets) and not summary["failed"] and not summary["timed_out"]
+        if summary["timed_out"]:
+            self.logger.warning(f"No capture response within {timeout}s from: {summary['timed_out']}")
+        return summary
     def _check_collection_progress(self, session_id: str):
         try:
             session = self.active_sessions[session_id]
@@ -1,12 +1,15 @@
 import json
 import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 from enum import Enum
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Any, Callable, Dict, List, Optional, Tuple
 import cv2
 from ..utils.logging_config import get_logger
+from .recovery_scheduler import BackoffPolicy, RecoveryScheduler
 logger = get_logger(__name__)
 class ErrorSeverity(Enum):
     LOW = "low"
@@ -37,6 +40,7 @@ class CameraResourceManager:
         self.active_cameras: Dict[int, str] = {}
         self.resource_lock = threading.Lock()
         self.recovery_attempts: Dict[int, int] = {}
+        self.probing_cameras = set()
         self.max_recovery_attempts = 3
     def request_camera_access(
         self, camera_index: int, process_name: str = "webcam_capture"
@@ -49,14 +53,24 @@ class CameraResourceManager:
                         False,
                         f"Camera {camera_index} is already in use by {current_user}",
                     )
-                else:
+                elif camera_index not in self.probing_cameras:
                     return True, None
-            success, error = self._test_camera_availability(camera_index)
-            if not success:
-                return False, error
+                else:
+                    return False, f"Camera {camera_index} is still being probed"
             self.active_cameras[camera_index] = process_name
-            print(f"[DEBUG_LOG] Camera {camera_index} reserved for {process_name}")
-            return True, None
+            self.probing_cameras.add(camera_index)
+        success, error = False, None
+        try:
+            success, error = self._test_camera_availability(camera_index)
+        finally:
+            with self.resource_lock:
+                self.probing_cameras.discard(camera_index)
+                if not success and self.active_cameras.get(camera_index) == process_name:
+                    del self.active_cameras[camera_index]
+        if not success:
+            return False, error
+        print(f"[DEBUG_LOG] Camera {camera_index} reserved for {process_name}")
+        return True, None
     def release_camera_access(
         self, camera_index: int, process_name: str = "webcam_capture"
     ):
@@ -94,18 +108,14 @@ class CameraResourceManager:
     def recover_camera_access(
         self, camera_index: int, process_name: str = "webcam_capture"
     ) -> Tuple[bool, Optional[str]]:
-        if camera_index not in self.recovery_attempts:
-            self.recovery_attempts[camera_index] = 0
-        self.recovery_attempts[camera_index] += 1
-        if self.recovery_attempts[camera_index] > self.max_recovery_attempts:
-            return (
-                False,
-                f"Maximum recovery attempts ({self.max_recovery_attempts}) exceeded for camera {camera_index}",
+        with self.resource_lock:
+            self.recovery_attempts[camera_index] = (
+                self.recovery_attempts.get(camera_index, 0) + 1
             )
+            attempt = self.recovery_attempts[camera_index]
         print(
-            f"[DEBUG_LOG] Attempting camera {camera_index} recovery (attempt {self.recovery_attempts[camera_index]})"
+            f"[DEBUG_LOG] Attempting camera {camera_index} recovery (attempt {attempt})"
         )
-        time.sleep(1.0 * self.recovery_attempts[camera_index])
         with self.resource_lock:
             if camera_index in self.active_cameras:
                 old_user = self.active_cameras[camera_index]
@@ -115,7 +125,8 @@ class CameraResourceManager:
                 )
         success, error = self.request_camera_access(camera_index, process_name)
         if success:
-            self.recovery_attempts[camera_index] = 0
+            with self.resource_lock:
+                self.recovery_attempts[camera_index] = 0
             print(f"[DEBUG_LOG] Camera {camera_index} recovery successful")
         return success, error
     def get_camera_status(self) -> Dict[str, Any]:
@@ -132,7 +143,7 @@ class NetworkRecoveryManager:
         self.sync_failures: Dict[str, int] = {}
         self.max_sync_failures = 5
         self.sync_timeout = 10.0
-        self.recovery_lock = threading.Lock()
+        self.recovery_lock = threading.RLock()
     def register_device(self, device_id: str):
         with self.recovery_lock:
             self.connection_status[device_id] = False
@@ -179,8 +190,6 @@ class NetworkRecoveryManager:
         print(
             f"[DEBUG_LOG] Attempting sync recovery with {device_id} (failure count: {failure_count})"
         )
-        delay = min(2.0**failure_count, 30.0)
-        time.sleep(delay)
         try:
             start_time = time.time()
             result = sync_function(*args, **kwargs)
@@ -212,26 +221,45 @@ class NetworkRecoveryManager:
                 }
             return status
 class ErrorRecoveryManager:
-    def __init__(self):
+    def __init__(self, scheduler: Optional[RecoveryScheduler] = None):
         self.camera_manager = CameraResourceManager()
         self.network_manager = NetworkRecoveryManager()
+        self.scheduler = scheduler or RecoveryScheduler()
         self.error_history: List[ErrorEvent] = []
         self.recovery_strategies: Dict[ErrorCategory, Callable] = {}
+        self.recovery_policies: Dict[ErrorCategory, BackoffPolicy] = {}
+        self.history_lock = threading.Lock()
         self.max_history_size = 1000
         self._register_default_strategies()
     def _register_default_strategies(self):
         self.recovery_strategies[ErrorCategory.CAMERA_RESOURCE] = (
             self._recover_camera_resource
         )
+        self.recovery_policies[ErrorCategory.CAMERA_RESOURCE] = BackoffPolicy(
+            base_delay=1.0,
+            max_attempts=self.camera_manager.max_recovery_attempts,
+            timeout=10.0,
+        )
         self.recovery_strategies[ErrorCategory.NETWORK_SYNCHRONIZATION] = (
             self._recover_network_sync
         )
+        self.recovery_policies[ErrorCategory.NETWORK_SYNCHRONIZATION] = BackoffPolicy(
+            base_delay=1.0,
+            max_attempts=self.network_manager.max_sync_failures,
+            timeout=self.network_manager.sync_timeout,
+        )
         self.recovery_strategies[ErrorCategory.CODEC_ENCODING] = (
             self._recover_codec_encoding
         )
+        self.recovery_policies[ErrorCategory.CODEC_ENCODING] = BackoffPolicy(
+            max_attempts=1, timeout=30.0
+        )
         self.recovery_strategies[ErrorCategory.CAMERA_HARDWARE] = (
             self._recover_camera_hardware
         )
+        self.recovery_policies[ErrorCategory.CAMERA_HARDWARE] = BackoffPolicy(
+            base_delay=2.0, max_attempts=2, timeout=30.0
+        )
     def classify_error(
         self, error_message: str, context: Dict[str, Any] = None
     ) -> Tuple[ErrorCategory, ErrorSeverity]:
@@ -282,6 +310,36 @@ class ErrorRecoveryManager:
         context: Dict[str, Any] = None,
         auto_recover: bool = True,
     ) -> Tuple[bool, Optional[str]]:
+        """Blocking variant of ``handle_error_async`` limited to one attempt.
+
+        Backoff retries are only scheduled by ``handle_error_async``. The wait
+        here is bounded by the category's attempt timeout; if another caller
+        already has a retry schedule pending for the same resource and it has
+        not finished by then, recovery is reported as still in progress.
+        """
+        future, timeout = self._submit_recovery(
+            error_message, context, auto_recover, None, single_attempt=True
+        )
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return False, "Recovery still in progress"
+    def handle_error_async(
+        self,
+        error_message: str,
+        context: Dict[str, Any] = None,
+        auto_recover: bool = True,
+        callback: Optional[Callable[[Tuple[bool, Optional[str]]], None]] = None,
+    ) -> Future:
+        return self._submit_recovery(error_message, context, auto_recover, callback)[0]
+    def _submit_recovery(
+        self,
+        error_message: str,
+        context: Optional[Dict[str, Any]],
+        auto_recover: bool,
+        callback: Optional[Callable[[Tuple[bool, Optional[str]]], None]],
+        single_attempt: bool = False,
+    ) -> Tuple[Future, Optional[float]]:
         category, severity = self.classify_error(error_message, context)
         error_event = ErrorEvent(
             timestamp=datetime.now(),
@@ -296,21 +354,37 @@ class ErrorRecoveryManager:
         )
         if auto_recover and category in self.recovery_strategies:
             error_event.recovery_attempted = True
-            try:
-                recovery_func = self.recovery_strategies[category]
-                success, message = recovery_func(error_event)
-                error_event.recovery_successful = success
-                if success:
-                    print(f"[DEBUG_LOG] Error recovery successful: {message}")
+            recovery_func = self.recovery_strategies[category]
+            policy = self.recovery_policies.get(category) or self.scheduler.default_policy
+            if single_attempt:
+                policy = replace(policy, max_attempts=1)
+            def on_complete(result: Tuple[bool, Optional[str]]):
+                error_event.recovery_successful = result[0]
+                if result[0]:
+                    print(f"[DEBUG_LOG] Error recovery successful: {result[1]}")
                 else:
-                    print(f"[DEBUG_LOG] Error recovery failed: {message}")
-                return success, message
-            except Exception as e:
-                error_event.recovery_successful = False
-                recovery_message = f"Recovery strategy failed: {str(e)}"
-                print(f"[DEBUG_LOG] {recovery_message}")
-                return False, recovery_message
-        return False, "No recovery strategy available"
+                    print(f"[DEBUG_LOG] Error recovery failed: {result[1]}")
+                if callback:
+                    callback(result)
+            future = self.scheduler.submit(
+                self._resource_key(category, error_event.details),
+                lambda: recovery_func(error_event),
+                policy=policy,
+                callback=on_complete,
+            )
+            return future, policy.timeout
+        result = (False, "No recovery strategy available")
+        future: Future = Future()
+        future.set_result(result)
+        if callback:
+            callback(result)
+        return future, None
+    @staticmethod
+    def _resource_key(category: ErrorCategory, details: Dict[str, Any]) -> str:
+        for key in ("camera_index", "device_id", "codec", "resource"):
+            if key in details:
+                return f"{category.value}:{details[key]}"
+        return category.value
     def _recover_camera_resource(self, error_event: ErrorEvent) -> Tuple[bool, str]:
         context = error_event.details
         camera_index = context.get("camera_index", 0)
@@ -355,9 +429,10 @@ class ErrorRecoveryManager:
                     return (True, f"Alternative camera found at index {alt_index}")
         return False, "No alternative camera hardware found"
     def _add_to_history(self, error_event: ErrorEvent):
-        self.error_history.append(error_event)
-        if len(self.error_history) > self.max_history_size:
-            self.error_history = self.error_history[-self.max_history_size :]
+        with self.history_lock:
+            self.error_history.append(error_event)
+            if len(self.error_history) > self.max_history_size:
+                self.error_history = self.error_history[-self.max_history_size :]
     def get_error_statistics(self) -> Dict[str, Any]:
         if not self.error_history:
             return {"total_errors": 0}
@@ -394,11 +469,17 @@ class ErrorRecoveryManager:
             "recovery_rate_percent": recovery_rate,
             "camera_status": self.camera_manager.get_camera_status(),
             "network_status": self.network_manager.get_sync_status(),
+            "scheduler_status": self.scheduler.get_status(),
         }
     def register_recovery_strategy(
-        self, category: ErrorCategory, strategy_func: Callable
+        self,
+        category: ErrorCategory,
+        strategy_func: Callable,
+        policy: Optional[BackoffPolicy] = None,
     ):
         self.recovery_strategies[category] = strategy_func
+        if policy is not None:
+            self.recovery_policies[category] = policy
         print(f"[DEBUG_LOG] Custom recovery strategy registered for {category.value}")
 error_recovery_manager = ErrorRecoveryManager()
 def handle_error_with_recovery(
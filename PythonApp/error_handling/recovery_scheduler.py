@@ -0,0 +1,322 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+RecoveryResult = Tuple[bool, Optional[str]]
+class MonotonicClock:
+    def now(self) -> float:
+        return time.monotonic()
+class FakeClock:
+    """Manually advanced clock for driving the scheduler deterministically."""
+    def __init__(self, start: float = 0.0):
+        self._now = start
+    def now(self) -> float:
+        return self._now
+    def advance(self, seconds: float):
+        self._now += seconds
+class InlineExecutor:
+    """Runs submitted attempts on the calling thread (used with ``FakeClock``)."""
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+    def shutdown(self, wait: bool = True):
+        pass
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+class CircuitBreaker:
+    def __init__(self, clock, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.clock = clock
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+    def allow(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if self.clock.now() - self.opened_at >= self.reset_timeout:
+                self.state = CircuitState.HALF_OPEN
+                return True
+            return False
+        return True
+    def record_success(self):
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = None
+    def record_failure(self):
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                self.trips += 1
+            self.state = CircuitState.OPEN
+            self.opened_at = self.clock.now()
+    def retry_at(self) -> Optional[float]:
+        if self.state != CircuitState.OPEN:
+            return None
+        return self.opened_at + self.reset_timeout
+@dataclass
+class BackoffPolicy:
+    base_delay: float = 0.5
+    factor: float = 2.0
+    max_delay: float = 30.0
+    jitter: float = 0.2
+    max_attempts: int = 5
+    timeout: Optional[float] = 10.0
+    def delay(self, attempt: int, rng: random.Random) -> float:
+        delay = min(self.base_delay * self.factor ** max(attempt - 1, 0), self.max_delay)
+        if self.jitter:
+            delay *= 1.0 + rng.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+@dataclass
+class RecoveryTask:
+    resource: str
+    action: Callable[[], Any]
+    policy: BackoffPolicy
+    future: Future
+    attempts: int = 0
+    last_message: Optional[str] = None
+    running: bool = False
+    generation: int = 0
+    callbacks: List[Callable[[RecoveryResult], None]] = field(default_factory=list)
+class RecoveryScheduler:
+    """Runs recovery attempts off the caller's thread.
+
+    A single scheduler thread owns a heap of deadlines. Each due attempt is
+    handed to a small executor, so a hung probe cannot stall other resources;
+    attempts that exceed their policy timeout count as failures. Failures are
+    retried with jittered exponential backoff and feed a per-resource circuit
+    breaker, and while a breaker is open new requests for that resource fail
+    fast. Requests for a resource that already has a pending task share its
+    future. Passing a ``FakeClock`` with ``start_worker=False`` lets tests call
+    ``run_due`` to drive everything deterministically.
+    """
+    def __init__(
+        self,
+        clock=None,
+        executor=None,
+        default_policy: Optional[BackoffPolicy] = None,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        max_workers: int = 2,
+        rng: Optional[random.Random] = None,
+        start_worker: bool = True,
+    ):
+        self.clock = clock or MonotonicClock()
+        self.default_policy = default_policy or BackoffPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rng = rng or random.Random()
+        self._executor = executor
+        self._max_workers = max_workers
+        self._start_worker = start_worker
+        self._heap: List[Tuple[float, int, str, RecoveryTask, int]] = []
+        self._sequence = itertools.count()
+        self._tasks: Dict[str, RecoveryTask] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._running = False
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+    def breaker(self, resource: str) -> CircuitBreaker:
+        with self._condition:
+            return self._breaker(resource)
+    def submit(
+        self,
+        resource: str,
+        action: Callable[[], Any],
+        policy: Optional[BackoffPolicy] = None,
+        delay: float = 0.0,
+        callback: Optional[Callable[[RecoveryResult], None]] = None,
+    ) -> Future:
+        with self._condition:
+            task = self._tasks.get(resource)
+            if task is not None:
+                if callback:
+                    task.callbacks.append(callback)
+                return task.future
+            breaker = self._breaker(resource)
+            if not breaker.allow():
+                self.rejected += 1
+                future: Future = Future()
+                result = (False, f"Recovery circuit open for {resource}")
+                future.set_result(result)
+                if callback:
+                    self._invoke_callback(callback, result)
+                return future
+            task = RecoveryTask(resource, action, policy or self.default_policy, Future())
+            if callback:
+                task.callbacks.append(callback)
+            self._tasks[resource] = task
+            self._push(self.clock.now() + delay, "attempt", task)
+            self._ensure_worker()
+            self._condition.notify()
+            return task.future
+    def run_due(self) -> int:
+        processed = 0
+        while True:
+            with self._condition:
+                entry = self._pop_due()
+            if entry is None:
+                return processed
+            self._dispatch(entry)
+            processed += 1
+    def next_deadline(self) -> Optional[float]:
+        with self._condition:
+            return self._heap[0][0] if self._heap else None
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._tasks)
+    def get_status(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "pending": sorted(self._tasks),
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "breakers": {
+                    resource: {
+                        "state": breaker.state.value,
+                        "failures": breaker.failures,
+                        "trips": breaker.trips,
+                    }
+                    for resource, breaker in self._breakers.items()
+                },
+            }
+    def shutdown(self, wait: bool = True):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            worker = self._worker
+        if worker is not None and wait:
+            worker.join(timeout=5.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+    def _breaker(self, resource: str) -> CircuitBreaker:
+        breaker = self._breakers.get(resource)
+        if breaker is None:
+            breaker = CircuitBreaker(self.clock, self.failure_threshold, self.reset_timeout)
+            self._breakers[resource] = breaker
+        return breaker
+    def _push(self, due: float, kind: str, task: RecoveryTask):
+        heapq.heappush(self._heap, (due, next(self._sequence), kind, task, task.generation))
+    def _pop_due(self):
+        while self._heap and self._heap[0][0] <= self.clock.now():
+            due, _, kind, task, generation = heapq.heappop(self._heap)
+            if self._tasks.get(task.resource) is task and generation == task.generation:
+                return kind, task
+        return None
+    def _ensure_worker(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="RecoveryAttempt"
+            )
+        if not self._start_worker or (self._worker and self._worker.is_alive()):
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="RecoveryScheduler", daemon=True)
+        self._worker.start()
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                entry = self._pop_due()
+                if entry is None:
+                    timeout = self._heap[0][0] - self.clock.now() if self._heap else None
+                    self._condition.wait(timeout)
+                    continue
+            self._dispatch(entry)
+    def _dispatch(self, entry: Tuple[str, RecoveryTask]):
+        kind, task = entry
+        if kind == "timeout":
+            with self._condition:
+                if not task.running:
+                    return
+                self.timeouts += 1
+                task.generation += 1
+                task.running = False
+            self._attempt_finished(task, False, "Recovery attempt timed out")
+            return
+        with self._condition:
+            task.attempts += 1
+            task.running = True
+            generation = task.generation
+            started = self.clock.now()
+            if task.policy.timeout:
+                self._push(started + task.policy.timeout, "timeout", task)
+        future = self._executor.submit(task.action)
+        future.add_done_callback(
+            lambda done: self._on_attempt_done(task, generation, started, done)
+        )
+    def _on_attempt_done(self, task: RecoveryTask, generation: int, started: float, done: Future):
+        with self._condition:
+            if task.generation != generation or not task.running:
+                return
+            task.running = False
+            task.generation += 1
+            timed_out = (
+                task.policy.timeout is not None
+                and self.clock.now() - started > task.policy.timeout
+            )
+            if timed_out:
+                self.timeouts += 1
+        if timed_out:
+            self._attempt_finished(task, False, "Recovery attempt timed out")
+            return
+        try:
+            success, message = _normalise_result(done.result())
+        except Exception as e:
+            success, message = False, f"Recovery attempt failed: {e}"
+        self._attempt_finished(task, success, message)
+    def _attempt_finished(self, task: RecoveryTask, success: bool, message: Optional[str]):
+        with self._condition:
+            breaker = self._breaker(task.resource)
+            task.last_message = message
+            if success:
+                breaker.record_success()
+                result = (True, message)
+                self.completed += 1
+            else:
+                breaker.record_failure()
+                if task.attempts < task.policy.max_attempts and breaker.state != CircuitState.OPEN:
+                    delay = task.policy.delay(task.attempts, self.rng)
+                    logger.debug(
+                        f"Recovery of {task.resource} failed (attempt {task.attempts}), retrying in {delay:.2f}s"
+                    )
+                    self._push(self.clock.now() + delay, "attempt", task)
+                    self._condition.notify()
+                    return
+                self.failed += 1
+                result = (False, message)
+            del self._tasks[task.resource]
+            callbacks = list(task.callbacks)
+        task.future.set_result(result)
+        for callback in callbacks:
+            self._invoke_callback(callback, result)
+    @staticmethod
+    def _invoke_callback(callback, result: RecoveryResult):
+        try:
+            callback(result)
+        except Exception as e:
+            logger.error(f"Error in recovery callback: {e}")
+def _normalise_result(value: Any) -> RecoveryResult:
+    if isinstance(value, tuple) and len(value) == 2:
+        return bool(value[0]), value[1]
+    return bool(value), None
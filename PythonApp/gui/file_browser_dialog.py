@@ -24,9 +24,13 @@ from PyQt5.QtWidgets import (
     QTreeView,
     QVBoxLayout,
 )
+from .preview_service import DirectoryLister, FilePreviewService
 class FilePreviewWidget(QFrame):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, preview_service: Optional[FilePreviewService] = None):
         super().__init__(parent)
+        self.preview_service = preview_service or FilePreviewService(parent=self)
+        self.preview_service.preview_ready.connect(self.on_preview_ready)
+        self.current_request = None
         self.setFrameStyle(QFrame.StyledPanel)
         self.setMinimumSize(400, 300)
         layout = QVBoxLayout(self)
@@ -36,6 +40,7 @@ class FilePreviewWidget(QFrame):
         self.preview_label = QLabel("Select a file to preview")
         self.preview_label.setAlignment(Qt.AlignCenter)
         self.preview_label.setStyleSheet(
+            "QLabel { color: #666; font-style: italic; }"
         )
         self.preview_scroll.setWidget(self.preview_label)
         layout.addWidget(self.preview_scroll)
@@ -49,51 +54,60 @@ class FilePreviewWidget(QFrame):
         self.current_file_path = None
     def preview_file(self, file_path: str):
         self.current_file_path = file_path
-        if not os.path.exists(file_path):
-            self.show_error("File not found")
+        self.info_text.setText(f"Name: {os.path.basename(file_path)}\nPath: {file_path}\n")
+        self.show_loading(file_path)
+        self.current_request = self.preview_service.request(file_path)
+    def on_preview_ready(self, request_id: int, file_path: str, result: dict):
+        if request_id != self.current_request:
             return
-        file_info = QFileInfo(file_path)
-        file_size = file_info.size()
-        file_suffix = file_info.suffix().lower()
+        self.current_request = None
+        self.show_file_info(file_path, result)
+        kind = result.get("kind")
+        if kind == "image":
+            self.show_image(result["image"])
+        elif kind == "video":
+            self.preview_video(file_path, result)
+        elif kind == "text":
+            self.preview_text(result)
+        elif kind == "error":
+            self.show_error(result.get("error", "Preview failed"))
+        else:
+            self.preview_unsupported(file_path, os.path.splitext(file_path)[1].lstrip(".") or "unknown")
+    def show_file_info(self, file_path: str, result: dict):
+        suffix = os.path.splitext(file_path)[1].lstrip(".").upper()
+        modified = datetime.fromtimestamp(result["mtime"]).strftime("%Y-%m-%d %H:%M:%S") if "mtime" in result else "Unknown"
         info_text = f"""
-Name: {file_info.fileName()}
-Size: {self.format_file_size(file_size)}
-Type: {file_suffix.upper() if file_suffix else 'Unknown'}
-Modified: {file_info.lastModified().toString(Qt.DefaultLocaleLongDate)}
+Name: {os.path.basename(file_path)}
+Size: {self.format_file_size(result.get("size", 0))}
+Type: {suffix if suffix else 'Unknown'}
+Modified: {modified}
 Path: {file_path}
 """
+        if result.get("duration_s"):
+            info_text += f"Video: {result.get('width')}x{result.get('height')}, {result['fps']:.1f} fps, {result['duration_s']:.1f} s\n"
         self.info_text.setText(info_text)
-        
-        try:
-            pixmap = QPixmap(file_path)
-            if not pixmap.isNull():
-
-                scaled_pixmap = pixmap.scaled(
-                    600, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                )
-                self.preview_label.setPixmap(scaled_pixmap)
-                self.preview_label.setText("")
-            else:
-                self.show_error("Cannot load image")
-        except Exception as e:
-            self.show_error(f"Error loading image: {str(e)}")
-
-    def preview_text(self, file_path: str):
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read(5000)
-                if len(content) == 5000:
-                    content += "\n\n... (file truncated for preview)"
-
-            self.preview_label.setPixmap(QPixmap())
-            self.preview_label.setText(content)
-            self.preview_label.setFont(QFont("Courier", 9))
-            self.preview_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-            self.preview_label.setWordWrap(True)
-        except Exception as e:
-            self.show_error(f"Error reading text file: {str(e)}")
-
-    def preview_video(self, file_path: str):
+    def show_loading(self, file_path: str):
+        self.preview_label.setPixmap(QPixmap())
+        self.preview_label.setText(f"Loading preview of {os.path.basename(file_path)}...")
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.setStyleSheet("QLabel { color: #666; font-style: italic; }")
+    def show_image(self, image):
+        self.preview_label.setStyleSheet("")
+        self.preview_label.setPixmap(QPixmap.fromImage(image))
+        self.preview_label.setText("")
+        self.preview_label.setAlignment(Qt.AlignCenter)
+    def preview_text(self, result: dict):
+        content = result.get("text", "")
+        self.preview_label.setStyleSheet("")
+        self.preview_label.setPixmap(QPixmap())
+        self.preview_label.setText(content)
+        self.preview_label.setFont(QFont("Courier", 9))
+        self.preview_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.preview_label.setWordWrap(True)
+    def preview_video(self, file_path: str, result: dict):
+        if result.get("image") is not None:
+            self.show_image(result["image"])
+            return
         self.preview_label.setPixmap(QPixmap())
         self.preview_label.setText(
             f"""
@@ -103,7 +117,6 @@ Click 'Open' to play with external application
 or use the playback page for detailed analysis.
 """
         )
-
     def preview_unsupported(self, file_path: str, file_type: str):
         self.preview_label.setPixmap(QPixmap())
         self.preview_label.setText(
@@ -123,6 +136,9 @@ Click 'Open' to open with external application.
         self.preview_label.setStyleSheet("QLabel { color: #d32f2f; }")
 
     def clear_preview(self):
+        if self.current_request is not None:
+            self.preview_service.cancel(self.current_request)
+            self.current_request = None
         self.preview_label.setPixmap(QPixmap())
         self.preview_label.setText("Select a file to preview")
         self.preview_label.setAlignment(Qt.AlignCenter)
@@ -153,6 +169,8 @@ class FileBrowserDialog(QDialog):
             os.makedirs(self.recordings_path, exist_ok=True)
         self.current_path = self.recordings_path
         self.selected_file = None
+        self.directory_lister: Optional[DirectoryLister] = None
+        self.dir_rows = 0
         self.setup_ui()
         self.load_directory(self.current_path)
     def setup_ui(self):
@@ -207,7 +225,7 @@ class FileBrowserDialog(QDialog):
         splitter.setSizes([400, 600])
         layout.addWidget(splitter)
         self.status_label = QLabel("Ready")
-        self.status_label.setStyleSheet("QLabel { colour: #666; padding: 5px; }")
+        self.status_label.setStyleSheet("QLabel { color: #666; padding: 5px; }")
         layout.addWidget(self.status_label)
         button_layout = QHBoxLayout()
         self.open_btn = QPushButton("Open")
@@ -228,49 +246,62 @@ class FileBrowserDialog(QDialog):
         button_layout.addWidget(self.close_btn)
         layout.addLayout(button_layout)
     def load_directory(self, path: str):
-        try:
-            self.current_path = path
-            self.path_label.setText(path)
-            self.file_list.clear()
-            self.preview_widget.clear_preview()
-            if not os.path.exists(path):
-                self.status_label.setText(f"Directory does not exist: {path}")
-                return
-            items = []
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    list_item = QListWidgetItem(f"[FOLDER] {item}")
-                    list_item.setData(Qt.UserRole, item_path)
-                    list_item.setData(Qt.UserRole + 1, "directory")
-                    items.append(list_item)
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isfile(item_path):
-                    file_info = QFileInfo(item_path)
-                    file_size = self.preview_widget.format_file_size(file_info.size())
-                    modified = file_info.lastModified().toString("yyyy-MM-dd hh:mm")
-                    icon = self.get_file_icon(file_info.suffix().lower())
-                    list_item = QListWidgetItem(
-                        f"{icon} {item} ({file_size}, {modified})"
-                    )
-                    list_item.setData(Qt.UserRole, item_path)
-                    list_item.setData(Qt.UserRole + 1, "file")
-                    items.append(list_item)
-            for item in items:
-                self.file_list.addItem(item)
-            dir_count = sum(
-                1 for item in items if item.data(Qt.UserRole + 1) == "directory"
-            )
-            file_count = sum(
-                1 for item in items if item.data(Qt.UserRole + 1) == "file"
-            )
-            self.status_label.setText(f"{dir_count} folders, {file_count} files")
-            self.back_btn.setEnabled(len(self.get_parent_directory(path)) > 0)
-            self.up_btn.setEnabled(path != self.recordings_path)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to load directory: {str(e)}")
-            self.status_label.setText(f"Error: {str(e)}")
+        self.stop_directory_listing()
+        self.current_path = path
+        self.path_label.setText(path)
+        self.file_list.clear()
+        self.dir_rows = 0
+        self.selected_file = None
+        self.preview_widget.clear_preview()
+        if not os.path.exists(path):
+            self.status_label.setText(f"Directory does not exist: {path}")
+            return
+        self.status_label.setText("Loading...")
+        self.back_btn.setEnabled(len(self.get_parent_directory(path)) > 0)
+        self.up_btn.setEnabled(path != self.recordings_path)
+        self.directory_lister = DirectoryLister(path, parent=self)
+        self.directory_lister.entries_ready.connect(self.add_directory_entries)
+        self.directory_lister.listing_finished.connect(self.on_listing_finished)
+        self.directory_lister.listing_failed.connect(self.on_listing_failed)
+        self.directory_lister.start()
+    def add_directory_entries(self, entries: List[dict]):
+        if self.sender() is not self.directory_lister:
+            return
+        search_text = self.search_box.text().lower()
+        for entry in entries:
+            if entry["is_dir"]:
+                list_item = QListWidgetItem(f"[FOLDER] {entry['name']}")
+                list_item.setData(Qt.UserRole + 1, "directory")
+                self.file_list.insertItem(self.dir_rows, list_item)
+                self.dir_rows += 1
+            else:
+                file_size = self.preview_widget.format_file_size(entry["size"])
+                modified = datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M")
+                icon = self.get_file_icon(os.path.splitext(entry["name"])[1].lower().lstrip("."))
+                list_item = QListWidgetItem(f"{icon} {entry['name']} ({file_size}, {modified})")
+                list_item.setData(Qt.UserRole + 1, "file")
+                self.file_list.addItem(list_item)
+            list_item.setData(Qt.UserRole, entry["path"])
+            list_item.setHidden(search_text not in list_item.text().lower())
+    def on_listing_finished(self, dir_count: int, file_count: int):
+        if self.sender() is not self.directory_lister:
+            return
+        self.status_label.setText(f"{dir_count} folders, {file_count} files")
+    def on_listing_failed(self, error: str):
+        if self.sender() is not self.directory_lister:
+            return
+        QMessageBox.warning(self, "Error", f"Failed to load directory: {error}")
+        self.status_label.setText(f"Error: {error}")
+    def stop_directory_listing(self):
+        if self.directory_lister is not None:
+            self.directory_lister.requestInterruption()
+            self.directory_lister.wait(2000)
+            self.directory_lister.deleteLater()
+            self.directory_lister = None
+    def done(self, result):
+        self.stop_directory_listing()
+        self.preview_widget.preview_service.shutdown()
+        super().done(result)
     def get_file_icon(self, extension: str) -> str:
         icons = {
             "jpg": "[IMAGE]",
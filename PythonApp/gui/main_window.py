@@ -31,29 +31,20 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
-try:
-    from bucika_gsr.network.device_server import JsonSocketServer
-except ImportError:
-    try:
-        from ..network.device_server import JsonSocketServer
-    except ImportError:
-        JsonSocketServer = None
+from ..utils.lazy_import import LazyAttributes
 
-try:
-    from bucika_gsr.session.session_manager import SessionManager
-except ImportError:
-    try:
-        from ..session.session_manager import SessionManager
-    except ImportError:
-        SessionManager = None
+# Backend services pull in OpenCV, NumPy and the network stack; they are
+# resolved on first use (PEP 562) so the window shell can be shown first.
+BACKENDS = LazyAttributes({
+    "JsonSocketServer": (("bucika_gsr.network.device_server", None), ("..network.device_server", __package__)),
+    "SessionManager": (("bucika_gsr.session.session_manager", None), ("..session.session_manager", __package__)),
+    "WebcamCapture": (("bucika_gsr.webcam.webcam_capture", None), ("..webcam.webcam_capture", __package__)),
+})
+
+
+def __getattr__(name):
+    return BACKENDS.getattr(__name__, name)
 
-try:
-    from bucika_gsr.webcam.webcam_capture import WebcamCapture
-except ImportError:
-    try:
-        from ..webcam.webcam_capture import WebcamCapture
-    except ImportError:
-        WebcamCapture = None
 
 try:
     from .device_panel import DeviceStatusPanel
@@ -150,22 +141,25 @@ class MainWindow(QMainWindow):
     # Signals
     session_started = pyqtSignal(str)
     session_stopped = pyqtSignal()
+    post_session_job_event = pyqtSignal(object)
     device_connected = pyqtSignal(str)
     device_disconnected = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, defer_backends=False):
         super().__init__()
         self.setWindowTitle("Multi-Sensor Recording System Controller")
         self.setGeometry(100, 100, 1400, 900)
         
-        # Initialize core components with error handling
-        self.json_server = JsonSocketServer() if JsonSocketServer else None
+        # Backend components are created by init_backends(); with
+        # defer_backends the caller does that once their modules are loaded
+        self.json_server = None
         self.server_running = False
-        self.webcam_capture = WebcamCapture() if WebcamCapture else None
+        self.webcam_capture = None
         self.webcam_previewing = False
         self.webcam_recording = False
-        self.session_manager = SessionManager() if SessionManager else None
+        self.session_manager = None
         self.current_session_id = None
+        self.backends_ready = False
         
         # Initialize stimulus controller
         try:
@@ -189,9 +183,27 @@ class MainWindow(QMainWindow):
         
         # Initialize UI
         self.init_ui()
-        self.connect_signals()
         self.init_placeholder_data()
         self.setup_demo_preview_simulation()
+        if not defer_backends:
+            self.init_backends()
+    
+    def init_backends(self):
+        """Create the server, webcam and session components and connect them."""
+        if self.backends_ready:
+            return
+        for attribute, name in (
+            ("json_server", "JsonSocketServer"),
+            ("webcam_capture", "WebcamCapture"),
+            ("session_manager", "SessionManager"),
+        ):
+            component_class = BACKENDS.resolve(name)
+            try:
+                setattr(self, attribute, component_class() if component_class else None)
+            except Exception as e:
+                logger.warning(f"Could not initialize {name}: {e}")
+        self.connect_signals()
+        self.backends_ready = True
     
     def init_ui(self):
         """Initialize the user interface."""
@@ -604,6 +616,28 @@ class MainWindow(QMainWindow):
                 pass
             except Exception as e:
                 logger.warning(f"Could not connect webcam signals: {e}")
+        
+        if self.session_manager and hasattr(self.session_manager, "subscribe_post_session_events"):
+            # Job events arrive on the runner's dispatcher thread; the signal
+            # queues them onto the GUI thread
+            self.post_session_job_event.connect(self.on_post_session_job_event)
+            self.session_manager.subscribe_post_session_events(self.post_session_job_event.emit)
+    
+    def on_post_session_job_event(self, event):
+        """Show post-session job progress in the log and status bar."""
+        label = f"{event['job_type']} #{event['job_id']}"
+        if event["state"] == "running":
+            self.statusBar().showMessage(
+                f"{label}: {event['progress'] * 100:.0f}% {event['message'] or ''}", 3000
+            )
+        else:
+            self.add_log_message("Processing", f"{label} ({event['session_id']}): {event['state']} - {event['message']}")
+    
+    def closeEvent(self, event):
+        """Stop post-session workers; queued jobs resume on the next start."""
+        if self.session_manager and hasattr(self.session_manager, "shutdown_post_session_jobs"):
+            self.session_manager.shutdown_post_session_jobs()
+        super().closeEvent(event)
     
     def setup_demo_preview_simulation(self):
         """Set up demo simulation for preview functionality."""
@@ -0,0 +1,313 @@
+import hashlib
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from PyQt5.QtCore import QObject, QRunnable, QSize, QStandardPaths, Qt, QThread, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "bmp", "tiff"}
+VIDEO_EXTENSIONS = {"mp4", "avi", "mov", "mkv", "wmv"}
+TEXT_EXTENSIONS = {"txt", "log", "json", "xml", "csv", "md", "py", "ini", "yaml", "yml"}
+def preview_kind(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in IMAGE_EXTENSIONS:
+        return "image"
+    if extension in VIDEO_EXTENSIONS:
+        return "video"
+    if extension in TEXT_EXTENSIONS:
+        return "text"
+    return "unsupported"
+def default_thumbnail_dir() -> Path:
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    return Path(base or Path.home() / ".cache") / "bucika_gsr" / "thumbnails"
+def read_text_preview(path: str, head_bytes: int = 4096, tail_bytes: int = 2048) -> Dict[str, Any]:
+    """Head and tail of a text file through ``mmap``; never reads the middle."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return {"text": "", "truncated": False, "size": 0}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if size <= head_bytes + tail_bytes:
+                return {"text": mapped[:].decode("utf-8", errors="replace"), "truncated": False, "size": size}
+            head = mapped[:head_bytes]
+            tail = mapped[size - tail_bytes:]
+    head = head[:head.rfind(b"\n") + 1] or head
+    newline = tail.find(b"\n")
+    tail = tail[newline + 1:] if 0 <= newline < len(tail) - 1 else tail
+    skipped = size - len(head) - len(tail)
+    text = (
+        head.decode("utf-8", errors="replace")
+        + f"\n... ({skipped} bytes not shown) ...\n\n"
+        + tail.decode("utf-8", errors="replace")
+    )
+    return {"text": text, "truncated": True, "size": size}
+def decode_image_thumbnail(path: str, max_size: QSize) -> Optional[QImage]:
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > max_size.width() or size.height() > max_size.height()):
+        reader.setScaledSize(size.scaled(max_size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > max_size.width() or image.height() > max_size.height():
+        image = image.scaled(max_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+def decode_video_frame(path: str, max_size: QSize, position: float = 0.1) -> Dict[str, Any]:
+    """Seek once to ``position`` of the video and decode a single frame."""
+    if not CV2_AVAILABLE:
+        return {"image": None, "error": "OpenCV not available"}
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            return {"image": None, "error": "Cannot open video"}
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        if frame_count > 1:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, int(frame_count * position))
+        ok, frame = capture.read()
+        info = {
+            "frame_count": frame_count,
+            "fps": fps,
+            "duration_s": frame_count / fps if fps else None,
+        }
+        if not ok or frame is None:
+            return {"image": None, "error": "Cannot decode frame", **info}
+        height, width = frame.shape[:2]
+        info["width"], info["height"] = width, height
+        scale = min(max_size.width() / width, max_size.height() / height, 1.0)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image = QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0], QImage.Format_RGB888).copy()
+        return {"image": image, **info}
+    finally:
+        capture.release()
+class ThumbnailDiskCache:
+    """Bounded on-disk PNG thumbnail cache keyed by path, mtime and size.
+
+    Entries are written atomically (temp file then rename); a hit refreshes the
+    entry's mtime, and when the directory grows beyond ``max_bytes`` the least
+    recently used entries are deleted first.
+    """
+    def __init__(self, directory=None, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory) if directory else default_thumbnail_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+    @staticmethod
+    def key(path: str, stat: os.stat_result) -> str:
+        identity = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+    def entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.png"
+    def get(self, key: str) -> Optional[QImage]:
+        entry = self.entry_path(key)
+        if not entry.exists():
+            return None
+        image = QImage(str(entry))
+        if image.isNull():
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return image
+    def put(self, key: str, image: QImage):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self.entry_path(key)
+        tmp_path = entry.with_name(f".{key}.{threading.get_ident()}.tmp")
+        if not image.save(str(tmp_path), "PNG"):
+            return
+        os.replace(tmp_path, entry)
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += entry.stat().st_size
+            self._enforce_limit()
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._scan_total()
+    def _scan_total(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.directory.glob("*.png"))
+        return self._total_bytes
+    def _enforce_limit(self):
+        if self._scan_total() <= self.max_bytes:
+            return
+        entries = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in self.directory.glob("*.png")),
+            key=lambda entry: entry[0],
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+class _PreviewJob(QRunnable):
+    def __init__(self, service: "FilePreviewService", request_id: int, path: str):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.service = service
+        self.request_id = request_id
+        self.path = path
+    def run(self):
+        service = self.service
+        try:
+            if service.is_cancelled(self.request_id):
+                return
+            try:
+                result = service.build_preview(self.path, lambda: service.is_cancelled(self.request_id))
+            except Exception as e:
+                result = {"kind": "error", "error": str(e)}
+            service._finished.emit(self.request_id, self.path, result)
+        finally:
+            service._release(self)
+class FilePreviewService(QObject):
+    """Builds file previews on a worker pool.
+
+    Every ``request`` gets an id; requesting a new preview cancels the previous
+    one, removing it from the pool queue if it has not started and otherwise
+    discarding its result. Image and video thumbnails go through a
+    ``ThumbnailDiskCache``, so revisiting a large recording costs one PNG read.
+    Text previews read only the head and tail of the file.
+    """
+    preview_ready = pyqtSignal(int, str, object)
+    _finished = pyqtSignal(int, str, object)
+    def __init__(self, thumbnail_cache: Optional[ThumbnailDiskCache] = None, max_workers: int = 2, thumbnail_size: QSize = QSize(600, 400), parent=None):
+        super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache or ThumbnailDiskCache()
+        self.thumbnail_size = thumbnail_size
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._active: Dict[int, _PreviewJob] = {}
+        self._jobs = set()
+        self.cache_hits = 0
+        self.cancelled = 0
+        self._finished.connect(self._deliver)
+    def request(self, path: str, cancel_previous: bool = True) -> int:
+        if cancel_previous:
+            self.cancel_all()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            job = _PreviewJob(self, request_id, path)
+            self._active[request_id] = job
+            self._jobs.add(job)
+        self.pool.start(job)
+        return request_id
+    def cancel(self, request_id: int):
+        with self._lock:
+            job = self._active.pop(request_id, None)
+            if job is None:
+                return
+            self.cancelled += 1
+        if self.pool.tryTake(job):
+            self._release(job)
+    def cancel_all(self):
+        with self._lock:
+            request_ids = list(self._active)
+        for request_id in request_ids:
+            self.cancel(request_id)
+    def is_cancelled(self, request_id: int) -> bool:
+        with self._lock:
+            return request_id not in self._active
+    def shutdown(self, timeout_ms: int = 3000):
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
+    def build_preview(self, path: str, cancelled=lambda: False) -> Dict[str, Any]:
+        stat = os.stat(path)
+        kind = preview_kind(path)
+        result: Dict[str, Any] = {"kind": kind, "size": stat.st_size, "mtime": stat.st_mtime}
+        if kind == "text":
+            result.update(read_text_preview(path))
+            return result
+        if kind not in ("image", "video"):
+            return result
+        key = self.thumbnail_cache.key(path, stat)
+        image = self.thumbnail_cache.get(key)
+        if image is not None:
+            with self._lock:
+                self.cache_hits += 1
+            result.update(image=image, cached=True)
+            return result
+        if cancelled():
+            return {"kind": "cancelled"}
+        if kind == "image":
+            image = decode_image_thumbnail(path, self.thumbnail_size)
+            if image is None:
+                result.update(kind="error", error="Cannot load image")
+                return result
+        else:
+            result.update(decode_video_frame(path, self.thumbnail_size))
+            image = result.get("image")
+            if image is None:
+                return result
+        self.thumbnail_cache.put(key, image)
+        result.update(image=image, cached=False)
+        return result
+    def _release(self, job: _PreviewJob):
+        with self._lock:
+            self._jobs.discard(job)
+    def _deliver(self, request_id: int, path: str, result: Dict[str, Any]):
+        with self._lock:
+            if self._active.pop(request_id, None) is None:
+                return
+        self.preview_ready.emit(request_id, path, result)
+class DirectoryLister(QThread):
+    """Streams a directory listing in chunks using ``os.scandir``."""
+    entries_ready = pyqtSignal(list)
+    listing_finished = pyqtSignal(int, int)
+    listing_failed = pyqtSignal(str)
+    def __init__(self, path: str, chunk_size: int = 200, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.chunk_size = chunk_size
+    def run(self):
+        dirs = files = 0
+        chunk = []
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if self.isInterruptionRequested():
+                        return
+                    try:
+                        is_dir = entry.is_dir()
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        dirs += 1
+                    elif entry.is_file():
+                        files += 1
+                    else:
+                        continue
+                    chunk.append({
+                        "name": entry.name,
+                        "path": entry.path,
+                        "is_dir": is_dir,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                    })
+                    if len(chunk) >= self.chunk_size:
+                        self.entries_ready.emit(chunk)
+                        chunk = []
+        except OSError as e:
+            self.listing_failed.emit(str(e))
+            return
+        if chunk:
+            self.entries_ready.emit(chunk)
+        self.listing_finished.emit(dirs, files)
@@ -0,0 +1,299 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QObject, QRunnable, Qt, QThread, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+FILE_TYPES = {
+    ".mp4": "Video", ".avi": "Video", ".mov": "Video", ".mkv": "Video", ".wmv": "Video",
+    ".jpg": "Image", ".jpeg": "Image", ".png": "Image", ".bmp": "Image", ".tiff": "Image",
+    ".json": "Data",
+    ".csv": "CSV",
+    ".txt": "Log", ".log": "Log",
+}
+TEXT_PREVIEW_TYPES = ("CSV", "Data", "Log")
+def classify_file(name: str) -> str:
+    return FILE_TYPES.get(os.path.splitext(name)[1].lower(), "Other")
+def file_info_from_entry(entry: os.DirEntry) -> Dict[str, Any]:
+    stat = entry.stat()
+    return {
+        "name": entry.name,
+        "path": entry.path,
+        "size": stat.st_size,
+        "modified": datetime.fromtimestamp(stat.st_mtime),
+        "type": classify_file(entry.name),
+    }
+class SessionFileScanner(QThread):
+    """Lists a session folder off the GUI thread and delivers files in batches.
+
+    Names are collected with ``os.scandir`` (no per-file stat) and sorted first,
+    then stat'ed and emitted in name order. The first batch is kept small so the
+    view has something to show almost immediately; later batches are larger to
+    keep the number of queued signals low.
+    """
+    batch_ready = pyqtSignal(list)
+    scan_finished = pyqtSignal(int)
+    scan_failed = pyqtSignal(str)
+    def __init__(self, folder, first_batch: int = 200, batch_size: int = 2000, parent=None):
+        super().__init__(parent)
+        self.folder = Path(folder)
+        self.first_batch = first_batch
+        self.batch_size = batch_size
+    def run(self):
+        try:
+            with os.scandir(self.folder) as it:
+                entries = [entry for entry in it if entry.is_file()]
+        except OSError as e:
+            self.scan_failed.emit(str(e))
+            self.scan_finished.emit(0)
+            return
+        entries.sort(key=lambda entry: entry.name)
+        delivered = 0
+        size = self.first_batch
+        while delivered < len(entries) and not self.isInterruptionRequested():
+            batch = []
+            for entry in entries[delivered:delivered + size]:
+                try:
+                    batch.append(file_info_from_entry(entry))
+                except OSError:
+                    continue
+            delivered += size
+            size = self.batch_size
+            self.batch_ready.emit(batch)
+        self.scan_finished.emit(len(entries))
+class SessionFileModel(QAbstractListModel):
+    """List model over the files of a session, filled incrementally by a scanner."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files: List[Dict[str, Any]] = []
+        self.icons: Dict[str, Any] = {}
+        self.total_size = 0
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.files):
+            return None
+        file_info = self.files[index.row()]
+        if role == Qt.DisplayRole:
+            size_mb = file_info["size"] / (1024 * 1024)
+            return f"{file_info['name']} ({file_info['type']}, {size_mb:.1f} MB)"
+        if role == Qt.DecorationRole:
+            return self.icons.get(file_info["type"])
+        if role == Qt.ToolTipRole:
+            return file_info["path"]
+        if role == Qt.UserRole:
+            return file_info
+        return None
+    def append_files(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        first = len(self.files)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self.files.extend(batch)
+        self.total_size += sum(f["size"] for f in batch)
+        self.endInsertRows()
+    def file_info(self, row: int) -> Optional[Dict[str, Any]]:
+        return self.files[row] if 0 <= row < len(self.files) else None
+class SessionStatisticsWorker(QThread):
+    """Accumulates session file statistics in the background.
+
+    Files are fed in with ``add_files`` as the scanner finds them and
+    ``finish_input`` marks the end of the listing. Sizes and type counts are
+    cheap; CSV row counts are read in chunks and are the expensive part, so the
+    worker publishes partial results at most every ``update_interval`` seconds
+    and stops promptly when interrupted.
+    """
+    progress = pyqtSignal(int, int)
+    statistics_updated = pyqtSignal(object)
+    statistics_finished = pyqtSignal(object)
+    CHUNK_SIZE = 1 << 20
+    def __init__(self, update_interval: float = 0.1, parent=None):
+        super().__init__(parent)
+        self.update_interval = update_interval
+        self._queue: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue()
+        self._known = 0
+        self.statistics: Dict[str, Any] = {
+            "total_files": 0,
+            "total_size": 0,
+            "by_type": {},
+            "csv_rows": 0,
+            "complete": False,
+        }
+    def add_files(self, batch: List[Dict[str, Any]]):
+        self._known += len(batch)
+        self._queue.put(list(batch))
+    def finish_input(self):
+        self._queue.put(None)
+    def run(self):
+        processed = 0
+        last_update = 0.0
+        while not self.isInterruptionRequested():
+            try:
+                batch = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if batch is None:
+                self.statistics["complete"] = True
+                break
+            for file_info in batch:
+                if self.isInterruptionRequested():
+                    return
+                self._accumulate(file_info)
+                processed += 1
+                now = time.monotonic()
+                if now - last_update >= self.update_interval:
+                    last_update = now
+                    self.progress.emit(processed, self._known)
+                    self.statistics_updated.emit(self.snapshot())
+        self.progress.emit(processed, self._known)
+        self.statistics_finished.emit(self.snapshot())
+    def snapshot(self) -> Dict[str, Any]:
+        statistics = dict(self.statistics)
+        statistics["by_type"] = {k: dict(v) for k, v in self.statistics["by_type"].items()}
+        return statistics
+    def _accumulate(self, file_info: Dict[str, Any]):
+        statistics = self.statistics
+        statistics["total_files"] += 1
+        statistics["total_size"] += file_info["size"]
+        by_type = statistics["by_type"].setdefault(file_info["type"], {"count": 0, "size": 0})
+        by_type["count"] += 1
+        by_type["size"] += file_info["size"]
+        if file_info["type"] == "CSV" and file_info["size"]:
+            statistics["csv_rows"] += self._count_data_rows(file_info["path"])
+    def _count_data_rows(self, path: str) -> int:
+        lines = 0
+        last = b"\n"
+        try:
+            with open(path, "rb") as f:
+                while not self.isInterruptionRequested():
+                    chunk = f.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    lines += chunk.count(b"\n")
+                    last = chunk[-1:]
+        except OSError:
+            return 0
+        if last != b"\n":
+            lines += 1
+        return max(lines - 1, 0)
+class PreviewCache:
+    """Bounded LRU cache of previews keyed by path and modification time."""
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    @staticmethod
+    def key(file_info: Dict[str, Any]) -> tuple:
+        return file_info["path"], file_info.get("modified"), file_info.get("size")
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    def put(self, key: tuple, preview: Dict[str, Any]):
+        cost = _preview_cost(preview)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (preview, cost)
+            self.current_bytes += cost
+            while self._entries and (
+                len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes
+            ):
+                _, (_, evicted_cost) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_cost
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+def _preview_cost(preview: Dict[str, Any]) -> int:
+    image = preview.get("image")
+    if image is not None:
+        return image.byteCount()
+    return len(preview.get("text", "")) + 64
+def load_preview(file_info: Dict[str, Any], thumbnail_size: int = 256, max_lines: int = 50, max_chars: int = 64 * 1024) -> Dict[str, Any]:
+    path = file_info["path"]
+    file_type = file_info["type"]
+    if file_type == "Image":
+        image = QImage(path)
+        if image.isNull():
+            return {"kind": "error", "text": f"Cannot decode image: {file_info['name']}"}
+        return {
+            "kind": "image",
+            "image": image.scaled(thumbnail_size, thumbnail_size, Qt.KeepAspectRatio, Qt.SmoothTransformation),
+            "text": f"{image.width()}x{image.height()}",
+        }
+    if file_type in TEXT_PREVIEW_TYPES:
+        lines = []
+        chars = 0
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                lines.append(line.rstrip("\n"))
+                chars += len(line)
+                if len(lines) >= max_lines or chars >= max_chars:
+                    lines.append("...")
+                    break
+        return {"kind": "text", "text": "\n".join(lines)}
+    return {"kind": "none", "text": ""}
+class _PreviewTask(QRunnable):
+    def __init__(self, loader: "PreviewLoader", key: tuple, file_info: Dict[str, Any]):
+        super().__init__()
+        self.loader = loader
+        self.key = key
+        self.file_info = file_info
+    def run(self):
+        try:
+            preview = load_preview(self.file_info, self.loader.thumbnail_size)
+        except Exception as e:
+            preview = {"kind": "error", "text": f"Preview failed: {e}"}
+        self.loader._finished.emit(self.key, self.file_info["path"], preview)
+class PreviewLoader(QObject):
+    """Loads thumbnails and text previews on demand on a small thread pool.
+
+    Results go into a ``PreviewCache``; ``request`` returns a cached preview
+    immediately, otherwise it queues one load per key and ``preview_ready``
+    fires on the GUI thread when it completes. Only ``QImage`` is used off the
+    GUI thread, never ``QPixmap``.
+    """
+    preview_ready = pyqtSignal(str, object)
+    _finished = pyqtSignal(object, str, object)
+    def __init__(self, cache: Optional[PreviewCache] = None, thumbnail_size: int = 256, max_threads: int = 2, parent=None):
+        super().__init__(parent)
+        self.cache = cache or PreviewCache()
+        self.thumbnail_size = thumbnail_size
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._pending = set()
+        self._finished.connect(self._on_finished)
+    def request(self, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = PreviewCache.key(file_info)
+        preview = self.cache.get(key)
+        if preview is not None:
+            return preview
+        if key not in self._pending:
+            self._pending.add(key)
+            self.pool.start(_PreviewTask(self, key, file_info))
+        return None
+    def shutdown(self, timeout_ms: int = 2000):
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
+    def _on_finished(self, key: tuple, path: str, preview: Dict[str, Any]):
+        self._pending.discard(key)
+        self.cache.put(key, preview)
+        self.preview_ready.emit(path, preview)
@@ -6,7 +6,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QFont
+from PyQt5.QtGui import QFont, QPixmap
 from PyQt5.QtWidgets import (
     QDialog,
     QFrame,
@@ -14,9 +14,11 @@ from PyQt5.QtWidgets import (
     QGroupBox,
     QHBoxLayout,
     QLabel,
+    QListView,
     QListWidget,
     QListWidgetItem,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSplitter,
     QTabWidget,
@@ -24,23 +26,47 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+from .session_file_model import (
+    PreviewLoader,
+    SessionFileModel,
+    SessionFileScanner,
+    SessionStatisticsWorker,
+    classify_file,
+)
 class SessionReviewDialog(QDialog):
+    """Review dialog for a recorded session.
+
+    The file list is a ``QListView`` over a ``SessionFileModel`` that a
+    background ``SessionFileScanner`` fills in batches, so the first screen
+    appears before large folders have been listed. File statistics are
+    accumulated by a ``SessionStatisticsWorker`` with a progress bar, and
+    thumbnails and text previews are loaded on selection into a bounded LRU
+    cache by a ``PreviewLoader``.
+    """
     file_open_requested = pyqtSignal(str)
+    files_loaded = pyqtSignal(int)
+    statistics_ready = pyqtSignal(dict)
     def __init__(self, session_data: Dict, session_folder: str, parent=None):
         super().__init__(parent)
         self.session_data = session_data
         self.session_folder = Path(session_folder)
-        self.session_files = []
+        self.file_model = SessionFileModel(self)
+        self.session_files = self.file_model.files
+        self.files_complete = False
+        self.file_scanner: Optional[SessionFileScanner] = None
+        self.statistics_worker: Optional[SessionStatisticsWorker] = None
+        self.preview_loader = PreviewLoader(parent=self)
+        self.preview_loader.preview_ready.connect(self.on_preview_ready)
         self.setWindowTitle(
             f"Session Review - {session_data.get('session', 'Unknown')}"
         )
         self.setModal(True)
         self.resize(900, 700)
         self.init_ui()
-        self.load_session_files()
         self.populate_session_info()
         self.populate_file_list()
         self.populate_event_timeline()
+        self.load_session_files()
         print(
             f"[DEBUG_LOG] SessionReviewDialog initialized for session: {session_data.get('session', 'Unknown')}"
         )
@@ -53,6 +79,7 @@ class SessionReviewDialog(QDialog):
         header_frame = QFrame()
         header_frame.setFrameStyle(QFrame.StyledPanel)
         header_frame.setStyleSheet(
+            "QFrame { background-color: #f0f0f0; border-radius: 5px; padding: 10px; }"
         )
         header_layout = QVBoxLayout(header_frame)
         session_name = self.session_data.get("session", "Unknown Session")
@@ -72,7 +99,7 @@ class SessionReviewDialog(QDialog):
         summary_label = QLabel(
             f"Started: {start_time} | Duration: {duration_str} | Status: {status}"
         )
-        summary_label.setStyleSheet("colour: #666666; font-size: 10pt;")
+        summary_label.setStyleSheet("color: #666666; font-size: 10pt;")
         header_layout.addWidget(summary_label)
         parent_layout.addWidget(header_frame)
     def create_main_content(self, parent_layout):
@@ -88,10 +115,17 @@ class SessionReviewDialog(QDialog):
         layout = QHBoxLayout(files_widget)
         left_panel = QGroupBox("Session Files")
         left_layout = QVBoxLayout(left_panel)
-        self.file_list = QListWidget()
-        self.file_list.itemDoubleClicked.connect(self.on_file_double_clicked)
-        self.file_list.currentItemChanged.connect(self.on_file_selection_changed)
+        self.file_list = QListView()
+        self.file_list.setUniformItemSizes(True)
+        self.file_list.setLayoutMode(QListView.Batched)
+        self.file_list.setModel(self.file_model)
+        self.file_list.doubleClicked.connect(self.on_file_double_clicked)
+        self.file_list.selectionModel().currentChanged.connect(
+            self.on_file_selection_changed
+        )
         left_layout.addWidget(self.file_list)
+        self.file_count_label = QLabel("Listing files...")
+        left_layout.addWidget(self.file_count_label)
         file_buttons_layout = QHBoxLayout()
         self.open_file_btn = QPushButton("Open File")
         self.open_file_btn.clicked.connect(self.open_selected_file)
@@ -108,6 +142,14 @@ class SessionReviewDialog(QDialog):
         self.file_details.setReadOnly(True)
         self.file_details.setMaximumHeight(200)
         right_layout.addWidget(self.file_details)
+        self.preview_image = QLabel()
+        self.preview_image.setAlignment(Qt.AlignCenter)
+        self.preview_image.hide()
+        right_layout.addWidget(self.preview_image)
+        self.preview_text = QTextEdit()
+        self.preview_text.setReadOnly(True)
+        self.preview_text.setLineWrapMode(QTextEdit.NoWrap)
+        right_layout.addWidget(self.preview_text)
         splitter = QSplitter(Qt.Horizontal)
         splitter.addWidget(left_panel)
         splitter.addWidget(right_panel)
@@ -162,14 +204,25 @@ class SessionReviewDialog(QDialog):
         stats_layout.addWidget(QLabel("Total Events:"), row, 0)
         stats_layout.addWidget(QLabel(str(len(events))), row, 1)
         row += 1
-        total_files = len(self.session_files)
-        total_size = sum(f.get("size", 0) for f in self.session_files if f.get("size"))
-        total_size_mb = total_size / (1024 * 1024) if total_size > 0 else 0
+        self.total_files_label = QLabel("Calculating...")
         stats_layout.addWidget(QLabel("Total Files:"), row, 0)
-        stats_layout.addWidget(QLabel(str(total_files)), row, 1)
+        stats_layout.addWidget(self.total_files_label, row, 1)
         row += 1
+        self.total_size_label = QLabel("Calculating...")
         stats_layout.addWidget(QLabel("Total Size:"), row, 0)
-        stats_layout.addWidget(QLabel(f"{total_size_mb:.1f} MB"), row, 1)
+        stats_layout.addWidget(self.total_size_label, row, 1)
+        row += 1
+        self.file_types_label = QLabel("")
+        stats_layout.addWidget(QLabel("File Types:"), row, 0)
+        stats_layout.addWidget(self.file_types_label, row, 1)
+        row += 1
+        self.csv_rows_label = QLabel("")
+        stats_layout.addWidget(QLabel("CSV Data Rows:"), row, 0)
+        stats_layout.addWidget(self.csv_rows_label, row, 1)
+        row += 1
+        self.statistics_progress = QProgressBar()
+        self.statistics_progress.setRange(0, 0)
+        stats_layout.addWidget(self.statistics_progress, row, 0, 1, 2)
         row += 1
         layout.addWidget(stats_group)
         if events:
@@ -250,54 +303,92 @@ class SessionReviewDialog(QDialog):
         button_layout.addWidget(close_btn)
         parent_layout.addLayout(button_layout)
     def load_session_files(self):
-        self.session_files = []
+        self.stop_background_work()
+        self.file_model.beginResetModel()
+        self.file_model.files.clear()
+        self.file_model.total_size = 0
+        self.file_model.endResetModel()
+        self.files_complete = False
         if not self.session_folder.exists():
             print(f"[DEBUG_LOG] Session folder does not exist: {self.session_folder}")
+            self.on_files_scanned(0)
             return
-        for file_path in self.session_folder.iterdir():
-            if file_path.is_file():
-                file_info = {
-                    "name": file_path.name,
-                    "path": str(file_path),
-                    "size": file_path.stat().st_size,
-                    "modified": datetime.fromtimestamp(file_path.stat().st_mtime),
-                    "type": self.get_file_type(file_path),
-                }
-                self.session_files.append(file_info)
-        self.session_files.sort(key=lambda x: x["name"])
-        print(f"[DEBUG_LOG] Loaded {len(self.session_files)} files from session folder")
-    def get_file_type(self, file_path: Path) -> str:
-        suffix = file_path.suffix.lower()
-        if suffix in [".mp4", ".avi", ".mov", ".mkv", ".wmv"]:
-            return "Video"
-        elif suffix in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
-            return "Image"
-        elif suffix in [".json"]:
-            return "Data"
-        elif suffix in [".txt", ".log"]:
-            return "Log"
+        self.statistics_worker = SessionStatisticsWorker(parent=self)
+        self.statistics_worker.progress.connect(self.on_statistics_progress)
+        self.statistics_worker.statistics_updated.connect(self.update_statistics)
+        self.statistics_worker.statistics_finished.connect(self.on_statistics_finished)
+        self.statistics_worker.start(SessionStatisticsWorker.LowPriority)
+        self.file_scanner = SessionFileScanner(self.session_folder, parent=self)
+        self.file_scanner.batch_ready.connect(self.on_files_batch)
+        self.file_scanner.scan_failed.connect(
+            lambda error: print(f"[DEBUG_LOG] Failed to list session folder: {error}")
+        )
+        self.file_scanner.scan_finished.connect(self.on_files_scanned)
+        self.file_scanner.start()
+    def on_files_batch(self, batch):
+        self.file_model.append_files(batch)
+        if self.statistics_worker is not None:
+            self.statistics_worker.add_files(batch)
+        self.file_count_label.setText(f"{self.file_model.rowCount()} files listed...")
+    def on_files_scanned(self, count: int):
+        self.files_complete = True
+        if self.statistics_worker is not None:
+            self.statistics_worker.finish_input()
         else:
-            return "Other"
+            self.on_statistics_finished(
+                {"total_files": 0, "total_size": 0, "by_type": {}, "csv_rows": 0, "complete": True}
+            )
+        self.file_count_label.setText(f"{self.file_model.rowCount()} files")
+        print(f"[DEBUG_LOG] Loaded {self.file_model.rowCount()} files from session folder")
+        self.files_loaded.emit(self.file_model.rowCount())
+    def on_statistics_progress(self, done: int, known: int):
+        if self.files_complete:
+            self.statistics_progress.setRange(0, max(known, 1))
+            self.statistics_progress.setValue(done)
+    def update_statistics(self, statistics: Dict):
+        total_size_mb = statistics["total_size"] / (1024 * 1024)
+        self.total_files_label.setText(str(statistics["total_files"]))
+        self.total_size_label.setText(f"{total_size_mb:.1f} MB")
+        self.file_types_label.setText(
+            ", ".join(
+                f"{file_type}: {info['count']}"
+                for file_type, info in sorted(statistics["by_type"].items())
+            )
+        )
+        self.csv_rows_label.setText(str(statistics["csv_rows"]))
+    def on_statistics_finished(self, statistics: Dict):
+        self.update_statistics(statistics)
+        self.statistics_progress.setRange(0, 1)
+        self.statistics_progress.setValue(1)
+        self.statistics_progress.hide()
+        self.statistics_ready.emit(statistics)
+    def stop_background_work(self, timeout_ms: int = 2000):
+        for worker in (self.file_scanner, self.statistics_worker):
+            if worker is not None and worker.isRunning():
+                worker.requestInterruption()
+                worker.wait(timeout_ms)
+        self.file_scanner = None
+        self.statistics_worker = None
+    def done(self, result):
+        self.stop_background_work()
+        self.preview_loader.shutdown()
+        super().done(result)
+    def closeEvent(self, event):
+        self.stop_background_work()
+        self.preview_loader.shutdown()
+        super().closeEvent(event)
+    def get_file_type(self, file_path: Path) -> str:
+        return classify_file(file_path.name)
     def populate_session_info(self):
         pass
     def populate_file_list(self):
-        self.file_list.clear()
-        for file_info in self.session_files:
-            name = file_info["name"]
-            size_mb = file_info["size"] / (1024 * 1024)
-            file_type = file_info["type"]
-            display_text = f"{name} ({file_type}, {size_mb:.1f} MB)"
-            item = QListWidgetItem(display_text)
-            item.setData(Qt.UserRole, file_info)
-            if file_type == "Video":
-                item.setIcon(self.style().standardIcon(self.style().SP_MediaPlay))
-            elif file_type == "Image":
-                item.setIcon(self.style().standardIcon(self.style().SP_FileIcon))
-            elif file_type == "Data":
-                item.setIcon(
-                    self.style().standardIcon(self.style().SP_FileDialogDetailedView)
-                )
-            self.file_list.addItem(item)
+        style = self.style()
+        self.file_model.icons = {
+            "Video": style.standardIcon(style.SP_MediaPlay),
+            "Image": style.standardIcon(style.SP_FileIcon),
+            "Data": style.standardIcon(style.SP_FileDialogDetailedView),
+            "CSV": style.standardIcon(style.SP_FileDialogDetailedView),
+        }
     def populate_event_timeline(self):
         pass
     def format_event_for_display(self, event: Dict) -> str:
@@ -335,10 +426,13 @@ class SessionReviewDialog(QDialog):
                 return f"[{time_str}] ERROR ({error_type}): {message}"
         else:
             return f"[{time_str}] {event_type}: {str(event)}"
+    def current_file_info(self) -> Optional[Dict]:
+        index = self.file_list.currentIndex()
+        return self.file_model.file_info(index.row()) if index.isValid() else None
     def on_file_selection_changed(self, current, previous):
-        if current:
+        if current.isValid():
             self.open_file_btn.setEnabled(True)
-            file_info = current.data(Qt.UserRole)
+            file_info = self.file_model.file_info(current.row())
             if file_info:
                 details_text = f"File: {file_info['name']}\n"
                 details_text += f"Type: {file_info['type']}\n"
@@ -348,16 +442,34 @@ class SessionReviewDialog(QDialog):
                 )
                 details_text += f"Path: {file_info['path']}\n"
                 self.file_details.setPlainText(details_text)
+                self.show_preview(file_info)
         else:
             self.open_file_btn.setEnabled(False)
             self.file_details.clear()
-    def on_file_double_clicked(self, item):
+            self.show_preview(None)
+    def show_preview(self, file_info: Optional[Dict]):
+        preview = self.preview_loader.request(file_info) if file_info else None
+        if file_info and preview is None:
+            self.preview_image.hide()
+            self.preview_text.setPlainText("Loading preview...")
+            return
+        self.display_preview(preview)
+    def on_preview_ready(self, path: str, preview: Dict):
+        current = self.current_file_info()
+        if current is not None and current["path"] == path:
+            self.display_preview(preview)
+    def display_preview(self, preview: Optional[Dict]):
+        if preview and preview.get("kind") == "image":
+            self.preview_image.setPixmap(QPixmap.fromImage(preview["image"]))
+            self.preview_image.show()
+        else:
+            self.preview_image.clear()
+            self.preview_image.hide()
+        self.preview_text.setPlainText(preview.get("text", "") if preview else "")
+    def on_file_double_clicked(self, index):
         self.open_selected_file()
     def open_selected_file(self):
-        current_item = self.file_list.currentItem()
-        if not current_item:
-            return
-        file_info = current_item.data(Qt.UserRole)
+        file_info = self.current_file_info()
         if not file_info:
             return
         file_path = file_info["path"]
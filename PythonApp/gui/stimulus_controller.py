@@ -1,9 +1,8 @@
-import json
 import os
 import time
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Dict, Optional
 from PyQt5.QtCore import Qt, QTimer, QUrl, pyqtSignal
 from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
 from PyQt5.QtMultimediaWidgets import QVideoWidget
@@ -16,6 +15,7 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+from ..utils.event_log import BufferedEventLog, ClockCalibration
 try:
     import vlc
     VLC_AVAILABLE = True
@@ -64,113 +64,99 @@ class CodecInfo:
             return VideoBackend.QT_MULTIMEDIA
         return None
 class EnhancedTimingLogger:
-    def __init__(self, log_directory: str = "logs"):
+    def __init__(self, log_directory: str = "logs", log_format: str = "ndjson"):
         self.log_directory = log_directory
+        self.log_format = log_format
         self.current_log_file: Optional[str] = None
         self.experiment_start_time: Optional[float] = None
+        self.experiment_start_ns: Optional[int] = None
         self.event_counter = 0
         self.system_clock = time.time
         self.monotonic_clock = time.monotonic
         self.perf_clock = time.perf_counter
         self.clock_offset = 0.0
+        self.calibration = ClockCalibration()
+        self.event_log: Optional[BufferedEventLog] = None
         self.calibrate_timing()
         os.makedirs(log_directory, exist_ok=True)
-    def calibrate_timing(self):
-        start_time = self.perf_clock()
-        system_start = self.system_clock()
-        time.sleep(0.001)
-        end_time = self.perf_clock()
-        system_end = self.system_clock()
-        perf_duration = end_time - start_time
-        system_duration = system_end - system_start
-        self.clock_offset = system_duration - perf_duration
+    def calibrate_timing(self, samples: int = 16, spacing_s: float = 0.0005):
+        self.calibration.calibrate(samples=samples, spacing_s=spacing_s)
+        self.clock_offset = self.calibration.intercept_ns / 1e9
+        info = self.calibration.describe()
         print(
-            f"[DEBUG_LOG] Timing calibration: offset={self.clock_offset * 1000:.3f}ms"
+            f"[DEBUG_LOG] Timing calibration: offset={info['offset_ms']:.3f}ms "
+            f"drift={info['drift_ppm']:.2f}ppm residual={info['residual_us']:.1f}us"
         )
     def get_precise_timestamp(self) -> Dict[str, float]:
+        perf_ns = time.perf_counter_ns()
         return {
             "system_time": self.system_clock(),
             "monotonic_time": self.monotonic_clock(),
-            "performance_time": self.perf_clock(),
-            "corrected_time": self.system_clock() - self.clock_offset,
+            "performance_time": perf_ns / 1e9,
+            "corrected_time": self.calibration.to_wall_time(perf_ns),
         }
     def start_experiment_log(self, video_file: str, backend: str) -> str:
+        if self.event_log is not None:
+            self.close_experiment_log("restarted")
         timestamp = time.strftime("%Y%m%d_%H%M%S")
+        extension = "ndjson" if self.log_format == "ndjson" else "bin"
         self.current_log_file = os.path.join(
-            self.log_directory, f"enhanced_experiment_log_{timestamp}.json"
+            self.log_directory, f"enhanced_experiment_log_{timestamp}.{extension}"
         )
         timing_info = self.get_precise_timestamp()
         self.experiment_start_time = timing_info["corrected_time"]
+        self.experiment_start_ns = int(timing_info["performance_time"] * 1e9)
         self.event_counter = 0
-        log_data = {
-            "experiment_info": {
-                "start_timestamps": timing_info,
-                "start_time_formatted": datetime.fromtimestamp(
-                    self.experiment_start_time
-                ).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                "stimulus_file": video_file,
-                "stimulus_filename": os.path.basename(video_file),
-                "video_backend": backend,
-                "timing_calibration": {
-                    "clock_offset_ms": self.clock_offset * 1000,
-                    "precision_test": "completed",
-                },
-            },
-            "events": [],
+        experiment_info = {
+            "start_timestamps": timing_info,
+            "start_time_formatted": datetime.fromtimestamp(
+                self.experiment_start_time
+            ).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "stimulus_file": video_file,
+            "stimulus_filename": os.path.basename(video_file),
+            "video_backend": backend,
         }
-        with open(self.current_log_file, "w") as f:
-            json.dump(log_data, f, indent=2)
+        self.event_log = BufferedEventLog(
+            self.current_log_file,
+            header={"experiment_info": experiment_info},
+            fmt=self.log_format,
+            calibration=self.calibration,
+        )
         return self.current_log_file
     def log_stimulus_start(self, video_duration_ms: int, frame_rate: float = None):
-        if not self.current_log_file or not self.experiment_start_time:
+        if self.event_log is None:
             return
-        timing_info = self.get_precise_timestamp()
-        event = {
-            "event_type": "stimulus_start",
-            "timestamps": timing_info,
-            "timestamp_formatted": datetime.fromtimestamp(
-                timing_info["corrected_time"]
-            ).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            "experiment_time": timing_info["corrected_time"]
-            - self.experiment_start_time,
-            "video_duration_ms": video_duration_ms,
-            "video_duration_s": video_duration_ms / 1000.0,
-            "frame_rate": frame_rate,
-        }
-        self._append_event(event)
+        self.event_log.log(
+            "stimulus_start", video_duration_ms=video_duration_ms, frame_rate=frame_rate
+        )
     def log_event_marker(
         self, video_position_ms: int, marker_label: str = "", frame_number: int = None
     ):
-        if not self.current_log_file or not self.experiment_start_time:
+        if self.event_log is None:
             return
-        timing_info = self.get_precise_timestamp()
         self.event_counter += 1
-        event = {
-            "event_type": "event_marker",
-            "marker_number": self.event_counter,
-            "marker_label": marker_label or f"Marker {self.event_counter}",
-            "timestamps": timing_info,
-            "timestamp_formatted": datetime.fromtimestamp(
-                timing_info["corrected_time"]
-            ).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            "experiment_time": timing_info["corrected_time"]
-            - self.experiment_start_time,
-            "video_position_ms": video_position_ms,
-            "video_position_s": video_position_ms / 1000.0,
-            "frame_number": frame_number,
-        }
-        self._append_event(event)
-    def _append_event(self, event: Dict[str, Any]):
-        if not self.current_log_file:
+        self.event_log.log(
+            "event_marker",
+            label=marker_label or f"Marker {self.event_counter}",
+            video_position_ms=video_position_ms,
+            frame_number=frame_number,
+        )
+    def log_stimulus_end(self, video_position_ms: int, reason: str = "stopped"):
+        if self.event_log is None:
+            return
+        self.event_log.log("stimulus_end", label=reason, video_position_ms=video_position_ms)
+        self.close_experiment_log(reason)
+    def close_experiment_log(self, reason: str = "stopped"):
+        if self.event_log is None:
             return
         try:
-            with open(self.current_log_file, "r") as f:
-                log_data = json.load(f)
-            log_data["events"].append(event)
-            with open(self.current_log_file, "w") as f:
-                json.dump(log_data, f, indent=2)
+            self.event_log.close(
+                footer={"end_reason": reason, "marker_count": self.event_counter}
+            )
         except Exception as e:
-            print(f"[DEBUG_LOG] Error writing to log file: {e}")
+            print(f"[DEBUG_LOG] Error closing log file: {e}")
+        finally:
+            self.event_log = None
 class VLCVideoWidget(QWidget):
     position_changed = pyqtSignal(int)
     duration_changed = pyqtSignal(int)
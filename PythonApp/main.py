@@ -8,32 +8,38 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from PyQt5.QtCore import Qt, qVersion
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWidgets import QApplication, QMessageBox
 from PythonApp.utils.logging_config import AppLogger, get_logger
 log_level = os.environ.get("MSR_LOG_LEVEL", "INFO")
 AppLogger.set_level(log_level)
-from PythonApp.gui.main_window import MainWindow
-from PythonApp.production.runtime_security_checker import validate_runtime_security, SecurityValidationError
+from PythonApp.startup import BackendLoader, StartupTask, attach_startup_progress, print_import_profile, wants_import_profile
 logger = get_logger(__name__)
-def main():
-    logger.info(
-        "=== Multi-Sensor Recording System Controller Starting ==="
-    )
-    logger.info(f"Python version: {sys.version}")
-    logger.info(f"PyQt5 available, Qt version: {qVersion()}")
+def validate_security():
+    from PythonApp.production.runtime_security_checker import validate_runtime_security, SecurityValidationError
     try:
         logger.info("[SECURE] Performing runtime security validation...")
         validate_runtime_security()
         logger.info("[SECURE] Runtime security validation completed successfully")
-    except SecurityValidationError as e:
-        logger.error(f"[SECURE] SECURITY VALIDATION FAILED: {e}")
-        logger.error("[SECURE] Application startup aborted due to security issues")
-        print(f"\n[FAIL] SECURITY ERROR: {e}")
-        print("[SECURE] Please fix security issues before running the application")
-        sys.exit(1)
+    except SecurityValidationError:
+        raise
     except Exception as e:
         logger.warning(f"[SECURE] Security validation encountered an error: {e}")
         logger.warning("[SECURE] Continuing startup with security warning")
+def on_security_failure(app, main_window, label, error):
+    logger.error(f"[SECURE] SECURITY VALIDATION FAILED: {error}")
+    logger.error("[SECURE] Application startup aborted due to security issues")
+    print(f"\n[FAIL] SECURITY ERROR: {error}")
+    print("[SECURE] Please fix security issues before running the application")
+    QMessageBox.critical(main_window, "Security Error", f"{label} failed:\n\n{error}")
+    app.exit(1)
+def main():
+    if wants_import_profile(sys.argv):
+        sys.exit(print_import_profile(sys.argv, ["PythonApp.gui.main_window"]))
+    logger.info(
+        "=== Multi-Sensor Recording System Controller Starting ==="
+    )
+    logger.info(f"Python version: {sys.version}")
+    logger.info(f"PyQt5 available, Qt version: {qVersion()}")
     try:
         logger.debug("Configuring high DPI scaling")
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
@@ -43,13 +49,31 @@ def main():
         app.setApplicationName("Multi-Sensor Recording System Controller")
         logger.info("Application properties configured")
         logger.debug("Creating MainWindow instance")
-        main_window = MainWindow()
+        from PythonApp.gui import main_window as main_window_module
+        main_window = main_window_module.MainWindow(defer_backends=True)
         logger.info("MainWindow created successfully")
         logger.debug("Showing main window")
         main_window.show()
         logger.info("Main window displayed")
+        # Security validation and the heavy backend imports run in the
+        # background; backends are only created once validation has passed
+        loader = BackendLoader(
+            [
+                StartupTask("Validating runtime security", validate_security, critical=True),
+                StartupTask("Loading device and session services", main_window_module.BACKENDS.preload),
+            ],
+            parent=app,
+        )
+        attach_startup_progress(main_window, loader)
+        loader.loading_finished.connect(lambda results: main_window.init_backends())
+        loader.loading_aborted.connect(
+            lambda label, error: on_security_failure(app, main_window, label, error)
+        )
+        loader.start()
         logger.info("Starting PyQt event loop")
         exit_code = app.exec_()
+        loader.requestInterruption()
+        loader.wait(5000)
         logger.info(f"Application exiting with code: {exit_code}")
         sys.exit(exit_code)
     except Exception as e:
@@ -18,62 +18,31 @@ try:
 except ImportError:
     logger.error("Main window not available")
     MainWindow = None
-try:
-    from PythonApp.gui.main_controller import MainController
-    MAIN_CONTROLLER_AVAILABLE = True
-except ImportError:
-    logger.warning("MainController not available")
-    MainController = None
-    MAIN_CONTROLLER_AVAILABLE = False
-try:
-    from PythonApp.session.session_manager import SessionManager
-    SESSION_MANAGER_AVAILABLE = True
-except ImportError:
-    logger.warning("SessionManager not available")
-    SessionManager = None
-    SESSION_MANAGER_AVAILABLE = False
-try:
-    from PythonApp.shimmer_manager import ShimmerManager
-    SHIMMER_MANAGER_AVAILABLE = True
-except ImportError:
-    logger.warning("ShimmerManager not available")
-    ShimmerManager = None
-    SHIMMER_MANAGER_AVAILABLE = False
-try:
-    from PythonApp.network.android_device_manager import AndroidDeviceManager
-    ANDROID_DEVICE_MANAGER_AVAILABLE = True
-except ImportError:
-    logger.warning("AndroidDeviceManager not available")
-    AndroidDeviceManager = None
-    ANDROID_DEVICE_MANAGER_AVAILABLE = False
-try:
-    from PythonApp.network.device_server import JsonSocketServer
-    JSON_SOCKET_SERVER_AVAILABLE = True
-except ImportError:
-    logger.warning("JsonSocketServer not available")
-    JsonSocketServer = None
-    JSON_SOCKET_SERVER_AVAILABLE = False
-try:
-    from PythonApp.webcam.webcam_capture import WebcamCapture
-    WEBCAM_CAPTURE_AVAILABLE = True
-except ImportError:
-    logger.warning("WebcamCapture not available")
-    WebcamCapture = None
-    WEBCAM_CAPTURE_AVAILABLE = False
-try:
-    from PythonApp.gui.stimulus_controller import StimulusController
-    STIMULUS_CONTROLLER_AVAILABLE = True
-except ImportError:
-    logger.warning("StimulusController not available")
-    StimulusController = None
-    STIMULUS_CONTROLLER_AVAILABLE = False
-try:
-    from PythonApp.web_ui.integration import WebDashboardIntegration
-    WEB_UI_AVAILABLE = True
-except ImportError:
-    logger.warning("Web UI components not available")
-    WebDashboardIntegration = None
-    WEB_UI_AVAILABLE = False
+from PythonApp.startup import BackendLoader, StartupTask, attach_startup_progress
+from PythonApp.utils.lazy_import import LazyAttributes
+# Backend and web components (OpenCV, NumPy, Flask/SocketIO, device stacks) are
+# imported on a background thread after the window is shown; module attribute
+# access (e.g. ``main_with_web.SessionManager``) still resolves them on demand.
+COMPONENTS = LazyAttributes({
+    "MainController": (("PythonApp.gui.main_controller", None),),
+    "SessionManager": (("PythonApp.session.session_manager", None),),
+    "ShimmerManager": (("PythonApp.shimmer_manager", None),),
+    "AndroidDeviceManager": (("PythonApp.network.android_device_manager", None),),
+    "JsonSocketServer": (("PythonApp.network.device_server", None),),
+    "WebcamCapture": (("PythonApp.webcam.webcam_capture", None),),
+    "StimulusController": (("PythonApp.gui.stimulus_controller", None),),
+    "WebDashboardIntegration": (("PythonApp.web_ui.integration", None),),
+})
+BACKEND_SERVICES_TASK = "Creating backend services"
+WEB_DASHBOARD_TASK = "Starting web dashboard"
+def __getattr__(name):
+    return COMPONENTS.getattr(__name__, name)
+def load_components() -> dict:
+    available = COMPONENTS.preload()
+    for name, ok in available.items():
+        if not ok:
+            logger.warning(f"{name} not available")
+    return available
 class EnhancedApplicationWithWebUI:
     def __init__(self):
         self.app = None
@@ -86,6 +55,8 @@ class EnhancedApplicationWithWebUI:
         self.json_server = None
         self.webcam_capture = None
         self.stimulus_controller = None
+        self.backend_loader = None
+        self.web_loader = None
         logger.info("Enhanced Application with Web UI initialized")
     def setup_application(self):
         logger.info(
@@ -101,28 +72,37 @@ class EnhancedApplicationWithWebUI:
         self.app.setApplicationVersion("2.0")
         self.app.setOrganizationName("Multi-Sensor Recording Team")
         logger.info("QApplication created and configured")
-    def setup_backend_services(self):
+    def create_backend_services(self) -> dict:
+        """Build the services that own no Qt objects; safe off the GUI thread."""
+        services = {}
+        for attribute, name, kwargs in (
+            ("session_manager", "SessionManager", {"base_recordings_dir": "recordings"}),
+            ("shimmer_manager", "ShimmerManager", {}),
+            ("android_device_manager", "AndroidDeviceManager", {"server_port": 9000}),
+            ("json_server", "JsonSocketServer", {"host": "0.0.0.0", "port": 9000}),
+        ):
+            component_class = COMPONENTS.resolve(name)
+            if component_class:
+                services[attribute] = component_class(**kwargs)
+                logger.info(f"{name} initialized")
+        return services
+    def setup_backend_services(self, services=None):
         logger.info("Setting up backend services...")
+        WebcamCapture = COMPONENTS.resolve("WebcamCapture")
+        StimulusController = COMPONENTS.resolve("StimulusController")
+        MainController = COMPONENTS.resolve("MainController")
         try:
-            if SESSION_MANAGER_AVAILABLE:
-                self.session_manager = SessionManager(base_recordings_dir="recordings")
-                logger.info("SessionManager initialized")
-            if SHIMMER_MANAGER_AVAILABLE:
-                self.shimmer_manager = ShimmerManager()
-                logger.info("ShimmerManager initialized")
-            if ANDROID_DEVICE_MANAGER_AVAILABLE:
-                self.android_device_manager = AndroidDeviceManager(server_port=9000)
-                logger.info("AndroidDeviceManager initialized")
-            if JSON_SOCKET_SERVER_AVAILABLE:
-                self.json_server = JsonSocketServer(host="0.0.0.0", port=9000)
-                logger.info("JsonSocketServer initialized")
-            if WEBCAM_CAPTURE_AVAILABLE:
+            if services is None:
+                services = self.create_backend_services()
+            for attribute, service in services.items():
+                setattr(self, attribute, service)
+            if WebcamCapture:
                 self.webcam_capture = WebcamCapture()
                 logger.info("WebcamCapture initialized")
-            if STIMULUS_CONTROLLER_AVAILABLE:
+            if StimulusController:
                 self.stimulus_controller = StimulusController()
                 logger.info("StimulusController initialized")
-            if MAIN_CONTROLLER_AVAILABLE:
+            if MainController:
                 self.main_controller = MainController()
                 if all(
                     [
@@ -151,39 +131,49 @@ class EnhancedApplicationWithWebUI:
             logger.error("No desktop UI components available")
             return False
         try:
-            self.main_window = MainWindow()
+            self.main_window = MainWindow(defer_backends=True)
             self.main_window.setWindowTitle(
                 "Multi-Sensor Recording System - UI + Web Dashboard"
             )
-            if WEB_UI_AVAILABLE:
-                self._add_web_dashboard_integration()
+            self._add_web_dashboard_integration()
             logger.info("Desktop UI components initialized successfully")
             return True
         except Exception as e:
             logger.error(f"Failed to initialize desktop UI: {e}")
             return False
-    def setup_web_dashboard(self):
-        if not WEB_UI_AVAILABLE:
+    def create_web_dashboard(self):
+        """Construct and start the dashboard server; safe off the GUI thread.
+
+        Controller signals are left unconnected so ``adopt_web_dashboard`` can
+        connect them from the GUI thread.
+        """
+        WebDashboardIntegration = COMPONENTS.resolve("WebDashboardIntegration")
+        if WebDashboardIntegration is None:
             logger.warning("Web UI not available, skipping web dashboard setup")
+            return None
+        web_integration = WebDashboardIntegration(
+            enable_web_ui=True,
+            web_port=5000,
+            main_controller=self.main_controller,
+            session_manager=self.session_manager,
+            shimmer_manager=self.shimmer_manager,
+            android_device_manager=self.android_device_manager,
+        )
+        if not web_integration.start_web_dashboard(connect_controller=False):
+            logger.error("Failed to start web dashboard")
+            return None
+        return web_integration
+    def adopt_web_dashboard(self, web_integration) -> bool:
+        if web_integration is None:
             return False
+        self.web_integration = web_integration
+        self.web_integration.connect_controller()
+        logger.info("Web dashboard started successfully with real application components")
+        self._connect_web_integration()
+        return True
+    def setup_web_dashboard(self):
         try:
-            self.web_integration = WebDashboardIntegration(
-                enable_web_ui=True,
-                web_port=5000,
-                main_controller=self.main_controller,
-                session_manager=self.session_manager,
-                shimmer_manager=self.shimmer_manager,
-                android_device_manager=self.android_device_manager,
-            )
-            if self.web_integration.start_web_dashboard():
-                logger.info(
-                    "Web dashboard started successfully with real application components"
-                )
-                self._connect_web_integration()
-                return True
-            else:
-                logger.error("Failed to start web dashboard")
-                return False
+            return self.adopt_web_dashboard(self.create_web_dashboard())
         except Exception as e:
             logger.error(f"Error setting up web dashboard: {e}")
             return False
@@ -280,7 +270,7 @@ class EnhancedApplicationWithWebUI:
                 self.main_window, "Web Dashboard", "Web dashboard is not running"
             )
     def _toggle_web_dashboard(self, enabled):
-        if not WEB_UI_AVAILABLE:
+        if COMPONENTS.resolve("WebDashboardIntegration") is None:
             QMessageBox.warning(
                 self.main_window,
                 "Web Dashboard",
@@ -296,39 +286,70 @@ class EnhancedApplicationWithWebUI:
             self.web_integration.stop_web_dashboard()
     def run(self):
         self.setup_application()
-        if not self.setup_backend_services():
-            logger.error(
-                "Failed to setup backend services, continuing with limited functionality"
-            )
         if not self.setup_desktop_ui():
             logger.error("Failed to setup desktop UI")
             return 1
-        web_success = self.setup_web_dashboard()
-        if web_success:
+        self.main_window.show()
+        logger.info("Main window displayed")
+        self.start_backend_loader()
+        logger.info("Starting PyQt event loop")
+        return self.app.exec_()
+    def start_backend_loader(self):
+        self.backend_loader = BackendLoader(
+            [
+                StartupTask("Loading backend and web components", load_components),
+                StartupTask(BACKEND_SERVICES_TASK, self.create_backend_services),
+            ],
+            parent=self.app,
+        )
+        attach_startup_progress(self.main_window, self.backend_loader)
+        self.backend_loader.loading_finished.connect(self.on_components_loaded)
+        self.backend_loader.start()
+    def on_components_loaded(self, results):
+        self.main_window.init_backends()
+        services = results.get(BACKEND_SERVICES_TASK)
+        if isinstance(services, Exception):
+            logger.error(f"Failed to create backend services: {services}")
+            services = {}
+        if not self.setup_backend_services(services):
+            logger.error(
+                "Failed to setup backend services, continuing with limited functionality"
+            )
+        self.web_loader = BackendLoader(
+            [StartupTask(WEB_DASHBOARD_TASK, self.create_web_dashboard)], parent=self.app
+        )
+        self.web_loader.loading_finished.connect(self.on_web_dashboard_loaded)
+        self.web_loader.start()
+    def on_web_dashboard_loaded(self, results):
+        web_integration = results.get(WEB_DASHBOARD_TASK)
+        if isinstance(web_integration, Exception):
+            logger.error(f"Error setting up web dashboard: {web_integration}")
+            web_integration = None
+        if self.adopt_web_dashboard(web_integration):
             logger.info(
                 "Application started with both desktop and web interfaces connected to real components"
             )
         else:
             logger.info("Application started with desktop interface only")
-        self.main_window.show()
-        logger.info("Main window displayed")
-        if web_success:
-            dashboard_url = self.web_integration.get_web_dashboard_url()
-            QMessageBox.information(
-                self.main_window,
-                "Multi-Sensor Recording System",
-                f"""Application started successfully!
+            return
+        dashboard_url = self.web_integration.get_web_dashboard_url()
+        QMessageBox.information(
+            self.main_window,
+            "Multi-Sensor Recording System",
+            f"""Application started successfully!
 
 Desktop UI: Running
 Web Dashboard: {dashboard_url}
 Connected Components: MainController, SessionManager, ShimmerManager, AndroidDeviceManager
 
 The web interface is connected to the same data sources as the desktop application.""",
-            )
-        logger.info("Starting PyQt event loop")
-        return self.app.exec_()
+        )
     def cleanup(self):
         logger.info("Cleaning up application resources...")
+        for loader in (self.backend_loader, self.web_loader):
+            if loader is not None:
+                loader.requestInterruption()
+                loader.wait(5000)
         if self.web_integration:
             self.web_integration.stop_web_dashboard()
             logger.info("Web dashboard stopped")
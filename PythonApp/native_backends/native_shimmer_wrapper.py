@@ -7,8 +7,10 @@ with fallback to pure Python implementation when native module is unavailable.
 
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Union
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal as sp_signal
 
 logger = logging.getLogger(__name__)
 
@@ -73,26 +75,102 @@ class ProcessingConfig:
     
     def __init__(self, sampling_rate: float = 128.0, enable_filtering: bool = True,
                  filter_cutoff: float = 5.0, enable_artifact_removal: bool = True,
-                 artifact_threshold: float = 100.0):
+                 artifact_threshold: float = 100.0, filter_order: int = 4,
+                 artifact_window: int = 129, artifact_mad_threshold: float = 3.5):
         self.sampling_rate = sampling_rate
         self.enable_filtering = enable_filtering
         self.filter_cutoff = filter_cutoff
         self.enable_artifact_removal = enable_artifact_removal
         self.artifact_threshold = artifact_threshold
+        # Used by the Python backend only
+        self.filter_order = filter_order
+        self.artifact_window = artifact_window
+        self.artifact_mad_threshold = artifact_mad_threshold
+
+
+# Scale factor turning a median absolute deviation into a Gaussian sigma
+MAD_TO_SIGMA = 1.4826
+
+
+class LowPassFilterBank:
+    """Butterworth low-pass filters over several channels with persistent state.
+    
+    Second-order sections run through ``scipy.signal.sosfilt`` and the
+    per-channel ``zi`` is carried from one call to the next, so a signal fed
+    in chunks of any size produces exactly the output of one call over the
+    whole signal. The state starts at the steady state of the first sample,
+    which avoids the step response a zero state would add.
+    """
+    
+    def __init__(self, sampling_rate: float, cutoff: float, order: int = 4, channels: int = 1):
+        if not 0 < cutoff < sampling_rate / 2.0:
+            raise ValueError(f"Cutoff {cutoff} Hz must lie between 0 and the Nyquist frequency {sampling_rate / 2.0} Hz")
+        self.sos = sp_signal.butter(order, cutoff, fs=sampling_rate, output="sos")
+        self.channels = channels
+        self.zi: Optional[np.ndarray] = None
+    
+    def reset(self):
+        """Forget the filter state; the next sample restarts at steady state."""
+        self.zi = None
+    
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Filter ``(n,)`` or ``(n, channels)`` samples, continuing from the last call."""
+        x = np.asarray(samples, dtype=np.float64)
+        squeeze = x.ndim == 1
+        if squeeze:
+            x = x[:, np.newaxis]
+        if x.shape[1] != self.channels:
+            raise ValueError(f"Expected {self.channels} channels, got {x.shape[1]}")
+        if not len(x):
+            return x[:, 0] if squeeze else x
+        if self.zi is None:
+            # (sections, 2, channels), scaled to the first sample of each channel
+            self.zi = sp_signal.sosfilt_zi(self.sos)[:, :, np.newaxis] * x[0]
+        y, self.zi = sp_signal.sosfilt(self.sos, x, axis=0, zi=self.zi)
+        return y[:, 0] if squeeze else y
+
+
+def rolling_median_mad(values: np.ndarray, window: int, block: int = 4096):
+    """Centred rolling median and median absolute deviation.
+    
+    The signal is reflected at both ends so every window is full, and rows
+    are evaluated a block at a time to bound the temporary window matrix.
+    """
+    half = window // 2
+    padded = np.pad(values, half, mode="reflect") if len(values) > 1 else np.repeat(values, 2 * half + 1)
+    windows = sliding_window_view(padded, 2 * half + 1)
+    median = np.empty(len(values))
+    mad = np.empty(len(values))
+    for start in range(0, len(values), block):
+        rows = windows[start:start + block]
+        median[start:start + block] = np.median(rows, axis=1)
+        mad[start:start + block] = np.median(np.abs(rows - median[start:start + block, np.newaxis]), axis=1)
+    return median, mad
+
+
+def _like_input(result: np.ndarray, original) -> Union[List[float], np.ndarray]:
+    return result if isinstance(original, np.ndarray) else result.tolist()
 
 
 class PythonShimmerProcessor:
     """Pure Python implementation of Shimmer data processor"""
     
+    # Accelerometer scaling, +/-2g range to m/s^2
+    ACCEL_SCALE = 4.0 / 65536.0 * 9.81
+    
     def __init__(self):
         self.config = ProcessingConfig()
-        self.filter_state = [0.0] * 4
+        self.gsr_filter = self._create_gsr_filter()
         self.total_processing_time_ms = 0.0
         self.packets_processed = 0
         
     def configure(self, config: ProcessingConfig):
         self.config = config
-        self.filter_state = [0.0] * 4
+        self.gsr_filter = self._create_gsr_filter()
+    
+    def _create_gsr_filter(self) -> LowPassFilterBank:
+        return LowPassFilterBank(self.config.sampling_rate, self.config.filter_cutoff,
+                                 self.config.filter_order)
         
     def process_raw_packet(self, raw_data: List[int]) -> SensorReading:
         start_time = time.perf_counter()
@@ -122,53 +200,105 @@ class PythonShimmerProcessor:
         reading.gsr_value = self._convert_gsr_raw_to_microsiemens(gsr_raw)
         reading.ppg_value = ppg_raw * 0.001
         
-        # Accelerometer scaling
-        accel_scale = 4.0 / 65536.0 * 9.81  # +/-2g range to m/s^2
-        reading.accel_x = accel_x_raw * accel_scale
-        reading.accel_y = accel_y_raw * accel_scale
-        reading.accel_z = accel_z_raw * accel_scale
+        reading.accel_x = accel_x_raw * self.ACCEL_SCALE
+        reading.accel_y = accel_y_raw * self.ACCEL_SCALE
+        reading.accel_z = accel_z_raw * self.ACCEL_SCALE
         
         # Battery level
         reading.battery_level = raw_data[20] if len(raw_data) > 20 else 100.0
         
-        # Apply filtering
+        # Apply filtering; one-sample chunks share the state used by batches
         if self.config.enable_filtering:
-            reading.gsr_value = self._apply_simple_filter(reading.gsr_value)
+            reading.gsr_value = float(self.gsr_filter.process(np.array([reading.gsr_value]))[0])
             
         self._update_performance_metrics(start_time)
         return reading
     
+    def process_batch_arrays(self, raw_packets: Sequence[Sequence[int]]) -> Dict[str, np.ndarray]:
+        """Parse and filter a batch of packets into one array per field.
+        
+        Produces the values ``process_raw_packet`` would for each packet in
+        turn, including the filter state carried across calls, with every
+        step vectorised over the batch. Packets shorter than 20 bytes give
+        default readings, as in the per-packet path.
+        """
+        start_time = time.perf_counter()
+        count = len(raw_packets)
+        columns = {name: np.zeros(count) for name in SensorReading().to_dict()}
+        columns["battery_level"].fill(100.0)
+        columns["timestamp"].fill(time.time() * 1000.0)
+        lengths = np.fromiter(map(len, raw_packets), dtype=np.int64, count=count)
+        valid = lengths >= 20
+        if count and valid.all() and (lengths == lengths[0]).all():
+            # Uniform packets convert in a single call
+            rows = np.array(raw_packets, dtype=np.int64)
+            if rows.shape[1] == 20:
+                rows = np.column_stack([rows, np.full(count, 100)])
+        elif valid.any():
+            rows = np.array(
+                [packet[:21] if len(packet) > 20 else list(packet[:20]) + [100]
+                 for packet, ok in zip(raw_packets, valid) if ok],
+                dtype=np.int64,
+            )
+        if valid.any():
+            words = (rows[:, 1:10:2] << 8) | rows[:, 0:10:2]
+            accel = np.where(words[:, 2:] > 32767, words[:, 2:] - 65536, words[:, 2:]) * self.ACCEL_SCALE
+            gsr = self._convert_gsr_array_to_microsiemens(words[:, 0])
+            if self.config.enable_filtering:
+                gsr = self.gsr_filter.process(gsr)
+            columns["gsr_value"][valid] = gsr
+            columns["ppg_value"][valid] = words[:, 1] * 0.001
+            columns["accel_x"][valid] = accel[:, 0]
+            columns["accel_y"][valid] = accel[:, 1]
+            columns["accel_z"][valid] = accel[:, 2]
+            columns["battery_level"][valid] = rows[:, 20]
+        self.total_processing_time_ms += (time.perf_counter() - start_time) * 1000.0
+        self.packets_processed += count
+        return columns
+    
     def process_batch(self, raw_packets: List[List[int]]) -> List[SensorReading]:
-        return [self.process_raw_packet(packet) for packet in raw_packets]
+        columns = self.process_batch_arrays(raw_packets)
+        names = list(columns)
+        return [SensorReading(**dict(zip(names, values)))
+                for values in zip(*(columns[name].tolist() for name in names))]
     
     def apply_low_pass_filter(self, signal: List[float], cutoff_freq: float) -> List[float]:
-        if not signal:
+        """First-order IIR low-pass over a whole signal, as the native module computes it.
+        
+        Runs as one ``scipy.signal.lfilter`` call whose initial condition
+        makes the output start at the first sample. For streaming data use
+        ``filter_chunk``, which keeps its state between calls.
+        """
+        if len(signal) == 0:
             return signal
-            
-        # Simple IIR low-pass filter
+        x = np.asarray(signal, dtype=np.float64)
         dt = 1.0 / self.config.sampling_rate
         alpha = dt / (dt + 1.0 / (2.0 * np.pi * cutoff_freq))
-        
-        filtered = [signal[0]]
-        for i in range(1, len(signal)):
-            filtered.append(alpha * signal[i] + (1.0 - alpha) * filtered[i-1])
-            
-        return filtered
+        filtered, _ = sp_signal.lfilter([alpha], [1.0, alpha - 1.0], x, axis=0, zi=[(1.0 - alpha) * x[0]])
+        return _like_input(filtered, signal)
+    
+    def filter_chunk(self, gsr_chunk: Union[List[float], np.ndarray]) -> Union[List[float], np.ndarray]:
+        """Low-pass the next chunk of a GSR stream with the persistent filter bank."""
+        return _like_input(self.gsr_filter.process(gsr_chunk), gsr_chunk)
     
     def remove_artifacts(self, gsr_signal: List[float]) -> List[float]:
+        """Replace outliers with the rolling median (Hampel filter).
+        
+        A sample is an artifact when it deviates from the median of the
+        centred ``artifact_window`` by more than ``artifact_mad_threshold``
+        robust standard deviations (1.4826 x MAD) and by more than
+        ``artifact_threshold``, which keeps flat stretches with a MAD of zero
+        untouched by small steps.
+        """
         if not self.config.enable_artifact_removal or len(gsr_signal) < 3:
             return gsr_signal
-            
-        clean_signal = gsr_signal.copy()
-        
-        for i in range(1, len(clean_signal) - 1):
-            diff_before = abs(clean_signal[i] - clean_signal[i-1])
-            diff_after = abs(clean_signal[i+1] - clean_signal[i])
-            
-            if diff_before > self.config.artifact_threshold or diff_after > self.config.artifact_threshold:
-                clean_signal[i] = (clean_signal[i-1] + clean_signal[i+1]) / 2.0
-                
-        return clean_signal
+        x = np.asarray(gsr_signal, dtype=np.float64)
+        window = min(self.config.artifact_window, 2 * len(x) - 1)
+        median, mad = rolling_median_mad(x, window)
+        deviation = np.abs(x - median)
+        artifacts = ((deviation > self.config.artifact_mad_threshold * MAD_TO_SIGMA * mad)
+                     & (deviation > self.config.artifact_threshold))
+        return _like_input(np.where(artifacts, median, x), gsr_signal)
     
     def get_average_processing_time_ms(self) -> float:
         return self.total_processing_time_ms / self.packets_processed if self.packets_processed > 0 else 0.0
@@ -190,11 +320,12 @@ class PythonShimmerProcessor:
         
         return max(0.0, min(100.0, conductance))
     
-    def _apply_simple_filter(self, value: float) -> float:
-        # Simple moving average filter
-        self.filter_state[0] = value * 0.1 + self.filter_state[1] * 0.9
-        self.filter_state[1:] = self.filter_state[:-1]
-        return self.filter_state[0]
+    def _convert_gsr_array_to_microsiemens(self, raw_values: np.ndarray) -> np.ndarray:
+        # Same operations as the scalar conversion, so results match exactly
+        voltage = (raw_values / 4096.0) * 3.0
+        with np.errstate(divide="ignore"):
+            conductance = np.where(voltage > 0, 1000000.0 / (40000.0 / voltage), 0.0)
+        return np.clip(conductance, 0.0, 100.0)
     
     def _update_performance_metrics(self, start_time: float):
         processing_time = (time.perf_counter() - start_time) * 1000.0
@@ -2,7 +2,6 @@ import base64
 import json
 import queue
 import socket
-import struct
 import threading
 import time
 import weakref
@@ -12,6 +11,15 @@ from enum import Enum, auto
 from typing import Any, Callable, Dict, List, Optional, Tuple
 from PyQt5.QtCore import QMutex, QMutexLocker, QThread, QTimer, pyqtSignal
 from ..utils.logging_config import get_logger
+from .link_quality import LinkQualityEstimator, PreviewProfile
+from .payload_compression import (
+    CompressionCodec,
+    CompressionError,
+    PayloadCompressor,
+    decode_frame_body,
+    encode_frame,
+    parse_length_header,
+)
 logger = get_logger(__name__)
 class MessagePriority(Enum):
     CRITICAL = 1
@@ -75,11 +83,14 @@ class RemoteDevice:
         self.heartbeat_timeout = 15.0
         self.streaming_quality = "medium"
         self.max_frame_rate = 15
+        self.preview_resolution = (640, 480)
+        self.link_quality = LinkQualityEstimator()
         self.last_frame_time = 0.0
         self.send_buffer_size = 64 * 1024
         self.recv_buffer_size = 64 * 1024
         self.consecutive_errors = 0
         self.max_consecutive_errors = 5
+        self.compressor: Optional[PayloadCompressor] = None
         logger.info(
             f"Enhanced RemoteDevice created: {device_id} @ {address[0]}:{address[1]}"
         )
@@ -93,17 +104,15 @@ class RemoteDevice:
             self.last_frame_time = current_time
             return True
         return False
-    def adapt_streaming_quality(self, network_latency: float, error_rate: float):
+    def adapt_streaming_quality(self) -> Optional[PreviewProfile]:
         with QMutexLocker(self.mutex):
-            if error_rate > 0.1 or network_latency > 200:
-                self.streaming_quality = "low"
-                self.max_frame_rate = 5
-            elif error_rate < 0.05 and network_latency < 50:
-                self.streaming_quality = "high"
-                self.max_frame_rate = 30
-            else:
-                self.streaming_quality = "medium"
-                self.max_frame_rate = 15
+            profile = self.link_quality.select_profile(self.streaming_quality)
+            if profile.name == self.streaming_quality:
+                return None
+            self.streaming_quality = profile.name
+            self.max_frame_rate = profile.frame_rate
+            self.preview_resolution = (profile.width, profile.height)
+            return profile
     def queue_message(self, message: NetworkMessage):
         priority_value = message.priority.value
         self.outbound_queue.put((priority_value, time.time(), message))
@@ -115,26 +124,29 @@ class RemoteDevice:
             return None
     def update_latency(self, latency: float):
         with QMutexLocker(self.mutex):
+            estimator = self.link_quality
+            estimator.update(latency)
             self.stats.latency_samples.append(latency)
-            self.stats.min_latency = min(self.stats.min_latency, latency)
-            self.stats.max_latency = max(self.stats.max_latency, latency)
-            if self.stats.latency_samples:
-                self.stats.average_latency = sum(self.stats.latency_samples) / len(
-                    self.stats.latency_samples
+            self.stats.min_latency = estimator.min_latency
+            self.stats.max_latency = estimator.max_latency
+            self.stats.average_latency = estimator.smoothed_latency
+            self.stats.jitter = estimator.jitter
+            if estimator.packets_expected:
+                self.stats.packet_loss_rate = estimator.packet_loss * 100
+            elif self.stats.ping_count > 0:
+                self.stats.packet_loss_rate = max(
+                    0,
+                    (self.stats.ping_count - self.stats.pong_count)
+                    / self.stats.ping_count
+                    * 100,
                 )
-                if len(self.stats.latency_samples) >= 2:
-                    variance = sum(
-                        (x - self.stats.average_latency) ** 2
-                        for x in self.stats.latency_samples
-                    ) / len(self.stats.latency_samples)
-                    self.stats.jitter = variance**0.5
-                if self.stats.ping_count > 0:
-                    self.stats.packet_loss_rate = max(
-                        0,
-                        (self.stats.ping_count - self.stats.pong_count)
-                        / self.stats.ping_count
-                        * 100,
-                    )
+    def record_sequence(self, sequence: int):
+        with QMutexLocker(self.mutex):
+            self.link_quality.record_sequence(sequence)
+            self.stats.packet_loss_rate = self.link_quality.packet_loss * 100
+    def get_health_score(self) -> float:
+        with QMutexLocker(self.mutex):
+            return self.link_quality.health_score()
     def update_ping_stats(self, is_response: bool = False):
         with QMutexLocker(self.mutex):
             if is_response:
@@ -158,8 +170,11 @@ class RemoteDevice:
                 "state": self.state.name,
                 "capabilities": self.capabilities,
                 "address": f"{self.address[0]}:{self.address[1]}",
-                "is_alive": self.is_alive(),
+                "is_alive": time.time() - self.last_heartbeat < self.heartbeat_timeout,
                 "streaming_quality": self.streaming_quality,
+                "preview_frame_rate": self.max_frame_rate,
+                "preview_resolution": list(self.preview_resolution),
+                "link_quality": self.link_quality.snapshot(),
                 "stats": {
                     "messages_sent": self.stats.messages_sent,
                     "messages_received": self.stats.messages_received,
@@ -182,6 +197,9 @@ class RemoteDevice:
                     ),
                     "latency_samples": len(self.stats.latency_samples),
                 },
+                "compression": (
+                    self.compressor.get_statistics() if self.compressor else None
+                ),
             }
 class DeviceServer(QThread):
     device_connected = pyqtSignal(str, dict)
@@ -228,6 +246,8 @@ class DeviceServer(QThread):
         }
         self.enable_compression = True
         self.compression_threshold = 1024
+        self.compression_codecs: Optional[List[str]] = None
+        self.uncompressed_message_types = {"handshake_ack"}
         logger.info(f"Enhanced Device Server initialized: {host}:{port}")
     def start_server(self):
         if self.running:
@@ -314,6 +334,9 @@ class DeviceServer(QThread):
             device = RemoteDevice(
                 device_id, capabilities, client_socket, address
             )
+            compression_info = self.negotiate_compression(
+                device, handshake_msg.get("compression")
+            )
             with QMutexLocker(self.devices_mutex):
                 self.devices[device_id] = device
                 self.client_handlers[device_id] = threading.current_thread()
@@ -323,6 +346,7 @@ class DeviceServer(QThread):
                 "server_name": "Enhanced Device Server",
                 "server_version": "1.0.0",
                 "compatible": True,
+                "compression": compression_info,
                 "timestamp": time.time(),
             }
             self.send_message(device, ack_msg, MessagePriority.CRITICAL)
@@ -383,15 +407,39 @@ class DeviceServer(QThread):
     ) -> bool:
         try:
             json_data = json.dumps(message.payload).encode("utf-8")
-            if self.enable_compression and len(json_data) > self.compression_threshold:
-                pass
-            length_header = struct.pack(">I", len(json_data))
-            device.client_socket.sendall(length_header + json_data)
-            device.stats.bytes_sent += len(length_header) + len(json_data)
+            codec, body = CompressionCodec.NONE, json_data
+            if (
+                self.enable_compression
+                and device.compressor is not None
+                and message.type not in self.uncompressed_message_types
+            ):
+                codec, body = device.compressor.encode(message.type, json_data)
+            frame = encode_frame(codec, body)
+            device.client_socket.sendall(frame)
+            device.stats.bytes_sent += len(frame)
             return True
         except Exception as e:
             logger.error(f"Failed to send message to {device.device_id}: {e}")
             return False
+    def negotiate_compression(
+        self, device: RemoteDevice, peer_compression: Any
+    ) -> Dict[str, Any]:
+        if isinstance(peer_compression, dict):
+            peer_codecs = peer_compression.get("codecs", [])
+        elif isinstance(peer_compression, list):
+            peer_codecs = peer_compression
+        else:
+            peer_codecs = []
+        if not self.enable_compression or not peer_codecs:
+            return {"codecs": [], "threshold": self.compression_threshold}
+        compressor = PayloadCompressor(
+            codecs=self.compression_codecs, threshold=self.compression_threshold
+        )
+        negotiated = compressor.negotiate(peer_codecs)
+        if negotiated:
+            device.compressor = compressor
+            logger.info(f"Compression negotiated with {device.device_id}: {negotiated}")
+        return compressor.capabilities()
     def receive_message(
         self, sock: socket.socket, timeout: float = 1.0
     ) -> Optional[Dict[str, Any]]:
@@ -400,15 +448,19 @@ class DeviceServer(QThread):
             length_data = self.recv_exact(sock, 4)
             if not length_data:
                 return None
-            message_length = struct.unpack(">I", length_data)[0]
+            encoded, message_length = parse_length_header(length_data)
             if message_length <= 0 or message_length > 10 * 1024 * 1024:
                 raise ValueError(f"Invalid message length: {message_length}")
-            json_data = self.recv_exact(sock, message_length)
-            if not json_data:
+            body = self.recv_exact(sock, message_length)
+            if not body:
                 return None
+            json_data = decode_frame_body(encoded, body)
             return json.loads(json_data.decode("utf-8"))
         except socket.timeout:
             return None
+        except CompressionError as e:
+            logger.error(f"Compressed frame decode error: {e}")
+            return None
         except Exception as e:
             logger.error(f"Receive message error: {e}")
             return None
@@ -458,12 +510,29 @@ class DeviceServer(QThread):
             self.preview_frame_received.emit(
                 device.device_id, frame_type, image_bytes, metadata
             )
-            error_rate = device.stats.error_count / max(
-                1, device.stats.messages_received
-            )
-            device.adapt_streaming_quality(device.stats.average_latency, error_rate)
+            self.update_preview_profile(device)
         except Exception as e:
             logger.error(f"Preview frame processing error: {e}")
+    def update_preview_profile(self, device: RemoteDevice) -> bool:
+        profile = device.adapt_streaming_quality()
+        if profile is None:
+            return False
+        score = device.get_health_score()
+        logger.info(
+            f"Link quality for {device.device_id} is {score:.2f}, requesting "
+            f"{profile.name} preview ({profile.width}x{profile.height} @ {profile.frame_rate} fps)"
+        )
+        self.send_command_to_device(
+            device.device_id,
+            "set_preview_quality",
+            quality=profile.name,
+            frame_rate=profile.frame_rate,
+            width=profile.width,
+            height=profile.height,
+        )
+        self.streaming_quality_changed.emit(device.device_id, profile.name)
+        self.connection_quality_changed.emit(device.device_id, score)
+        return True
     def handle_heartbeat(self, device: RemoteDevice, message: Dict[str, Any]):
         response = NetworkMessage(
             type="heartbeat_response",
@@ -593,6 +662,7 @@ class DeviceServer(QThread):
                     "ping_count": device.stats.ping_count,
                     "pong_count": device.stats.pong_count,
                     "sample_count": len(device.stats.latency_samples),
+                    "link_quality": device.link_quality.snapshot(),
                     "recent_samples": (
                         list(device.stats.latency_samples)[-10:]
                         if device.stats.latency_samples
@@ -637,7 +707,9 @@ class DeviceServer(QThread):
                 device.queue_message(response)
                 ping_latency = (current_time - ping_timestamp) * 1000
                 device.update_latency(ping_latency / 2)
+                device.record_sequence(sequence)
                 device.update_ping_stats(is_response=True)
+                self.update_preview_profile(device)
                 logger.debug(
                     f"Responded to ping {ping_id} from {device.device_id}, RTT: {ping_latency:.2f}ms"
                 )
@@ -0,0 +1,163 @@
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import numpy as np
+@dataclass(frozen=True)
+class PreviewProfile:
+    name: str
+    frame_rate: int
+    width: int
+    height: int
+    min_score: float
+PREVIEW_PROFILES = (
+    PreviewProfile("high", 30, 1280, 720, 0.8),
+    PreviewProfile("medium", 15, 640, 480, 0.5),
+    PreviewProfile("low", 5, 320, 240, 0.0),
+)
+def _default_bucket_edges() -> np.ndarray:
+    return np.concatenate(([0.0], np.geomspace(0.1, 10_000.0, 63)))
+class LinkQualityEstimator:
+    """Constant-time link statistics for one device connection.
+
+    RTT is smoothed with an EWMA (RFC 6298 gains), jitter follows the RFC 3550
+    interarrival estimator, percentiles come from a fixed log-spaced histogram
+    and loss is derived from sequence-number gaps, so every update is O(1)
+    regardless of how long the device has been connected.
+    """
+    def __init__(
+        self,
+        rtt_gain: float = 1.0 / 8.0,
+        jitter_gain: float = 1.0 / 16.0,
+        bucket_edges_ms: Optional[np.ndarray] = None,
+        target_latency_ms: float = 30.0,
+        max_latency_ms: float = 300.0,
+        max_jitter_ms: float = 50.0,
+        max_loss: float = 0.1,
+    ):
+        self.rtt_gain = rtt_gain
+        self.jitter_gain = jitter_gain
+        self.bucket_edges = (
+            np.asarray(bucket_edges_ms, dtype=np.float64)
+            if bucket_edges_ms is not None
+            else _default_bucket_edges()
+        )
+        self.histogram = np.zeros(len(self.bucket_edges), dtype=np.int64)
+        self.target_latency_ms = target_latency_ms
+        self.max_latency_ms = max_latency_ms
+        self.max_jitter_ms = max_jitter_ms
+        self.max_loss = max_loss
+        self.reset()
+    def reset(self):
+        self.histogram[:] = 0
+        self.samples = 0
+        self.smoothed_latency = 0.0
+        self.latency_variation = 0.0
+        self.jitter = 0.0
+        self.min_latency = math.inf
+        self.max_latency = 0.0
+        self.last_latency: Optional[float] = None
+        self.base_sequence: Optional[int] = None
+        self.highest_sequence: Optional[int] = None
+        self.packets_received = 0
+    def update(self, latency_ms: float):
+        if latency_ms < 0 or math.isnan(latency_ms):
+            return
+        if self.samples == 0:
+            self.smoothed_latency = latency_ms
+            self.latency_variation = latency_ms / 2.0
+        else:
+            error = latency_ms - self.smoothed_latency
+            self.smoothed_latency += self.rtt_gain * error
+            self.latency_variation += 0.25 * (abs(error) - self.latency_variation)
+        if self.last_latency is not None:
+            delta = abs(latency_ms - self.last_latency)
+            self.jitter += (delta - self.jitter) * self.jitter_gain
+        self.last_latency = latency_ms
+        self.min_latency = min(self.min_latency, latency_ms)
+        self.max_latency = max(self.max_latency, latency_ms)
+        bucket = int(np.searchsorted(self.bucket_edges, latency_ms, side="right")) - 1
+        self.histogram[max(bucket, 0)] += 1
+        self.samples += 1
+    def record_sequence(self, sequence: int):
+        if self.base_sequence is None:
+            self.base_sequence = sequence
+            self.highest_sequence = sequence
+        elif sequence > self.highest_sequence:
+            self.highest_sequence = sequence
+        elif sequence < self.base_sequence:
+            self.base_sequence = sequence
+        self.packets_received += 1
+    @property
+    def packets_expected(self) -> int:
+        if self.base_sequence is None:
+            return 0
+        return self.highest_sequence - self.base_sequence + 1
+    @property
+    def packet_loss(self) -> float:
+        expected = self.packets_expected
+        if expected <= 0:
+            return 0.0
+        return max(0.0, (expected - self.packets_received) / expected)
+    def percentile(self, p: float) -> float:
+        if self.samples == 0:
+            return 0.0
+        rank = min(max(p, 0.0), 100.0) / 100.0 * self.samples
+        cumulative = np.cumsum(self.histogram)
+        bucket = int(np.searchsorted(cumulative, max(rank, 1), side="left"))
+        lower = self.bucket_edges[bucket]
+        upper = (
+            self.bucket_edges[bucket + 1]
+            if bucket + 1 < len(self.bucket_edges)
+            else max(self.max_latency, lower)
+        )
+        previous = cumulative[bucket - 1] if bucket > 0 else 0
+        in_bucket = self.histogram[bucket]
+        fraction = (rank - previous) / in_bucket if in_bucket else 0.0
+        value = lower + (upper - lower) * min(max(fraction, 0.0), 1.0)
+        return float(min(max(value, self.min_latency), self.max_latency))
+    def health_score(self) -> float:
+        if self.samples == 0 and self.packets_received == 0:
+            # Nothing measured yet: stay on the medium profile until samples arrive
+            return PREVIEW_PROFILES[1].min_score
+        span = max(self.max_latency_ms - self.target_latency_ms, 1e-9)
+        latency_score = 1.0 - (self.smoothed_latency - self.target_latency_ms) / span
+        jitter_score = 1.0 - self.jitter / self.max_jitter_ms
+        loss_score = 1.0 - self.packet_loss / self.max_loss
+        score = (
+            0.4 * min(max(latency_score, 0.0), 1.0)
+            + 0.2 * min(max(jitter_score, 0.0), 1.0)
+            + 0.4 * min(max(loss_score, 0.0), 1.0)
+        )
+        if self.packet_loss >= self.max_loss or self.smoothed_latency >= self.max_latency_ms:
+            score = min(score, PREVIEW_PROFILES[1].min_score - 0.01)
+        return round(score, 4)
+    def select_profile(
+        self, current: Optional[str] = None, hysteresis: float = 0.05
+    ) -> PreviewProfile:
+        score = self.health_score()
+        for profile in PREVIEW_PROFILES:
+            threshold = profile.min_score
+            if current is not None and profile.name != current and threshold > 0:
+                current_rank = next(
+                    (i for i, p in enumerate(PREVIEW_PROFILES) if p.name == current), None
+                )
+                if current_rank is not None and PREVIEW_PROFILES.index(profile) < current_rank:
+                    threshold += hysteresis
+            if score >= threshold:
+                return profile
+        return PREVIEW_PROFILES[-1]
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "smoothed_latency": round(self.smoothed_latency, 3),
+            "jitter": round(self.jitter, 3),
+            "min_latency": 0.0 if self.min_latency == math.inf else round(self.min_latency, 3),
+            "max_latency": round(self.max_latency, 3),
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "packets_expected": self.packets_expected,
+            "packets_received": self.packets_received,
+            "packet_loss": round(self.packet_loss, 4),
+            "health_score": self.health_score(),
+        }
@@ -7,50 +7,84 @@ real-time monitoring and analysis.
 """
 
 import logging
+import threading
 import time
 from typing import Dict, Optional, List, Any
 from dataclasses import dataclass
 import numpy as np
 
+class MockPyLSL:
+    """Stand-in for pylsl used when the library is missing and in tests.
+
+    Outlets record what they are given so tests can check how samples were
+    batched: ``samples`` holds single pushes, ``chunks`` the pushed arrays,
+    ``chunk_sizes`` their lengths and ``push_times`` the ``local_clock`` value
+    at each push.
+    """
+    IRREGULAR_RATE = 0.0
+    
+    @staticmethod
+    def local_clock():
+        return time.monotonic()
+    
+    class StreamInfo:
+        def __init__(self, name, type, channel_count, nominal_srate, channel_format='float32', source_id=''):
+            self.name = name
+            self.type = type
+            self.channel_count = channel_count
+            self.nominal_srate = nominal_srate
+            self.channel_format = channel_format
+            self.source_id = source_id
+            
+        def desc(self):
+            return MockPyLSL.XMLElement()
+    
+    class StreamOutlet:
+        def __init__(self, info):
+            self.info = info
+            self.samples: List[Any] = []
+            self.chunks: List[Any] = []
+            self.chunk_timestamps: List[Any] = []
+            self.chunk_sizes: List[int] = []
+            self.push_times: List[float] = []
+            
+        def push_sample(self, data, timestamp=None):
+            self.samples.append((list(data), timestamp))
+            
+        def push_chunk(self, data, timestamps=None):
+            # The caller may reuse its buffer once push_chunk returns, as with
+            # pylsl, so keep a copy
+            self.chunks.append(np.array(data, copy=True))
+            self.chunk_timestamps.append(None if timestamps is None else np.array(timestamps, copy=True))
+            self.chunk_sizes.append(len(data))
+            self.push_times.append(MockPyLSL.local_clock())
+    
+    class XMLElement:
+        def append_child(self, name):
+            return MockPyLSL.XMLElement()
+            
+        def append_child_value(self, name, value):
+            pass
+
+
 # Try to import pylsl, with fallback to mock implementation
 LSL_AVAILABLE = False
 try:
     import pylsl
     LSL_AVAILABLE = True
 except (ImportError, RuntimeError):
-    # Create mock pylsl for when the library isn't available
-    class MockPyLSL:
-        IRREGULAR_RATE = 0.0
-        
-        class StreamInfo:
-            def __init__(self, name, type, channel_count, nominal_srate, channel_format='float32', source_id=''):
-                self.name = name
-                self.type = type
-                self.channel_count = channel_count
-                self.nominal_srate = nominal_srate
-                
-            def desc(self):
-                return MockPyLSL.XMLElement()
-        
-        class StreamOutlet:
-            def __init__(self, info):
-                self.info = info
-                
-            def push_sample(self, data, timestamp=None):
-                pass  # Mock implementation
-                
-            def push_chunk(self, data, timestamps=None):
-                pass  # Mock implementation
-        
-        class XMLElement:
-            def append_child(self, name):
-                return MockPyLSL.XMLElement()
-                
-            def append_child_value(self, name, value):
-                pass
-    
     pylsl = MockPyLSL()
 
+# NumPy dtypes for the numeric LSL channel formats that can be batched
+CHANNEL_FORMAT_DTYPES = {
+    'float32': np.float32,
+    'double64': np.float64,
+    'int64': np.int64,
+    'int32': np.int32,
+    'int16': np.int16,
+    'int8': np.int8,
+}
+
 
 @dataclass
 class LSLStreamConfig:
@@ -65,20 +99,166 @@ class LSLStreamConfig:
     channel_units: Optional[List[str]] = None
 
 
+def _as_chunk(data: Any, channel_count: int, dtype: np.dtype) -> np.ndarray:
+    """Return ``data`` as a C-contiguous ``(n, channel_count)`` array of ``dtype``.
+
+    Arrays that already have that layout are returned as-is, without a copy.
+    """
+    array = np.asarray(data)
+    if array.ndim == 1 and array.shape[0] == channel_count:
+        array = array.reshape(1, channel_count)
+    if array.ndim != 2 or array.shape[1] != channel_count or array.shape[0] == 0:
+        raise ValueError(f"Expected an (n, {channel_count}) array, got shape {array.shape}")
+    if array.dtype != dtype or not array.flags.c_contiguous:
+        array = np.ascontiguousarray(array, dtype=dtype)
+    return array
+
+
+class BatchingOutlet:
+    """Buffers samples for one LSL outlet and pushes them as contiguous chunks.
+
+    Samples are written into a preallocated ``(max_samples, channels)`` array
+    next to a float64 timestamp array, so appending one is a row assignment
+    instead of a Python list and a network packet per sample. The buffer goes
+    out in a single ``push_chunk`` call once it is full or once its oldest
+    sample is ``max_latency`` seconds old. Appends check the deadline
+    themselves; ``flush_if_due`` covers streams that go quiet, and
+    ``LSLStreamer`` calls it from its flusher thread.
+
+    Samples are stamped with the LSL clock when appended, so batching delays
+    delivery but does not shift the recorded acquisition times. pylsl copies
+    chunk data into its send queue, which is what makes reusing the buffer
+    after a push safe.
+    """
+    
+    def __init__(self, outlet: Any, channel_count: int, max_samples: int = 64, max_latency: float = 0.010,
+                 dtype: Any = np.float32, clock=None, on_pending=None):
+        if max_samples < 1:
+            raise ValueError("max_samples must be at least 1")
+        self.outlet = outlet
+        self.channel_count = channel_count
+        self.max_samples = max_samples
+        self.max_latency = max_latency
+        self.dtype = np.dtype(dtype)
+        self.clock = clock or getattr(pylsl, "local_clock", time.monotonic)
+        self.on_pending = on_pending
+        self.samples_pushed = 0
+        self.chunks_pushed = 0
+        self._data = np.zeros((max_samples, channel_count), dtype=self.dtype)
+        self._timestamps = np.zeros(max_samples, dtype=np.float64)
+        self._count = 0
+        self._deadline: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def pending(self) -> int:
+        """Number of samples waiting in the buffer."""
+        return self._count
+    
+    @property
+    def deadline(self) -> Optional[float]:
+        """Clock time by which the buffered samples must be pushed, if any."""
+        return self._deadline
+    
+    def append(self, sample: Any, timestamp: Optional[float] = None) -> None:
+        """Buffer one sample, pushing the buffer if it is full or overdue."""
+        if len(sample) != self.channel_count:
+            raise ValueError(f"Data length {len(sample)} doesn't match channel count {self.channel_count}")
+        now = self.clock()
+        first = False
+        with self._lock:
+            index = self._count
+            self._data[index] = sample
+            self._timestamps[index] = now if timestamp is None else timestamp
+            self._count = index + 1
+            if index == 0:
+                self._deadline = now + self.max_latency
+                first = True
+            if self._count == self.max_samples or now >= self._deadline:
+                self._flush_locked()
+                first = False
+        if first and self.on_pending is not None:
+            self.on_pending(self)
+    
+    def push_array(self, data: Any, timestamps: Optional[Any] = None) -> int:
+        """Push an ``(n, channels)`` array straight to the outlet.
+
+        Buffered samples are flushed first so ordering is kept. A C-contiguous
+        array of the outlet dtype is handed to ``push_chunk`` without copying.
+        Without ``timestamps`` LSL stamps the chunk itself on arrival.
+        """
+        array = _as_chunk(data, self.channel_count, self.dtype)
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=np.float64)
+            if timestamps.shape != (len(array),):
+                raise ValueError(f"Expected {len(array)} timestamps, got shape {timestamps.shape}")
+        with self._lock:
+            self._flush_locked()
+            if timestamps is not None:
+                self.outlet.push_chunk(array, timestamps)
+            else:
+                self.outlet.push_chunk(array)
+            self.samples_pushed += len(array)
+            self.chunks_pushed += 1
+        return len(array)
+    
+    def flush(self) -> int:
+        """Push any buffered samples now and return how many were pushed."""
+        with self._lock:
+            return self._flush_locked()
+    
+    def flush_if_due(self) -> int:
+        """Push the buffer if its oldest sample has reached ``max_latency``."""
+        with self._lock:
+            if self._count and self.clock() >= self._deadline:
+                return self._flush_locked()
+            return 0
+    
+    def _flush_locked(self) -> int:
+        count = self._count
+        if not count:
+            return 0
+        try:
+            # Row slices of a C-ordered array are contiguous views
+            self.outlet.push_chunk(self._data[:count], self._timestamps[:count])
+        finally:
+            self._count = 0
+            self._deadline = None
+        self.samples_pushed += count
+        self.chunks_pushed += 1
+        return count
+
+
 class LSLStreamer:
-    """Manages LSL outlet streams for real-time sensor data broadcasting."""
+    """Manages LSL outlet streams for real-time sensor data broadcasting.
+
+    Streams that receive high-rate per-sample data can be switched to batched
+    delivery with ``enable_batching``; ``push_sample`` and ``push_chunk`` then
+    go through a ``BatchingOutlet`` and a flusher thread enforces the latency
+    bound. ``backend`` replaces the pylsl module, e.g. with ``MockPyLSL``.
+    """
     
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(self, logger: Optional[logging.Logger] = None, backend: Any = None):
         self.logger = logger or logging.getLogger(__name__)
+        self.backend = backend if backend is not None else pylsl
         self.outlets: Dict[str, Any] = {}
         self.stream_configs: Dict[str, LSLStreamConfig] = {}
-        self.is_enabled = LSL_AVAILABLE
+        self.batchers: Dict[str, BatchingOutlet] = {}
+        self.is_enabled = LSL_AVAILABLE or backend is not None
+        self._clock = getattr(self.backend, "local_clock", time.monotonic)
+        self._flush_condition = threading.Condition()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._flush_stop = False
         
-        if not LSL_AVAILABLE:
+        if not self.is_enabled:
             self.logger.warning("LSL (pylsl) not available - LSL streaming disabled")
         else:
             self.logger.info("LSL integration initialized successfully")
     
+    def local_clock(self) -> float:
+        """Current time on the LSL clock used to stamp samples."""
+        return self._clock()
+    
     def create_outlet(self, stream_id: str, config: LSLStreamConfig) -> bool:
         """Create a new LSL outlet stream."""
         if not self.is_enabled:
@@ -87,7 +267,7 @@ class LSLStreamer:
         
         try:
             # Create stream info
-            info = pylsl.StreamInfo(
+            info = self.backend.StreamInfo(
                 name=config.name,
                 type=config.type,
                 channel_count=config.channel_count,
@@ -118,7 +298,7 @@ class LSLStreamer:
             acquisition.append_child_value("model", "BucikaGSR")
             
             # Create outlet
-            outlet = pylsl.StreamOutlet(info)
+            outlet = self.backend.StreamOutlet(info)
             
             self.outlets[stream_id] = outlet
             self.stream_configs[stream_id] = config
@@ -135,6 +315,18 @@ class LSLStreamer:
         if not self.is_enabled or stream_id not in self.outlets:
             return False
         
+        batcher = self.batchers.get(stream_id)
+        if batcher is not None:
+            try:
+                batcher.append(data, timestamp)
+                return True
+            except ValueError as e:
+                self.logger.warning(str(e))
+                return False
+            except Exception as e:
+                self.logger.error(f"Failed to push sample to LSL stream {stream_id}: {e}")
+                return False
+        
         try:
             outlet = self.outlets[stream_id]
             config = self.stream_configs[stream_id]
@@ -161,6 +353,9 @@ class LSLStreamer:
         if not self.is_enabled or stream_id not in self.outlets:
             return False
         
+        if stream_id in self.batchers or isinstance(data, np.ndarray):
+            return self.push_array(stream_id, data, timestamps)
+        
         try:
             outlet = self.outlets[stream_id]
             config = self.stream_configs[stream_id]
@@ -182,8 +377,136 @@ class LSLStreamer:
             self.logger.error(f"Failed to push chunk to LSL stream {stream_id}: {e}")
             return False
     
+    def push_array(self, stream_id: str, data: Any, timestamps: Optional[Any] = None) -> bool:
+        """Push an ``(n, channels)`` NumPy array in one ``push_chunk`` call.
+
+        A C-contiguous array in the stream's channel format is passed to the
+        outlet without being copied. On a batched stream any buffered samples
+        are pushed first.
+        """
+        if not self.is_enabled or stream_id not in self.outlets:
+            return False
+        
+        try:
+            batcher = self.batchers.get(stream_id)
+            if batcher is not None:
+                batcher.push_array(data, timestamps)
+                return True
+            
+            config = self.stream_configs[stream_id]
+            dtype = np.dtype(CHANNEL_FORMAT_DTYPES.get(config.channel_format, np.float32))
+            array = _as_chunk(data, config.channel_count, dtype)
+            outlet = self.outlets[stream_id]
+            if timestamps is not None:
+                outlet.push_chunk(array, np.asarray(timestamps, dtype=np.float64))
+            else:
+                outlet.push_chunk(array)
+            return True
+            
+        except ValueError as e:
+            self.logger.warning(f"Invalid data format for stream {stream_id}: {e}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Failed to push array to LSL stream {stream_id}: {e}")
+            return False
+    
+    def enable_batching(self, stream_id: str, max_samples: int = 64, max_latency: float = 0.010) -> bool:
+        """Buffer samples of ``stream_id`` and push them in chunks.
+
+        The buffer is pushed when it holds ``max_samples`` samples or when its
+        oldest sample is ``max_latency`` seconds old, whichever comes first.
+        """
+        if not self.is_enabled or stream_id not in self.outlets:
+            return False
+        
+        config = self.stream_configs[stream_id]
+        dtype = CHANNEL_FORMAT_DTYPES.get(config.channel_format)
+        if dtype is None:
+            self.logger.warning(f"Cannot batch LSL stream {stream_id} with channel format {config.channel_format}")
+            return False
+        
+        self.disable_batching(stream_id)
+        self.batchers[stream_id] = BatchingOutlet(
+            self.outlets[stream_id],
+            config.channel_count,
+            max_samples=max_samples,
+            max_latency=max_latency,
+            dtype=dtype,
+            clock=self._clock,
+            on_pending=self._wake_flusher
+        )
+        self._start_flusher()
+        self.logger.info(f"Batching LSL stream {stream_id}: up to {max_samples} samples or {max_latency * 1000:.1f} ms")
+        return True
+    
+    def disable_batching(self, stream_id: str) -> bool:
+        """Flush and stop batching ``stream_id``; later samples are pushed singly."""
+        batcher = self.batchers.pop(stream_id, None)
+        if batcher is None:
+            return False
+        
+        try:
+            batcher.flush()
+        except Exception as e:
+            self.logger.error(f"Failed to flush LSL stream {stream_id}: {e}")
+        return True
+    
+    def flush(self, stream_id: Optional[str] = None) -> int:
+        """Push buffered samples of one or all batched streams immediately."""
+        stream_ids = [stream_id] if stream_id is not None else list(self.batchers.keys())
+        pushed = 0
+        for sid in stream_ids:
+            batcher = self.batchers.get(sid)
+            if batcher is None:
+                continue
+            try:
+                pushed += batcher.flush()
+            except Exception as e:
+                self.logger.error(f"Failed to flush LSL stream {sid}: {e}")
+        return pushed
+    
+    def _wake_flusher(self, batcher: BatchingOutlet):
+        with self._flush_condition:
+            self._flush_condition.notify()
+    
+    def _start_flusher(self):
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        self._flush_stop = False
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="lsl-batch-flusher", daemon=True)
+        self._flush_thread.start()
+    
+    def _stop_flusher(self):
+        thread = self._flush_thread
+        if thread is None:
+            return
+        with self._flush_condition:
+            self._flush_stop = True
+            self._flush_condition.notify()
+        thread.join(timeout=1.0)
+        self._flush_thread = None
+    
+    def _flush_loop(self):
+        """Push buffers whose deadline passes while no new samples arrive."""
+        with self._flush_condition:
+            while not self._flush_stop:
+                deadlines = [b.deadline for b in list(self.batchers.values()) if b.deadline is not None]
+                if not deadlines:
+                    self._flush_condition.wait()
+                    continue
+                delay = min(deadlines) - self._clock()
+                if delay > 0:
+                    self._flush_condition.wait(delay)
+                    continue
+                for stream_id, batcher in list(self.batchers.items()):
+                    try:
+                        batcher.flush_if_due()
+                    except Exception as e:
+                        self.logger.error(f"Failed to flush LSL stream {stream_id}: {e}")
+    
     def remove_outlet(self, stream_id: str) -> bool:
         """Remove an LSL outlet stream."""
+        self.disable_batching(stream_id)
         if stream_id in self.outlets:
             try:
                 # LSL outlets are automatically cleaned up when they go out of scope
@@ -204,6 +527,7 @@ class LSLStreamer:
         """Clean up all LSL outlets."""
         for stream_id in list(self.outlets.keys()):
             self.remove_outlet(stream_id)
+        self._stop_flusher()
         self.logger.info("LSL integration cleaned up")
 
 
@@ -264,12 +588,20 @@ class DefaultLSLStreams:
 
 
 # Convenience functions for quick LSL integration
-def create_shimmer_lsl_outlet(device_id: str, sampling_rate: float = 128.0, logger: Optional[logging.Logger] = None) -> Optional[LSLStreamer]:
-    """Create and configure LSL outlet for Shimmer GSR data."""
+def create_shimmer_lsl_outlet(device_id: str, sampling_rate: float = 128.0, logger: Optional[logging.Logger] = None,
+                              max_latency: Optional[float] = 0.010) -> Optional[LSLStreamer]:
+    """Create and configure LSL outlet for Shimmer GSR data.
+
+    Samples are batched with at most ``max_latency`` seconds of delay; pass
+    ``None`` to push every sample individually.
+    """
     streamer = LSLStreamer(logger)
     config = DefaultLSLStreams.shimmer_gsr_stream(device_id, sampling_rate)
+    stream_id = f"shimmer_{device_id}"
     
-    if streamer.create_outlet(f"shimmer_{device_id}", config):
+    if streamer.create_outlet(stream_id, config):
+        if max_latency is not None:
+            streamer.enable_batching(stream_id, max_latency=max_latency)
         return streamer
     return None
 
@@ -295,7 +627,9 @@ def push_sync_marker(streamer: LSLStreamer, event_type: str, timestamp: Optional
         "calibration_start": 20.0,
         "calibration_end": 21.0,
         "recording_start": 30.0,
-        "recording_stop": 31.0
+        "recording_stop": 31.0,
+        "stimulus_onset": 40.0,
+        "stimulus_offset": 41.0
     }
     
     event_code = event_codes.get(event_type, 99.0)  # 99.0 for unknown events
@@ -0,0 +1,239 @@
+import lzma
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+try:
+    import lz4.frame as lz4_frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4_frame = None
+    LZ4_AVAILABLE = False
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+ENCODED_FRAME_FLAG = 0x80000000
+FRAME_LENGTH_MASK = 0x7FFFFFFF
+MAX_DECOMPRESSED_SIZE = 10 * 1024 * 1024
+PRECOMPRESSED_MARKERS = (b'"/9j/', b'"iVBORw0KGgo', b'"UklGR', b'"data:image/')
+class CompressionCodec(IntEnum):
+    NONE = 0
+    ZLIB = 1
+    LZMA = 2
+    LZ4 = 3
+    ZSTD = 4
+CODEC_NAMES = {
+    CompressionCodec.ZLIB: "zlib",
+    CompressionCodec.LZMA: "lzma",
+    CompressionCodec.LZ4: "lz4",
+    CompressionCodec.ZSTD: "zstd",
+}
+CODEC_PREFERENCE = ("zstd", "lz4", "zlib", "lzma")
+class CompressionError(Exception):
+    pass
+def available_codecs() -> List[str]:
+    codecs = ["zlib", "lzma"]
+    if LZ4_AVAILABLE:
+        codecs.append("lz4")
+    if ZSTD_AVAILABLE:
+        codecs.append("zstd")
+    return [name for name in CODEC_PREFERENCE if name in codecs]
+def codec_from_name(name: str) -> CompressionCodec:
+    for codec, codec_name in CODEC_NAMES.items():
+        if codec_name == name:
+            return codec
+    raise CompressionError(f"Unknown compression codec: {name}")
+def compress_bytes(codec: CompressionCodec, data: bytes) -> bytes:
+    if codec == CompressionCodec.NONE:
+        return data
+    if codec == CompressionCodec.ZLIB:
+        return zlib.compress(data, 6)
+    if codec == CompressionCodec.LZMA:
+        return lzma.compress(data, preset=1)
+    if codec == CompressionCodec.LZ4 and LZ4_AVAILABLE:
+        return lz4_frame.compress(data)
+    if codec == CompressionCodec.ZSTD and ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise CompressionError(f"Codec not available: {codec!r}")
+def decompress_bytes(
+    codec: CompressionCodec, data: bytes, max_size: int = MAX_DECOMPRESSED_SIZE
+) -> bytes:
+    if codec == CompressionCodec.NONE:
+        result = data
+    elif codec == CompressionCodec.ZLIB:
+        decompressor = zlib.decompressobj()
+        result = decompressor.decompress(data, max_size + 1)
+        if decompressor.unconsumed_tail:
+            raise CompressionError("Decompressed payload exceeds size limit")
+    elif codec == CompressionCodec.LZMA:
+        decompressor = lzma.LZMADecompressor()
+        result = decompressor.decompress(data, max_length=max_size + 1)
+    elif codec == CompressionCodec.LZ4 and LZ4_AVAILABLE:
+        result = lz4_frame.decompress(data)
+    elif codec == CompressionCodec.ZSTD and ZSTD_AVAILABLE:
+        result = zstandard.ZstdDecompressor().decompress(
+            data, max_output_size=max_size + 1
+        )
+    else:
+        raise CompressionError(f"Codec not available: {codec!r}")
+    if len(result) > max_size:
+        raise CompressionError("Decompressed payload exceeds size limit")
+    return result
+def encode_frame(codec: CompressionCodec, body: bytes) -> bytes:
+    if codec == CompressionCodec.NONE:
+        return struct.pack(">I", len(body)) + body
+    return struct.pack(">IB", ENCODED_FRAME_FLAG | (len(body) + 1), int(codec)) + body
+def parse_length_header(header: bytes) -> Tuple[bool, int]:
+    value = struct.unpack(">I", header)[0]
+    return bool(value & ENCODED_FRAME_FLAG), value & FRAME_LENGTH_MASK
+def decode_frame_body(encoded: bool, body: bytes) -> bytes:
+    if not encoded:
+        return body
+    if not body:
+        raise CompressionError("Encoded frame is missing its codec byte")
+    try:
+        codec = CompressionCodec(body[0])
+    except ValueError:
+        raise CompressionError(f"Unknown codec id in frame: {body[0]}")
+    return decompress_bytes(codec, body[1:])
+@dataclass
+class CodecStats:
+    messages: int = 0
+    raw_bytes: int = 0
+    compressed_bytes: int = 0
+    cpu_time: float = 0.0
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes / self.raw_bytes if self.raw_bytes else 1.0
+    def record(self, raw: int, compressed: int, cpu_time: float):
+        self.messages += 1
+        self.raw_bytes += raw
+        self.compressed_bytes += compressed
+        self.cpu_time += cpu_time
+    def transfer_cost(self, bandwidth: float) -> float:
+        if not self.messages:
+            return float("inf")
+        return (self.cpu_time + self.compressed_bytes / bandwidth) / self.raw_bytes
+@dataclass
+class MessageTypeStats:
+    messages: int = 0
+    uncompressed: int = 0
+    precompressed_skips: int = 0
+    codecs: Dict[str, CodecStats] = field(default_factory=dict)
+    selected: Optional[str] = None
+class PayloadCompressor:
+    """Per-connection codec negotiation and adaptive codec choice.
+
+    Each message type first probes every negotiated codec, then settles on the
+    one with the lowest estimated delivery time (compression time plus
+    compressed bytes over ``bandwidth_bytes_per_s``), or on no compression when
+    sending the raw payload is cheaper. Payloads that embed base64 JPEG/PNG
+    data skip compression entirely. Choices are re-probed every
+    ``reprobe_interval`` messages so they follow changes in payload content.
+    """
+    def __init__(
+        self,
+        codecs: Optional[Iterable[str]] = None,
+        threshold: int = 1024,
+        bandwidth_bytes_per_s: float = 10 * 1024 * 1024,
+        probe_messages: int = 3,
+        reprobe_interval: int = 500,
+    ):
+        local = available_codecs()
+        requested = list(codecs) if codecs is not None else local
+        self.codecs = [name for name in CODEC_PREFERENCE if name in requested and name in local]
+        self.threshold = threshold
+        self.bandwidth = bandwidth_bytes_per_s
+        self.probe_messages = probe_messages
+        self.reprobe_interval = reprobe_interval
+        self._types: Dict[str, MessageTypeStats] = {}
+        self._lock = threading.Lock()
+    @property
+    def enabled(self) -> bool:
+        return bool(self.codecs)
+    def negotiate(self, peer_codecs: Iterable[str]) -> List[str]:
+        peer = set(peer_codecs or [])
+        self.codecs = [name for name in self.codecs if name in peer]
+        return list(self.codecs)
+    def capabilities(self) -> Dict[str, Any]:
+        return {"codecs": list(self.codecs), "threshold": self.threshold}
+    def encode(self, message_type: str, data: bytes) -> Tuple[CompressionCodec, bytes]:
+        if not self.codecs or len(data) < self.threshold:
+            return CompressionCodec.NONE, data
+        with self._lock:
+            stats = self._types.setdefault(message_type, MessageTypeStats())
+            stats.messages += 1
+            if self._is_precompressed(data):
+                stats.precompressed_skips += 1
+                stats.uncompressed += 1
+                return CompressionCodec.NONE, data
+            codec_name = self._choose_codec(stats)
+        if codec_name is None:
+            with self._lock:
+                stats.uncompressed += 1
+            return CompressionCodec.NONE, data
+        codec = codec_from_name(codec_name)
+        start = time.perf_counter()
+        compressed = compress_bytes(codec, data)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats.codecs.setdefault(codec_name, CodecStats()).record(
+                len(data), len(compressed), elapsed
+            )
+        if len(compressed) >= len(data):
+            return CompressionCodec.NONE, data
+        return codec, compressed
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "codecs": list(self.codecs),
+                "threshold": self.threshold,
+                "message_types": {
+                    message_type: {
+                        "messages": stats.messages,
+                        "uncompressed": stats.uncompressed,
+                        "precompressed_skips": stats.precompressed_skips,
+                        "selected_codec": stats.selected,
+                        "codecs": {
+                            name: {
+                                "messages": codec_stats.messages,
+                                "ratio": round(codec_stats.ratio, 4),
+                                "cpu_ms_per_message": round(
+                                    codec_stats.cpu_time * 1000 / codec_stats.messages, 4
+                                ),
+                            }
+                            for name, codec_stats in stats.codecs.items()
+                            if codec_stats.messages
+                        },
+                    }
+                    for message_type, stats in self._types.items()
+                },
+            }
+    def _choose_codec(self, stats: MessageTypeStats) -> Optional[str]:
+        if stats.messages % self.reprobe_interval == 0:
+            stats.codecs.clear()
+            stats.selected = None
+        for name in self.codecs:
+            codec_stats = stats.codecs.get(name)
+            if codec_stats is None or codec_stats.messages < self.probe_messages:
+                return name
+        if stats.selected is None:
+            best_name, best_cost = None, 1.0 / self.bandwidth
+            for name in self.codecs:
+                cost = stats.codecs[name].transfer_cost(self.bandwidth)
+                if cost < best_cost:
+                    best_name, best_cost = name, cost
+            stats.selected = best_name or ""
+        return stats.selected or None
+    @staticmethod
+    def _is_precompressed(data: bytes) -> bool:
+        head = data[:4096]
+        return any(marker in head for marker in PRECOMPRESSED_MARKERS)
@@ -0,0 +1,154 @@
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+from PyQt5.QtCore import QObject, Qt, QTimer
+SPIN_MARGIN_NS = 2_000_000
+@dataclass
+class PresentationRecord:
+    presentation_id: int
+    monitor_id: int
+    request_ns: int
+    onset_deadline_ns: int
+    onset_dispatch_ns: Optional[int] = None
+    onset_flip_ns: Optional[int] = None
+    flip_source: Optional[str] = None
+    offset_deadline_ns: Optional[int] = None
+    offset_dispatch_ns: Optional[int] = None
+    offset_flip_ns: Optional[int] = None
+    requested_duration_ms: Optional[float] = None
+    @property
+    def onset_error_ms(self) -> Optional[float]:
+        if self.onset_flip_ns is None:
+            return None
+        return (self.onset_flip_ns - self.onset_deadline_ns) / 1e6
+    @property
+    def duration_actual_ms(self) -> Optional[float]:
+        if self.onset_flip_ns is None or self.offset_flip_ns is None:
+            return None
+        return (self.offset_flip_ns - self.onset_flip_ns) / 1e6
+    @property
+    def duration_error_ms(self) -> Optional[float]:
+        if self.duration_actual_ms is None or self.requested_duration_ms is None:
+            return None
+        return self.duration_actual_ms - self.requested_duration_ms
+class FlipTimingEstimator:
+    """Predicts display flip times for one monitor from frame callbacks.
+
+    The refresh period starts at the screen's nominal rate and is refined from
+    the median interval between observed frame callbacks (paint completions or
+    swap notifications). Flips are predicted on the grid anchored at the most
+    recent callback; without any callback the event time itself is used.
+    """
+    def __init__(self, refresh_hz: float = 60.0, history: int = 120):
+        self.nominal_period_ns = int(1e9 / (refresh_hz if refresh_hz > 0 else 60.0))
+        self.period_ns = self.nominal_period_ns
+        self.last_frame_ns: Optional[int] = None
+        self._intervals: Deque[int] = deque(maxlen=history)
+    def observe(self, frame_ns: int):
+        if self.last_frame_ns is not None:
+            interval = frame_ns - self.last_frame_ns
+            frames = round(interval / self.nominal_period_ns)
+            if 1 <= frames <= 4:
+                self._intervals.append(interval // frames)
+                if len(self._intervals) >= 8:
+                    self.period_ns = int(statistics.median(self._intervals))
+        self.last_frame_ns = frame_ns
+    def predict_flip(self, event_ns: int) -> int:
+        if self.last_frame_ns is None or event_ns <= self.last_frame_ns:
+            return event_ns
+        frames = -(-(event_ns - self.last_frame_ns) // self.period_ns)
+        return self.last_frame_ns + frames * self.period_ns
+    @property
+    def refresh_hz(self) -> float:
+        return 1e9 / self.period_ns
+class PresentationClock(QObject):
+    """Schedules presentation events against ``perf_counter_ns`` deadlines.
+
+    A precise single-shot ``QTimer`` wakes the GUI thread ``SPIN_MARGIN_NS``
+    before the deadline and the remainder is spent spinning on the monotonic
+    clock, so dispatch is not delayed by a coarse timer tick. The flip that
+    actually put the change on screen is taken from a swap-completed hook when
+    the window exposes one, otherwise from that monitor's frame-callback
+    estimator.
+    """
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.estimators: Dict[int, FlipTimingEstimator] = {}
+        self.records: List[PresentationRecord] = []
+        self._next_id = 0
+        self._timers: List[QTimer] = []
+    @staticmethod
+    def now_ns() -> int:
+        return time.perf_counter_ns()
+    def estimator(self, monitor_id: int, refresh_hz: float = 60.0) -> FlipTimingEstimator:
+        if monitor_id not in self.estimators:
+            self.estimators[monitor_id] = FlipTimingEstimator(refresh_hz)
+        return self.estimators[monitor_id]
+    def frame_period_ns(self, monitor_id: int) -> int:
+        return self.estimator(monitor_id).period_ns
+    def observe_frame(self, monitor_id: int, frame_ns: int):
+        self.estimator(monitor_id).observe(frame_ns)
+    def new_record(self, monitor_id: int, onset_deadline_ns: int, request_ns: int) -> PresentationRecord:
+        record = PresentationRecord(
+            presentation_id=self._next_id,
+            monitor_id=monitor_id,
+            request_ns=request_ns,
+            onset_deadline_ns=onset_deadline_ns,
+        )
+        self._next_id += 1
+        self.records.append(record)
+        return record
+    def call_at(self, deadline_ns: int, callback: Callable[[int], None]) -> QTimer:
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.PreciseTimer)
+        def fire():
+            self._timers.remove(timer)
+            timer.deleteLater()
+            while self.now_ns() < deadline_ns:
+                pass
+            callback(self.now_ns())
+        timer.timeout.connect(fire)
+        self._timers.append(timer)
+        timer.start(max(0, (deadline_ns - self.now_ns() - SPIN_MARGIN_NS) // 1_000_000))
+        return timer
+    def cancel(self, timer: Optional[QTimer]):
+        if timer is not None and timer in self._timers:
+            self._timers.remove(timer)
+            timer.stop()
+            timer.deleteLater()
+    def cancel_all(self):
+        for timer in self._timers:
+            timer.stop()
+            timer.deleteLater()
+        self._timers.clear()
+    def wall_time(self, perf_ns: int) -> float:
+        return time.time() - (self.now_ns() - perf_ns) / 1e9
+    def get_statistics(self) -> Dict[str, object]:
+        per_monitor: Dict[int, Dict[str, object]] = {}
+        for monitor_id in sorted({record.monitor_id for record in self.records}):
+            records = [r for r in self.records if r.monitor_id == monitor_id]
+            onset_errors = [r.onset_error_ms for r in records if r.onset_error_ms is not None]
+            duration_errors = [
+                r.duration_error_ms for r in records if r.duration_error_ms is not None
+            ]
+            estimator = self.estimators.get(monitor_id)
+            per_monitor[monitor_id] = {
+                "presentations": len(records),
+                "refresh_hz": round(estimator.refresh_hz, 3) if estimator else None,
+                "flip_sources": sorted({r.flip_source for r in records if r.flip_source}),
+                "onset_error_ms": _summarise(onset_errors),
+                "duration_error_ms": _summarise(duration_errors),
+            }
+        return {"presentations": len(self.records), "monitors": per_monitor}
+def _summarise(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "mean": None, "std": None, "max_abs": None}
+    return {
+        "count": len(values),
+        "mean": round(statistics.fmean(values), 4),
+        "std": round(statistics.pstdev(values), 4),
+        "max_abs": round(max(abs(v) for v in values), 4),
+    }
@@ -20,6 +20,9 @@ import logging
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.exceptions import InvalidTag
 
 
 class MessageType(Enum):
@@ -361,6 +364,113 @@ class CryptoHandler:
         self.aes_iv = key_iv_bytes[32:48] # Next 16 bytes = IV
 
 
+class SecureFramingError(Exception):
+    """Raised when a binary secure frame cannot be authenticated or parsed."""
+    pass
+
+
+class ReplayError(SecureFramingError):
+    """Raised when a secure frame reuses or rewinds the sender's nonce counter."""
+    pass
+
+
+class SecureFrameCodec:
+    """Binary AEAD framing for encrypted protocol messages.
+
+    Frame layout (network byte order)::
+
+        length:u32 | version/flags:u8 | nonce:12 bytes | ciphertext | tag:16 bytes
+
+    ``length`` counts everything after itself. The high nibble of the
+    version/flags byte is the framing version and bit 0 selects ChaCha20-Poly1305
+    instead of AES-256-GCM. The nonce is a 4-byte direction prefix followed by a
+    64-bit send counter; receivers reject any counter that is not strictly
+    greater than the last one seen for that prefix. The length prefix and
+    version/flags byte are authenticated as associated data.
+    """
+
+    VERSION = 1
+    FLAG_CHACHA20 = 0x01
+    NONCE_SIZE = 12
+    TAG_SIZE = 16
+    HEADER_SIZE = 4 + 1 + NONCE_SIZE
+    OVERHEAD = HEADER_SIZE + TAG_SIZE
+    CIPHERS = ('aes-gcm', 'chacha20-poly1305')
+    DIRECTION_PREFIXES = {'initiator': b'\x00\x00\x00\x01', 'responder': b'\x00\x00\x00\x02'}
+    KDF_INFO = b'bucika-secure-frame-v1'
+
+    def __init__(self, session_key: bytes, role: str = 'initiator', cipher: str = 'aes-gcm'):
+        if len(session_key) != 32:
+            raise ValueError("Session key must be 32 bytes")
+        if role not in self.DIRECTION_PREFIXES:
+            raise ValueError(f"Unknown framing role: {role}")
+        if cipher not in self.CIPHERS:
+            raise ValueError(f"Unsupported AEAD cipher: {cipher}")
+        self.role = role
+        self.cipher = cipher
+        self._send_prefix = self.DIRECTION_PREFIXES[role]
+        self._send_counter = 0
+        self._recv_counters: Dict[bytes, int] = {}
+        self._aead = {
+            'aes-gcm': AESGCM(session_key),
+            'chacha20-poly1305': ChaCha20Poly1305(session_key),
+        }
+        self.frames_sealed = 0
+        self.frames_opened = 0
+        self.replays_rejected = 0
+
+    @classmethod
+    def derive_session_key(cls, key_material: bytes, salt: Optional[bytes] = None) -> bytes:
+        """Derive the per-session AEAD key from handshake key material (HKDF-SHA256)."""
+        return HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=salt, info=cls.KDF_INFO
+        ).derive(key_material)
+
+    def seal(self, plaintext: bytes) -> bytes:
+        """Encrypt ``plaintext`` into a complete length-prefixed frame."""
+        self._send_counter += 1
+        if self._send_counter >= 1 << 64:
+            raise SecureFramingError("Nonce counter exhausted; re-key the session")
+        nonce = self._send_prefix + struct.pack('!Q', self._send_counter)
+        flags = (self.VERSION << 4) | (self.FLAG_CHACHA20 if self.cipher == 'chacha20-poly1305' else 0)
+        length = 1 + self.NONCE_SIZE + len(plaintext) + self.TAG_SIZE
+        aad = struct.pack('!IB', length, flags)
+        ciphertext = self._aead[self.cipher].encrypt(nonce, plaintext, aad)
+        self.frames_sealed += 1
+        return aad + nonce + ciphertext
+
+    def open(self, frame: bytes) -> bytes:
+        """Authenticate and decrypt a complete frame produced by ``seal``."""
+        if len(frame) < self.OVERHEAD:
+            raise SecureFramingError("Secure frame too short")
+        length, flags = struct.unpack('!IB', frame[:5])
+        if length != len(frame) - 4:
+            raise SecureFramingError("Secure frame length mismatch")
+        if flags >> 4 != self.VERSION:
+            raise SecureFramingError(f"Unsupported secure frame version: {flags >> 4}")
+        cipher = 'chacha20-poly1305' if flags & self.FLAG_CHACHA20 else 'aes-gcm'
+        nonce = frame[5:self.HEADER_SIZE]
+        prefix = nonce[:4]
+        counter = struct.unpack('!Q', nonce[4:])[0]
+        if prefix == self._send_prefix:
+            raise ReplayError("Secure frame reflected back to its sender")
+        if counter <= self._recv_counters.get(prefix, 0):
+            self.replays_rejected += 1
+            raise ReplayError(f"Replayed or out-of-order secure frame (counter {counter})")
+        try:
+            plaintext = self._aead[cipher].decrypt(nonce, frame[self.HEADER_SIZE:], frame[:5])
+        except InvalidTag:
+            raise SecureFramingError("Secure frame authentication failed")
+        self._recv_counters[prefix] = counter
+        self.frames_opened += 1
+        return plaintext
+
+    @staticmethod
+    def is_secure_frame(data: bytes) -> bool:
+        """Check whether ``data`` looks like a binary secure frame rather than JSON."""
+        return len(data) > 4 and data[4] >> 4 == SecureFrameCodec.VERSION
+
+
 class ProtocolHandler:
     """Handles protocol communication with encryption and validation."""
     
@@ -372,6 +482,11 @@ class ProtocolHandler:
         self.active_sessions = {}
         self.message_handlers = {}
         
+        # Binary AEAD framing (enabled once a session key is established)
+        self.secure_framing = True
+        self.aead_cipher = 'aes-gcm'
+        self.frame_codec: Optional[SecureFrameCodec] = None
+        
         # Protocol statistics
         self.messages_sent = 0
         self.messages_received = 0
@@ -407,10 +522,26 @@ class ProtocolHandler:
         
         # Encrypt AES key with remote's public key
         encrypted_aes_key = self.crypto.encrypt_rsa(base64.b64decode(aes_key_b64))
+        self._init_secure_framing('initiator')
         
         self.logger.info("RSA/AES handshake completed")
         return public_pem, encrypted_aes_key
     
+    def complete_handshake(self, encrypted_aes_key: str):
+        """Accept the session key sent by the handshake initiator."""
+        key_iv = self.crypto.decrypt_rsa(encrypted_aes_key)
+        self.crypto.set_aes_key_from_base64(base64.b64encode(key_iv).decode('utf-8'))
+        self._init_secure_framing('responder')
+        self.logger.info("RSA/AES handshake accepted")
+    
+    def _init_secure_framing(self, role: str):
+        """Derive the per-session AEAD key once and reset nonce counters."""
+        if not self.secure_framing or not self.crypto.aes_key:
+            self.frame_codec = None
+            return
+        session_key = SecureFrameCodec.derive_session_key(self.crypto.aes_key + self.crypto.aes_iv)
+        self.frame_codec = SecureFrameCodec(session_key, role=role, cipher=self.aead_cipher)
+    
     def create_auth_request(self, device_type: str, capabilities: List[str]) -> ProtocolMessage:
         """Create authentication request message."""
         # Generate challenge nonce
@@ -498,6 +629,10 @@ class ProtocolHandler:
             json_data = message.to_json()
             json_bytes = json_data.encode('utf-8')
             
+            # Prefer binary AEAD framing when a session key has been derived
+            if self.frame_codec is not None:
+                return self.frame_codec.seal(json_bytes)
+            
             # Encrypt with AES if available
             if self.crypto.aes_key:
                 encrypted_data = self.crypto.encrypt_aes(json_bytes)
@@ -535,6 +670,12 @@ class ProtocolHandler:
             if len(data) < 4 + length:
                 raise ValueError("Incomplete message")
             
+            if SecureFrameCodec.is_secure_frame(data):
+                if self.frame_codec is None:
+                    raise SecureFramingError("Secure frame received before session key exchange")
+                plaintext = self.frame_codec.open(data[:4 + length])
+                return ProtocolMessage.from_json(plaintext.decode('utf-8'))
+            
             json_data = data[4:4+length].decode('utf-8')
             wrapper = json.loads(json_data)
             
@@ -582,6 +723,9 @@ class ProtocolHandler:
             'errors_count': self.errors_count,
             'active_sessions': len(self.active_sessions),
             'encryption_enabled': self.crypto.aes_key is not None,
+            'secure_framing': self.frame_codec is not None,
+            'aead_cipher': self.frame_codec.cipher if self.frame_codec else None,
+            'replays_rejected': self.frame_codec.replays_rejected if self.frame_codec else 0,
             'sequence_counter': self.sequence_counter
         }
 
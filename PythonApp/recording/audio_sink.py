@@ -0,0 +1,303 @@
+"""
+Streaming PCM audio sink.
+
+The capture callback copies each block into a preallocated ring of NumPy
+blocks and returns; a writer thread appends the blocks to a WAV file and
+patches the header periodically, so a recording that is cut short by a
+crash is still a playable file up to the last patch. Files switch to RF64
+(EBU Tech 3306) once they outgrow the 4 GiB RIFF limit. Every block is
+stamped with the host time of its first sample and the stamps are written
+to a CSV next to the audio for alignment with other sensors.
+"""
+
+import csv
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# RIFF/WAVE header with a JUNK chunk reserved for the RF64 ds64 chunk:
+# RIFF(12) + JUNK(8 + 28) + fmt(8 + 16) + data(8)
+HEADER_BYTES = 80
+DS64_BYTES = 28
+MAX_RIFF_BYTES = 0xFFFFFFFF
+
+
+class WavStreamWriter:
+    """Append-only PCM WAV writer whose header is valid after every patch.
+
+    Sizes in the header are rewritten by ``patch_header``; until then a
+    reader sees the file as it was at the previous patch. When the RIFF size
+    would exceed ``max_riff_bytes`` the file becomes RF64 and the 64-bit
+    sizes go into the ds64 chunk that replaces the reserved JUNK chunk.
+    """
+
+    def __init__(self, path: str, sample_rate: int, channels: int, sample_width: int,
+                 max_riff_bytes: int = MAX_RIFF_BYTES):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.max_riff_bytes = max_riff_bytes
+        self.frame_bytes = channels * sample_width
+        self.data_bytes = 0
+        self.rf64 = False
+        self._file = open(path, "wb")
+        self._file.write(bytes(HEADER_BYTES))
+        self.patch_header()
+
+    def write(self, data) -> None:
+        """Append raw little-endian PCM frames."""
+        if not self.rf64 and HEADER_BYTES - 8 + self.data_bytes + len(data) > self.max_riff_bytes:
+            self.rf64 = True
+        self._file.write(data)
+        self.data_bytes += len(data)
+
+    def patch_header(self, sync: bool = False) -> None:
+        """Rewrite the header for the data written so far and flush it."""
+        riff_bytes = HEADER_BYTES - 8 + self.data_bytes
+        frames = self.data_bytes // self.frame_bytes
+        if self.rf64:
+            header = struct.pack("<4sI4s", b"RF64", 0xFFFFFFFF, b"WAVE")
+            header += struct.pack("<4sIQQQI", b"ds64", DS64_BYTES, riff_bytes, self.data_bytes, frames, 0)
+        else:
+            header = struct.pack("<4sI4s", b"RIFF", riff_bytes, b"WAVE")
+            header += struct.pack("<4sI", b"JUNK", DS64_BYTES) + bytes(DS64_BYTES)
+        header += struct.pack(
+            "<4sIHHIIHH", b"fmt ", 16, 1, self.channels, self.sample_rate,
+            self.sample_rate * self.frame_bytes, self.frame_bytes, self.sample_width * 8,
+        )
+        header += struct.pack("<4sI", b"data", 0xFFFFFFFF if self.rf64 else self.data_bytes)
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self.patch_header(sync=True)
+        finally:
+            self._file.close()
+
+
+class AudioBlockRing:
+    """Fixed pool of audio blocks passed from the capture callback to a writer.
+
+    ``push`` copies into the next free slot and never waits: when every slot
+    is in use the block is dropped and counted, so a stalled disk cannot
+    block the audio callback or grow memory.
+    """
+
+    def __init__(self, capacity: int, block_frames: int, channels: int, dtype):
+        self.blocks = np.zeros((capacity, block_frames, channels), dtype=dtype)
+        self.frames = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity)
+        self.capacity = capacity
+        self.block_frames = block_frames
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        self.closed = False
+        self._head = 0
+        self._tail = 0
+        self._count = 0
+        self._ready = threading.Condition()
+
+    def push(self, data: np.ndarray, host_time: float) -> bool:
+        """Copy up to ``block_frames`` frames into a free slot."""
+        with self._ready:
+            if self._count == self.capacity:
+                self.dropped_blocks += 1
+                self.dropped_frames += len(data)
+                return False
+            slot = self._head
+            self.blocks[slot, :len(data)] = data
+            self.frames[slot] = len(data)
+            self.timestamps[slot] = host_time
+            self._head = (slot + 1) % self.capacity
+            self._count += 1
+            self._ready.notify()
+            return True
+
+    def peek(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Slot of the oldest filled block, waiting up to ``timeout``; keep it until ``release``."""
+        with self._ready:
+            if not self._count and not self.closed:
+                self._ready.wait(timeout)
+            return self._tail if self._count else None
+
+    def release(self) -> None:
+        """Hand the oldest slot back to the producer."""
+        with self._ready:
+            self._tail = (self._tail + 1) % self.capacity
+            self._count -= 1
+
+    def close(self) -> None:
+        """Stop waiting readers; blocks already queued can still be read."""
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class StreamingAudioSink:
+    """Streams timestamped PCM blocks to a WAV file from a writer thread.
+
+    ``write_block`` is safe to call from a PortAudio callback. Integer
+    blocks are stored as they are; float blocks in [-1, 1] are scaled to the
+    sample format. 24-bit audio is held as left-justified int32, the layout
+    PortAudio delivers for ``int32`` streams, and written as its top three
+    bytes.
+
+    If a write fails, the writer thread stops and records the reason in
+    ``error``; later blocks are refused rather than counted as dropped, and
+    the reason is returned by ``close``.
+    """
+
+    _DTYPES = {16: np.dtype("<i2"), 24: np.dtype("<i4"), 32: np.dtype("<i4")}
+
+    def __init__(self, path: str, sample_rate: int, channels: int = 1, bit_depth: int = 16,
+                 block_frames: int = 1024, ring_blocks: int = 256, header_interval: float = 1.0,
+                 timestamps_path: Optional[str] = None, max_riff_bytes: int = MAX_RIFF_BYTES,
+                 logger: Optional[logging.Logger] = None):
+        if bit_depth not in self._DTYPES:
+            raise ValueError(f"Unsupported bit depth: {bit_depth}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bit_depth = bit_depth
+        self.dtype = self._DTYPES[bit_depth]
+        self.header_interval = header_interval
+        self.timestamps_path = timestamps_path or os.path.splitext(path)[0] + "_blocks.csv"
+        self.logger = logger or logging.getLogger(__name__)
+        self.ring = AudioBlockRing(ring_blocks, block_frames, channels, self.dtype)
+        self.writer = WavStreamWriter(path, sample_rate, channels, bit_depth // 8, max_riff_bytes)
+        self.frames_written = 0
+        self.blocks_written = 0
+        self.error: Optional[str] = None
+        self._finish_lock = threading.Lock()
+        self._drained = False
+        self._abandoned = False
+        self._sum_squares = 0.0
+        self._peak = 0.0
+        self._full_scale = float(np.iinfo(self.dtype).max)
+        self._thread = threading.Thread(target=self._write_loop, name="AudioSinkWriter", daemon=True)
+        self._timestamps_file = open(self.timestamps_path, "w", newline="")
+        self._timestamps = csv.writer(self._timestamps_file)
+        self._timestamps.writerow(["block_index", "first_frame", "frame_count", "host_timestamp_ms"])
+        self._thread.start()
+
+    def write_block(self, data: np.ndarray, host_time: Optional[float] = None) -> bool:
+        """Queue one block of ``(frames, channels)`` (or mono ``(frames,)``) samples.
+
+        ``host_time`` is the wall-clock time of the first frame, in seconds;
+        it defaults to now minus the block duration. Blocks longer than the
+        ring's block size are split. Returns False if anything was dropped,
+        or without queueing anything once the writer has failed.
+        """
+        if self.error is not None:
+            return False
+        data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        if host_time is None:
+            host_time = time.time() - len(data) / self.sample_rate
+        if data.dtype.kind == "f":
+            # Scale in float64: float32 full scale rounds up past the int32 range
+            scaled = np.rint(data.astype(np.float64) * self._full_scale)
+            data = np.clip(scaled, -self._full_scale - 1, self._full_scale).astype(self.dtype)
+        block_frames = self.ring.block_frames
+        stored = True
+        for start in range(0, len(data), block_frames):
+            stored &= self.ring.push(data[start:start + block_frames], host_time + start / self.sample_rate)
+        return stored
+
+    def _encode(self, block: np.ndarray) -> bytes:
+        if self.bit_depth == 24:
+            return block.view(np.uint8).reshape(-1, 4)[:, 1:].tobytes()
+        return block.tobytes()
+
+    def _write_loop(self):
+        last_patch = time.monotonic()
+        try:
+            while True:
+                slot = self.ring.peek(timeout=self.header_interval)
+                if slot is not None:
+                    frames = int(self.ring.frames[slot])
+                    block = self.ring.blocks[slot, :frames]
+                    self.writer.write(self._encode(block))
+                    samples = block.astype(np.float64)
+                    self._sum_squares += float(np.dot(samples.ravel(), samples.ravel()))
+                    if frames:
+                        self._peak = max(self._peak, float(np.abs(samples).max()))
+                    self._timestamps.writerow([
+                        self.blocks_written, self.frames_written, frames,
+                        f"{self.ring.timestamps[slot] * 1000.0:.3f}",
+                    ])
+                    self.frames_written += frames
+                    self.blocks_written += 1
+                    self.ring.release()
+                if time.monotonic() - last_patch >= self.header_interval:
+                    self.writer.patch_header(sync=True)
+                    self._timestamps_file.flush()
+                    last_patch = time.monotonic()
+                if slot is None and self.ring.closed:
+                    break
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.logger.error(f"Audio writer failed: {e}")
+        finally:
+            with self._finish_lock:
+                self._drained = True
+                if self._abandoned:
+                    self._finish()
+
+    def _finish(self):
+        try:
+            self.writer.close()
+        except OSError as e:
+            self.error = self.error or f"{type(e).__name__}: {e}"
+            self.logger.error(f"Failed to finalise {self.path}: {e}")
+        self._timestamps_file.close()
+
+    def close(self, timeout: float = 10.0) -> Dict[str, Any]:
+        """Drain the ring, finalise the file and return recording statistics.
+
+        The statistics carry ``error``, which is None unless the writer failed
+        or did not drain within ``timeout``. In the latter case the writer
+        thread finalises the file itself once it has drained, rather than
+        having the file closed under it.
+        """
+        self.ring.close()
+        self._thread.join(timeout)
+        with self._finish_lock:
+            if self._drained:
+                self._finish()
+            else:
+                self._abandoned = True
+                self.error = self.error or f"Writer still draining after {timeout:.1f}s"
+                self.logger.warning(f"Audio writer did not finish within {timeout:.1f}s; it will finalise {self.path}")
+        samples = self.frames_written * self.channels
+        # Report amplitudes in units of the nominal bit depth
+        scale = 256.0 if self.bit_depth == 24 else 1.0
+        return {
+            "frames_recorded": self.frames_written,
+            "samples_recorded": samples,
+            "blocks_recorded": self.blocks_written,
+            "dropped_frames": self.ring.dropped_frames,
+            "duration_ms": self.frames_written / self.sample_rate * 1000.0,
+            "rms_amplitude": float(np.sqrt(self._sum_squares / samples)) / scale if samples else 0.0,
+            "peak_amplitude": self._peak / scale,
+            "file_format": "RF64" if self.writer.rf64 else "WAV",
+            "timestamps_file": os.path.basename(self.timestamps_path),
+            "error": self.error,
+        }
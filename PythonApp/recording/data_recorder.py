@@ -18,16 +18,24 @@ import logging
 import zipfile
 import hashlib
 import shutil
-import wave
 import struct
 from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import numpy as np
-from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 import tempfile
 
+from .audio_sink import StreamingAudioSink
+
+try:
+    import sounddevice
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    # OSError: the module is installed but the PortAudio library is missing
+    sounddevice = None
+    SOUNDDEVICE_AVAILABLE = False
+
 
 class HardwareValidationError(Exception):
     """Raised when hardware validation fails."""
@@ -349,28 +357,55 @@ class CSVDataLogger:
 
 
 class AudioRecorder:
-    """PCM audio recording at 44.1kHz as specified in thesis."""
+    """PCM audio recording at 44.1kHz as specified in thesis.
+    
+    Captured blocks stream through a StreamingAudioSink: the capture
+    callback only copies into a preallocated ring and a writer thread
+    appends to the WAV file, so memory stays bounded and an interrupted
+    recording remains playable. Each block's host timestamp is logged to a
+    ``*_blocks.csv`` file next to the audio.
+    """
     
     def __init__(self, sample_rate: int = 44100, channels: int = 1, 
-                 bit_depth: int = 16, logger: Optional[logging.Logger] = None):
+                 bit_depth: int = 16, logger: Optional[logging.Logger] = None,
+                 block_frames: int = 1024, ring_blocks: int = 256,
+                 device: Optional[Any] = None):
         self.sample_rate = sample_rate
         self.channels = channels
         self.bit_depth = bit_depth
         self.logger = logger or logging.getLogger(__name__)
+        self.block_frames = block_frames
+        self.ring_blocks = ring_blocks
+        self.device = device
         
         self.is_recording = False
-        self.audio_data = deque()
+        self.sink: Optional[StreamingAudioSink] = None
+        self.stream = None
         self.record_thread = None
+        self.input_overflows = 0
         
     def start_recording(self, output_file: str) -> bool:
         """Start PCM audio recording."""
         try:
             self.output_file = output_file
+            self.input_overflows = 0
+            self.sink = StreamingAudioSink(
+                output_file, self.sample_rate, self.channels, self.bit_depth,
+                block_frames=self.block_frames, ring_blocks=self.ring_blocks, logger=self.logger
+            )
             self.is_recording = True
             
-            # Start recording thread
-            self.record_thread = threading.Thread(target=self._record_audio_loop, daemon=True)
-            self.record_thread.start()
+            if SOUNDDEVICE_AVAILABLE:
+                self.stream = sounddevice.InputStream(
+                    samplerate=self.sample_rate, channels=self.channels, device=self.device,
+                    dtype="int16" if self.bit_depth == 16 else "int32",
+                    blocksize=self.block_frames, callback=self._audio_callback
+                )
+                self.stream.start()
+            else:
+                self.logger.warning("sounddevice not available; recording simulated audio")
+                self.record_thread = threading.Thread(target=self._record_audio_loop, daemon=True)
+                self.record_thread.start()
             
             self.logger.info(f"Started audio recording: {output_file}")
             self.logger.info(f"  Sample rate: {self.sample_rate} Hz")
@@ -381,6 +416,10 @@ class AudioRecorder:
             
         except Exception as e:
             self.logger.error(f"Failed to start audio recording: {e}")
+            self.is_recording = False
+            if self.sink:
+                self.sink.close()
+                self.sink = None
             return False
     
     def stop_recording(self) -> Optional[Dict[str, Any]]:
@@ -391,35 +430,32 @@ class AudioRecorder:
         try:
             self.is_recording = False
             
+            if self.stream is not None:
+                self.stream.stop()
+                self.stream.close()
+                self.stream = None
             if self.record_thread:
                 self.record_thread.join(timeout=5)
             
-            # Save audio data to WAV file
-            self._save_audio_file()
-            
-            # Calculate audio statistics
-            if self.audio_data:
-                audio_array = np.array(list(self.audio_data))
-                rms_amplitude = np.sqrt(np.mean(audio_array**2))
-                peak_amplitude = np.max(np.abs(audio_array))
-                duration_ms = (len(audio_array) / self.sample_rate) * 1000
-            else:
-                rms_amplitude = 0.0
-                peak_amplitude = 0.0
-                duration_ms = 0.0
+            stats = self.sink.close()
+            self.sink = None
             
             metadata = {
                 "audio_filename": os.path.basename(self.output_file),
                 "sample_rate_hz": self.sample_rate,
                 "channels": self.channels,
                 "bit_depth": self.bit_depth,
-                "duration_ms": duration_ms,
-                "rms_amplitude": rms_amplitude,
-                "peak_amplitude": peak_amplitude,
-                "samples_recorded": len(self.audio_data)
+                "input_overflows": self.input_overflows,
+                **stats
             }
+            if stats["error"]:
+                self.logger.error(f"Audio file may be incomplete: {stats['error']}")
+            if stats["dropped_frames"]:
+                self.logger.warning(f"Audio writer fell behind; dropped {stats['dropped_frames']} frames")
+            if self.input_overflows:
+                self.logger.warning(f"Audio input overflowed {self.input_overflows} times; samples were lost before capture")
             
-            self.logger.info(f"Stopped audio recording: {duration_ms:.1f}ms, {len(self.audio_data)} samples")
+            self.logger.info(f"Stopped audio recording: {stats['duration_ms']:.1f}ms, {stats['samples_recorded']} samples")
             
             return metadata
             
@@ -427,53 +463,35 @@ class AudioRecorder:
             self.logger.error(f"Error stopping audio recording: {e}")
             return None
     
+    def _audio_callback(self, indata, frames, time_info, status):
+        """PortAudio callback: stamp the block and hand it to the sink."""
+        if status and status.input_overflow:
+            # The device dropped samples before this block, so the file has a gap here
+            self.input_overflows += 1
+        adc_time = time_info.inputBufferAdcTime
+        if adc_time:
+            # Map the stream clock of the first frame onto the wall clock
+            host_time = time.time() - (time_info.currentTime - adc_time)
+        else:
+            host_time = time.time() - frames / self.sample_rate
+        self.sink.write_block(indata, host_time)
+    
     def _record_audio_loop(self):
-        """Audio recording loop (placeholder - would use actual audio library)."""
-        # This is a simulation - real implementation would use PyAudio, sounddevice, etc.
+        """Audio recording loop used when no audio backend is installed."""
         try:
+            samples_per_chunk = self.sample_rate // 10  # 100ms chunks
+            next_time = time.time()
             while self.is_recording:
-                # Simulate audio samples (would be replaced with actual audio capture)
-                samples_per_chunk = self.sample_rate // 10  # 100ms chunks
-                
                 # Generate simulated audio data (silence with occasional noise)
-                chunk = np.random.normal(0, 0.01, samples_per_chunk).astype(np.float32)
-                
-                # Convert to appropriate integer format
-                if self.bit_depth == 16:
-                    chunk = (chunk * 32767).astype(np.int16)
-                elif self.bit_depth == 24:
-                    chunk = (chunk * 8388607).astype(np.int32)
-                
-                # Add to buffer
-                self.audio_data.extend(chunk)
+                chunk = np.random.normal(0, 0.01, (samples_per_chunk, self.channels)).astype(np.float32)
+                self.sink.write_block(chunk, next_time)
                 
                 # Sleep to maintain real-time rate
-                time.sleep(0.1)  # 100ms chunks
+                next_time += samples_per_chunk / self.sample_rate
+                time.sleep(max(0.0, next_time - time.time()))
                 
         except Exception as e:
             self.logger.error(f"Audio recording loop error: {e}")
-    
-    def _save_audio_file(self):
-        """Save recorded audio data to WAV file."""
-        try:
-            if not self.audio_data:
-                return
-            
-            with wave.open(self.output_file, 'wb') as wav_file:
-                wav_file.setnchannels(self.channels)
-                wav_file.setsampwidth(self.bit_depth // 8)
-                wav_file.setframerate(self.sample_rate)
-                
-                # Convert audio data to bytes
-                audio_array = np.array(list(self.audio_data))
-                audio_bytes = audio_array.tobytes()
-                
-                wav_file.writeframes(audio_bytes)
-            
-            self.logger.info(f"Saved audio file: {self.output_file}")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to save audio file: {e}")
 
 
 class DataPackager:
@@ -0,0 +1,550 @@
+import json
+import math
+import os
+import shutil
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..utils.logging_config import get_logger
+from .session_metadata import read_json, write_json_atomic
+from .session_reader import INDEX_DIR_NAME, SessionReader
+logger = get_logger(__name__)
+try:
+    from scipy.signal import resample_poly
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+try:
+    import h5py
+    H5PY_AVAILABLE = True
+except ImportError:
+    H5PY_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+CLOCK_OFFSETS_FILENAME = "clock_offsets.json"
+EXPORT_MANIFEST_FILENAME = "export_manifest.json"
+RESAMPLING_METHODS = ("linear", "hold", "polyphase")
+EXPORT_FORMATS = ("hdf5", "parquet", "npz")
+AUDIO_BLOCKS_SUFFIX = "_blocks"
+# Stored timestamps have microsecond resolution; closer than this counts as reached
+TIME_TOLERANCE_S = 2e-6
+ProgressCallback = Callable[[float, str], None]
+class ClockMap:
+    """Maps one device's timestamps onto the master timeline.
+
+    ``offsets_s[i]`` is master time minus device time measured at device time
+    ``device_times[i]`` (the sign NTP reports); between measurements the
+    offset is interpolated linearly, which absorbs clock drift, and it is held
+    constant beyond the first and last measurement.
+    """
+    def __init__(self, device_times: Sequence[float] = (0.0,), offsets_s: Sequence[float] = (0.0,)):
+        order = np.argsort(np.asarray(device_times, dtype=np.float64), kind="stable")
+        self.device_times = np.asarray(device_times, dtype=np.float64)[order]
+        self.offsets_s = np.asarray(offsets_s, dtype=np.float64)[order]
+        if len(self.device_times) == 0 or len(self.device_times) != len(self.offsets_s):
+            raise ValueError("ClockMap needs matching, non-empty device times and offsets")
+        self.master_times = self.device_times + self.offsets_s
+    @classmethod
+    def constant(cls, offset_s: float) -> "ClockMap":
+        return cls((0.0,), (offset_s,))
+    def to_master(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        return t + np.interp(t, self.device_times, self.offsets_s)
+    def to_device(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        return t - np.interp(t, self.master_times, self.offsets_s)
+    def describe(self) -> Dict[str, Any]:
+        return {"samples": [[float(t), float(o) * 1000.0] for t, o in zip(self.device_times, self.offsets_s)]}
+class SessionClock:
+    """Per-device clock maps for one session, with the streams each device recorded.
+
+    Read from ``clock_offsets.json`` in the session folder, or from the
+    ``clock_offsets`` key of the session metadata::
+
+        {"devices": {"shimmer_01": {"offset_ms": 12.5},
+                     "android_1": {"samples": [[device_time_s, offset_ms], ...]}},
+         "streams": {"phone/thermal": "android_1"}}
+
+    A stream without an entry in ``streams`` belongs to the first device whose
+    id is one of its path components or prefixes one (``shimmer_01_gsr``).
+    Streams of unknown devices are already on the master clock.
+    """
+    def __init__(self, devices: Optional[Dict[str, ClockMap]] = None, streams: Optional[Dict[str, str]] = None, source: Optional[str] = None):
+        self.devices = dict(devices or {})
+        self.streams = dict(streams or {})
+        self.source = source
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], source: Optional[str] = None) -> "SessionClock":
+        devices = {}
+        for device_id, entry in (data.get("devices") or {}).items():
+            if isinstance(entry, (int, float)):
+                entry = {"offset_ms": entry}
+            if entry.get("samples"):
+                samples = np.asarray(entry["samples"], dtype=np.float64).reshape(-1, 2)
+                devices[device_id] = ClockMap(samples[:, 0], samples[:, 1] / 1000.0)
+            else:
+                devices[device_id] = ClockMap.constant(float(entry.get("offset_ms", 0.0)) / 1000.0)
+        return cls(devices, data.get("streams") or {}, source)
+    @classmethod
+    def load(cls, session_dir) -> "SessionClock":
+        session_dir = Path(session_dir)
+        path = session_dir / CLOCK_OFFSETS_FILENAME
+        if path.exists():
+            return cls.from_dict(read_json(path), str(path))
+        offsets = read_json(session_dir / "session_metadata.json").get("clock_offsets")
+        if offsets:
+            return cls.from_dict(offsets, "session_metadata.json")
+        return cls()
+    def device_for(self, stream: str) -> Optional[str]:
+        if stream in self.streams:
+            return self.streams[stream]
+        parts = stream.split("/")
+        for device_id in self.devices:
+            if any(part == device_id or part.startswith(device_id + "_") for part in parts):
+                return device_id
+        return None
+    def for_stream(self, stream: str) -> ClockMap:
+        device_id = self.device_for(stream)
+        return self.devices.get(device_id) or ClockMap()
+def save_clock_offsets(session_dir, devices: Dict[str, Any], streams: Optional[Dict[str, str]] = None) -> Path:
+    """Record device clock offsets for a session, for the sync subsystem to call at stop.
+
+    Each value in ``devices`` is either a constant offset in milliseconds or a
+    list of ``(device_time_s, offset_ms)`` measurements.
+    """
+    entries = {}
+    for device_id, value in devices.items():
+        if isinstance(value, (int, float)):
+            entries[device_id] = {"offset_ms": float(value)}
+        else:
+            entries[device_id] = {"samples": [[float(t), float(o)] for t, o in value]}
+    path = Path(session_dir) / CLOCK_OFFSETS_FILENAME
+    write_json_atomic(path, {"devices": entries, "streams": dict(streams or {}), "saved_at": datetime.now().isoformat()})
+    return path
+@dataclass
+class AlignedExportConfig:
+    """What to export: the target grid, per-stream resampling and the output format.
+
+    ``methods`` overrides ``method`` per stream; ``source_rates`` overrides the
+    nominal rate polyphase resampling assumes (estimated from the index and
+    rounded to whole hertz otherwise); a stream whose rate has no exact
+    ``up/down`` ratio to ``rate_hz`` is resampled linearly. ``t0``/``t1`` are master-clock seconds
+    and default to the union of the stream spans. ``epoch_window`` is the
+    (start, end) of each marker-aligned epoch relative to its marker, or None
+    for no epochs. ``markers`` replaces the ``sync_marker`` events of the
+    session log. ``format`` "auto" picks HDF5, then Parquet, then NPZ.
+    """
+    rate_hz: float = 128.0
+    method: str = "linear"
+    methods: Dict[str, str] = field(default_factory=dict)
+    streams: Optional[List[str]] = None
+    t0: Optional[float] = None
+    t1: Optional[float] = None
+    chunk_seconds: float = 30.0
+    epoch_window: Optional[Tuple[float, float]] = (-1.0, 2.0)
+    markers: Optional[List[Tuple[float, str]]] = None
+    source_rates: Dict[str, float] = field(default_factory=dict)
+    format: str = "auto"
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "AlignedExportConfig":
+        names = set(cls.__dataclass_fields__)
+        config = cls(**{key: value for key, value in params.items() if key in names})
+        if config.epoch_window is not None:
+            config.epoch_window = tuple(config.epoch_window)
+        if config.markers is not None:
+            config.markers = [(float(t), str(label)) for t, label in config.markers]
+        return config
+@dataclass
+class AlignedStream:
+    name: str
+    kind: str
+    method: str
+    columns: List[str]
+    clock: ClockMap
+    t_min: float
+    t_max: float
+    source_rate: Optional[float] = None
+    path: Optional[str] = None
+    spacing: float = 1.0
+    def output_name(self, column: str) -> str:
+        return f"{self.name.replace('/', '__')}.{column}"
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind, "method": self.method, "columns": [self.output_name(c) for c in self.columns],
+            "source_rate": self.source_rate, "t_min": self.t_min, "t_max": self.t_max, "clock": self.clock.describe(),
+        }
+def resolve_format(requested: str = "auto") -> str:
+    if requested == "auto":
+        return "hdf5" if H5PY_AVAILABLE else "parquet" if PYARROW_AVAILABLE else "npz"
+    if requested not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {requested}")
+    if requested == "hdf5" and not H5PY_AVAILABLE:
+        raise ImportError("h5py is required for HDF5 export")
+    if requested == "parquet" and not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for Parquet export")
+    return requested
+class _NpzTableWriter:
+    """One ``<table>/chunk_NNNNN.npz`` file per appended chunk."""
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.counts: Dict[str, int] = {}
+    def append(self, table: str, columns: Dict[str, np.ndarray]):
+        index = self.counts.get(table, 0)
+        (self.directory / table).mkdir(parents=True, exist_ok=True)
+        np.savez(self.directory / table / f"chunk_{index:05d}.npz", **columns)
+        self.counts[table] = index + 1
+    def close(self) -> List[str]:
+        return sorted(self.counts)
+class _ParquetTableWriter:
+    """One ``<table>.parquet`` file per table; each chunk becomes a row group."""
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.writers: Dict[str, Any] = {}
+    def append(self, table: str, columns: Dict[str, np.ndarray]):
+        batch = pa.table({name: pa.array(values.tolist() if values.dtype.kind == "U" else values) for name, values in columns.items()})
+        if table not in self.writers:
+            self.writers[table] = pq.ParquetWriter(str(self.directory / f"{table}.parquet"), batch.schema)
+        self.writers[table].write_table(batch)
+    def close(self) -> List[str]:
+        for writer in self.writers.values():
+            writer.close()
+        return sorted(self.writers)
+class _Hdf5TableWriter:
+    """One group per table in ``aligned.h5`` with a resizable dataset per column."""
+    def __init__(self, directory: Path):
+        self.file = h5py.File(str(directory / "aligned.h5"), "w")
+        self.tables: List[str] = []
+    def append(self, table: str, columns: Dict[str, np.ndarray]):
+        if table not in self.file:
+            self.tables.append(table)
+            group = self.file.create_group(table)
+            for name, values in columns.items():
+                dtype = h5py.string_dtype() if values.dtype.kind == "U" else values.dtype
+                group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=dtype, chunks=(max(1, min(len(values), 65536)),))
+        group = self.file[table]
+        for name, values in columns.items():
+            dataset = group[name]
+            start = dataset.shape[0]
+            dataset.resize((start + len(values),))
+            dataset[start:] = values.astype(object) if values.dtype.kind == "U" else values
+    def close(self) -> List[str]:
+        self.file.close()
+        return sorted(self.tables)
+_WRITERS = {"npz": _NpzTableWriter, "parquet": _ParquetTableWriter, "hdf5": _Hdf5TableWriter}
+def _polyphase_factors(rate_hz: float, source_rate: float, max_down: int = 1000) -> Optional[Tuple[int, int]]:
+    """``(up, down)`` with ``up / down == rate_hz / source_rate`` and ``down <= max_down``, or None.
+
+    An approximate ratio would slide the resampled output off the grid by a
+    fixed fraction of a sample per input sample, so it is never used.
+    """
+    ratio = Fraction(rate_hz / source_rate).limit_denominator(max_down)
+    if abs(float(ratio) * source_rate - rate_hz) > 1e-9 * rate_hz:
+        return None
+    return ratio.numerator, ratio.denominator
+def _wav_sample_rate(path: Path) -> Optional[int]:
+    """Sample rate from the ``fmt`` chunk of a RIFF or RF64 WAVE file."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] not in (b"RIFF", b"RF64") or header[8:12] != b"WAVE":
+                return None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                chunk_id, size = struct.unpack("<4sI", chunk)
+                if chunk_id == b"fmt ":
+                    return struct.unpack("<HHI", f.read(8))[2]
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    except OSError:
+        return None
+def load_session_markers(session_dir) -> List[Tuple[float, str]]:
+    """``sync_marker`` events from the session logs as sorted (master time, label) pairs."""
+    markers = []
+    for log_file in sorted(Path(session_dir).glob("*_log.json")):
+        try:
+            with open(log_file, "r", encoding="utf-8") as f:
+                events = json.load(f).get("events", [])
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Could not read markers from {log_file}: {e}")
+            continue
+        for event in events:
+            if event.get("event") != "sync_marker":
+                continue
+            timestamp = event.get("timestamp")
+            try:
+                t = float(timestamp) if isinstance(timestamp, (int, float)) else datetime.fromisoformat(timestamp).timestamp()
+            except (TypeError, ValueError):
+                continue
+            markers.append((t, str(event.get("marker", "marker"))))
+    return sorted(markers)
+class AlignedExporter:
+    """Maps every stream of a session onto one uniform master-clock grid.
+
+    The grid runs at ``rate_hz`` and is produced ``chunk_seconds`` at a time:
+    for each chunk, every stream reads only the samples around that window
+    through ``SessionReader``'s checkpoint index (in the stream's own clock,
+    mapped through its ``ClockMap``), so memory depends on the chunk length,
+    not the session length. Numeric columns are resampled with ``np.interp``
+    ("linear"), sample-and-hold ("hold") or ``scipy.signal.resample_poly``
+    ("polyphase", padded so chunk seams match a single-pass filter); grid
+    points outside a stream's span are NaN. Videos contribute the index of
+    the frame on screen at each grid time and audio files, through the block
+    timestamps ``StreamingAudioSink`` writes, the index of the sample being
+    captured; both are -1 where the stream has no data. Markers produce an
+    ``epochs`` table holding each grid row that falls within ``epoch_window``
+    of a marker, tagged with the epoch and the time relative to the marker.
+    """
+    def __init__(self, session_dir, output_dir, config: Optional[AlignedExportConfig] = None, clock: Optional[SessionClock] = None, reader: Optional[SessionReader] = None):
+        self.session_dir = Path(session_dir)
+        self.output_dir = Path(output_dir)
+        self.config = config or AlignedExportConfig()
+        if self.config.rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        for method in [self.config.method, *self.config.methods.values()]:
+            if method not in RESAMPLING_METHODS:
+                raise ValueError(f"unknown resampling method {method!r}")
+        self.clock = clock or SessionClock.load(self.session_dir)
+        self.reader = reader or SessionReader(self.session_dir)
+        self.format = resolve_format(self.config.format)
+        self.streams: List[AlignedStream] = []
+        self.markers: List[Tuple[float, str]] = []
+        self.t_start = 0.0
+        self.n_samples = 0
+        self.chunk_samples = max(1, int(round(self.config.chunk_seconds * self.config.rate_hz)))
+    def discover_streams(self) -> List[AlignedStream]:
+        available = self.reader.list_streams()
+        audio = {}
+        for path in sorted(self.session_dir.rglob("*.wav")):
+            name = path.relative_to(self.session_dir).with_suffix("").as_posix()
+            if INDEX_DIR_NAME not in path.parts and name + AUDIO_BLOCKS_SUFFIX in available:
+                audio[name] = path
+        skipped = {name + AUDIO_BLOCKS_SUFFIX for name in audio}
+        wanted = self.config.streams
+        streams = []
+        for name in list(available) + list(audio):
+            if name in skipped or (wanted and name not in wanted):
+                continue
+            try:
+                stream = self._describe_stream(name, audio.get(name))
+            except Exception as e:
+                logger.warning(f"Skipping stream {name}: {e}")
+                continue
+            if stream is not None:
+                streams.append(stream)
+        return streams
+    def _describe_stream(self, name: str, wav_path: Optional[Path]) -> Optional[AlignedStream]:
+        clock = self.clock.for_stream(name)
+        index = self.reader.get_index(name + AUDIO_BLOCKS_SUFFIX if wav_path else name)
+        if index.t_min is None or index.t_max is None or index.row_count == 0:
+            return None
+        t_min, t_max = (float(t) for t in clock.to_master([index.t_min, index.t_max]))
+        spacing = (index.t_max - index.t_min) / (index.row_count - 1) if index.row_count > 1 and index.t_max > index.t_min else 1.0
+        if wav_path is not None:
+            rate = _wav_sample_rate(wav_path)
+            if not rate:
+                raise ValueError(f"unreadable WAV header in {wav_path.name}")
+            last = self.reader.read_range(name + AUDIO_BLOCKS_SUFFIX, index.t_max, None, columns=["frame_count"])
+            t_max += float(last["columns"]["frame_count"][-1]) / rate
+            return AlignedStream(name, "audio", "hold", ["sample_index"], clock, t_min, t_max, float(rate), str(wav_path), spacing)
+        if index.kind == "video":
+            period = 1.0 / index.fps if index.fps else 0.0
+            return AlignedStream(name, "video", "hold", ["frame_index"], clock, t_min, t_max + period, index.fps, index.path, spacing)
+        if "video_filename" in index.columns:
+            return None
+        columns = [c for c in index.numeric_columns if c != index.timestamp_column]
+        if not columns:
+            return None
+        method = self.config.methods.get(name, self.config.method)
+        if method == "polyphase" and not SCIPY_AVAILABLE:
+            raise ImportError("scipy is required for polyphase resampling")
+        rate = self.config.source_rates.get(name)
+        if rate is None and index.row_count > 1 and index.t_max > index.t_min:
+            rate = 1.0 / spacing
+            rate = float(round(rate)) if rate >= 10.0 else rate
+        if method == "polyphase" and not rate:
+            raise ValueError("polyphase resampling needs a source rate")
+        if method == "polyphase" and _polyphase_factors(self.config.rate_hz, rate) is None:
+            logger.warning(f"{name}: {rate:g} Hz to {self.config.rate_hz:g} Hz has no exact polyphase ratio; resampling linearly")
+            method = "linear"
+        return AlignedStream(name, "numeric", method, columns, clock, t_min, t_max, rate, index.path, spacing)
+    def plan(self):
+        self.streams = self.discover_streams()
+        self.markers = list(self.config.markers) if self.config.markers is not None else load_session_markers(self.session_dir)
+        if not self.streams:
+            raise ValueError(f"No exportable streams in {self.session_dir}")
+        t_start = self.config.t0 if self.config.t0 is not None else min(s.t_min for s in self.streams)
+        t_end = self.config.t1 if self.config.t1 is not None else max(s.t_max for s in self.streams)
+        if t_end < t_start:
+            raise ValueError(f"Empty export window [{t_start}, {t_end}]")
+        self.t_start = float(t_start)
+        self.n_samples = int(math.floor((t_end - t_start) * self.config.rate_hz + 1e-9)) + 1
+    def grid(self, k0: int, k1: int) -> np.ndarray:
+        return self.t_start + np.arange(k0, k1, dtype=np.float64) / self.config.rate_hz
+    def _read_master(self, stream: AlignedStream, name: str, a: float, b: float, columns: List[str]):
+        d0, d1 = stream.clock.to_device([a, b])
+        data = self.reader.read_range(name, float(d0), float(d1), columns=columns)
+        return stream.clock.to_master(data["timestamps"]), data["columns"]
+    def _pad(self, stream: AlignedStream) -> float:
+        # Enough to reach the row before the window, allowing for jittery rows
+        return 4.0 * stream.spacing
+    def _sample_hold(self, stream: AlignedStream, grid: np.ndarray) -> Dict[str, np.ndarray]:
+        pad = self._pad(stream)
+        name = stream.name + AUDIO_BLOCKS_SUFFIX if stream.kind == "audio" else stream.name
+        wanted = ["first_frame", "frame_count"] if stream.kind == "audio" else stream.columns
+        times, columns = self._read_master(stream, name, grid[0] - pad, grid[-1] + pad, wanted)
+        position = np.searchsorted(times, grid + TIME_TOLERANCE_S, side="right") - 1
+        # Frames and audio blocks last until t_max; a numeric sample is held up to it
+        past_end = grid > stream.t_max if stream.kind == "numeric" else grid >= stream.t_max
+        outside = (position < 0) | past_end
+        position = np.clip(position, 0, max(len(times) - 1, 0))
+        if stream.kind == "audio":
+            if not len(times):
+                return {"sample_index": np.full(len(grid), -1, dtype=np.int64)}
+            offset = np.floor((grid - times[position] + TIME_TOLERANCE_S) * stream.source_rate)
+            inside = ~outside & (offset < columns["frame_count"][position])
+            values = np.where(inside, columns["first_frame"][position] + offset, -1)
+            return {"sample_index": values.astype(np.int64)}
+        if stream.kind == "video":
+            values = columns["frame_index"][position] if len(times) else np.zeros(len(grid))
+            return {"frame_index": np.where(outside, -1, values).astype(np.int64)}
+        if not len(times):
+            return {c: np.full(len(grid), np.nan) for c in stream.columns}
+        return {c: np.where(outside, np.nan, columns[c][position]) for c in stream.columns}
+    def _linear(self, stream: AlignedStream, grid: np.ndarray) -> Dict[str, np.ndarray]:
+        pad = self._pad(stream)
+        times, columns = self._read_master(stream, stream.name, grid[0] - pad, grid[-1] + pad, stream.columns)
+        if not len(times):
+            return {c: np.full(len(grid), np.nan) for c in stream.columns}
+        return {c: np.interp(grid, times, columns[c], left=np.nan, right=np.nan) for c in stream.columns}
+    def _polyphase(self, stream: AlignedStream, k0: int, k1: int) -> Dict[str, np.ndarray]:
+        up, down = _polyphase_factors(self.config.rate_hz, stream.source_rate)
+        # Work on whole filter phases, so every chunk sees the same input grid
+        block0, block1 = (k0 // up) * up, -(-k1 // up) * up
+        half_length = 10 * max(up, down)
+        pad = -(-(half_length // up + 2) // down) * down
+        j0 = block0 // up * down - pad
+        j1 = block1 // up * down + pad
+        inputs = self.t_start + np.arange(j0, j1, dtype=np.float64) / stream.source_rate
+        times, columns = self._read_master(stream, stream.name, inputs[0] - 2.0 / stream.source_rate, inputs[-1] + 2.0 / stream.source_rate, stream.columns)
+        grid = self.grid(k0, k1)
+        outside = (grid < stream.t_min) | (grid > stream.t_max)
+        skip = pad * up // down + (k0 - block0)
+        result = {}
+        for c in stream.columns:
+            if not len(times):
+                result[c] = np.full(len(grid), np.nan)
+                continue
+            uniform = np.interp(inputs, times, np.nan_to_num(columns[c]))
+            resampled = resample_poly(uniform, up, down)[skip:skip + (k1 - k0)]
+            result[c] = np.where(outside, np.nan, resampled)
+        return result
+    def _chunk(self, k0: int, k1: int) -> Dict[str, np.ndarray]:
+        grid = self.grid(k0, k1)
+        table = {"t": grid}
+        for stream in self.streams:
+            if stream.kind != "numeric" or stream.method == "hold":
+                values = self._sample_hold(stream, grid)
+            elif stream.method == "polyphase":
+                values = self._polyphase(stream, k0, k1)
+            else:
+                values = self._linear(stream, grid)
+            for column, array in values.items():
+                table[stream.output_name(column)] = array
+        return table
+    def _epochs(self, table: Dict[str, np.ndarray], k0: int) -> Optional[Dict[str, np.ndarray]]:
+        if not self.markers or self.config.epoch_window is None:
+            return None
+        before, after = self.config.epoch_window
+        grid = table["t"]
+        pieces = []
+        for epoch, (marker_time, label) in enumerate(self.markers):
+            if marker_time + after < grid[0] or marker_time + before > grid[-1]:
+                continue
+            lo = int(np.searchsorted(grid, marker_time + before, side="left"))
+            hi = int(np.searchsorted(grid, marker_time + after, side="right"))
+            if lo < hi:
+                pieces.append((epoch, label, marker_time, lo, hi))
+        if not pieces:
+            return None
+        rows = np.concatenate([np.arange(lo, hi) for *_, lo, hi in pieces])
+        lengths = [hi - lo for *_, lo, hi in pieces]
+        epochs = {
+            "epoch": np.repeat([p[0] for p in pieces], lengths).astype(np.int64),
+            "marker": np.repeat(np.array([p[1] for p in pieces], dtype=str), lengths),
+            "t_rel": grid[rows] - np.repeat([p[2] for p in pieces], lengths),
+            "sample": rows.astype(np.int64) + k0,
+        }
+        epochs.update({name: values[rows] for name, values in table.items()})
+        return epochs
+    def run(self, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Write the export and its manifest; returns the manifest."""
+        self.plan()
+        partial = self.output_dir.with_name(self.output_dir.name + ".partial")
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir(parents=True)
+        writer = _WRITERS[self.format](partial)
+        epoch_rows = 0
+        try:
+            if self.markers:
+                writer.append("markers", {
+                    "epoch": np.arange(len(self.markers), dtype=np.int64),
+                    "t": np.array([t for t, _ in self.markers], dtype=np.float64),
+                    "marker": np.array([label for _, label in self.markers], dtype=str),
+                })
+            for k0 in range(0, self.n_samples, self.chunk_samples):
+                k1 = min(k0 + self.chunk_samples, self.n_samples)
+                table = self._chunk(k0, k1)
+                writer.append("aligned", table)
+                epochs = self._epochs(table, k0)
+                if epochs is not None:
+                    writer.append("epochs", epochs)
+                    epoch_rows += len(epochs["epoch"])
+                if progress is not None:
+                    progress(k1 / self.n_samples, f"Aligned {k1}/{self.n_samples} samples")
+            tables = writer.close()
+        except BaseException:
+            try:
+                writer.close()
+            except Exception:
+                pass
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+        manifest = {
+            "session_id": self.session_dir.name,
+            "created_at": datetime.now().isoformat(),
+            "format": self.format,
+            "rate_hz": self.config.rate_hz,
+            "t_start": self.t_start,
+            "n_samples": self.n_samples,
+            "chunk_samples": self.chunk_samples,
+            "tables": tables,
+            "epoch_window": list(self.config.epoch_window) if self.config.epoch_window else None,
+            "epoch_rows": epoch_rows,
+            "markers": len(self.markers),
+            "clock_source": self.clock.source,
+            "streams": {stream.name: stream.describe() for stream in self.streams},
+        }
+        write_json_atomic(partial / EXPORT_MANIFEST_FILENAME, manifest)
+        if self.output_dir.exists():
+            shutil.rmtree(self.output_dir)
+        os.replace(partial, self.output_dir)
+        logger.info(f"Aligned export of {self.session_dir.name}: {len(self.streams)} streams, {self.n_samples} samples at {self.config.rate_hz} Hz ({self.format})")
+        return manifest
+def load_npz_table(export_dir, table: str = "aligned") -> Dict[str, np.ndarray]:
+    """Concatenate the chunks of one table of an NPZ export (for small exports and tests)."""
+    chunks = sorted((Path(export_dir) / table).glob("chunk_*.npz"))
+    parts: Dict[str, List[np.ndarray]] = {}
+    for chunk in chunks:
+        with np.load(chunk) as data:
+            for name in data.files:
+                parts.setdefault(name, []).append(data[name])
+    return {name: np.concatenate(values) for name, values in parts.items()}
@@ -0,0 +1,444 @@
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+HEALTH_INDEX_FILENAME = ".session_health.sqlite3"
+Validator = Callable[[bytes], Optional[str]]
+def validate_json(data: bytes) -> Optional[str]:
+    try:
+        json.loads(data.decode("utf-8"))
+        return None
+    except (ValueError, UnicodeDecodeError) as e:
+        return str(e)
+DEFAULT_VALIDATORS: Dict[str, Validator] = {".json": validate_json}
+def _ancestors(relative: str) -> List[str]:
+    parts = relative.split("/")[:-1]
+    return [""] + ["/".join(parts[: i + 1]) for i in range(len(parts))]
+@dataclass
+class FileHealth:
+    path: str
+    size: int
+    mtime_ns: int
+    checksum: Optional[str]
+    valid: Optional[bool]
+    error: Optional[str]
+    checked_at: float
+@dataclass
+class HealthScanResult:
+    scanned: int = 0
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    corrupted: List[str] = field(default_factory=list)
+    bytes_read: int = 0
+    elapsed_s: float = 0.0
+    def merge(self, other: "HealthScanResult"):
+        self.scanned += other.scanned
+        self.added += other.added
+        self.modified += other.modified
+        self.removed += other.removed
+        self.corrupted.extend(other.corrupted)
+        self.bytes_read += other.bytes_read
+        self.elapsed_s += other.elapsed_s
+class SessionHealthIndex:
+    """Persistent per-file health cache for a recordings directory.
+
+    Every file under the session folders (hidden entries excluded) has a row
+    with its size, mtime, a BLAKE2b checksum (files up to ``checksum_limit``
+    bytes) and the result of the validator registered for its extension.
+    ``scan`` walks the tree with ``os.scandir`` and only reads files whose size
+    or mtime differ from the index, so a rescan of an unchanged tree costs one
+    ``stat`` per file and no parsing. Folder sizes and file counts are kept as
+    rolled-up aggregates for every ancestor folder and adjusted by deltas, so
+    ``folder_size`` is a single lookup. Paths in the index are relative to
+    ``root`` and use ``/`` separators.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            checksum TEXT,
+            valid INTEGER,
+            error TEXT,
+            checked_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS folders (
+            path TEXT PRIMARY KEY,
+            total_size INTEGER NOT NULL,
+            file_count INTEGER NOT NULL
+        );
+    """
+    def __init__(self, root, db_path=None, checksum_limit: int = 16 * 1024 * 1024, validators: Optional[Dict[str, Validator]] = None):
+        self.root = Path(root).absolute()
+        self.db_path = Path(db_path) if db_path else self.root / HEALTH_INDEX_FILENAME
+        self.checksum_limit = checksum_limit
+        self.validators = dict(DEFAULT_VALIDATORS if validators is None else validators)
+        self._lock = threading.RLock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30.0, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    def relative(self, path) -> Optional[str]:
+        """Index key for ``path``, or ``None`` if it is outside the session folders."""
+        try:
+            relative = Path(os.path.abspath(path)).relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+        return "" if relative == "." else relative
+    @staticmethod
+    def _range(prefix: str) -> Tuple[str, str]:
+        # Rows below "a/b" sort between "a/b/" and "a/b0" ("0" follows "/")
+        return prefix + "/", prefix + "0"
+    def _load_rows(self, prefix: str) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            if prefix:
+                low, high = self._range(prefix)
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE path = ? OR (path >= ? AND path < ?)",
+                    (prefix, low, high),
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT path, size, mtime_ns FROM files").fetchall()
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+    def _walk(self, directory: str, prefix: str, found: Dict[str, Tuple[int, int]]):
+        stack = [(directory, prefix)]
+        while stack:
+            current, current_prefix = stack.pop()
+            try:
+                entries = os.scandir(current)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    relative = f"{current_prefix}/{entry.name}" if current_prefix else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, relative))
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    # Files directly in the root (logs, databases) are not session data
+                    if current_prefix:
+                        found[relative] = (stat.st_size, stat.st_mtime_ns)
+    def _inspect(self, relative: str, size: int, mtime_ns: int, result: HealthScanResult) -> FileHealth:
+        validator = self.validators.get(os.path.splitext(relative)[1].lower())
+        checksum = error = None
+        valid: Optional[bool] = None
+        if validator is not None or size <= self.checksum_limit:
+            try:
+                with open(os.path.join(self.root, relative), "rb") as f:
+                    data = f.read()
+                result.bytes_read += len(data)
+                if size <= self.checksum_limit:
+                    checksum = hashlib.blake2b(data, digest_size=16).hexdigest()
+                if validator is not None:
+                    error = validator(data)
+                    valid = error is None
+            except OSError as e:
+                error, valid = str(e), False
+        if valid is False:
+            result.corrupted.append(relative)
+        return FileHealth(relative, size, mtime_ns, checksum, valid, error, time.time())
+    def _apply(self, old: Dict[str, Tuple[int, int]], updates: List[FileHealth], removed: Iterable[str]):
+        deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for health in updates:
+            previous = old.get(health.path)
+            for ancestor in _ancestors(health.path):
+                delta = deltas[ancestor]
+                delta[0] += health.size - (previous[0] if previous else 0)
+                delta[1] += 0 if previous else 1
+        removed = list(removed)
+        for relative in removed:
+            for ancestor in _ancestors(relative):
+                deltas[ancestor][0] -= old[relative][0]
+                deltas[ancestor][1] -= 1
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, checksum, valid, error, checked_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (h.path, h.size, h.mtime_ns, h.checksum, None if h.valid is None else int(h.valid), h.error, h.checked_at)
+                    for h in updates
+                ],
+            )
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(r,) for r in removed])
+            self._conn.executemany(
+                "INSERT INTO folders (path, total_size, file_count) VALUES (?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET total_size = total_size + excluded.total_size, file_count = file_count + excluded.file_count",
+                [(path, size, count) for path, (size, count) in deltas.items() if size or count],
+            )
+            self._conn.execute("DELETE FROM folders WHERE file_count <= 0")
+    def _reconcile(self, old: Dict[str, Tuple[int, int]], found: Dict[str, Tuple[int, int]], result: HealthScanResult):
+        updates = []
+        for relative, (size, mtime_ns) in found.items():
+            previous = old.get(relative)
+            if previous == (size, mtime_ns):
+                continue
+            if previous is None:
+                result.added += 1
+            else:
+                result.modified += 1
+            updates.append(self._inspect(relative, size, mtime_ns, result))
+        removed = [relative for relative in old if relative not in found]
+        result.scanned += len(found)
+        result.removed += len(removed)
+        if updates or removed:
+            self._apply(old, updates, removed)
+    def scan(self, subtree=None) -> HealthScanResult:
+        """Bring the index up to date for the whole root or one folder below it."""
+        start = time.perf_counter()
+        result = HealthScanResult()
+        prefix = "" if subtree is None else self.relative(subtree)
+        if prefix is None:
+            raise ValueError(f"{subtree} is not inside {self.root}")
+        with self._lock:
+            old = self._load_rows(prefix)
+            found: Dict[str, Tuple[int, int]] = {}
+            self._walk(os.path.join(self.root, prefix) if prefix else str(self.root), prefix, found)
+            self._reconcile(old, found, result)
+        result.elapsed_s = time.perf_counter() - start
+        return result
+    def update_paths(self, paths: Iterable) -> HealthScanResult:
+        """Refresh specific files or folders (used by the file watcher)."""
+        start = time.perf_counter()
+        result = HealthScanResult()
+        with self._lock:
+            for path in set(paths):
+                relative = self.relative(path)
+                if relative is None or any(part.startswith(".") for part in relative.split("/")):
+                    continue
+                absolute = os.path.join(self.root, relative)
+                if relative == "" or os.path.isdir(absolute):
+                    result.merge(self.scan(absolute))
+                    continue
+                old = self._load_rows(relative)
+                found = {}
+                try:
+                    stat = os.stat(absolute)
+                    if "/" in relative and os.path.isfile(absolute):
+                        found[relative] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    pass
+                self._reconcile(old, found, result)
+        result.elapsed_s = time.perf_counter() - start
+        return result
+    def forget(self, subtree) -> int:
+        """Drop a deleted folder from the index; returns how many files it held."""
+        prefix = self.relative(subtree)
+        if not prefix:
+            return 0
+        with self._lock:
+            old = self._load_rows(prefix)
+            self._apply(old, [], list(old))
+        return len(old)
+    def folder_stats(self, folder) -> Optional[Tuple[int, int]]:
+        relative = self.relative(folder)
+        if relative is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT total_size, file_count FROM folders WHERE path = ?", (relative,)).fetchone()
+        if row is None:
+            # Folders without files have no aggregate row
+            return (0, 0) if os.path.isdir(folder) and self._has_entries() else None
+        return row[0], row[1]
+    def _has_entries(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM folders WHERE path = ''").fetchone() is not None
+    def folder_size(self, folder) -> Optional[int]:
+        stats = self.folder_stats(folder)
+        return None if stats is None else stats[0]
+    def file_health(self, path) -> Optional[FileHealth]:
+        relative = self.relative(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns, checksum, valid, error, checked_at FROM files WHERE path = ?", (relative,)
+            ).fetchone()
+        if row is None:
+            return None
+        return FileHealth(row[0], row[1], row[2], row[3], None if row[4] is None else bool(row[4]), row[5], row[6])
+    def corrupted_files(self) -> List[Path]:
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files WHERE valid = 0 ORDER BY path").fetchall()
+        return [self.root / row[0] for row in rows]
+    def statistics(self) -> Dict[str, int]:
+        with self._lock:
+            files, corrupted = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(valid = 0), 0) FROM files").fetchone()
+            total = self._conn.execute("SELECT total_size FROM folders WHERE path = ''").fetchone()
+        return {"indexed_files": files, "corrupted_files": corrupted, "total_bytes": total[0] if total else 0}
+class InotifyWatcher(threading.Thread):
+    """Keeps a ``SessionHealthIndex`` current from Linux inotify events.
+
+    Every non-hidden folder under the index root is watched. Changed paths are
+    collected and handed to ``index.update_paths`` once they have been quiet
+    for ``flush_interval`` seconds, so half-written files are not validated; a
+    file that is written continuously is refreshed every ``max_delay`` seconds
+    instead. A queue overflow or a renamed folder makes the next flush fall
+    back to a full ``scan``. ``on_change`` receives each non-empty
+    ``HealthScanResult``. ``available()`` is false on platforms without
+    inotify; callers then rely on periodic scans alone.
+    """
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _EVENT = struct.Struct("iIII")
+    _libc = None
+    def __init__(self, index: SessionHealthIndex, flush_interval: float = 1.0, on_change: Optional[Callable[[HealthScanResult], None]] = None, max_delay: Optional[float] = None):
+        super().__init__(name="session-health-watcher", daemon=True)
+        self.index = index
+        self.flush_interval = flush_interval
+        self.max_delay = max_delay if max_delay is not None else 10 * flush_interval
+        self.on_change = on_change
+        self.needs_rescan = False
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, str] = {}
+        # path -> (first event, last event) in monotonic seconds
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self._stop_event = threading.Event()
+    @classmethod
+    def _load_libc(cls):
+        if cls._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            cls._libc = libc
+        return cls._libc
+    @classmethod
+    def available(cls) -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            return hasattr(cls._load_libc(), "inotify_init1")
+        except OSError:
+            return False
+    def start(self):
+        if not self.available():
+            raise OSError("inotify is not available on this platform")
+        fd = self._load_libc().inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._watch_tree(str(self.index.root))
+        super().start()
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    def _watch_tree(self, directory: str):
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            wd = self._load_libc().inotify_add_watch(self._fd, os.fsencode(current), self.WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Cannot watch {current}: {os.strerror(ctypes.get_errno())}")
+                self.needs_rescan = True
+                continue
+            self._watches[wd] = current
+            try:
+                with os.scandir(current) as entries:
+                    stack.extend(e.path for e in entries if not e.name.startswith(".") and e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+    def _read_events(self):
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + self._EVENT.size <= len(buffer):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(buffer, offset)
+            name = buffer[offset + self._EVENT.size: offset + self._EVENT.size + length].rstrip(b"\0")
+            offset += self._EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                self.needs_rescan = True
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name or name.startswith(b"."):
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._watch_tree(path)
+                elif mask & self.IN_MOVED_FROM:
+                    # Watches below a moved folder keep the old path
+                    self.needs_rescan = True
+            now = time.monotonic()
+            self._pending[path] = (self._pending.get(path, (now, now))[0], now)
+    def flush(self) -> Optional[HealthScanResult]:
+        if self.needs_rescan:
+            self.needs_rescan = False
+            self._pending.clear()
+            result = self.index.scan()
+        else:
+            now = time.monotonic()
+            ready = [
+                path for path, (first, last) in self._pending.items()
+                if now - last >= self.flush_interval or now - first >= self.max_delay
+            ]
+            if not ready:
+                return None
+            for path in ready:
+                del self._pending[path]
+            result = self.index.update_paths(ready)
+        if self.on_change and (result.added or result.modified or result.removed):
+            try:
+                self.on_change(result)
+            except Exception as e:
+                logger.error(f"Health index change callback failed: {e}")
+        return result
+    def run(self):
+        last_flush = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                readable, _, _ = select.select([self._fd], [], [], min(self.flush_interval, 0.2))
+                if readable:
+                    self._read_events()
+                if time.monotonic() - last_flush >= self.flush_interval / 2:
+                    last_flush = time.monotonic()
+                    self.flush()
+            except (OSError, ValueError, sqlite3.Error) as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning(f"Session health watcher error: {e}")
+                self.needs_rescan = True
+                self._stop_event.wait(self.flush_interval)
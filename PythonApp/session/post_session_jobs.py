@@ -0,0 +1,812 @@
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from ..error_handling.recovery_scheduler import BackoffPolicy
+from ..utils.logging_config import get_logger
+from .session_metadata import METADATA_FILENAME, deep_merge, update_session_metadata, write_json_atomic
+logger = get_logger(__name__)
+JobHandler = Callable[["JobContext"], Optional[Dict[str, Any]]]
+EventCallback = Callable[[Dict[str, Any]], None]
+class JobState(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+ACTIVE_STATES = (JobState.QUEUED.value, JobState.RUNNING.value)
+FINAL_STATES = (JobState.SUCCEEDED.value, JobState.FAILED.value, JobState.CANCELLED.value)
+MANIFEST_FILENAME = "integrity_manifest.json"
+STORED_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".wmv", ".jpg", ".jpeg", ".png", ".zip", ".gz", ".npz"}
+class JobCancelled(Exception):
+    pass
+class JobInterrupted(Exception):
+    """Raised inside a handler when its worker is shutting down; the job is requeued."""
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix (missing module, missing session)."""
+@dataclass
+class PostSessionJob:
+    id: int
+    job_type: str
+    session_id: Optional[str]
+    session_dir: Optional[str]
+    params: Dict[str, Any]
+    state: str
+    attempts: int
+    max_attempts: int
+    run_after: float
+    progress: float
+    message: Optional[str]
+    checkpoint: Dict[str, Any]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    cancel_requested: bool
+    worker: Optional[str]
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float]
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "PostSessionJob":
+        return cls(
+            id=row["id"],
+            job_type=row["job_type"],
+            session_id=row["session_id"],
+            session_dir=row["session_dir"],
+            params=json.loads(row["params"] or "{}"),
+            state=row["state"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            run_after=row["run_after"],
+            progress=row["progress"],
+            message=row["message"],
+            checkpoint=json.loads(row["checkpoint"] or "{}"),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            cancel_requested=bool(row["cancel_requested"]),
+            worker=row["worker"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            finished_at=row["finished_at"],
+        )
+    @property
+    def finished(self) -> bool:
+        return self.state in FINAL_STATES
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+class PostSessionJobQueue:
+    """Persistent post-session job queue stored in SQLite.
+
+    Jobs move ``queued -> running -> succeeded | failed | cancelled``. A worker
+    claims the oldest due job inside a ``BEGIN IMMEDIATE`` transaction, so
+    several worker processes can share one database file, and holds a lease
+    that it renews while the handler runs. Handlers persist a JSON checkpoint
+    as they go; a job whose worker died (lease expired, or the application
+    restarted) is put back in the queue with its checkpoint intact. Every state
+    or progress change appends a row to ``job_events``, which is how other
+    processes observe progress.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_type TEXT NOT NULL,
+            session_id TEXT,
+            session_dir TEXT,
+            params TEXT NOT NULL DEFAULT '{}',
+            state TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            run_after REAL NOT NULL,
+            lease_expires REAL,
+            worker TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            checkpoint TEXT,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, run_after);
+        CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id);
+        CREATE TABLE IF NOT EXISTS job_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            progress REAL NOT NULL,
+            message TEXT,
+            created_at REAL NOT NULL
+        );
+    """
+    def __init__(self, path, lease_seconds: float = 60.0, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    def _event(self, conn, job_id: int, state: str, progress: float, message: Optional[str]):
+        conn.execute(
+            "INSERT INTO job_events (job_id, state, progress, message, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, state, progress, message, self.clock()),
+        )
+    def enqueue(self, job_type: str, session_id: Optional[str] = None, session_dir=None, params: Optional[Dict[str, Any]] = None, max_attempts: int = 3, delay: float = 0.0, dedupe: bool = True) -> int:
+        """Add a job and return its id; an identical active job is reused when ``dedupe``."""
+        params_json = json.dumps(params or {}, sort_keys=True)
+        now = self.clock()
+        with self._transaction() as conn:
+            if dedupe:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE job_type = ? AND session_id IS ? AND params = ? AND state IN (?, ?) ORDER BY id LIMIT 1",
+                    (job_type, session_id, params_json) + ACTIVE_STATES,
+                ).fetchone()
+                if row is not None:
+                    return row["id"]
+            cursor = conn.execute(
+                "INSERT INTO jobs (job_type, session_id, session_dir, params, state, max_attempts, run_after, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_type, session_id, str(session_dir) if session_dir else None, params_json, JobState.QUEUED.value, max(1, max_attempts), now + delay, now, now),
+            )
+            job_id = cursor.lastrowid
+            self._event(conn, job_id, JobState.QUEUED.value, 0.0, "Queued")
+        return job_id
+    def claim(self, worker: str) -> Optional[PostSessionJob]:
+        now = self.clock()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE state = ? AND run_after <= ? ORDER BY run_after, id LIMIT 1",
+                (JobState.QUEUED.value, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, worker = ?, lease_expires = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (JobState.RUNNING.value, worker, now + self.lease_seconds, now, row["id"]),
+            )
+            job = PostSessionJob.from_row(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+            self._event(conn, job.id, job.state, job.progress, f"Started (attempt {job.attempts}/{job.max_attempts})")
+        return job
+    def renew_lease(self, job_id: int) -> bool:
+        """Extend a running job's lease; returns whether cancellation was requested."""
+        now = self.clock()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND state = ?",
+                (now + self.lease_seconds, job_id, JobState.RUNNING.value),
+            )
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+    def report_progress(self, job_id: int, progress: float, message: Optional[str] = None) -> bool:
+        now = self.clock()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, lease_expires = ?, updated_at = ? WHERE id = ? AND state = ?",
+                (progress, message, now + self.lease_seconds, now, job_id, JobState.RUNNING.value),
+            )
+            self._event(conn, job_id, JobState.RUNNING.value, progress, message)
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+    def save_checkpoint(self, job_id: int, checkpoint: Dict[str, Any]) -> bool:
+        now = self.clock()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET checkpoint = ?, lease_expires = ?, updated_at = ? WHERE id = ? AND state = ?",
+                (json.dumps(checkpoint), now + self.lease_seconds, now, job_id, JobState.RUNNING.value),
+            )
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+    def cancel_requested(self, job_id: int) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+    def _finish(self, job_id: int, state: str, message: str, **columns) -> bool:
+        now = self.clock()
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET state = ?, message = ?, lease_expires = NULL, updated_at = ?, finished_at = ?{', ' + assignments if assignments else ''} WHERE id = ? AND state IN (?, ?)",
+                (state, message, now, now, *columns.values(), job_id) + ACTIVE_STATES,
+            )
+            if cursor.rowcount == 0:
+                return False
+            progress = conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()["progress"]
+            self._event(conn, job_id, state, progress, message)
+        return True
+    def complete(self, job_id: int, result: Optional[Dict[str, Any]] = None) -> bool:
+        return self._finish(job_id, JobState.SUCCEEDED.value, "Completed", progress=1.0, result=json.dumps(result or {}, default=str))
+    def fail(self, job_id: int, error: str, retry_delay: Optional[float] = None) -> str:
+        """Record a failed attempt; requeue after ``retry_delay`` if attempts remain."""
+        now = self.clock()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts, progress, cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return JobState.FAILED.value
+            if retry_delay is not None and row["attempts"] < row["max_attempts"] and not row["cancel_requested"]:
+                conn.execute(
+                    "UPDATE jobs SET state = ?, run_after = ?, lease_expires = NULL, worker = NULL, error = ?, message = ?, updated_at = ? WHERE id = ?",
+                    (JobState.QUEUED.value, now + retry_delay, error, f"Retrying in {retry_delay:.1f}s", now, job_id),
+                )
+                self._event(conn, job_id, JobState.QUEUED.value, row["progress"], f"Attempt {row['attempts']} failed: {error}")
+                return JobState.QUEUED.value
+            conn.execute(
+                "UPDATE jobs SET state = ?, lease_expires = NULL, error = ?, message = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (JobState.FAILED.value, error, "Failed", now, now, job_id),
+            )
+            self._event(conn, job_id, JobState.FAILED.value, row["progress"], error)
+        return JobState.FAILED.value
+    def mark_cancelled(self, job_id: int) -> bool:
+        return self._finish(job_id, JobState.CANCELLED.value, "Cancelled")
+    def release(self, job_id: int, message: str = "Interrupted; will resume") -> bool:
+        """Return a running job to the queue without counting the attempt."""
+        now = self.clock()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), worker = NULL, lease_expires = NULL, message = ?, updated_at = ? WHERE id = ? AND state = ?",
+                (JobState.QUEUED.value, message, now, job_id, JobState.RUNNING.value),
+            )
+            if cursor.rowcount:
+                progress = conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()["progress"]
+                self._event(conn, job_id, JobState.QUEUED.value, progress, message)
+        return bool(cursor.rowcount)
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job now, or ask the worker running it to stop."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["state"] in FINAL_STATES:
+                return False
+            conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?", (self.clock(), job_id))
+        if row["state"] == JobState.QUEUED.value:
+            self.mark_cancelled(job_id)
+        return True
+    def requeue_interrupted(self, expired_only: bool = False) -> int:
+        """Requeue running jobs whose worker is gone, keeping their checkpoints.
+
+        With ``expired_only`` only jobs whose lease has lapsed are touched;
+        otherwise every running job is assumed orphaned (application start).
+        Jobs that have already used all attempts are failed instead.
+        """
+        now = self.clock()
+        recovered = 0
+        with self._transaction() as conn:
+            query = "SELECT id, attempts, max_attempts, progress FROM jobs WHERE state = ?"
+            args = [JobState.RUNNING.value]
+            if expired_only:
+                query += " AND lease_expires < ?"
+                args.append(now)
+            for row in conn.execute(query, args).fetchall():
+                if row["attempts"] >= row["max_attempts"]:
+                    conn.execute(
+                        "UPDATE jobs SET state = ?, lease_expires = NULL, error = ?, message = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                        (JobState.FAILED.value, "Worker stopped unexpectedly", "Failed", now, now, row["id"]),
+                    )
+                    self._event(conn, row["id"], JobState.FAILED.value, row["progress"], "Worker stopped unexpectedly")
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL, run_after = ?, message = ?, updated_at = ? WHERE id = ?",
+                    (JobState.QUEUED.value, now, "Resuming from checkpoint", now, row["id"]),
+                )
+                self._event(conn, row["id"], JobState.QUEUED.value, row["progress"], "Resuming from checkpoint")
+                recovered += 1
+        return recovered
+    def get(self, job_id: int) -> Optional[PostSessionJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return PostSessionJob.from_row(row) if row else None
+    def list_jobs(self, session_id: Optional[str] = None, states: Optional[Sequence[str]] = None, limit: int = 100) -> List[PostSessionJob]:
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        args: List[Any] = []
+        if session_id is not None:
+            query += " AND session_id = ?"
+            args.append(session_id)
+        if states:
+            query += f" AND state IN ({', '.join('?' for _ in states)})"
+            args.extend(states)
+        query += " ORDER BY id DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [PostSessionJob.from_row(row) for row in rows]
+    def events_since(self, after_id: int, limit: int = 500) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.id, e.job_id, e.state, e.progress, e.message, e.created_at, j.job_type, j.session_id "
+                "FROM job_events e JOIN jobs j ON j.id = e.job_id WHERE e.id > ? ORDER BY e.id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [
+            {
+                "event_id": row["id"],
+                "job_id": row["job_id"],
+                "job_type": row["job_type"],
+                "session_id": row["session_id"],
+                "state": row["state"],
+                "progress": row["progress"],
+                "message": row["message"],
+                "timestamp": row["created_at"],
+            }
+            for row in rows
+        ]
+    def last_event_id(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) AS last FROM job_events").fetchone()
+        return row["last"] or 0
+    def prune(self, older_than: float = 7 * 24 * 3600.0) -> int:
+        """Delete finished jobs and events older than ``older_than`` seconds."""
+        cutoff = self.clock() - older_than
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM job_events WHERE created_at < ?", (cutoff,))
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE finished_at < ? AND state IN ({', '.join('?' for _ in FINAL_STATES)})",
+                (cutoff,) + FINAL_STATES,
+            )
+        return cursor.rowcount
+class JobContext:
+    """What a handler sees: its job, checkpoint, and progress/cancellation hooks."""
+    def __init__(self, queue: PostSessionJobQueue, job: PostSessionJob, stopping: Callable[[], bool] = lambda: False, progress_interval: float = 0.25):
+        self.queue = queue
+        self.job = job
+        self.params = dict(job.params)
+        self.checkpoint: Dict[str, Any] = dict(job.checkpoint)
+        self.session_dir = Path(job.session_dir) if job.session_dir else None
+        self.stopping = stopping
+        self.progress_interval = progress_interval
+        self._last_report = 0.0
+        self._last_check = 0.0
+    def progress(self, fraction: float, message: Optional[str] = None, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            self.check_cancelled()
+            return
+        self._last_report = self._last_check = now
+        if self.queue.report_progress(self.job.id, min(max(fraction, 0.0), 1.0), message):
+            raise JobCancelled()
+        self._raise_if_stopping()
+    def save_checkpoint(self, checkpoint: Optional[Dict[str, Any]] = None):
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        if self.queue.save_checkpoint(self.job.id, self.checkpoint):
+            raise JobCancelled()
+        self._raise_if_stopping()
+    def check_cancelled(self):
+        now = time.monotonic()
+        if now - self._last_check < self.progress_interval:
+            return
+        self._last_check = now
+        if self.queue.cancel_requested(self.job.id):
+            raise JobCancelled()
+        self._raise_if_stopping()
+    def _raise_if_stopping(self):
+        if self.stopping():
+            raise JobInterrupted()
+    def require_session_dir(self) -> Path:
+        if self.session_dir is None or not self.session_dir.is_dir():
+            raise PermanentJobError(f"Session folder not found: {self.session_dir}")
+        return self.session_dir
+class _LeaseKeeper(threading.Thread):
+    def __init__(self, queue: PostSessionJobQueue, job_id: int):
+        super().__init__(name=f"job-{job_id}-lease", daemon=True)
+        self.queue = queue
+        self.job_id = job_id
+        self._done = threading.Event()
+    def run(self):
+        while not self._done.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.renew_lease(self.job_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew lease for job {self.job_id}: {e}")
+    def stop(self):
+        self._done.set()
+def _record_in_session_metadata(job: PostSessionJob, state: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    if not job.session_dir or not (Path(job.session_dir) / METADATA_FILENAME).exists():
+        return
+    status = {
+        "status": state,
+        "job_id": job.id,
+        "attempts": job.attempts,
+        "finished_at": datetime.now().isoformat(),
+        "error": error,
+    }
+    changes = deep_merge({"post_processing": {job.job_type: status}}, (result or {}).get("metadata") or {})
+    try:
+        update_session_metadata(job.session_dir, changes)
+    except OSError as e:
+        logger.warning(f"Failed to record {job.job_type} status in session metadata: {e}")
+def execute_job(queue: PostSessionJobQueue, job: PostSessionJob, handlers: Dict[str, JobHandler], policy: Optional[BackoffPolicy] = None, rng: Optional[random.Random] = None, stopping: Callable[[], bool] = lambda: False) -> str:
+    """Run one claimed job to a terminal state (or back to the queue) and return it."""
+    policy = policy or BackoffPolicy(base_delay=5.0, max_delay=300.0)
+    handler = handlers.get(job.job_type)
+    if handler is None:
+        state = queue.fail(job.id, f"No handler for job type '{job.job_type}'")
+        _record_in_session_metadata(job, state, error=f"No handler for job type '{job.job_type}'")
+        return state
+    context = JobContext(queue, job, stopping)
+    keeper = _LeaseKeeper(queue, job.id)
+    keeper.start()
+    try:
+        result = handler(context) or {}
+    except JobCancelled:
+        queue.mark_cancelled(job.id)
+        _record_in_session_metadata(job, JobState.CANCELLED.value)
+        return JobState.CANCELLED.value
+    except JobInterrupted:
+        queue.release(job.id)
+        return JobState.QUEUED.value
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        retry_delay = None if isinstance(e, PermanentJobError) else policy.delay(job.attempts, rng or random.Random())
+        state = queue.fail(job.id, error, retry_delay)
+        logger.warning(f"Post-session job {job.id} ({job.job_type}) failed: {error}")
+        if state == JobState.FAILED.value:
+            _record_in_session_metadata(job, state, error=error)
+        return state
+    finally:
+        keeper.stop()
+    queue.complete(job.id, result)
+    _record_in_session_metadata(job, JobState.SUCCEEDED.value, result)
+    return JobState.SUCCEEDED.value
+def run_worker(db_path: str, handlers: Dict[str, JobHandler], worker_name: str, stop_event, poll_interval: float = 0.5, lease_seconds: float = 60.0, policy: Optional[BackoffPolicy] = None):
+    """Worker loop; used as the target of both worker processes and threads."""
+    queue = PostSessionJobQueue(db_path, lease_seconds)
+    rng = random.Random()
+    try:
+        while not stop_event.is_set():
+            try:
+                job = queue.claim(worker_name)
+            except sqlite3.Error as e:
+                logger.warning(f"{worker_name} could not claim a job: {e}")
+                job = None
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+            logger.info(f"{worker_name} running job {job.id} ({job.job_type}) for {job.session_id}")
+            execute_job(queue, job, handlers, policy, rng, stop_event.is_set)
+    finally:
+        queue.close()
+def _session_files(session_dir: Path, exclude: Sequence[Path] = ()) -> List[Path]:
+    excluded = {Path(p).resolve() for p in exclude}
+    files = []
+    for path in sorted(session_dir.rglob("*")):
+        relative = path.relative_to(session_dir)
+        if any(part.startswith(".") for part in relative.parts) or path.name.endswith(".lock"):
+            continue
+        if path.is_file() and path.resolve() not in excluded:
+            files.append(path)
+    return files
+def run_hand_segmentation(context: JobContext) -> Dict[str, Any]:
+    """Segment every session video, checkpointing after each one."""
+    session_dir = context.require_session_dir()
+    try:
+        from ..hand_segmentation import create_session_post_processor
+    except ImportError as e:
+        raise PermanentJobError(f"Hand segmentation module not available: {e}")
+    method = context.params.get("method", "mediapipe")
+    processor = create_session_post_processor(str(session_dir.parent))
+    videos = processor.get_session_videos(session_dir.name)
+    done = context.checkpoint.setdefault("videos", {})
+    for position, video_path in enumerate(videos):
+        if video_path in done:
+            continue
+        context.progress(position / len(videos), f"Segmenting {Path(video_path).name}", force=True)
+        result = processor.process_video_file(
+            video_path,
+            str(session_dir / f"hand_segmentation_{Path(video_path).stem}"),
+            method=method,
+            output_cropped=True,
+            output_masks=True,
+        )
+        done[video_path] = {
+            "success": result.success,
+            "processed_frames": result.processed_frames,
+            "detected_hands": result.detected_hands_count,
+            "processing_time": result.processing_time,
+            "output_directory": result.output_directory,
+            "error_message": result.error_message,
+        }
+        context.save_checkpoint()
+    summary_path = session_dir / f"hand_segmentation_summary_{method}.json"
+    write_json_atomic(summary_path, {
+        "session_id": session_dir.name,
+        "processing_method": method,
+        "processed_at": datetime.now().isoformat(),
+        "total_videos": len(done),
+        "successful_videos": sum(1 for v in done.values() if v["success"]),
+        "failed_videos": sum(1 for v in done.values() if not v["success"]),
+        "total_processing_time": sum(v["processing_time"] for v in done.values()),
+        "total_detections": sum(v["detected_hands"] for v in done.values()),
+        "videos": done,
+    })
+    return {
+        "videos": done,
+        "summary_path": str(summary_path),
+        "metadata": {
+            "post_processing": {
+                "hand_segmentation_completed": True,
+                "hand_segmentation_timestamp": datetime.now().isoformat(),
+            }
+        },
+    }
+def run_integrity_manifest(context: JobContext) -> Dict[str, Any]:
+    """SHA-256 every session file into ``integrity_manifest.json``.
+
+    Hashed files are checkpointed with their size and mtime, so a resumed job
+    only re-hashes files that changed or were not reached.
+    """
+    session_dir = context.require_session_dir()
+    manifest_path = session_dir / MANIFEST_FILENAME
+    files = _session_files(session_dir, exclude=[manifest_path, session_dir / METADATA_FILENAME])
+    total_bytes = sum(path.stat().st_size for path in files) or 1
+    entries = context.checkpoint.setdefault("files", {})
+    hashed_bytes = 0
+    for path in files:
+        relative = path.relative_to(session_dir).as_posix()
+        stat = path.stat()
+        previous = entries.get(relative)
+        if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+            hashed_bytes += stat.st_size
+            continue
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+                hashed_bytes += len(chunk)
+                context.progress(hashed_bytes / total_bytes, f"Hashing {relative}")
+        entries[relative] = {"sha256": digest.hexdigest(), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        context.save_checkpoint()
+    present = {path.relative_to(session_dir).as_posix() for path in files}
+    manifest = {
+        "session_id": context.job.session_id or session_dir.name,
+        "created_at": datetime.now().isoformat(),
+        "algorithm": "sha256",
+        "files": {name: {"sha256": e["sha256"], "size": e["size"]} for name, e in sorted(entries.items()) if name in present},
+    }
+    write_json_atomic(manifest_path, manifest)
+    return {"manifest_path": str(manifest_path), "file_count": len(manifest["files"]), "total_bytes": sum(e["size"] for e in manifest["files"].values())}
+def run_package(context: JobContext, batch_bytes: int = 256 * 1024 * 1024) -> Dict[str, Any]:
+    """Zip the session folder; the archive is closed and checkpointed every ``batch_bytes``."""
+    session_dir = context.require_session_dir()
+    output = Path(context.params.get("output") or session_dir.parent / "exports" / f"{session_dir.name}.zip")
+    partial = output.with_name(output.name + ".partial")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    added: List[str] = []
+    if partial.exists():
+        # An interrupted batch closes the archive after files the checkpoint never listed,
+        # so resume from what the archive actually holds
+        try:
+            with zipfile.ZipFile(partial) as archive:
+                added = list(dict.fromkeys(archive.namelist()))
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.warning(f"Restarting package for {session_dir.name}: {e}")
+    if not added and partial.exists():
+        partial.unlink()
+    done = set(added)
+    pending = [p for p in _session_files(session_dir, exclude=[output, partial]) if p.relative_to(session_dir).as_posix() not in done]
+    total = len(done) + len(pending)
+    while pending:
+        written = 0
+        with zipfile.ZipFile(partial, "a" if added else "w", allowZip64=True) as archive:
+            while pending and written < batch_bytes:
+                path = pending.pop(0)
+                relative = path.relative_to(session_dir).as_posix()
+                compression = zipfile.ZIP_STORED if path.suffix.lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                archive.write(path, relative, compress_type=compression)
+                written += path.stat().st_size
+                added.append(relative)
+                context.progress(len(added) / total, f"Packaging {relative}")
+        context.save_checkpoint({"added": added})
+    if not partial.exists():
+        zipfile.ZipFile(partial, "w").close()
+    os.replace(partial, output)
+    return {"archive_path": str(output), "file_count": len(added), "archive_bytes": output.stat().st_size}
+def run_export(context: JobContext) -> Dict[str, Any]:
+    """Export each non-video stream to CSV via ``SessionReader``, one checkpoint per stream."""
+    from .session_reader import SessionReader
+    session_dir = context.require_session_dir()
+    output_dir = Path(context.params.get("output_dir") or session_dir.parent / "exports" / f"{session_dir.name}_csv")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    reader = SessionReader(session_dir)
+    wanted = context.params.get("streams")
+    streams = [name for name in reader.list_streams() if (not wanted or name in wanted) and reader.get_index(name).kind != "video"]
+    exported = context.checkpoint.setdefault("streams", {})
+    for position, stream in enumerate(streams):
+        if stream in exported:
+            continue
+        context.progress(position / max(len(streams), 1), f"Exporting {stream}", force=True)
+        data = reader.read_range(stream, context.params.get("t0"), context.params.get("t1"), max_points=context.params.get("max_points"))
+        target = output_dir / (stream.replace("/", "__") + ".csv")
+        tmp_path = target.with_name(f".{target.name}.tmp")
+        names = list(data["columns"])
+        with open(tmp_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp_s"] + names)
+            writer.writerows(zip(data["timestamps"].tolist(), *(data["columns"][n].tolist() for n in names)))
+        os.replace(tmp_path, target)
+        exported[stream] = {"path": str(target), "rows": len(data["timestamps"])}
+        context.save_checkpoint()
+    return {"output_dir": str(output_dir), "streams": exported}
+def run_aligned_export(context: JobContext) -> Dict[str, Any]:
+    """Resample every stream onto one master-clock grid via ``AlignedExporter``.
+
+    Chunks are streamed straight to the output, so an interrupted job starts
+    the export again rather than resuming it.
+    """
+    from .aligned_export import AlignedExportConfig, AlignedExporter
+    session_dir = context.require_session_dir()
+    output_dir = Path(context.params.get("output_dir") or session_dir.parent / "exports" / f"{session_dir.name}_aligned")
+    try:
+        config = AlignedExportConfig.from_params(context.params)
+        exporter = AlignedExporter(session_dir, output_dir, config)
+    except (ValueError, TypeError, ImportError) as e:
+        raise PermanentJobError(f"Invalid aligned export: {e}")
+    manifest = exporter.run(progress=lambda fraction, message: context.progress(fraction, message))
+    return {
+        "output_dir": str(output_dir),
+        "format": manifest["format"],
+        "n_samples": manifest["n_samples"],
+        "streams": sorted(manifest["streams"]),
+        "metadata": {"post_processing": {"aligned_export": {"output_dir": str(output_dir), "rate_hz": manifest["rate_hz"]}}},
+    }
+DEFAULT_HANDLERS: Dict[str, JobHandler] = {
+    "hand_segmentation": run_hand_segmentation,
+    "integrity_manifest": run_integrity_manifest,
+    "package": run_package,
+    "export": run_export,
+    "aligned_export": run_aligned_export,
+}
+class PostSessionJobRunner:
+    """Owns a ``PostSessionJobQueue`` plus its worker pool and event dispatch.
+
+    Workers are separate processes by default (``spawn`` context, so they are
+    safe to start from the Qt GUI) and claim jobs straight from the SQLite
+    file; ``use_processes=False`` runs the same loop in threads. A dispatcher
+    thread in the owning process tails ``job_events`` and hands each event to
+    subscribers, and periodically requeues jobs whose lease lapsed. ``start``
+    requeues whatever was running when the application last exited, so jobs
+    resume from their checkpoint; ``stop`` asks running handlers to return
+    their job to the queue at the next progress report.
+    """
+    def __init__(self, db_path, handlers: Optional[Dict[str, JobHandler]] = None, workers: int = 2, use_processes: bool = True, poll_interval: float = 0.5, lease_seconds: float = 60.0, policy: Optional[BackoffPolicy] = None):
+        self.db_path = str(db_path)
+        self.handlers = dict(DEFAULT_HANDLERS)
+        self.handlers.update(handlers or {})
+        self.worker_count = max(1, workers)
+        self.use_processes = use_processes
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.policy = policy or BackoffPolicy(base_delay=5.0, max_delay=300.0)
+        self.queue = PostSessionJobQueue(self.db_path, lease_seconds)
+        self._subscribers: List[EventCallback] = []
+        self._subscribers_lock = threading.Lock()
+        self._last_event_id = self.queue.last_event_id()
+        self._workers: List[Any] = []
+        self._stop_event = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._dispatch_stop = threading.Event()
+    @property
+    def running(self) -> bool:
+        return self._dispatcher is not None
+    def start(self):
+        if self.running:
+            return
+        recovered = self.queue.requeue_interrupted()
+        if recovered:
+            logger.info(f"Resuming {recovered} interrupted post-session job(s)")
+        if self.use_processes:
+            context = multiprocessing.get_context("spawn")
+            self._stop_event = context.Event()
+            factory = context.Process
+        else:
+            self._stop_event = threading.Event()
+            factory = threading.Thread
+        for index in range(self.worker_count):
+            worker = factory(
+                target=run_worker,
+                args=(self.db_path, self.handlers, f"post-session-worker-{index}", self._stop_event, self.poll_interval, self.lease_seconds, self.policy),
+                name=f"post-session-worker-{index}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+        self._dispatch_stop.clear()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="post-session-events", daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Post-session job runner started with {self.worker_count} {'process' if self.use_processes else 'thread'} worker(s)")
+    def stop(self, timeout: float = 10.0):
+        if not self.running:
+            return
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(deadline - time.monotonic(), 0.1))
+            if self.use_processes and worker.is_alive():
+                logger.warning(f"{worker.name} did not stop in time; terminating")
+                worker.terminate()
+                worker.join(1.0)
+        self._workers = []
+        self._dispatch_stop.set()
+        self._dispatcher.join(timeout=max(self.poll_interval * 4, 1.0))
+        self._dispatcher = None
+        self.dispatch_events()
+    def close(self):
+        self.stop()
+        self.queue.close()
+    def enqueue(self, job_type: str, session_id: Optional[str] = None, session_dir=None, params: Optional[Dict[str, Any]] = None, max_attempts: int = 3, dedupe: bool = True) -> int:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown post-session job type: {job_type}")
+        return self.queue.enqueue(job_type, session_id, session_dir, params, max_attempts, dedupe=dedupe)
+    def cancel(self, job_id: int) -> bool:
+        return self.queue.cancel(job_id)
+    def get_job(self, job_id: int) -> Optional[PostSessionJob]:
+        return self.queue.get(job_id)
+    def list_jobs(self, session_id: Optional[str] = None, states: Optional[Sequence[str]] = None, limit: int = 100) -> List[PostSessionJob]:
+        return self.queue.list_jobs(session_id, states, limit)
+    def wait_for(self, job_id: int, timeout: Optional[float] = None) -> Optional[PostSessionJob]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.queue.get(job_id)
+            if job is None or job.finished or (deadline is not None and time.monotonic() >= deadline):
+                return job
+            time.sleep(min(self.poll_interval, 0.05))
+    def subscribe(self, callback: EventCallback) -> Callable[[], None]:
+        with self._subscribers_lock:
+            self._subscribers.append(callback)
+        return lambda: self.unsubscribe(callback)
+    def unsubscribe(self, callback: EventCallback):
+        with self._subscribers_lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    def dispatch_events(self) -> int:
+        """Deliver new ``job_events`` rows to subscribers; returns how many were sent."""
+        events = self.queue.events_since(self._last_event_id)
+        if not events:
+            return 0
+        self._last_event_id = events[-1]["event_id"]
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Post-session event subscriber failed: {e}")
+        return len(events)
+    def _dispatch_loop(self):
+        last_lease_check = time.monotonic()
+        while not self._dispatch_stop.wait(self.poll_interval):
+            try:
+                while self.dispatch_events():
+                    pass
+                if time.monotonic() - last_lease_check >= self.lease_seconds / 2:
+                    last_lease_check = time.monotonic()
+                    self.queue.requeue_interrupted(expired_only=True)
+            except sqlite3.Error as e:
+                logger.warning(f"Post-session event dispatch failed: {e}")
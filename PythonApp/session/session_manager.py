@@ -1,16 +1,21 @@
-import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from ..utils.logging_config import get_logger
+from .session_metadata import METADATA_FILENAME, update_session_metadata, write_json_atomic
 logger = get_logger(__name__)
+JOB_QUEUE_FILENAME = "post_session_jobs.sqlite3"
 class SessionManager:
-    def __init__(self, base_recordings_dir: str = "recordings"):
+    def __init__(self, base_recordings_dir: str = "recordings", job_workers: int = 2, use_job_processes: bool = True):
         self.logger = get_logger(__name__)
         self.base_recordings_dir = Path(base_recordings_dir)
         self.current_session: Optional[Dict] = None
         self.session_history: List[Dict] = []
         self.base_recordings_dir.mkdir(parents=True, exist_ok=True)
+        self.job_workers = job_workers
+        self.use_job_processes = use_job_processes
+        self._job_runner = None
+        self._job_subscribers: List[Callable[[Dict[str, Any]], None]] = []
         logger.info(
             f"session manager initialized with base directory: {self.base_recordings_dir}"
         )
@@ -63,9 +68,7 @@ class SessionManager:
             "files": {},
             "status": "active",
         }
-        metadata_file = session_folder / "session_metadata.json"
-        with open(metadata_file, "w") as f:
-            json.dump(session_info, f, indent=2)
+        write_json_atomic(session_folder / METADATA_FILENAME, session_info)
         self.current_session = session_info
         logger.info(f"session created: {session_id}")
         return session_info
@@ -79,11 +82,7 @@ class SessionManager:
         self.current_session["end_time"] = end_time.isoformat()
         self.current_session["duration"] = duration
         self.current_session["status"] = "completed"
-        metadata_file = (
-            Path(self.current_session["folder_path"]) / "session_metadata.json"
-        )
-        with open(metadata_file, "w") as f:
-            json.dump(self.current_session, f, indent=2)
+        update_session_metadata(self.current_session["folder_path"], self.current_session)
         self.session_history.append(self.current_session.copy())
         session_id = self.current_session["session_id"]
         logger.info(f"session ended: {session_id} (duration: {duration:.1f}s)")
@@ -139,6 +138,9 @@ class SessionManager:
                 return Path(session["folder_path"])
         if self.current_session and self.current_session["session_id"] == session_id:
             return Path(self.current_session["folder_path"])
+        session_folder = self.base_recordings_dir / session_id
+        if (session_folder / METADATA_FILENAME).exists():
+            return session_folder
         return None
     def get_current_session(self) -> Optional[Dict]:
         return self.current_session.copy() if self.current_session else None
@@ -151,11 +153,51 @@ class SessionManager:
             return True
         except ImportError:
             return False
+    @property
+    def job_runner(self):
+        """The post-session job runner, created and started on first use."""
+        if self._job_runner is None:
+            from .post_session_jobs import PostSessionJobRunner
+            self._job_runner = PostSessionJobRunner(
+                self.base_recordings_dir / JOB_QUEUE_FILENAME,
+                workers=self.job_workers,
+                use_processes=self.use_job_processes,
+            )
+            for callback in self._job_subscribers:
+                self._job_runner.subscribe(callback)
+            self._job_runner.start()
+        return self._job_runner
+    def _resolve_target_session(self, session_id: Optional[str]) -> Optional[str]:
+        if session_id:
+            return session_id
+        if self.session_history:
+            return self.session_history[-1]["session_id"]
+        if self.current_session:
+            return self.current_session["session_id"]
+        return None
+    def enqueue_post_session_job(
+        self,
+        job_type: str,
+        session_id: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        max_attempts: int = 3,
+    ) -> Optional[int]:
+        target_session = self._resolve_target_session(session_id)
+        session_folder = self.get_session_folder(target_session) if target_session else None
+        if session_folder is None:
+            logger.warning(f"no session found for post-session job {job_type}")
+            return None
+        job_id = self.job_runner.enqueue(
+            job_type, target_session, session_folder, params, max_attempts
+        )
+        logger.info(f"queued post-session job {job_id} ({job_type}) for {target_session}")
+        return job_id
     def trigger_post_session_processing(
         self,
         session_id: Optional[str] = None,
         enable_hand_segmentation: bool = True,
         segmentation_method: str = "mediapipe",
+        extra_jobs: Optional[List[str]] = None,
     ) -> Dict[str, any]:
         results = {
             "session_id": session_id,
@@ -163,79 +205,62 @@ class SessionManager:
                 "enabled": enable_hand_segmentation,
                 "available": self.has_hand_segmentation_available(),
                 "success": False,
-                "results": None,
+                "job_id": None,
                 "error": None,
             },
+            "jobs": {},
         }
+        target_session = self._resolve_target_session(session_id)
+        results["session_id"] = target_session
+        if not target_session or self.get_session_folder(target_session) is None:
+            results["hand_segmentation"]["error"] = "No session found to process"
+            return results
+        for job_type in extra_jobs or []:
+            results["jobs"][job_type] = self.enqueue_post_session_job(job_type, target_session)
         if not enable_hand_segmentation:
             results["hand_segmentation"]["success"] = True
             return results
-        if not self.has_hand_segmentation_available():
+        if not results["hand_segmentation"]["available"]:
             results["hand_segmentation"][
                 "error"
             ] = "Hand segmentation module not available"
             return results
-        try:
-            import os
-            import sys
-            sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-            from hand_segmentation import create_session_post_processor
-            processor = create_session_post_processor(str(self.base_recordings_dir))
-            target_session = session_id
-            if not target_session:
-                if self.session_history:
-                    target_session = self.session_history[-1]["session_id"]
-                elif self.current_session:
-                    target_session = self.current_session["session_id"]
-            if not target_session:
-                results["hand_segmentation"]["error"] = "No session found to process"
-                return results
-            print(
-                f"[INFO] Starting post-session hand segmentation for: {target_session}"
-            )
-            segmentation_results = processor.process_session(
-                target_session,
-                method=segmentation_method,
-                output_cropped=True,
-                output_masks=True,
-            )
-            results["hand_segmentation"]["success"] = True
-            results["hand_segmentation"]["results"] = segmentation_results
-            self._update_session_post_processing_status(target_session, True)
-            print(f"[INFO] Post-session processing completed for: {target_session}")
-        except Exception as e:
-            error_msg = f"Error in post-session processing: {str(e)}"
-            results["hand_segmentation"]["error"] = error_msg
-            print(f"[ERROR] {error_msg}")
+        job_id = self.enqueue_post_session_job(
+            "hand_segmentation", target_session, {"method": segmentation_method}
+        )
+        results["hand_segmentation"]["success"] = job_id is not None
+        results["hand_segmentation"]["job_id"] = job_id
+        results["jobs"]["hand_segmentation"] = job_id
         return results
-    def _update_session_post_processing_status(self, session_id: str, completed: bool):
-        try:
-            session_folder = self.get_session_folder(session_id)
-            if session_folder:
-                metadata_file = session_folder / "session_metadata.json"
-                if metadata_file.exists():
-                    import json
-                    with open(metadata_file, "r") as f:
-                        metadata = json.load(f)
-                    metadata["post_processing"] = {
-                        "hand_segmentation_completed": completed,
-                        "hand_segmentation_timestamp": (
-                            datetime.now().isoformat() if completed else None
-                        ),
-                    }
-                    with open(metadata_file, "w") as f:
-                        json.dump(metadata, f, indent=2)
-        except Exception as e:
-            print(f"[WARNING] Failed to update post-processing status: {e}")
+    def get_post_session_job(self, job_id: int):
+        return self.job_runner.get_job(job_id)
+    def list_post_session_jobs(self, session_id: Optional[str] = None):
+        return self.job_runner.list_jobs(session_id)
+    def cancel_post_session_job(self, job_id: int) -> bool:
+        return self.job_runner.cancel(job_id)
+    def subscribe_post_session_events(
+        self, callback: Callable[[Dict[str, Any]], None]
+    ) -> Callable[[], None]:
+        """Receive job progress events; does not start the job runner by itself."""
+        self._job_subscribers.append(callback)
+        if self._job_runner is not None:
+            self._job_runner.subscribe(callback)
+        def unsubscribe():
+            if callback in self._job_subscribers:
+                self._job_subscribers.remove(callback)
+            if self._job_runner is not None:
+                self._job_runner.unsubscribe(callback)
+        return unsubscribe
+    def shutdown_post_session_jobs(self, timeout: float = 10.0):
+        if self._job_runner is not None:
+            self._job_runner.stop(timeout)
+            self._job_runner.queue.close()
+            self._job_runner = None
     def _update_session_metadata(self):
         if not self.current_session:
             return
-        metadata_file = (
-            Path(self.current_session["folder_path"]) / "session_metadata.json"
-        )
         try:
-            with open(metadata_file, "w") as f:
-                json.dump(self.current_session, f, indent=2)
+            update_session_metadata(self.current_session["folder_path"], self.current_session)
         except Exception as e:
             print(f"[DEBUG_LOG] Failed to update session metadata: {e}")
 if __name__ == "__main__":
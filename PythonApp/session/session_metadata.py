@@ -0,0 +1,98 @@
+import copy
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+METADATA_FILENAME = "session_metadata.json"
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+def _thread_lock(path: Path) -> threading.Lock:
+    with _path_locks_guard:
+        return _path_locks.setdefault(str(path.resolve()), threading.Lock())
+@contextmanager
+def metadata_lock(path):
+    """Exclusive lock on ``path`` shared by threads and by other processes.
+
+    Processes coordinate through an OS lock on ``<path>.lock``; threads of one
+    process additionally serialise on an in-process lock, since Windows byte
+    range locks are not re-entrant across handles of the same process.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _thread_lock(path):
+        with open(path.with_name(path.name + ".lock"), "a+b") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+def write_json_atomic(path, data: Dict[str, Any], indent: Optional[int] = 2):
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+def read_json(path) -> Dict[str, Any]:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+def deep_merge(base: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Nested dicts merge key by key; any other value (lists included) replaces."""
+    merged = dict(base)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+def update_metadata_file(path, changes: Optional[Dict[str, Any]] = None, mutate: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+    """Read-merge-write ``path`` under ``metadata_lock`` and return the new document.
+
+    ``changes`` is deep-merged into what is on disk, so concurrent writers that
+    touch different keys (the recording session and post-session jobs) no
+    longer overwrite each other. ``mutate`` may edit the merged document in
+    place or return a replacement. The file is replaced atomically.
+    """
+    path = Path(path)
+    with metadata_lock(path):
+        document = read_json(path)
+        if changes:
+            document = deep_merge(document, changes)
+        if mutate is not None:
+            replaced = mutate(document)
+            if replaced is not None:
+                document = replaced
+        write_json_atomic(path, document)
+        return document
+def update_session_metadata(session_folder, changes: Optional[Dict[str, Any]] = None, mutate=None) -> Dict[str, Any]:
+    return update_metadata_file(Path(session_folder) / METADATA_FILENAME, changes, mutate)
@@ -0,0 +1,498 @@
+import bisect
+import csv
+import io
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+INDEX_VERSION = 1
+INDEX_DIR_NAME = ".index"
+CSV_EXTENSIONS = {".csv"}
+BINARY_EXTENSIONS = {".npy"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+TIMESTAMP_COLUMNS = ("timestamp_ms", "timestamp", "time_ms", "time", "t", "host_timestamp_ms")
+@dataclass
+class StreamIndex:
+    stream: str
+    path: str
+    kind: str
+    file_size: int
+    mtime: float
+    stride: int
+    row_count: int = 0
+    columns: List[str] = field(default_factory=list)
+    numeric_columns: List[str] = field(default_factory=list)
+    timestamp_column: Optional[str] = None
+    time_scale: float = 1.0
+    t_min: Optional[float] = None
+    t_max: Optional[float] = None
+    checkpoint_times: List[float] = field(default_factory=list)
+    checkpoint_offsets: List[int] = field(default_factory=list)
+    frame_times: List[float] = field(default_factory=list)
+    fps: Optional[float] = None
+    version: int = INDEX_VERSION
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamIndex":
+        return cls(**data)
+    def matches(self, path: Path) -> bool:
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return (
+            self.version == INDEX_VERSION
+            and self.file_size == stat.st_size
+            and self.mtime == stat.st_mtime
+        )
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "stream": self.stream,
+            "kind": self.kind,
+            "file": Path(self.path).name,
+            "rows": self.row_count,
+            "columns": self.numeric_columns,
+            "t_min": self.t_min,
+            "t_max": self.t_max,
+            "duration": (
+                self.t_max - self.t_min
+                if self.t_min is not None and self.t_max is not None
+                else 0.0
+            ),
+            "fps": self.fps,
+        }
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-triangle-three-buckets selection of ``max_points`` sample indices."""
+    n = len(x)
+    if max_points >= n or n <= 2:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])[:max_points]
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    x = np.asarray(x, dtype=np.float64)
+    every = (n - 2) / (max_points - 2)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs(
+            (x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+class SessionReader:
+    """Random-access reader over the streams recorded in one session folder.
+
+    Each CSV, ``.npy`` or video file gets a sidecar index under ``.index/`` that
+    maps timestamps to byte offsets (or row numbers) every ``stride`` rows, and
+    for videos to per-frame timestamps. Indexes are built on first use, persisted,
+    and rebuilt when the file size or mtime changes. Stream timestamps are assumed
+    to be non-decreasing and are reported in seconds.
+    """
+    def __init__(self, session_folder, stride: int = 1000, persist_index: bool = True):
+        self.session_folder = Path(session_folder)
+        self.stride = max(1, int(stride))
+        self.persist_index = persist_index
+        self.index_dir = self.session_folder / INDEX_DIR_NAME
+        self._indexes: Dict[str, StreamIndex] = {}
+        self._lock = threading.RLock()
+        if not self.session_folder.is_dir():
+            raise FileNotFoundError(f"session folder not found: {self.session_folder}")
+    def list_streams(self) -> Dict[str, Path]:
+        streams = {}
+        for path in sorted(self.session_folder.rglob("*")):
+            if not path.is_file() or INDEX_DIR_NAME in path.parts:
+                continue
+            suffix = path.suffix.lower()
+            if suffix in CSV_EXTENSIONS | BINARY_EXTENSIONS | VIDEO_EXTENSIONS:
+                relative = path.relative_to(self.session_folder)
+                streams[relative.with_suffix("").as_posix()] = path
+        return streams
+    def get_metadata(self) -> Dict[str, Any]:
+        metadata_file = self.session_folder / "session_metadata.json"
+        if not metadata_file.exists():
+            return {}
+        try:
+            with open(metadata_file, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"failed to read session metadata {metadata_file}: {e}")
+            return {}
+    def get_index(self, stream: str) -> StreamIndex:
+        with self._lock:
+            path = self._resolve_stream(stream)
+            index = self._indexes.get(stream)
+            if index is not None and index.matches(path):
+                return index
+            index = self._load_index(stream, path)
+            if index is None:
+                index = self._build_index(stream, path)
+                self._save_index(index)
+            self._indexes[stream] = index
+            return index
+    def describe(self) -> List[Dict[str, Any]]:
+        summaries = []
+        for stream in self.list_streams():
+            try:
+                summaries.append(self.get_index(stream).summary())
+            except Exception as e:
+                logger.warning(f"failed to index stream {stream}: {e}")
+        return summaries
+    def time_bounds(self) -> Optional[tuple]:
+        bounds = [
+            (s["t_min"], s["t_max"])
+            for s in self.describe()
+            if s["t_min"] is not None and s["t_max"] is not None
+        ]
+        if not bounds:
+            return None
+        return min(b[0] for b in bounds), max(b[1] for b in bounds)
+    def read_range(
+        self,
+        stream: str,
+        t0: Optional[float] = None,
+        t1: Optional[float] = None,
+        max_points: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        decimate_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        index = self.get_index(stream)
+        if index.kind == "video":
+            timestamps = np.asarray(index.frame_times, dtype=np.float64)
+            lo, hi = self._bounds(timestamps, t0, t1)
+            timestamps = timestamps[lo:hi]
+            data = {"frame_index": np.arange(lo, hi, dtype=np.int64)}
+        elif index.kind == "binary":
+            timestamps, data = self._read_binary_range(index, t0, t1, columns)
+        else:
+            timestamps, data = self._read_csv_range(index, t0, t1, columns)
+        total = len(timestamps)
+        decimated = False
+        if max_points is not None and 0 < max_points < total:
+            key = decimate_by or next(
+                (c for c in data if c != "frame_index"), None
+            )
+            y = data[key] if key is not None else np.zeros(total)
+            selected = lttb_indices(timestamps, y, max_points)
+            timestamps = timestamps[selected]
+            data = {name: values[selected] for name, values in data.items()}
+            decimated = True
+        return {
+            "stream": stream,
+            "t0": t0,
+            "t1": t1,
+            "timestamps": timestamps,
+            "columns": data,
+            "total_points": total,
+            "decimated": decimated,
+        }
+    def frame_index_at(self, stream: str, t: float) -> Optional[int]:
+        index = self.get_index(stream)
+        if index.kind != "video" or not index.frame_times:
+            return None
+        position = bisect.bisect_right(index.frame_times, t) - 1
+        return min(max(position, 0), len(index.frame_times) - 1)
+    def read_frame(self, stream: str, t: float):
+        frame_number = self.frame_index_at(stream, t)
+        if frame_number is None:
+            return None
+        import cv2
+        index = self.get_index(stream)
+        capture = cv2.VideoCapture(index.path)
+        try:
+            if not capture.isOpened():
+                return None
+            capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ok, frame = capture.read()
+            return frame if ok else None
+        finally:
+            capture.release()
+    def invalidate(self, stream: Optional[str] = None):
+        with self._lock:
+            names = [stream] if stream else list(self._indexes)
+            for name in names:
+                self._indexes.pop(name, None)
+                sidecar = self._sidecar_path(name)
+                if sidecar.exists():
+                    sidecar.unlink()
+    def _resolve_stream(self, stream: str) -> Path:
+        streams = self.list_streams()
+        if stream not in streams:
+            raise KeyError(f"unknown stream: {stream}")
+        return streams[stream]
+    def _sidecar_path(self, stream: str) -> Path:
+        return self.index_dir / (stream.replace("/", "__") + ".idx.json")
+    def _load_index(self, stream: str, path: Path) -> Optional[StreamIndex]:
+        sidecar = self._sidecar_path(stream)
+        if not sidecar.exists():
+            return None
+        try:
+            with open(sidecar, "r") as f:
+                index = StreamIndex.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"discarding unreadable index {sidecar}: {e}")
+            return None
+        return index if index.matches(path) else None
+    def _save_index(self, index: StreamIndex):
+        if not self.persist_index:
+            return
+        sidecar = self._sidecar_path(index.stream)
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            tmp = sidecar.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(index.to_dict(), f)
+            tmp.replace(sidecar)
+        except OSError as e:
+            logger.warning(f"failed to persist index {sidecar}: {e}")
+    def _build_index(self, stream: str, path: Path) -> StreamIndex:
+        stat = path.stat()
+        suffix = path.suffix.lower()
+        index = StreamIndex(
+            stream=stream,
+            path=str(path),
+            kind="csv",
+            file_size=stat.st_size,
+            mtime=stat.st_mtime,
+            stride=self.stride,
+        )
+        if suffix in VIDEO_EXTENSIONS:
+            index.kind = "video"
+            self._index_video(index, path)
+        elif suffix in BINARY_EXTENSIONS:
+            index.kind = "binary"
+            self._index_binary(index, path)
+        else:
+            self._index_csv(index, path)
+        logger.debug(f"built index for {stream}: {index.row_count} rows")
+        return index
+    def _index_csv(self, index: StreamIndex, path: Path):
+        with open(path, "rb") as f:
+            header_line = f.readline()
+            offset = len(header_line)
+            header = next(csv.reader([header_line.decode("utf-8-sig")]), [])
+            index.columns = [name.strip() for name in header]
+            ts_column = next(
+                (name for name in TIMESTAMP_COLUMNS if name in index.columns),
+                index.columns[0] if index.columns else None,
+            )
+            index.timestamp_column = ts_column
+            index.time_scale = 0.001 if ts_column and ts_column.endswith("_ms") else 1.0
+            ts_position = index.columns.index(ts_column) if ts_column else 0
+            rows = 0
+            for line in f:
+                line_offset = offset
+                offset += len(line)
+                if not line.strip():
+                    continue
+                row = next(csv.reader([line.decode("utf-8", errors="replace")]))
+                try:
+                    t = float(row[ts_position]) * index.time_scale
+                except (IndexError, ValueError):
+                    continue
+                if rows == 0:
+                    index.numeric_columns = self._numeric_columns(index.columns, row)
+                    index.t_min = t
+                if rows % index.stride == 0:
+                    index.checkpoint_times.append(t)
+                    index.checkpoint_offsets.append(line_offset)
+                index.t_max = t
+                rows += 1
+            index.row_count = rows
+    @staticmethod
+    def _numeric_columns(columns: List[str], row: List[str]) -> List[str]:
+        numeric = []
+        for name, value in zip(columns, row):
+            try:
+                float(value)
+            except ValueError:
+                continue
+            numeric.append(name)
+        return numeric
+    def _index_binary(self, index: StreamIndex, path: Path):
+        array = np.load(path, mmap_mode="r")
+        if array.dtype.names:
+            index.columns = list(array.dtype.names)
+            ts_column = next(
+                (name for name in TIMESTAMP_COLUMNS if name in index.columns),
+                index.columns[0],
+            )
+            timestamps = array[ts_column]
+        else:
+            if array.ndim == 1:
+                array = array.reshape(-1, 1)
+            index.columns = [f"col{i}" for i in range(array.shape[1])]
+            ts_column = index.columns[0]
+            timestamps = array[:, 0]
+        index.numeric_columns = list(index.columns)
+        index.timestamp_column = ts_column
+        index.time_scale = 0.001 if ts_column.endswith("_ms") else 1.0
+        index.row_count = int(len(timestamps))
+        if index.row_count:
+            rows = np.arange(0, index.row_count, index.stride)
+            index.checkpoint_times = (
+                np.asarray(timestamps[rows], dtype=np.float64) * index.time_scale
+            ).tolist()
+            index.checkpoint_offsets = rows.tolist()
+            index.t_min = float(timestamps[0]) * index.time_scale
+            index.t_max = float(timestamps[-1]) * index.time_scale
+    def _index_video(self, index: StreamIndex, path: Path):
+        frame_times = self._frame_times_from_sidecar_csv(path)
+        fps = None
+        if frame_times is None:
+            try:
+                import cv2
+                capture = cv2.VideoCapture(str(path))
+                try:
+                    fps = capture.get(cv2.CAP_PROP_FPS) or None
+                    count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+                finally:
+                    capture.release()
+            except ImportError:
+                count = 0
+            start = self._session_start_seconds()
+            if fps and count > 0:
+                frame_times = (start + np.arange(count) / fps).tolist()
+            else:
+                frame_times = []
+        elif len(frame_times) > 1:
+            span = frame_times[-1] - frame_times[0]
+            fps = (len(frame_times) - 1) / span if span > 0 else None
+        index.frame_times = frame_times
+        index.fps = fps
+        index.row_count = len(frame_times)
+        index.columns = ["frame_index"]
+        index.numeric_columns = ["frame_index"]
+        if frame_times:
+            index.t_min = frame_times[0]
+            index.t_max = frame_times[-1]
+            index.checkpoint_times = frame_times[:: index.stride]
+            index.checkpoint_offsets = list(range(0, len(frame_times), index.stride))
+    def _frame_times_from_sidecar_csv(self, video_path: Path) -> Optional[List[float]]:
+        for csv_path in self.session_folder.rglob("*.csv"):
+            if INDEX_DIR_NAME in csv_path.parts:
+                continue
+            try:
+                with open(csv_path, "r", newline="", encoding="utf-8") as f:
+                    reader = csv.DictReader(f)
+                    if not reader.fieldnames or "video_filename" not in reader.fieldnames:
+                        continue
+                    ts_column = next(
+                        (c for c in TIMESTAMP_COLUMNS if c in reader.fieldnames), None
+                    )
+                    if ts_column is None:
+                        continue
+                    scale = 0.001 if ts_column.endswith("_ms") else 1.0
+                    times = [
+                        float(row[ts_column]) * scale
+                        for row in reader
+                        if row.get("video_filename") == video_path.name
+                    ]
+            except (OSError, ValueError) as e:
+                logger.debug(f"could not read frame timestamps from {csv_path}: {e}")
+                continue
+            if times:
+                return times
+        return None
+    def _session_start_seconds(self) -> float:
+        start_time = self.get_metadata().get("start_time")
+        if not start_time:
+            return 0.0
+        try:
+            from datetime import datetime
+            return datetime.fromisoformat(start_time).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+    @staticmethod
+    def _bounds(timestamps: np.ndarray, t0: Optional[float], t1: Optional[float]):
+        lo = 0 if t0 is None else int(np.searchsorted(timestamps, t0, side="left"))
+        hi = len(timestamps) if t1 is None else int(
+            np.searchsorted(timestamps, t1, side="right")
+        )
+        return lo, max(lo, hi)
+    def _checkpoint_for(self, index: StreamIndex, t0: Optional[float]) -> int:
+        if t0 is None or not index.checkpoint_times:
+            return 0
+        position = bisect.bisect_left(index.checkpoint_times, t0) - 1
+        return max(position, 0)
+    def _read_csv_range(self, index, t0, t1, columns):
+        wanted = [c for c in (columns or index.numeric_columns) if c != index.timestamp_column]
+        positions = [index.columns.index(c) for c in wanted if c in index.columns]
+        wanted = [index.columns[p] for p in positions]
+        ts_position = index.columns.index(index.timestamp_column)
+        timestamps: List[float] = []
+        values: List[List[float]] = [[] for _ in positions]
+        if not index.checkpoint_offsets:
+            return np.array(timestamps), {c: np.array(v) for c, v in zip(wanted, values)}
+        start_offset = index.checkpoint_offsets[self._checkpoint_for(index, t0)]
+        with open(index.path, "rb") as f:
+            f.seek(start_offset)
+            text = io.TextIOWrapper(f, encoding="utf-8", errors="replace", newline="")
+            for row in csv.reader(text):
+                if not row:
+                    continue
+                try:
+                    t = float(row[ts_position]) * index.time_scale
+                except (IndexError, ValueError):
+                    continue
+                if t0 is not None and t < t0:
+                    continue
+                if t1 is not None and t > t1:
+                    break
+                timestamps.append(t)
+                for target, position in zip(values, positions):
+                    try:
+                        target.append(float(row[position]))
+                    except (IndexError, ValueError):
+                        target.append(np.nan)
+        return (
+            np.asarray(timestamps, dtype=np.float64),
+            {c: np.asarray(v, dtype=np.float64) for c, v in zip(wanted, values)},
+        )
+    def _read_binary_range(self, index, t0, t1, columns):
+        array = np.load(index.path, mmap_mode="r")
+        structured = bool(array.dtype.names)
+        if not structured and array.ndim == 1:
+            array = array.reshape(-1, 1)
+        def column(name):
+            if structured:
+                return array[name]
+            return array[:, index.columns.index(name)]
+        first = self._checkpoint_for(index, t0)
+        row_start = index.checkpoint_offsets[first] if index.checkpoint_offsets else 0
+        if t1 is None or not index.checkpoint_times:
+            row_end = index.row_count
+        else:
+            last = bisect.bisect_right(index.checkpoint_times, t1)
+            row_end = (
+                index.checkpoint_offsets[last] if last < len(index.checkpoint_offsets)
+                else index.row_count
+            )
+        window = np.asarray(
+            column(index.timestamp_column)[row_start:row_end], dtype=np.float64
+        ) * index.time_scale
+        lo, hi = self._bounds(window, t0, t1)
+        wanted = [
+            c for c in (columns or index.numeric_columns)
+            if c != index.timestamp_column and c in index.columns
+        ]
+        data = {
+            name: np.asarray(column(name)[row_start + lo:row_start + hi], dtype=np.float64)
+            for name in wanted
+        }
+        return window[lo:hi], data
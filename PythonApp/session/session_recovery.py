@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import psutil
 from PyQt5.QtCore import QObject, pyqtSignal
+from .health_index import HEALTH_INDEX_FILENAME, HealthScanResult, InotifyWatcher, SessionHealthIndex
+from .snapshot_backup import RetentionPolicy, SnapshotStore
 class SessionRecoveryManager(QObject):
     disk_space_warning = pyqtSignal(str, float)
     disk_space_critical = pyqtSignal(str, float)
@@ -14,7 +16,12 @@ class SessionRecoveryManager(QObject):
     backup_completed = pyqtSignal(str, str)
     system_health_alert = pyqtSignal(str, str)
     def __init__(
-        self, base_sessions_dir: str = "recordings", backup_dir: Optional[str] = None
+        self,
+        base_sessions_dir: str = "recordings",
+        backup_dir: Optional[str] = None,
+        use_health_index: bool = True,
+        backup_retention: Optional[RetentionPolicy] = None,
+        verify_backup_content: bool = False,
     ):
         super().__init__()
         self.base_sessions_dir = Path(base_sessions_dir)
@@ -24,9 +31,15 @@ class SessionRecoveryManager(QObject):
         self.disk_critical_threshold_gb = 1.0
         self.max_session_age_days = 30
         self.backup_enabled = self.backup_dir is not None
+        self.backup_retention = backup_retention or RetentionPolicy()
+        self.verify_backup_content = verify_backup_content
+        self.snapshot_store: Optional[SnapshotStore] = None
         self.monitoring_active = False
         self.monitoring_thread = None
-        self.stop_monitoring = threading.Event()
+        self._stop_monitoring_event = threading.Event()
+        self.use_health_index = use_health_index
+        self.health_index: Optional[SessionHealthIndex] = None
+        self.health_watcher: Optional[InotifyWatcher] = None
         self.init_recovery_system()
         print(f"[DEBUG_LOG] SessionRecoveryManager initialized")
         print(f"[DEBUG_LOG] Base directory: {self.base_sessions_dir}")
@@ -36,18 +49,27 @@ class SessionRecoveryManager(QObject):
         try:
             self.base_sessions_dir.mkdir(parents=True, exist_ok=True)
             if self.backup_dir:
-                self.backup_dir.mkdir(parents=True, exist_ok=True)
+                self.snapshot_store = SnapshotStore(
+                    self.backup_dir, verify_content=self.verify_backup_content
+                )
             if not self.recovery_log_file.exists():
                 self.log_recovery_event("system_init", "Recovery system initialized")
+            if self.use_health_index:
+                self.health_index = SessionHealthIndex(
+                    self.base_sessions_dir,
+                    self.base_sessions_dir / HEALTH_INDEX_FILENAME,
+                )
             print("[DEBUG_LOG] Recovery system initialized successfully")
         except Exception as e:
             print(f"[DEBUG_LOG] Failed to initialize recovery system: {e}")
-    def start_monitoring(self):
+    def start_monitoring(self, watch_files: bool = False):
         if self.monitoring_active:
             print("[DEBUG_LOG] Monitoring already active")
             return
         self.monitoring_active = True
-        self.stop_monitoring.clear()
+        self._stop_monitoring_event.clear()
+        if watch_files:
+            self.start_health_watcher()
         self.monitoring_thread = threading.Thread(
             target=self._monitoring_loop, daemon=True
         )
@@ -58,18 +80,19 @@ class SessionRecoveryManager(QObject):
         if not self.monitoring_active:
             return
         self.monitoring_active = False
-        self.stop_monitoring.set()
+        self._stop_monitoring_event.set()
+        self.stop_health_watcher()
         if self.monitoring_thread and self.monitoring_thread.is_alive():
             self.monitoring_thread.join(timeout=5.0)
         self.log_recovery_event("monitoring_stop", "Background monitoring stopped")
         print("[DEBUG_LOG] Background monitoring stopped")
     def _monitoring_loop(self):
-        while not self.stop_monitoring.is_set():
+        while not self._stop_monitoring_event.is_set():
             try:
                 self.check_disk_space()
                 self.scan_for_corrupted_files()
                 self.auto_cleanup_old_sessions()
-                if self.stop_monitoring.wait(60):
+                if self._stop_monitoring_event.wait(60):
                     break
             except Exception as e:
                 self.log_recovery_event(
@@ -103,7 +126,51 @@ class SessionRecoveryManager(QObject):
             self.log_recovery_event(
                 "disk_check_error", f"Disk space check failed: {str(e)}"
             )
-    def scan_for_corrupted_files(self):
+    def start_health_watcher(self, flush_interval: float = 1.0) -> bool:
+        """Keep the health index current from inotify events while recording."""
+        if self.health_watcher is not None:
+            return True
+        if self.health_index is None or not InotifyWatcher.available():
+            print("[DEBUG_LOG] File watching not available; relying on periodic scans")
+            return False
+        try:
+            self.health_index.scan()
+            watcher = InotifyWatcher(
+                self.health_index, flush_interval, on_change=self._handle_health_changes
+            )
+            watcher.start()
+        except OSError as e:
+            self.log_recovery_event("watcher_error", f"Could not start file watcher: {e}")
+            return False
+        self.health_watcher = watcher
+        self.log_recovery_event("watcher_start", "Session health watcher started")
+        return True
+    def stop_health_watcher(self):
+        if self.health_watcher is None:
+            return
+        self.health_watcher.stop()
+        self.health_watcher = None
+        self.log_recovery_event("watcher_stop", "Session health watcher stopped")
+    def _handle_health_changes(self, result: HealthScanResult):
+        for relative in result.corrupted:
+            file_path = self.base_sessions_dir / relative
+            if file_path.suffix != ".json":
+                continue
+            self.file_corruption_detected.emit(str(file_path), "JSON corruption detected")
+            self.attempt_file_repair(file_path)
+            self.health_index.update_paths([file_path])
+    def scan_for_corrupted_files(self) -> Optional[HealthScanResult]:
+        """Validate new or changed JSON files; unchanged files are skipped via the index."""
+        if self.health_index is not None:
+            try:
+                result = self.health_index.scan()
+                self._handle_health_changes(result)
+                return result
+            except Exception as e:
+                self.log_recovery_event(
+                    "corruption_scan_error", f"Corruption scan failed: {str(e)}"
+                )
+                return None
         try:
             for session_folder in self.base_sessions_dir.iterdir():
                 if not session_folder.is_dir():
@@ -198,6 +265,8 @@ class SessionRecoveryManager(QObject):
                     if self.backup_enabled:
                         self.backup_session(session_folder)
                     shutil.rmtree(session_folder)
+                    if self.health_index is not None:
+                        self.health_index.forget(session_folder)
                     cleaned_count += 1
                     freed_space += folder_size
                     self.log_recovery_event(
@@ -213,6 +282,16 @@ class SessionRecoveryManager(QObject):
         except Exception as e:
             self.log_recovery_event("cleanup_error", f"Auto cleanup failed: {str(e)}")
     def get_folder_size(self, folder_path: Path) -> int:
+        if self.health_index is not None:
+            try:
+                # With the watcher running the aggregates are already current
+                if self.health_watcher is None:
+                    self.health_index.scan(folder_path)
+                size = self.health_index.folder_size(folder_path)
+                if size is not None:
+                    return size
+            except (ValueError, OSError) as e:
+                print(f"[DEBUG_LOG] Health index unavailable for {folder_path}: {e}")
         total_size = 0
         try:
             for file_path in folder_path.rglob("*"):
@@ -222,14 +301,17 @@ class SessionRecoveryManager(QObject):
             print(f"[DEBUG_LOG] Error calculating folder size: {e}")
         return total_size
     def backup_session(self, session_folder: Path) -> bool:
-        if not self.backup_enabled or not self.backup_dir:
+        if not self.backup_enabled or not self.snapshot_store:
             return False
         try:
-            backup_path = self.backup_dir / session_folder.name
-            shutil.copytree(session_folder, backup_path, dirs_exist_ok=True)
-            self.backup_completed.emit(session_folder.name, str(backup_path))
+            result = self.snapshot_store.snapshot(session_folder)
+            pruned = self.snapshot_store.prune(session_folder.name, self.backup_retention)
+            self.backup_completed.emit(session_folder.name, str(result.path))
             self.log_recovery_event(
-                "backup_created", f"Backed up session: {session_folder.name}"
+                "backup_created",
+                f"Backed up session: {session_folder.name} as snapshot {result.snapshot_id} "
+                f"({result.linked} linked, {result.reflinked + result.copied} copied, "
+                f"{result.bytes_copied / 1024**2:.1f}MB written, {len(pruned)} pruned)",
             )
             return True
         except Exception as e:
@@ -237,6 +319,35 @@ class SessionRecoveryManager(QObject):
                 "backup_error", f"Backup failed for {session_folder.name}: {str(e)}"
             )
             return False
+    def list_session_backups(self, session_name: str) -> List[str]:
+        if not self.snapshot_store:
+            return []
+        return self.snapshot_store.list_snapshots(session_name)
+    def restore_session(
+        self,
+        session_name: str,
+        snapshot_id: Optional[str] = None,
+        destination: Optional[Path] = None,
+    ) -> Optional[Path]:
+        if not self.snapshot_store:
+            return None
+        destination = Path(destination) if destination else self.base_sessions_dir / session_name
+        try:
+            restored = self.snapshot_store.restore(
+                session_name, destination, snapshot_id, verify=True
+            )
+            if self.health_index is not None and self.health_index.relative(restored):
+                self.health_index.scan(restored)
+            self.log_recovery_event(
+                "backup_restored",
+                f"Restored session {session_name} from snapshot {snapshot_id or 'latest'} to {restored}",
+            )
+            return restored
+        except Exception as e:
+            self.log_recovery_event(
+                "restore_error", f"Restore failed for {session_name}: {str(e)}"
+            )
+            return None
     def recover_incomplete_sessions(self) -> List[Dict]:
         recovered_sessions = []
         try:
@@ -363,6 +474,9 @@ class SessionRecoveryManager(QObject):
                 }
             if self.recovery_log_file.exists():
                 stats["recovery_log_size"] = self.recovery_log_file.stat().st_size
+            if self.health_index is not None:
+                stats["health_index"] = self.health_index.statistics()
+                stats["health_index"]["watching"] = self.health_watcher is not None
             return stats
         except Exception as e:
             print(f"[DEBUG_LOG] Failed to get recovery statistics: {e}")
@@ -0,0 +1,340 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from ..utils.logging_config import get_logger
+logger = get_logger(__name__)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+FICLONE_AVAILABLE = fcntl is not None and sys.platform.startswith("linux")
+FICLONE = 0x40049409
+SNAPSHOTS_DIRNAME = "snapshots"
+MANIFESTS_DIRNAME = "manifests"
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+# Errors that mean "this filesystem cannot do it", not "this file is broken"
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOTTY, errno.EPERM, errno.EMLINK, errno.ENOSYS}
+def file_checksum(path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+@dataclass
+class SnapshotEntry:
+    size: int
+    mtime_ns: int
+    mode: int
+    checksum: Optional[str] = None
+    link_target: Optional[str] = None
+@dataclass
+class SnapshotManifest:
+    session: str
+    snapshot_id: str
+    created_at: str
+    source: str
+    parent: Optional[str] = None
+    files: Dict[str, SnapshotEntry] = field(default_factory=dict)
+    directories: List[str] = field(default_factory=list)
+    stats: Dict[str, float] = field(default_factory=dict)
+    def to_dict(self) -> Dict:
+        return asdict(self)
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SnapshotManifest":
+        data = dict(data)
+        data["files"] = {path: SnapshotEntry(**entry) for path, entry in data.get("files", {}).items()}
+        return cls(**data)
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self.files.values())
+@dataclass
+class SnapshotResult:
+    session: str
+    snapshot_id: str
+    path: Path
+    files: int = 0
+    linked: int = 0
+    reflinked: int = 0
+    copied: int = 0
+    bytes_linked: int = 0
+    bytes_copied: int = 0
+    elapsed_s: float = 0.0
+@dataclass
+class RetentionPolicy:
+    """Which snapshots ``prune`` keeps; a snapshot kept by any rule survives.
+
+    ``keep_daily`` and ``keep_weekly`` keep the newest snapshot of each of the
+    most recent days or ISO weeks that have one. ``max_age_days`` removes
+    snapshots older than that even if another rule would keep them, except
+    the newest snapshot, which is never pruned.
+    """
+    keep_last: int = 5
+    keep_daily: int = 0
+    keep_weekly: int = 0
+    max_age_days: Optional[float] = None
+class SnapshotStore:
+    """Incremental, point-in-time backups of session folders.
+
+    Each ``snapshot`` of a session is a full directory tree under
+    ``<root>/<session>/snapshots/<id>`` plus a JSON manifest under
+    ``<root>/<session>/manifests/<id>.json``. Like ``rsync --link-dest``,
+    files whose size and mtime (and checksum, with ``verify_content``) match
+    the previous snapshot's manifest are hard-linked to that snapshot's copy;
+    only new and changed files are read. Those are cloned with ``FICLONE``
+    where the filesystem supports reflinks and copied otherwise, so snapshot
+    files never share an inode with the live session and later writes to the
+    session cannot alter a snapshot. Deleting a snapshot only drops its links,
+    so any snapshot can be pruned without touching the others.
+    """
+    def __init__(self, root, verify_content: bool = False, use_reflink: bool = True):
+        self.root = Path(root)
+        self.verify_content = verify_content
+        self.use_reflink = use_reflink and FICLONE_AVAILABLE
+        self.root.mkdir(parents=True, exist_ok=True)
+    def session_dir(self, session: str) -> Path:
+        return self.root / session
+    def snapshot_path(self, session: str, snapshot_id: str) -> Path:
+        return self.root / session / SNAPSHOTS_DIRNAME / snapshot_id
+    def _manifest_path(self, session: str, snapshot_id: str) -> Path:
+        return self.root / session / MANIFESTS_DIRNAME / f"{snapshot_id}.json"
+    def list_snapshots(self, session: str) -> List[str]:
+        """Snapshot ids of ``session``, oldest first; only completed snapshots have a manifest."""
+        manifests = self.root / session / MANIFESTS_DIRNAME
+        if not manifests.is_dir():
+            return []
+        return sorted(p.stem for p in manifests.glob("*.json"))
+    def load_manifest(self, session: str, snapshot_id: Optional[str] = None) -> Optional[SnapshotManifest]:
+        """The manifest of ``snapshot_id``, or of the latest snapshot when it is None."""
+        if snapshot_id is None:
+            snapshots = self.list_snapshots(session)
+            if not snapshots:
+                return None
+            snapshot_id = snapshots[-1]
+        path = self._manifest_path(session, snapshot_id)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return SnapshotManifest.from_dict(json.load(f))
+    def _new_snapshot_id(self, session: str) -> str:
+        snapshot_id = datetime.now().strftime("%Y%m%dT%H%M%S_%f")
+        existing = set(self.list_snapshots(session))
+        while snapshot_id in existing:
+            snapshot_id += "_1"
+        return snapshot_id
+    def _scan_source(self, source: Path, manifest: SnapshotManifest) -> Dict[str, os.stat_result]:
+        found = {}
+        stack = [(str(source), "")]
+        while stack:
+            current, prefix = stack.pop()
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    relative = f"{prefix}/{entry.name}" if prefix else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        manifest.directories.append(relative)
+                        stack.append((entry.path, relative))
+                    elif entry.is_file(follow_symlinks=False) or entry.is_symlink():
+                        found[relative] = entry.stat(follow_symlinks=False)
+        manifest.directories.sort()
+        return found
+    def _unchanged(self, source_file: Path, info: os.stat_result, previous: Optional[SnapshotEntry]) -> Optional[str]:
+        """Checksum to record when the previous snapshot's copy can be reused, else None."""
+        if previous is None or previous.link_target is not None:
+            return None
+        if previous.size != info.st_size or previous.mtime_ns != info.st_mtime_ns:
+            return None
+        if not self.verify_content:
+            return previous.checksum or ""
+        checksum = file_checksum(source_file)
+        return checksum if checksum == previous.checksum else None
+    def _reflink(self, source_file: Path, target: Path) -> bool:
+        if not self.use_reflink:
+            return False
+        try:
+            with open(source_file, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError as e:
+            target.unlink(missing_ok=True)
+            if e.errno not in _UNSUPPORTED:
+                raise
+            # One failure means this filesystem pair cannot clone; stop trying
+            self.use_reflink = False
+            return False
+    def _copy_file(self, source_file: Path, target: Path, result: SnapshotResult, size: int):
+        if self._reflink(source_file, target):
+            result.reflinked += 1
+        else:
+            shutil.copyfile(source_file, target)
+            result.copied += 1
+        shutil.copystat(source_file, target)
+        result.bytes_copied += size
+    def snapshot(self, source, session: Optional[str] = None) -> SnapshotResult:
+        """Take a new snapshot of the folder ``source`` and return what it cost.
+
+        The tree is built under a temporary name and the manifest written last,
+        so an interrupted snapshot is never listed or used as a link base.
+        """
+        started = time.perf_counter()
+        source = Path(source)
+        if not source.is_dir():
+            raise NotADirectoryError(f"Not a session folder: {source}")
+        session = session or source.name
+        parent = self.load_manifest(session)
+        snapshot_id = self._new_snapshot_id(session)
+        final_path = self.snapshot_path(session, snapshot_id)
+        staging = final_path.with_name(f".{snapshot_id}.partial")
+        manifest = SnapshotManifest(session, snapshot_id, datetime.now().isoformat(), str(source.absolute()),
+                                    parent.snapshot_id if parent else None)
+        result = SnapshotResult(session, snapshot_id, final_path)
+        parent_path = self.snapshot_path(session, parent.snapshot_id) if parent else None
+        found = self._scan_source(source, manifest)
+        staging.mkdir(parents=True)
+        try:
+            for directory in manifest.directories:
+                (staging / directory).mkdir(parents=True, exist_ok=True)
+            for relative, info in found.items():
+                source_file = source / relative
+                target = staging / relative
+                if stat.S_ISLNK(info.st_mode):
+                    link_target = os.readlink(source_file)
+                    os.symlink(link_target, target)
+                    manifest.files[relative] = SnapshotEntry(0, info.st_mtime_ns, info.st_mode, link_target=link_target)
+                    continue
+                previous = parent.files.get(relative) if parent else None
+                checksum = self._unchanged(source_file, info, previous)
+                if checksum is not None:
+                    try:
+                        os.link(parent_path / relative, target)
+                        result.linked += 1
+                        result.bytes_linked += info.st_size
+                        manifest.files[relative] = SnapshotEntry(info.st_size, info.st_mtime_ns, info.st_mode, checksum or None)
+                        continue
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        if e.errno not in _UNSUPPORTED:
+                            raise
+                self._copy_file(source_file, target, result, info.st_size)
+                checksum = file_checksum(target) if self.verify_content else None
+                manifest.files[relative] = SnapshotEntry(info.st_size, info.st_mtime_ns, info.st_mode, checksum)
+            result.files = len(manifest.files)
+            result.elapsed_s = time.perf_counter() - started
+            manifest.stats = {
+                "linked": result.linked, "reflinked": result.reflinked, "copied": result.copied,
+                "bytes_linked": result.bytes_linked, "bytes_copied": result.bytes_copied, "elapsed_s": result.elapsed_s,
+            }
+            os.rename(staging, final_path)
+            self._write_manifest(manifest)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            shutil.rmtree(final_path, ignore_errors=True)
+            raise
+        logger.info(
+            f"Snapshot {session}/{snapshot_id}: {result.linked} linked, {result.reflinked} reflinked, "
+            f"{result.copied} copied ({result.bytes_copied / 1024**2:.1f}MB) in {result.elapsed_s:.2f}s"
+        )
+        return result
+    def _write_manifest(self, manifest: SnapshotManifest):
+        path = self._manifest_path(manifest.session, manifest.snapshot_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(manifest.to_dict(), f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    def restore(self, session: str, destination, snapshot_id: Optional[str] = None, verify: bool = False) -> Path:
+        """Recreate a snapshot as an independent folder at ``destination``.
+
+        Files are cloned or copied, never linked, so editing the restored
+        session cannot reach back into the backups. ``destination`` must not
+        exist yet. With ``verify``, sizes and recorded checksums are checked.
+        """
+        manifest = self.load_manifest(session, snapshot_id)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot {snapshot_id or '(latest)'} for session {session}")
+        destination = Path(destination)
+        if destination.exists():
+            raise FileExistsError(f"Restore destination already exists: {destination}")
+        snapshot_path = self.snapshot_path(session, manifest.snapshot_id)
+        staging = destination.with_name(f".{destination.name}.restoring")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            for directory in manifest.directories:
+                (staging / directory).mkdir(parents=True, exist_ok=True)
+            scratch = SnapshotResult(session, manifest.snapshot_id, staging)
+            for relative, entry in manifest.files.items():
+                target = staging / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if entry.link_target is not None:
+                    os.symlink(entry.link_target, target)
+                    continue
+                self._copy_file(snapshot_path / relative, target, scratch, entry.size)
+                if verify:
+                    if target.stat().st_size != entry.size:
+                        raise IOError(f"Restored {relative} has {target.stat().st_size} bytes, expected {entry.size}")
+                    if entry.checksum and file_checksum(target) != entry.checksum:
+                        raise IOError(f"Restored {relative} does not match its snapshot checksum")
+            os.rename(staging, destination)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(f"Restored {session}/{manifest.snapshot_id} to {destination}")
+        return destination
+    @staticmethod
+    def _snapshot_time(snapshot_id: str) -> datetime:
+        return datetime.strptime(snapshot_id[:22], "%Y%m%dT%H%M%S_%f")
+    def select_for_pruning(self, snapshot_ids: List[str], policy: RetentionPolicy, now: Optional[datetime] = None) -> List[str]:
+        """Ids from ``snapshot_ids`` (oldest first) that ``policy`` does not keep."""
+        if not snapshot_ids:
+            return []
+        now = now or datetime.now()
+        newest_first = sorted(snapshot_ids, reverse=True)
+        times = {snapshot_id: self._snapshot_time(snapshot_id) for snapshot_id in newest_first}
+        keep: Set[str] = set(newest_first[: max(policy.keep_last, 1)])
+        for count, bucket in ((policy.keep_daily, lambda t: t.date()), (policy.keep_weekly, lambda t: t.isocalendar()[:2])):
+            seen = set()
+            for snapshot_id in newest_first:
+                key = bucket(times[snapshot_id])
+                if key in seen:
+                    continue
+                if len(seen) == count:
+                    break
+                seen.add(key)
+                keep.add(snapshot_id)
+        if policy.max_age_days is not None:
+            cutoff = now - timedelta(days=policy.max_age_days)
+            keep = {snapshot_id for snapshot_id in keep if times[snapshot_id] >= cutoff}
+            keep.add(newest_first[0])
+        return [snapshot_id for snapshot_id in sorted(snapshot_ids) if snapshot_id not in keep]
+    def prune(self, session: str, policy: RetentionPolicy, now: Optional[datetime] = None) -> List[str]:
+        """Delete the snapshots of ``session`` that ``policy`` does not keep."""
+        removed = self.select_for_pruning(self.list_snapshots(session), policy, now)
+        for snapshot_id in removed:
+            # Drop the manifest first so a half-deleted tree is never listed
+            self._manifest_path(session, snapshot_id).unlink(missing_ok=True)
+            shutil.rmtree(self.snapshot_path(session, snapshot_id), ignore_errors=True)
+        if removed:
+            logger.info(f"Pruned {len(removed)} snapshots of {session}")
+        return removed
+    def disk_usage(self, session: str) -> int:
+        """Bytes the snapshots of ``session`` occupy, counting each shared inode once."""
+        seen = set()
+        total = 0
+        for directory, _, files in os.walk(self.root / session / SNAPSHOTS_DIRNAME):
+            for name in files:
+                info = os.lstat(os.path.join(directory, name))
+                if (info.st_dev, info.st_ino) not in seen:
+                    seen.add((info.st_dev, info.st_ino))
+                    total += info.st_size
+        return total
@@ -0,0 +1,92 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QProgressBar
+from .utils.lazy_import import format_import_profile, profile_imports
+from .utils.logging_config import get_logger
+logger = get_logger(__name__)
+IMPORT_PROFILE_FLAG = "--import-profile"
+HEAVY_MODULES = ("cv2", "scipy", "numpy", "flask", "flask_socketio")
+@dataclass
+class StartupTask:
+    label: str
+    action: Callable[[], Any]
+    critical: bool = False
+class BackendLoader(QThread):
+    """Runs slow startup tasks (imports, checks) off the GUI thread.
+
+    Tasks run in order and report ``progress(done, total, label)``. A failing
+    non-critical task is logged and skipped; a failing critical task emits
+    ``loading_aborted`` and stops the sequence. Tasks may import modules, run
+    thread-safe checks or build services that own no Qt objects and return
+    them as their result; Qt objects must still be created on the GUI thread
+    once ``loading_finished`` arrives.
+    """
+    progress = pyqtSignal(int, int, str)
+    loading_finished = pyqtSignal(object)
+    loading_aborted = pyqtSignal(str, object)
+    def __init__(self, tasks: Sequence[StartupTask], parent=None):
+        super().__init__(parent)
+        self.tasks: List[StartupTask] = list(tasks)
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+    def run(self):
+        total = len(self.tasks)
+        for done, task in enumerate(self.tasks):
+            if self.isInterruptionRequested():
+                return
+            self.progress.emit(done, total, task.label)
+            start = time.perf_counter()
+            try:
+                self.results[task.label] = task.action()
+            except Exception as e:
+                self.timings[task.label] = time.perf_counter() - start
+                if task.critical:
+                    logger.error(f"Startup task '{task.label}' failed: {e}")
+                    self.loading_aborted.emit(task.label, e)
+                    return
+                logger.warning(f"Startup task '{task.label}' failed: {e}")
+                self.results[task.label] = e
+                continue
+            self.timings[task.label] = time.perf_counter() - start
+            logger.debug(f"Startup task '{task.label}' took {self.timings[task.label] * 1000:.0f} ms")
+        self.progress.emit(total, total, "Ready")
+        self.loading_finished.emit(self.results)
+def attach_startup_progress(window, loader: BackendLoader):
+    """Show the loader's progress in ``window``'s status bar until it completes."""
+    status_bar = window.statusBar()
+    label = QLabel("Starting services...")
+    bar = QProgressBar()
+    bar.setMaximumWidth(160)
+    bar.setRange(0, max(len(loader.tasks), 1))
+    status_bar.addWidget(label)
+    status_bar.addWidget(bar)
+    def on_progress(done: int, total: int, text: str):
+        bar.setValue(done)
+        label.setText(text if done < total else "Services ready")
+    def remove(*_):
+        status_bar.removeWidget(label)
+        status_bar.removeWidget(bar)
+        label.deleteLater()
+        bar.deleteLater()
+    loader.progress.connect(on_progress)
+    loader.loading_finished.connect(remove)
+    loader.loading_aborted.connect(remove)
+    return label, bar
+def print_import_profile(argv: Sequence[str], default_modules: Sequence[str]) -> int:
+    """Handle ``--import-profile[=module,...]``: print an ``-X importtime`` breakdown."""
+    modules = list(default_modules)
+    for arg in argv:
+        if arg.startswith(IMPORT_PROFILE_FLAG + "="):
+            modules = [m for m in arg.split("=", 1)[1].split(",") if m]
+    try:
+        rows = profile_imports(modules)
+    except ImportError as e:
+        print(f"Import profile failed: {e}")
+        return 1
+    print(f"Import profile for: {', '.join(modules)}")
+    print(format_import_profile(rows, watch=HEAVY_MODULES))
+    return 0
+def wants_import_profile(argv: Optional[Sequence[str]]) -> bool:
+    return any(arg == IMPORT_PROFILE_FLAG or arg.startswith(IMPORT_PROFILE_FLAG + "=") for arg in argv or ())
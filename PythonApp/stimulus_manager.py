@@ -3,11 +3,16 @@ import os
 import sys
 import time
 from dataclasses import dataclass, field
-from typing import Callable, Dict, List, Optional
-from PyQt5.QtCore import QRect, Qt, QTimer, QUrl
+from typing import Any, Callable, Dict, List, Optional
+from PyQt5.QtCore import QRect, Qt, QTimer, QUrl, pyqtSignal
 from PyQt5.QtGui import QColor, QFont, QPalette, QPixmap
-from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
-from PyQt5.QtMultimediaWidgets import QVideoWidget
+try:
+    from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
+    from PyQt5.QtMultimediaWidgets import QVideoWidget
+    MULTIMEDIA_AVAILABLE = True
+except ImportError:
+    QMediaContent = QMediaPlayer = QVideoWidget = None
+    MULTIMEDIA_AVAILABLE = False
 from PyQt5.QtWidgets import (
     QApplication,
     QDesktopWidget,
@@ -16,6 +21,7 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+from .presentation_clock import PresentationClock, PresentationRecord
 @dataclass
 class MonitorInfo:
     monitor_id: int
@@ -23,6 +29,7 @@ class MonitorInfo:
     geometry: QRect
     is_primary: bool = False
     dpi: float = 96.0
+    refresh_rate: float = 60.0
 @dataclass
 class StimulusConfig:
     stimulus_type: str = "video"
@@ -43,7 +50,13 @@ class StimulusEvent:
     monitor_id: int
     stimulus_config: StimulusConfig
     duration_actual_ms: Optional[float] = None
+    perf_counter_ns: Optional[int] = None
+    onset_error_ms: Optional[float] = None
+    flip_source: Optional[str] = None
+    presentation_id: Optional[int] = None
 class StimulusWindow(QMainWindow):
+    frame_painted = pyqtSignal("qint64")
+    frame_swapped = pyqtSignal("qint64")
     def __init__(self, monitor_info: MonitorInfo, config: StimulusConfig):
         super().__init__()
         self.monitor_info = monitor_info
@@ -59,8 +72,19 @@ class StimulusWindow(QMainWindow):
         palette = QPalette()
         palette.setColor(QPalette.Window, QColor(self.config.background_color))
         self.setPalette(palette)
+    def reveal(self):
         if self.config.fullscreen:
             self.showFullScreen()
+        else:
+            self.show()
+        handle = self.windowHandle()
+        if handle is not None and hasattr(handle, "frameSwapped"):
+            handle.frameSwapped.connect(
+                lambda: self.frame_swapped.emit(time.perf_counter_ns())
+            )
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.frame_painted.emit(time.perf_counter_ns())
     def setup_content(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -75,6 +99,11 @@ class StimulusWindow(QMainWindow):
         elif self.config.stimulus_type == "pattern":
             self.setup_pattern_content(layout)
     def setup_video_content(self, layout):
+        if not MULTIMEDIA_AVAILABLE:
+            label = QLabel("Video playback unavailable")
+            label.setAlignment(Qt.AlignCenter)
+            layout.addWidget(label)
+            return
         self.video_widget = QVideoWidget()
         self.media_player = QMediaPlayer()
         self.media_player.setVideoOutput(self.video_widget)
@@ -133,6 +162,12 @@ class StimulusManager:
         self.high_precision_timer = QTimer()
         self.high_precision_timer.setSingleShot(True)
         self.synchronization_offset_ms = 0.0
+        self.presentation_clock = PresentationClock()
+        self.onset_lead_ms = 50.0
+        self.marker_sinks: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._onset_timers: Dict[int, QTimer] = {}
+        self._active_records: Dict[int, PresentationRecord] = {}
+        self._pending_onsets: Dict[int, str] = {}
         self.logger.info("StimulusManager initialized")
     def initialize(self) -> bool:
         try:
@@ -151,10 +186,12 @@ class StimulusManager:
                     geometry=screen.geometry(),
                     is_primary=i == desktop.primaryScreen(),
                     dpi=screen.logicalDotsPerInch(),
+                    refresh_rate=screen.refreshRate() or 60.0,
                 )
                 self.available_monitors.append(monitor_info)
+                self.presentation_clock.estimator(i, monitor_info.refresh_rate)
                 self.logger.info(
-                    f"Monitor {i}: {monitor_info.name} ({monitor_info.geometry.width()}x{monitor_info.geometry.height()}) {'[PRIMARY]' if monitor_info.is_primary else ''}"
+                    f"Monitor {i}: {monitor_info.name} ({monitor_info.geometry.width()}x{monitor_info.geometry.height()} @ {monitor_info.refresh_rate:.1f}Hz) {'[PRIMARY]' if monitor_info.is_primary else ''}"
                 )
             self.is_initialized = True
             self.logger.info(
@@ -180,7 +217,9 @@ class StimulusManager:
             if not monitor.is_primary:
                 return monitor.monitor_id
         return None
-    def present_stimulus(self, config: StimulusConfig) -> bool:
+    def present_stimulus(
+        self, config: StimulusConfig, onset_deadline_ns: Optional[int] = None
+    ) -> bool:
         try:
             if not self.is_initialized:
                 self.logger.error("StimulusManager not initialized")
@@ -188,37 +227,15 @@ class StimulusManager:
             if config.monitor_id >= len(self.available_monitors):
                 self.logger.error(f"Invalid monitor ID: {config.monitor_id}")
                 return False
-            monitor_info = self.available_monitors[config.monitor_id]
             self.logger.info(
                 f"Presenting {config.stimulus_type} stimulus on monitor {config.monitor_id}"
             )
-            stimulus_window = StimulusWindow(monitor_info, config)
-            self.stimulus_windows[config.monitor_id] = stimulus_window
-            stimulus_window.show()
-            start_time = time.time()
-            stimulus_window.start_presentation()
-            event = StimulusEvent(
-                event_type="stimulus_start",
-                timestamp=start_time,
-                monitor_id=config.monitor_id,
-                stimulus_config=config,
+            request_ns = self.presentation_clock.now_ns()
+            if onset_deadline_ns is None:
+                onset_deadline_ns = request_ns + int(self.onset_lead_ms * 1e6)
+            self._schedule_presentation(
+                config, request_ns, onset_deadline_ns, config.duration_ms, "stimulus_start"
             )
-            self.presentation_history.append(event)
-            for callback in self.event_callbacks:
-                try:
-                    callback(event)
-                except Exception as e:
-                    self.logger.error(f"Error in event callback: {e}")
-            if config.duration_ms > 0:
-                timer = QTimer()
-                timer.setSingleShot(True)
-                timer.timeout.connect(
-                    lambda: self._stop_stimulus_presentation(
-                        config.monitor_id, start_time
-                    )
-                )
-                timer.start(config.duration_ms)
-                self.presentation_timers[config.monitor_id] = timer
             return True
         except Exception as e:
             self.logger.error(f"Error presenting stimulus: {e}")
@@ -226,7 +243,7 @@ class StimulusManager:
     def stop_stimulus(self, monitor_id: int) -> bool:
         try:
             if monitor_id in self.stimulus_windows:
-                self._stop_stimulus_presentation(monitor_id, time.time())
+                self._stop_stimulus_presentation(monitor_id)
                 return True
             else:
                 self.logger.warning(f"No active stimulus on monitor {monitor_id}")
@@ -241,74 +258,206 @@ class StimulusManager:
                 self.stop_stimulus(monitor_id)
         except Exception as e:
             self.logger.error(f"Error stopping all stimuli: {e}")
-    def present_synchronized_stimuli(self, configs: List[StimulusConfig]) -> bool:
+    def present_synchronized_stimuli(
+        self, configs: List[StimulusConfig], onset_deadline_ns: Optional[int] = None
+    ) -> bool:
         try:
             if not configs:
                 return False
             self.logger.info(f"Presenting {len(configs)} synchronised stimuli")
-            windows = []
+            request_ns = self.presentation_clock.now_ns()
+            if onset_deadline_ns is None:
+                onset_deadline_ns = request_ns + int(self.onset_lead_ms * 1e6)
+            max_duration = max((config.duration_ms for config in configs), default=0)
+            scheduled = 0
             for config in configs:
                 if config.monitor_id >= len(self.available_monitors):
                     self.logger.error(f"Invalid monitor ID: {config.monitor_id}")
                     continue
-                monitor_info = self.available_monitors[config.monitor_id]
-                window = StimulusWindow(monitor_info, config)
-                window.show()
-                windows.append((window, config))
-                self.stimulus_windows[config.monitor_id] = window
-            start_time = time.time()
-            for window, config in windows:
-                window.start_presentation()
-                event = StimulusEvent(
-                    event_type="synchronized_stimulus_start",
-                    timestamp=start_time,
-                    monitor_id=config.monitor_id,
-                    stimulus_config=config,
+                self._schedule_presentation(
+                    config,
+                    request_ns,
+                    onset_deadline_ns,
+                    max_duration,
+                    "synchronized_stimulus_start",
                 )
-                self.presentation_history.append(event)
-            max_duration = max(
-                config.duration_ms for config in configs if config.duration_ms > 0
-            )
-            if max_duration > 0:
-                timer = QTimer()
-                timer.setSingleShot(True)
-                timer.timeout.connect(lambda: self.stop_all_stimuli())
-                timer.start(max_duration)
-            return True
+                scheduled += 1
+            return scheduled > 0
         except Exception as e:
             self.logger.error(f"Error presenting synchronised stimuli: {e}")
             return False
     def add_event_callback(self, callback: Callable[[StimulusEvent], None]) -> None:
         self.event_callbacks.append(callback)
+    def add_marker_sink(self, sink: Callable[[str, Dict[str, Any]], None]) -> None:
+        self.marker_sinks.append(sink)
+    def attach_session_logger(self, session_logger) -> None:
+        self.add_marker_sink(
+            lambda marker, details: session_logger.log_event(
+                "sync_marker", dict(details, marker=marker)
+            )
+        )
+    def attach_lsl_streamer(self, streamer) -> None:
+        from .network.lsl_integration import push_sync_marker
+        def push(marker: str, details: Dict[str, Any]) -> None:
+            timestamp = None
+            if details.get("flip_ns") is not None:
+                timestamp = streamer.local_clock() - (
+                    self.presentation_clock.now_ns() - details["flip_ns"]
+                ) / 1e9
+            push_sync_marker(streamer, marker, timestamp)
+        self.add_marker_sink(push)
     def get_presentation_history(self) -> List[StimulusEvent]:
         return self.presentation_history.copy()
-    def _stop_stimulus_presentation(self, monitor_id: int, start_time: float) -> None:
+    def get_timing_statistics(self) -> Dict[str, Any]:
+        return self.presentation_clock.get_statistics()
+    def _schedule_presentation(
+        self,
+        config: StimulusConfig,
+        request_ns: int,
+        onset_deadline_ns: int,
+        duration_ms: int,
+        event_type: str,
+    ) -> PresentationRecord:
+        monitor_id = config.monitor_id
+        if monitor_id in self.stimulus_windows:
+            self._stop_stimulus_presentation(monitor_id)
+        monitor_info = self.available_monitors[monitor_id]
+        stimulus_window = StimulusWindow(monitor_info, config)
+        stimulus_window.frame_painted.connect(
+            lambda frame_ns, m=monitor_id: self._on_frame(m, frame_ns, "paint")
+        )
+        stimulus_window.frame_swapped.connect(
+            lambda frame_ns, m=monitor_id: self._on_frame(m, frame_ns, "swap")
+        )
+        self.stimulus_windows[monitor_id] = stimulus_window
+        record = self.presentation_clock.new_record(monitor_id, onset_deadline_ns, request_ns)
+        self._active_records[monitor_id] = record
+        self._onset_timers[monitor_id] = self.presentation_clock.call_at(
+            onset_deadline_ns,
+            lambda dispatch_ns: self._dispatch_onset(monitor_id, event_type, dispatch_ns),
+        )
+        if duration_ms > 0:
+            record.requested_duration_ms = float(duration_ms)
+            record.offset_deadline_ns = onset_deadline_ns + int(duration_ms * 1e6)
+            self.presentation_timers[monitor_id] = self.presentation_clock.call_at(
+                record.offset_deadline_ns,
+                lambda dispatch_ns: self._stop_stimulus_presentation(monitor_id, dispatch_ns),
+            )
+        return record
+    def _dispatch_onset(self, monitor_id: int, event_type: str, dispatch_ns: int) -> None:
+        self._onset_timers.pop(monitor_id, None)
+        window = self.stimulus_windows.get(monitor_id)
+        record = self._active_records.get(monitor_id)
+        if window is None or record is None:
+            return
+        record.onset_dispatch_ns = dispatch_ns
+        self._pending_onsets[monitor_id] = event_type
+        window.reveal()
+        window.start_presentation()
+        window.repaint()
+        if monitor_id in self._pending_onsets:
+            fallback_ms = 3 * self.presentation_clock.frame_period_ns(monitor_id) // 1_000_000
+            QTimer.singleShot(
+                max(1, fallback_ms),
+                lambda r=record: self._finalise_onset(
+                    monitor_id,
+                    r,
+                    self.presentation_clock.estimator(monitor_id).predict_flip(dispatch_ns),
+                    "estimated",
+                ),
+            )
+    def _on_frame(self, monitor_id: int, frame_ns: int, source: str) -> None:
+        estimator = self.presentation_clock.estimator(monitor_id)
+        flip_ns = frame_ns if source == "swap" else estimator.predict_flip(frame_ns)
+        estimator.observe(flip_ns)
+        record = self._active_records.get(monitor_id)
+        if record is not None and monitor_id in self._pending_onsets:
+            self._finalise_onset(monitor_id, record, flip_ns, source)
+    def _finalise_onset(
+        self, monitor_id: int, record: PresentationRecord, flip_ns: int, source: str
+    ) -> None:
+        if self._active_records.get(monitor_id) is not record:
+            return
+        event_type = self._pending_onsets.pop(monitor_id, None)
+        if event_type is None:
+            return
+        record.onset_flip_ns = flip_ns
+        record.flip_source = source
+        window = self.stimulus_windows.get(monitor_id)
+        event = StimulusEvent(
+            event_type=event_type,
+            timestamp=self.presentation_clock.wall_time(flip_ns),
+            monitor_id=monitor_id,
+            stimulus_config=window.config if window else None,
+            perf_counter_ns=flip_ns,
+            onset_error_ms=record.onset_error_ms,
+            flip_source=source,
+            presentation_id=record.presentation_id,
+        )
+        self._emit_event(event)
+        self._publish_marker("stimulus_onset", record, event)
+    def _emit_event(self, event: StimulusEvent) -> None:
+        self.presentation_history.append(event)
+        for callback in self.event_callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                self.logger.error(f"Error in event callback: {e}")
+    def _publish_marker(
+        self, marker: str, record: PresentationRecord, event: StimulusEvent
+    ) -> None:
+        details = {
+            "monitor_id": record.monitor_id,
+            "presentation_id": record.presentation_id,
+            "timestamp": event.timestamp,
+            "flip_ns": event.perf_counter_ns,
+            "flip_source": event.flip_source,
+            "request_ns": record.request_ns,
+            "onset_deadline_ns": record.onset_deadline_ns,
+            "onset_error_ms": record.onset_error_ms,
+            "duration_actual_ms": event.duration_actual_ms,
+        }
+        for sink in self.marker_sinks:
+            try:
+                sink(marker, details)
+            except Exception as e:
+                self.logger.error(f"Error publishing sync marker: {e}")
+    def _stop_stimulus_presentation(
+        self, monitor_id: int, dispatch_ns: Optional[int] = None
+    ) -> None:
         try:
             if monitor_id in self.stimulus_windows:
-                window = self.stimulus_windows[monitor_id]
+                if dispatch_ns is None:
+                    dispatch_ns = self.presentation_clock.now_ns()
+                self.presentation_clock.cancel(self._onset_timers.pop(monitor_id, None))
+                self.presentation_clock.cancel(self.presentation_timers.pop(monitor_id, None))
+                window = self.stimulus_windows.pop(monitor_id)
                 window.stop_presentation()
                 window.close()
-                del self.stimulus_windows[monitor_id]
-                if monitor_id in self.presentation_timers:
-                    self.presentation_timers[monitor_id].stop()
-                    del self.presentation_timers[monitor_id]
-                stop_time = time.time()
-                duration_ms = (stop_time - start_time) * 1000
+                record = self._active_records.pop(monitor_id, None)
+                self._pending_onsets.pop(monitor_id, None)
+                flip_ns = self.presentation_clock.estimator(monitor_id).predict_flip(dispatch_ns)
+                duration_ms = None
+                if record is not None:
+                    record.offset_dispatch_ns = dispatch_ns
+                    if record.onset_flip_ns is not None:
+                        record.offset_flip_ns = flip_ns
+                        duration_ms = record.duration_actual_ms
                 event = StimulusEvent(
                     event_type="stimulus_stop",
-                    timestamp=stop_time,
+                    timestamp=self.presentation_clock.wall_time(flip_ns),
                     monitor_id=monitor_id,
                     stimulus_config=None,
                     duration_actual_ms=duration_ms,
+                    perf_counter_ns=flip_ns,
+                    flip_source="estimated",
+                    presentation_id=record.presentation_id if record else None,
                 )
-                self.presentation_history.append(event)
-                for callback in self.event_callbacks:
-                    try:
-                        callback(event)
-                    except Exception as e:
-                        self.logger.error(f"Error in stop event callback: {e}")
+                self._emit_event(event)
+                if record is not None and record.onset_flip_ns is not None:
+                    self._publish_marker("stimulus_offset", record, event)
                 self.logger.info(
-                    f"Stopped stimulus on monitor {monitor_id} (duration: {duration_ms:.1f}ms)"
+                    f"Stopped stimulus on monitor {monitor_id} (duration: {duration_ms if duration_ms is not None else 0.0:.1f}ms)"
                 )
         except Exception as e:
             self.logger.error(f"Error stopping stimulus presentation: {e}")
@@ -316,11 +465,12 @@ class StimulusManager:
         try:
             self.logger.info("Cleaning up StimulusManager...")
             self.stop_all_stimuli()
-            for timer in self.presentation_timers.values():
-                timer.stop()
+            self.presentation_clock.cancel_all()
             self.presentation_timers.clear()
+            self._onset_timers.clear()
             self.stimulus_windows.clear()
             self.event_callbacks.clear()
+            self.marker_sinks.clear()
             self.is_initialized = False
             self.logger.info("StimulusManager cleanup completed")
         except Exception as e:
@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+EVENT_TYPES = ("stimulus_start", "event_marker", "stimulus_end", "custom")
+EVENT_DTYPE = np.dtype(
+    [
+        ("seq", "<u4"),
+        ("event_type", "u1"),
+        ("perf_ns", "<i8"),
+        ("monotonic_ns", "<i8"),
+        ("video_position_ms", "<i8"),
+        ("video_duration_ms", "<i8"),
+        ("frame_number", "<i4"),
+        ("frame_rate", "<f4"),
+    ]
+)
+BINARY_LABEL_BYTES = 48
+BINARY_RECORD_DTYPE = np.dtype(
+    EVENT_DTYPE.descr + [("wall_ns", "<i8"), ("label", f"S{BINARY_LABEL_BYTES}")]
+)
+BINARY_MAGIC = b"BKEVLOG1"
+class ClockCalibration:
+    """Cross-clock regression mapping ``perf_counter_ns`` onto wall-clock time.
+
+    Each sample reads the wall clock between two performance-counter reads and
+    keeps only the tightest brackets, so scheduler preemption during a read
+    does not bias the fit. A least-squares line over a rolling window of such
+    samples gives both the offset and the drift between the two clocks.
+    """
+    def __init__(self, window: int = 64, reads_per_sample: int = 16):
+        self.window = window
+        self.reads_per_sample = reads_per_sample
+        self._perf = np.zeros(window, dtype=np.float64)
+        self._wall = np.zeros(window, dtype=np.float64)
+        self._count = 0
+        self.origin_perf_ns = time.perf_counter_ns()
+        self.origin_wall_ns = time.time_ns()
+        self.intercept_ns = 0.0
+        self.slope = 1.0
+        self.residual_ns = 0.0
+    def sample(self) -> Tuple[int, int, int]:
+        best = None
+        for _ in range(self.reads_per_sample):
+            before = time.perf_counter_ns()
+            wall = time.time_ns()
+            after = time.perf_counter_ns()
+            width = after - before
+            if best is None or width < best[2]:
+                best = ((before + after) // 2, wall, width)
+        slot = self._count % self.window
+        self._perf[slot] = best[0] - self.origin_perf_ns
+        self._wall[slot] = best[1] - self.origin_wall_ns
+        self._count += 1
+        return best
+    def calibrate(self, samples: int = 8, spacing_s: float = 0.0):
+        for i in range(samples):
+            if i and spacing_s:
+                time.sleep(spacing_s)
+            self.sample()
+        self._fit()
+    def _fit(self):
+        n = min(self._count, self.window)
+        perf, wall = self._perf[:n], self._wall[:n]
+        if n >= 3 and np.ptp(perf) > 1e6:
+            slope, intercept = np.polyfit(perf, wall, 1)
+        else:
+            slope, intercept = 1.0, float(np.mean(wall - perf)) if n else 0.0
+        residuals = wall - (intercept + slope * perf)
+        self.slope = float(slope)
+        self.intercept_ns = float(intercept)
+        self.residual_ns = float(np.std(residuals)) if n else 0.0
+    def to_wall_ns(self, perf_ns):
+        relative = np.asarray(perf_ns, dtype=np.float64) - self.origin_perf_ns
+        return (self.origin_wall_ns + self.intercept_ns + self.slope * relative).astype(np.int64)
+    def to_wall_time(self, perf_ns: int) -> float:
+        return float(self.to_wall_ns(perf_ns)) / 1e9
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "samples": self._count,
+            "offset_ms": self.intercept_ns / 1e6,
+            "origin_perf_ns": self.origin_perf_ns,
+            "origin_wall_ns": self.origin_wall_ns,
+            "drift_ppm": (self.slope - 1.0) * 1e6,
+            "residual_us": self.residual_ns / 1e3,
+        }
+class BufferedEventLog:
+    """Timestamp-at-call event log with a background writer.
+
+    ``log`` only stamps the clocks and fills a slot of a preallocated NumPy
+    ring, so its cost is independent of how many events came before. A single
+    writer thread drains the ring to NDJSON (``fmt="ndjson"``) or fixed-width
+    binary records (``fmt="binary"``), fsyncs periodically and appends a footer
+    with the final counts and clock calibration on ``close``. One producer
+    thread is assumed; it publishes a slot by advancing ``_head`` after the
+    slot is written, and the writer only ever advances ``_tail``.
+    """
+    def __init__(
+        self,
+        path: str,
+        header: Optional[Dict[str, Any]] = None,
+        fmt: str = "ndjson",
+        capacity: int = 65536,
+        flush_interval: float = 0.05,
+        fsync_interval: float = 1.0,
+        recalibrate_interval: float = 10.0,
+        calibration: Optional[ClockCalibration] = None,
+    ):
+        if fmt not in ("ndjson", "binary"):
+            raise ValueError(f"Unsupported event log format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.recalibrate_interval = recalibrate_interval
+        self.calibration = calibration or ClockCalibration()
+        if calibration is None:
+            self.calibration.calibrate()
+        self._buffer = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self._labels: List[Optional[str]] = [None] * capacity
+        self._extras: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._head = 0
+        self._tail = 0
+        self.stalls = 0
+        self.records_written = 0
+        self.fsyncs = 0
+        self._closed = False
+        self._wakeup = threading.Event()
+        self._file = open(path, "wb")
+        self._write_header(header or {})
+        self._writer = threading.Thread(target=self._run, name="EventLogWriter", daemon=True)
+        self._writer.start()
+    @property
+    def pending(self) -> int:
+        return self._head - self._tail
+    def log(
+        self,
+        event_type: str,
+        label: Optional[str] = None,
+        video_position_ms: int = -1,
+        video_duration_ms: int = -1,
+        frame_number: Optional[int] = None,
+        frame_rate: Optional[float] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        perf_ns = time.perf_counter_ns()
+        monotonic_ns = time.monotonic_ns()
+        if self._closed:
+            raise RuntimeError("Event log is closed")
+        head = self._head
+        while head - self._tail >= self.capacity:
+            self.stalls += 1
+            self._wakeup.set()
+            time.sleep(0.0005)
+        slot = head % self.capacity
+        self._buffer[slot] = (
+            head,
+            EVENT_TYPES.index(event_type) if event_type in EVENT_TYPES else len(EVENT_TYPES) - 1,
+            perf_ns,
+            monotonic_ns,
+            video_position_ms,
+            video_duration_ms,
+            -1 if frame_number is None else frame_number,
+            np.nan if frame_rate is None else frame_rate,
+        )
+        self._labels[slot] = label
+        if event_type not in EVENT_TYPES:
+            extra = dict(extra or {}, event_type=event_type)
+        self._extras[slot] = extra
+        self._head = head + 1
+        return perf_ns
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            self._wakeup.set()
+            time.sleep(0.001)
+        return self.pending == 0
+    def close(self, footer: Optional[Dict[str, Any]] = None):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self._drain()
+        self.calibration.calibrate(samples=1)
+        self._write_footer(footer or {})
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+    def _run(self):
+        last_fsync = time.monotonic()
+        last_calibration = last_fsync
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._drain():
+                self._file.flush()
+            now = time.monotonic()
+            if now - last_fsync >= self.fsync_interval and self.records_written:
+                os.fsync(self._file.fileno())
+                self.fsyncs += 1
+                last_fsync = now
+            if now - last_calibration >= self.recalibrate_interval:
+                self.calibration.calibrate(samples=1)
+                last_calibration = now
+    def _drain(self) -> int:
+        tail, head = self._tail, self._head
+        if head == tail:
+            return 0
+        start, stop = tail % self.capacity, head % self.capacity
+        if start < stop:
+            slots = np.arange(start, stop)
+        else:
+            slots = np.concatenate((np.arange(start, self.capacity), np.arange(0, stop)))
+        records = self._buffer[slots]
+        labels = [self._labels[i] for i in slots]
+        extras = [self._extras[i] for i in slots]
+        wall_ns = self.calibration.to_wall_ns(records["perf_ns"])
+        if self.fmt == "binary":
+            self._file.write(self._binary_records(records, wall_ns, labels).tobytes())
+        else:
+            self._file.write(self._ndjson_records(records, wall_ns, labels, extras))
+        for i in slots:
+            self._labels[i] = None
+            self._extras[i] = None
+        self._tail = head
+        self.records_written += len(slots)
+        return len(slots)
+    @staticmethod
+    def _binary_records(records, wall_ns, labels) -> np.ndarray:
+        out = np.zeros(len(records), dtype=BINARY_RECORD_DTYPE)
+        for name in EVENT_DTYPE.names:
+            out[name] = records[name]
+        out["wall_ns"] = wall_ns
+        out["label"] = [
+            (label or "").encode("utf-8")[:BINARY_LABEL_BYTES] for label in labels
+        ]
+        return out
+    @staticmethod
+    def _ndjson_records(records, wall_ns, labels, extras) -> bytes:
+        lines = []
+        for record, wall, label, extra in zip(records.tolist(), wall_ns.tolist(), labels, extras):
+            seq, type_code, perf_ns, monotonic_ns, position, duration, frame, rate = record
+            event = {
+                "record": "event",
+                "seq": seq,
+                "event_type": EVENT_TYPES[type_code],
+                "perf_ns": perf_ns,
+                "monotonic_ns": monotonic_ns,
+                "wall_ns": wall,
+                "timestamp_formatted": datetime.fromtimestamp(wall / 1e9).strftime(
+                    "%Y-%m-%d %H:%M:%S.%f"
+                )[:-3],
+            }
+            if label is not None:
+                event["label"] = label
+            if position >= 0:
+                event["video_position_ms"] = position
+            if duration >= 0:
+                event["video_duration_ms"] = duration
+            if frame >= 0:
+                event["frame_number"] = frame
+            if rate == rate:
+                event["frame_rate"] = rate
+            if extra:
+                event.update(extra)
+            lines.append(json.dumps(event, separators=(",", ":")))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+    def _write_header(self, header: Dict[str, Any]):
+        header = dict(header, record="header", format=self.fmt, calibration=self.calibration.describe())
+        if self.fmt == "binary":
+            header["record_dtype"] = [list(field) for field in BINARY_RECORD_DTYPE.descr]
+            payload = json.dumps(header).encode("utf-8")
+            self._file.write(BINARY_MAGIC + len(payload).to_bytes(4, "little") + payload)
+        else:
+            self._file.write((json.dumps(header, separators=(",", ":")) + "\n").encode("utf-8"))
+        self._file.flush()
+    def _write_footer(self, footer: Dict[str, Any]):
+        footer = dict(
+            footer,
+            record="footer",
+            event_count=self.records_written,
+            stalls=self.stalls,
+            calibration=self.calibration.describe(),
+        )
+        payload = json.dumps(footer, separators=(",", ":")).encode("utf-8")
+        if self.fmt == "binary":
+            self._file.write(payload + len(payload).to_bytes(4, "little") + BINARY_MAGIC)
+        else:
+            self._file.write(payload + b"\n")
+def read_event_log(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(BINARY_MAGIC):
+        header_len = int.from_bytes(data[8:12], "little")
+        header = json.loads(data[12 : 12 + header_len])
+        body = data[12 + header_len :]
+        footer = None
+        if body.endswith(BINARY_MAGIC):
+            footer_len = int.from_bytes(body[-12:-8], "little")
+            footer = json.loads(body[-12 - footer_len : -12])
+            body = body[: -12 - footer_len]
+        usable = len(body) - len(body) % BINARY_RECORD_DTYPE.itemsize
+        records = np.frombuffer(body[:usable], dtype=BINARY_RECORD_DTYPE)
+        return {"header": header, "events": records, "footer": footer}
+    lines = [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+    return {
+        "header": lines[0] if lines and lines[0].get("record") == "header" else None,
+        "events": [line for line in lines if line.get("record") == "event"],
+        "footer": lines[-1] if lines and lines[-1].get("record") == "footer" else None,
+    }
@@ -0,0 +1,87 @@
+import importlib
+import os
+import subprocess
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from .logging_config import get_logger
+logger = get_logger(__name__)
+def optional_attr(candidates: Sequence[Tuple[str, Optional[str]]], attr: str) -> Any:
+    """Import ``attr`` from the first importable module in ``candidates``, else ``None``.
+
+    Each candidate is ``(module_name, package)`` as accepted by
+    ``importlib.import_module``.
+    """
+    for module_name, package in candidates:
+        try:
+            return getattr(importlib.import_module(module_name, package), attr)
+        except (ImportError, AttributeError) as e:
+            logger.debug(f"{attr} not importable from {module_name}: {e}")
+    return None
+class LazyAttributes:
+    """Backs a module-level PEP 562 ``__getattr__`` with deferred optional imports.
+
+    ``table`` maps exported names to candidate ``(module, package)`` pairs.
+    Names resolve on first access and are cached (``None`` when no candidate
+    imports), so the owning module can be imported without its heavy
+    dependencies and ``preload`` can warm them from a background thread.
+    """
+    def __init__(self, table: Dict[str, Sequence[Tuple[str, Optional[str]]]]):
+        self.table = dict(table)
+        self._resolved: Dict[str, Any] = {}
+    def __contains__(self, name: str) -> bool:
+        return name in self.table
+    def resolve(self, name: str) -> Any:
+        if name not in self._resolved:
+            self._resolved[name] = optional_attr(self.table[name], name)
+        return self._resolved[name]
+    def getattr(self, module_name: str, name: str) -> Any:
+        if name not in self.table:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        return self.resolve(name)
+    def preload(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        return {name: self.resolve(name) is not None for name in (names or self.table)}
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resolved
+def profile_imports(modules: Sequence[str], python: Optional[str] = None, env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Import ``modules`` in a fresh interpreter under ``-X importtime`` and parse the report."""
+    statement = "; ".join(f"import {module}" for module in modules)
+    run_env = dict(os.environ if env is None else env)
+    run_env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    completed = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=run_env,
+        cwd=cwd,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            })
+        except ValueError:
+            continue
+    if completed.returncode != 0 and not rows:
+        raise ImportError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else statement)
+    return rows
+def format_import_profile(rows: List[Dict[str, Any]], top: int = 25, watch: Sequence[str] = ()) -> str:
+    loaded = {row["module"] for row in rows}
+    total_us = sum(row["self_us"] for row in rows)
+    lines = [f"{len(rows)} modules imported in {total_us / 1000:.1f} ms (self time)", ""]
+    lines.append(f"{'self [ms]':>10} {'cumulative [ms]':>16}  module")
+    for row in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:top]:
+        lines.append(
+            f"{row['self_us'] / 1000:>10.1f} {row['cumulative_us'] / 1000:>16.1f}  {'  ' * row['depth']}{row['module']}"
+        )
+    if watch:
+        lines.append("")
+        for module in watch:
+            lines.append(f"{module}: {'loaded' if module in loaded else 'not loaded'}")
+    return "\n".join(lines)
@@ -38,6 +38,8 @@ class WebDashboardIntegration:
         self.web_port = web_port
         self.web_server: Optional[WebDashboardServer] = None
         self.is_running = False
+        self.session_manager = session_manager
+        self._unsubscribe_jobs = None
         if main_controller is not None:
             self.controller = main_controller
             self.using_web_controller = False
@@ -54,7 +56,12 @@ class WebDashboardIntegration:
         logger.info(
             f"Controller: {'WebController' if self.using_web_controller else 'MainController' if self.controller else 'None'}"
         )
-    def start_web_dashboard(self) -> bool:
+    def start_web_dashboard(self, connect_controller: bool = True) -> bool:
+        """Start the dashboard server.
+
+        Pass ``connect_controller=False`` when starting from a worker thread
+        and call ``connect_controller`` from the controller's (GUI) thread.
+        """
         if not self.enable_web_ui:
             logger.info("Web UI is disabled, not starting dashboard")
             return False
@@ -73,14 +80,15 @@ class WebDashboardIntegration:
             )
             self.web_server.start_server()
             self.is_running = True
-            logger.info(f"Web dashboard started on http://localhost:{self.web_port}")
-            if self.controller is not None:
-                self._connect_to_controller()
-                logger.info(
-                    f"Connected web dashboard to {'WebController' if self.using_web_controller else 'MainController'} with network protocol integration"
+            if self.session_manager is not None and hasattr(
+                self.session_manager, "subscribe_post_session_events"
+            ):
+                self._unsubscribe_jobs = self.session_manager.subscribe_post_session_events(
+                    self.web_server.update_post_session_job
                 )
-            else:
-                logger.warning("No controller available for real data integration")
+            logger.info(f"Web dashboard started on http://localhost:{self.web_port}")
+            if connect_controller:
+                self.connect_controller()
             return True
         except Exception as e:
             logger.error(f"Failed to start web dashboard: {e}")
@@ -91,12 +99,23 @@ class WebDashboardIntegration:
         try:
             if self.using_web_controller and self.controller:
                 self.controller.stop_monitoring()
+            if self._unsubscribe_jobs:
+                self._unsubscribe_jobs()
+                self._unsubscribe_jobs = None
             self.web_server.stop_server()
             self.web_server = None
             self.is_running = False
             logger.info("Web dashboard stopped")
         except Exception as e:
             logger.error(f"Error stopping web dashboard: {e}")
+    def connect_controller(self):
+        if self.controller is not None:
+            self._connect_to_controller()
+            logger.info(
+                f"Connected web dashboard to {'WebController' if self.using_web_controller else 'MainController'} with network protocol integration"
+            )
+        else:
+            logger.warning("No controller available for real data integration")
     def _connect_to_controller(self):
         if self.controller is None:
             return
@@ -0,0 +1,314 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, Iterable, Optional, Tuple
+import numpy as np
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+try:
+    from ..utils.logging_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+MJPEG_BOUNDARY = "frame"
+MJPEG_MIMETYPE = f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
+@dataclass(frozen=True)
+class PreviewTier:
+    name: str
+    quality: int = 80
+    max_width: Optional[int] = None
+DEFAULT_PREVIEW_TIERS = (
+    PreviewTier("full", quality=80),
+    PreviewTier("low", quality=60, max_width=320),
+)
+def build_thermal_lut() -> np.ndarray:
+    lut = np.zeros((256, 3), dtype=np.uint8)
+    for intensity in range(256):
+        if intensity < 51:
+            lut[intensity] = [intensity * 5, 0, 255]
+        elif intensity < 102:
+            lut[intensity] = [255, 0, 255 - (intensity - 51) * 5]
+        elif intensity < 153:
+            lut[intensity] = [255, (intensity - 102) * 5, 0]
+        elif intensity < 204:
+            lut[intensity] = [255, 255, (intensity - 153) * 5]
+        else:
+            lut[intensity] = [255, 255, 255]
+    return lut
+THERMAL_LUT = build_thermal_lut()
+def apply_thermal_lut(thermal_array: np.ndarray) -> np.ndarray:
+    if thermal_array.dtype != np.uint8:
+        data = thermal_array.astype(np.float32, copy=False)
+        low = float(data.min())
+        span = float(data.max()) - low
+        if span <= 0:
+            normalized = np.zeros(data.shape, dtype=np.uint8)
+        else:
+            normalized = ((data - low) * (255.0 / span)).astype(np.uint8)
+    else:
+        normalized = thermal_array
+    return THERMAL_LUT[normalized]
+class _EncodedSlot:
+    __slots__ = ("version", "payload", "timestamp")
+    def __init__(self):
+        self.version = 0
+        self.payload: Optional[bytes] = None
+        self.timestamp = 0.0
+class PreviewBroadcaster:
+    """Encodes each new source frame once per tier and fans it out to all viewers.
+
+    Frames arrive either through ``publish_frame`` or by polling ``frame_source``;
+    a polled frame is treated as new only when the source returns a different
+    array object. Viewers block on a shared condition for the next version and
+    always receive the latest slot, so slow clients skip frames instead of
+    building a backlog.
+    """
+    def __init__(
+        self,
+        name: str,
+        frame_source: Optional[Callable[[], Optional[np.ndarray]]] = None,
+        transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        tiers: Iterable[PreviewTier] = DEFAULT_PREVIEW_TIERS,
+        max_fps: float = 15.0,
+        encoder: Optional[Callable[[np.ndarray, PreviewTier], Optional[bytes]]] = None,
+        demand_timeout: float = 2.0,
+        stale_after: float = 5.0,
+    ):
+        self.name = name
+        self.frame_source = frame_source
+        self.transform = transform
+        self.tiers: Dict[str, PreviewTier] = {tier.name: tier for tier in tiers}
+        if not self.tiers:
+            raise ValueError("at least one preview tier is required")
+        self.default_tier = next(iter(self.tiers))
+        self.frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.encoder = encoder or self._encode_jpeg
+        self.demand_timeout = demand_timeout
+        self.stale_after = stale_after
+        self._slots: Dict[str, _EncodedSlot] = {
+            name: _EncodedSlot() for name in self.tiers
+        }
+        self._condition = threading.Condition()
+        self._pending_frame: Optional[np.ndarray] = None
+        self._last_source_frame: Optional[np.ndarray] = None
+        self._viewers = 0
+        self._polls = 0
+        self._last_demand = 0.0
+        self._running = False
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {
+            "frames_received": 0,
+            "frames_encoded": 0,
+            "encode_count": 0,
+            "encode_errors": 0,
+            "encode_time_total": 0.0,
+            "frames_served": 0,
+        }
+    @property
+    def viewer_count(self) -> int:
+        with self._condition:
+            return self._viewers
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._worker = threading.Thread(
+                target=self._run, name=f"PreviewBroadcaster-{self.name}", daemon=True
+            )
+            self._worker.start()
+        logger.debug(f"preview broadcaster '{self.name}' started")
+    def stop(self, timeout: float = 2.0):
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+            worker = self._worker
+            self._worker = None
+        if worker and worker is not threading.current_thread():
+            worker.join(timeout=timeout)
+        logger.debug(f"preview broadcaster '{self.name}' stopped")
+    def publish_frame(self, frame: Optional[np.ndarray]):
+        if frame is None:
+            return
+        with self._condition:
+            self._pending_frame = frame
+            self.stats["frames_received"] += 1
+            self._condition.notify_all()
+    def acquire_viewer(self):
+        with self._condition:
+            self._viewers += 1
+            self._last_demand = time.monotonic()
+        self.start()
+    def release_viewer(self):
+        with self._condition:
+            self._viewers = max(0, self._viewers - 1)
+    def latest(self, tier: Optional[str] = None) -> Tuple[int, Optional[bytes]]:
+        slot = self._slots[self._resolve_tier(tier)]
+        with self._condition:
+            return slot.version, slot.payload
+    def wait_for_frame(
+        self, tier: Optional[str] = None, last_version: int = 0, timeout: float = 1.0
+    ) -> Tuple[int, Optional[bytes]]:
+        slot = self._slots[self._resolve_tier(tier)]
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._last_demand = time.monotonic()
+            while slot.version <= last_version and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return slot.version, slot.payload
+    def snapshot(self, tier: Optional[str] = None, timeout: float = 0.5) -> Optional[bytes]:
+        slot = self._slots[self._resolve_tier(tier)]
+        self.start()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._last_demand = time.monotonic()
+            polls = self._polls
+            self._condition.notify_all()
+            while slot.payload is None and self._running and self._polls <= polls:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            payload = slot.payload
+            if payload is not None and time.time() - slot.timestamp > self.stale_after:
+                payload = None
+            if payload is not None:
+                self.stats["frames_served"] += 1
+        return payload
+    def stream(
+        self, tier: Optional[str] = None, idle_timeout: float = 1.0
+    ) -> Generator[bytes, None, None]:
+        tier_name = self._resolve_tier(tier)
+        self.acquire_viewer()
+        last_version = 0
+        try:
+            while self._running:
+                version, payload = self.wait_for_frame(
+                    tier_name, last_version, idle_timeout
+                )
+                if payload is None or version == last_version:
+                    continue
+                last_version = version
+                self.stats["frames_served"] += 1
+                yield self.format_part(payload)
+        finally:
+            self.release_viewer()
+    @staticmethod
+    def format_part(payload: bytes) -> bytes:
+        header = (
+            f"--{MJPEG_BOUNDARY}\r\n"
+            f"Content-Type: image/jpeg\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+        ).encode("ascii")
+        return header + payload + b"\r\n"
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = dict(self.stats)
+            stats["viewers"] = self._viewers
+            stats["versions"] = {name: slot.version for name, slot in self._slots.items()}
+        encoded = stats["encode_count"]
+        stats["avg_encode_ms"] = (
+            stats["encode_time_total"] / encoded * 1000.0 if encoded else 0.0
+        )
+        return stats
+    def _resolve_tier(self, tier: Optional[str]) -> str:
+        if tier is None:
+            return self.default_tier
+        if tier not in self.tiers:
+            raise KeyError(f"unknown preview tier: {tier}")
+        return tier
+    def _has_demand(self) -> bool:
+        return (
+            self._viewers > 0
+            or time.monotonic() - self._last_demand < self.demand_timeout
+        )
+    def _run(self):
+        next_poll = 0.0
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                frame = self._pending_frame
+                self._pending_frame = None
+                if frame is None and (self.frame_source is None or not self._has_demand()):
+                    self._condition.wait(self.frame_interval or 0.1)
+                    continue
+            if frame is None:
+                now = time.monotonic()
+                if now < next_poll:
+                    time.sleep(next_poll - now)
+                next_poll = time.monotonic() + self.frame_interval
+                self._poll_source()
+                continue
+            if not self._has_demand():
+                continue
+            self._encode_and_publish(frame)
+    def _poll_source(self):
+        try:
+            frame = self.frame_source()
+        except Exception as e:
+            logger.debug(f"preview source '{self.name}' failed: {e}")
+            frame = None
+        if frame is not None and frame is not self._last_source_frame:
+            self._last_source_frame = frame
+            self.stats["frames_received"] += 1
+            self._encode_and_publish(frame)
+        with self._condition:
+            self._polls += 1
+            self._condition.notify_all()
+    def _encode_and_publish(self, frame: np.ndarray):
+        try:
+            image = self.transform(frame) if self.transform else frame
+        except Exception as e:
+            self.stats["encode_errors"] += 1
+            logger.error(f"preview transform failed for '{self.name}': {e}")
+            return
+        encoded = {}
+        for tier in self.tiers.values():
+            start = time.perf_counter()
+            try:
+                payload = self.encoder(image, tier)
+            except Exception as e:
+                payload = None
+                logger.error(f"preview encode failed for '{self.name}/{tier.name}': {e}")
+            self.stats["encode_time_total"] += time.perf_counter() - start
+            self.stats["encode_count"] += 1
+            if payload is None:
+                self.stats["encode_errors"] += 1
+                continue
+            encoded[tier.name] = payload
+        if not encoded:
+            return
+        now = time.time()
+        with self._condition:
+            for tier_name, payload in encoded.items():
+                slot = self._slots[tier_name]
+                slot.version += 1
+                slot.payload = payload
+                slot.timestamp = now
+            self.stats["frames_encoded"] += 1
+            self._condition.notify_all()
+    @staticmethod
+    def _encode_jpeg(image: np.ndarray, tier: PreviewTier) -> Optional[bytes]:
+        if not CV2_AVAILABLE:
+            return None
+        if tier.max_width and image.shape[1] > tier.max_width:
+            scale = tier.max_width / image.shape[1]
+            image = cv2.resize(
+                image,
+                (tier.max_width, max(1, int(image.shape[0] * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, tier.quality])
+        return buffer.tobytes() if ok else None
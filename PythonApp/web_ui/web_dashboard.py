@@ -29,6 +29,12 @@ except ImportError:
     logger.warning("System monitor not available")
     SYSTEM_MONITOR_AVAILABLE = False
     get_simple_monitor = lambda: None
+from PythonApp.session.session_reader import SessionReader
+from PythonApp.web_ui.preview_broadcaster import (
+    MJPEG_MIMETYPE,
+    PreviewBroadcaster,
+    apply_thermal_lut,
+)
 class WebDashboardServer:
     def __init__(
         self,
@@ -80,6 +86,16 @@ class WebDashboardServer:
             "shimmer_1": [],
             "shimmer_2": [],
         }
+        self.rgb_preview = PreviewBroadcaster(
+            "rgb", frame_source=self._latest_rgb_source_frame
+        )
+        self.ir_preview = PreviewBroadcaster(
+            "ir",
+            frame_source=self._latest_thermal_source_frame,
+            transform=apply_thermal_lut,
+        )
+        self._session_readers: Dict[str, SessionReader] = {}
+        self.post_session_jobs: Dict[int, Dict[str, Any]] = {}
         self._setup_routes()
         self._setup_socket_handlers()
         logger.info("Web Dashboard Server initialized")
@@ -555,6 +571,12 @@ class WebDashboardServer:
             except Exception as e:
                 logger.error(f"System status error: {e}")
                 return jsonify({"success": False, "error": str(e)}), 500
+        @self.app.route("/api/post_session/jobs")
+        def api_post_session_jobs():
+            jobs = sorted(
+                self.post_session_jobs.values(), key=lambda job: job["job_id"], reverse=True
+            )
+            return jsonify({"success": True, "jobs": jobs})
         @self.app.route("/api/sessions/export")
         def api_sessions_export():
             try:
@@ -647,24 +669,18 @@ Generated at: {datetime.now().isoformat()}"""
         @self.app.route("/api/playback/sessions")
         def api_playback_sessions():
             try:
-                sessions = [
-                    {
-                        "id": "session_20250802_001",
-                        "name": "Baseline Recording",
-                        "start_time": "2025-08-02T10:30:00Z",
-                        "duration": 1800,
-                        "devices": ["android_1", "android_2", "webcam_1"],
-                        "status": "completed",
-                    },
-                    {
-                        "id": "session_20250802_002",
-                        "name": "Stress Test",
-                        "start_time": "2025-08-02T14:15:00Z",
-                        "duration": 1200,
-                        "devices": ["android_1", "shimmer_1", "shimmer_2"],
-                        "status": "completed",
-                    },
-                ]
+                sessions = []
+                recordings_dir = self._get_recordings_dir()
+                if os.path.isdir(recordings_dir):
+                    for entry in sorted(os.listdir(recordings_dir), reverse=True):
+                        session_dir = os.path.join(recordings_dir, entry)
+                        if not os.path.isfile(
+                            os.path.join(session_dir, "session_metadata.json")
+                        ):
+                            continue
+                        reader = self._get_session_reader(entry)
+                        metadata = reader.get_metadata() if reader else {}
+                        sessions.append(self._playback_session_summary(entry, metadata))
                 return jsonify({"success": True, "sessions": sessions})
             except Exception as e:
                 logger.error(f"Playback sessions error: {e}")
@@ -672,15 +688,23 @@ Generated at: {datetime.now().isoformat()}"""
         @self.app.route("/api/playback/session/<session_id>")
         def api_playback_session_data(session_id):
             try:
-                session_data = {
-                    "id": session_id,
-                    "name": "Baseline Recording",
-                    "start_time": "2025-08-02T10:30:00Z",
-                    "duration": 1800,
-                    "devices": ["android_1", "android_2", "webcam_1"],
-                    "status": "completed",
-                    "data_size": "2.5 GB",
-                }
+                reader = self._get_session_reader(session_id)
+                if reader is None:
+                    return jsonify({"success": False, "error": "Session not found"}), 404
+                session_data = self._playback_session_summary(
+                    session_id, reader.get_metadata()
+                )
+                session_data["streams"] = reader.describe()
+                bounds = reader.time_bounds()
+                if bounds:
+                    session_data["t_start"], session_data["t_end"] = bounds
+                    if not session_data["duration"]:
+                        session_data["duration"] = bounds[1] - bounds[0]
+                data_size = sum(
+                    path.stat().st_size for path in reader.list_streams().values()
+                )
+                session_data["data_size_bytes"] = data_size
+                session_data["data_size"] = f"{data_size / (1024 * 1024):.1f} MB"
                 return jsonify({"success": True, "session": session_data})
             except Exception as e:
                 logger.error(f"Playback session data error: {e}")
@@ -688,9 +712,20 @@ Generated at: {datetime.now().isoformat()}"""
         @self.app.route("/api/playback/session/<session_id>/videos")
         def api_playback_session_videos(session_id):
             try:
+                reader = self._get_session_reader(session_id)
+                if reader is None:
+                    return jsonify({"success": False, "error": "Session not found"}), 404
                 videos = [
-                    {"filename": "camera1.mp4", "duration": 1800},
-                    {"filename": "camera2.mp4", "duration": 1800},
+                    {
+                        "stream": summary["stream"],
+                        "filename": summary["file"],
+                        "duration": summary["duration"],
+                        "frames": summary["rows"],
+                        "fps": summary["fps"],
+                        "t_start": summary["t_min"],
+                    }
+                    for summary in reader.describe()
+                    if summary["kind"] == "video"
                 ]
                 return jsonify({"success": True, "videos": videos})
             except Exception as e:
@@ -699,26 +734,90 @@ Generated at: {datetime.now().isoformat()}"""
         @self.app.route("/api/playback/session/<session_id>/sensors")
         def api_playback_session_sensors(session_id):
             try:
-                import random
-                time_points = list(range(0, 1800, 5))
-                sensor_data = {
-                    "gsr": [
-                        {"x": t, "y": random.uniform(0.1, 2.0)} for t in time_points
-                    ],
-                    "thermal": [
-                        {"x": t, "y": random.uniform(25, 35)} for t in time_points
-                    ],
-                    "shimmer": [
-                        {"x": t, "y": random.uniform(0.5, 3.0)} for t in time_points
-                    ],
-                    "heart_rate": [
-                        {"x": t, "y": random.uniform(60, 100)} for t in time_points
-                    ],
-                }
+                reader = self._get_session_reader(session_id)
+                if reader is None:
+                    return jsonify({"success": False, "error": "Session not found"}), 404
+                bounds = reader.time_bounds()
+                origin = bounds[0] if bounds else 0.0
+                t0 = request.args.get("t0", type=float)
+                t1 = request.args.get("t1", type=float)
+                max_points = request.args.get("max_points", default=1000, type=int)
+                sensor_data = {}
+                for summary in reader.describe():
+                    if summary["kind"] == "video":
+                        continue
+                    chart_key, column = self._playback_chart_column(summary)
+                    if chart_key is None or chart_key in sensor_data:
+                        continue
+                    result = reader.read_range(
+                        summary["stream"],
+                        None if t0 is None else origin + t0,
+                        None if t1 is None else origin + t1,
+                        max_points=max_points,
+                        columns=[column],
+                    )
+                    sensor_data[chart_key] = [
+                        {"x": round(t - origin, 3), "y": float(y)}
+                        for t, y in zip(result["timestamps"], result["columns"][column])
+                    ]
                 return jsonify({"success": True, "sensor_data": sensor_data})
             except Exception as e:
                 logger.error(f"Playback sensors error: {e}")
                 return jsonify({"success": False, "error": str(e)}), 500
+        @self.app.route("/api/playback/session/<session_id>/stream/<path:stream>")
+        def api_playback_stream_range(session_id, stream):
+            try:
+                reader = self._get_session_reader(session_id)
+                if reader is None:
+                    return jsonify({"success": False, "error": "Session not found"}), 404
+                result = reader.read_range(
+                    stream,
+                    request.args.get("t0", type=float),
+                    request.args.get("t1", type=float),
+                    max_points=request.args.get("max_points", type=int),
+                    decimate_by=request.args.get("column"),
+                )
+                return jsonify(
+                    {
+                        "success": True,
+                        "stream": stream,
+                        "total_points": result["total_points"],
+                        "decimated": result["decimated"],
+                        "timestamps": result["timestamps"].tolist(),
+                        "columns": {
+                            name: values.tolist()
+                            for name, values in result["columns"].items()
+                        },
+                    }
+                )
+            except KeyError as e:
+                return jsonify({"success": False, "error": str(e)}), 404
+            except Exception as e:
+                logger.error(f"Playback stream range error: {e}")
+                return jsonify({"success": False, "error": str(e)}), 500
+        @self.app.route("/api/playback/session/<session_id>/frame/<path:stream>")
+        def api_playback_frame(session_id, stream):
+            try:
+                import cv2
+                reader = self._get_session_reader(session_id)
+                t = request.args.get("t", type=float)
+                if reader is None or t is None:
+                    return (
+                        jsonify({"success": False, "error": "Session or time missing"}),
+                        404,
+                    )
+                frame = reader.read_frame(stream, t)
+                if frame is None:
+                    return jsonify({"success": False, "error": "Frame not found"}), 404
+                ret, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+                if not ret:
+                    return jsonify({"success": False, "error": "Encode failed"}), 500
+                return self._jpeg_response(buffer.tobytes())
+            except KeyError as e:
+                return jsonify({"success": False, "error": str(e)}), 404
+            except Exception as e:
+                logger.error(f"Playback frame error: {e}")
+                return jsonify({"success": False, "error": str(e)}), 500
         @self.app.route("/api/playback/video/<session_id>/<filename>")
         def api_playback_video(session_id, filename):
             try:
@@ -736,10 +835,7 @@ Generated at: {datetime.now().isoformat()}"""
                             404,
                         )
                 else:
-                    recordings_dir = os.path.join(
-                        os.path.dirname(os.path.dirname(__file__)), "recordings"
-                    )
-                    session_dir = os.path.join(recordings_dir, session_id)
+                    session_dir = os.path.join(self._get_recordings_dir(), session_id)
                     video_path = os.path.join(session_dir, filename)
                     if os.path.exists(video_path):
                         return send_from_directory(session_dir, filename)
@@ -793,39 +889,11 @@ Generated at: {datetime.now().isoformat()}"""
 
         @self.app.route("/api/camera/rgb/preview")
         def api_camera_rgb_preview():
-            """Serve RGB camera preview from connected devices."""
+            """Serve the latest encoded RGB preview frame."""
             try:
-                # Try to get real RGB camera feed from connected devices
                 real_frame = self._get_real_rgb_frame()
                 if real_frame is not None:
                     return real_frame
-                
-                # Check if PC webcam is available
-                if (
-                    self.controller
-                    and hasattr(self.controller, "webcam_capture")
-                    and self.controller.webcam_capture
-                ):
-                    frame = self.controller.webcam_capture.get_current_frame()
-                    if frame is not None:
-                        import io
-                        import cv2
-                        from flask import Response
-
-                        ret, buffer = cv2.imencode(
-                            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80]
-                        )
-                        if ret:
-                            response = Response(
-                                io.BytesIO(buffer).read(), mimetype="image/jpeg"
-                            )
-                            response.headers["Cache-Control"] = (
-                                "no-cache, no-store, must-revalidate"
-                            )
-                            response.headers["Pragma"] = "no-cache"
-                            response.headers["Expires"] = "0"
-                            return response
-
                 return self._generate_placeholder_image(
                     "RGB Camera\nPreview Not Available\n\nWaiting for Device Connection"
                 )
@@ -835,9 +903,8 @@ Generated at: {datetime.now().isoformat()}"""
 
         @self.app.route("/api/camera/ir/preview")
         def api_camera_ir_preview():
-            """Serve IR/thermal camera preview from connected Android devices."""
+            """Serve the latest encoded IR/thermal preview frame."""
             try:
-                # Try to get real thermal camera feed from connected Android devices
                 real_frame = self._get_real_thermal_frame_web()
                 if real_frame is not None:
                     return real_frame
@@ -859,6 +926,25 @@ Generated at: {datetime.now().isoformat()}"""
                 logger.error(f"IR preview error: {e}")
                 return self._generate_placeholder_image("IR Camera\nError")
 
+        @self.app.route("/api/camera/rgb/stream")
+        def api_camera_rgb_stream():
+            """Stream RGB preview as MJPEG; every viewer shares one encode per frame."""
+            return self._mjpeg_stream_response(self.rgb_preview)
+
+        @self.app.route("/api/camera/ir/stream")
+        def api_camera_ir_stream():
+            """Stream IR/thermal preview as MJPEG; every viewer shares one encode per frame."""
+            return self._mjpeg_stream_response(self.ir_preview)
+
+        @self.app.route("/api/camera/preview/stats")
+        def api_camera_preview_stats():
+            return jsonify(
+                {
+                    "rgb": self.rgb_preview.get_statistics(),
+                    "ir": self.ir_preview.get_statistics(),
+                }
+            )
+
         @self.app.route("/api/camera/rgb/capture", methods=["POST"])
         def api_camera_rgb_capture():
             try:
@@ -986,7 +1072,21 @@ Generated at: {datetime.now().isoformat()}"""
         return self._generate_placeholder_image("IR Camera\nThermal Preview")
     
     def _get_real_rgb_frame(self):
-        """Get real RGB camera frame from connected Android devices."""
+        """Get the latest RGB preview frame encoded by the shared broadcaster."""
+        payload = self.rgb_preview.snapshot()
+        if payload is None:
+            return None
+        return self._jpeg_response(payload)
+    
+    def _get_real_thermal_frame_web(self):
+        """Get the latest thermal preview frame encoded by the shared broadcaster."""
+        payload = self.ir_preview.snapshot()
+        if payload is None:
+            return None
+        return self._jpeg_response(payload)
+    
+    def _latest_rgb_source_frame(self):
+        """Return the newest raw RGB frame from Android devices or the PC webcam."""
         try:
             if (
                 self.controller
@@ -998,10 +1098,16 @@ Generated at: {datetime.now().isoformat()}"""
                 
                 for device_id, device_info in devices.items():
                     if "camera" in device_info.get("capabilities", []):
-                        # Try to get latest RGB frame from Android device
                         rgb_frame = device_manager.get_latest_rgb_frame(device_id)
                         if rgb_frame is not None:
-                            return self._convert_frame_to_response(rgb_frame)
+                            return rgb_frame
+            
+            if (
+                self.controller
+                and hasattr(self.controller, "webcam_capture")
+                and self.controller.webcam_capture
+            ):
+                return self.controller.webcam_capture.get_current_frame()
             
             return None
             
@@ -1009,8 +1115,8 @@ Generated at: {datetime.now().isoformat()}"""
             logger.debug(f"Could not get real RGB frame: {e}")
             return None
     
-    def _get_real_thermal_frame_web(self):
-        """Get real thermal camera frame from connected Android devices for web display."""
+    def _latest_thermal_source_frame(self):
+        """Return the newest raw thermal frame from connected Android devices."""
         try:
             if (
                 self.controller
@@ -1022,10 +1128,9 @@ Generated at: {datetime.now().isoformat()}"""
                 
                 for device_id, device_info in devices.items():
                     if "thermal" in device_info.get("capabilities", []):
-                        # Try to get latest thermal frame from Android device
                         thermal_frame = device_manager.get_latest_thermal_frame(device_id)
                         if thermal_frame is not None:
-                            return self._convert_thermal_frame_to_response(thermal_frame)
+                            return thermal_frame
             
             return None
             
@@ -1064,92 +1169,82 @@ Generated at: {datetime.now().isoformat()}"""
         
         return status
     
-    def _convert_frame_to_response(self, frame):
-        """Convert camera frame to HTTP response."""
-        try:
-            import io
-            import cv2
-            import numpy as np
-            from flask import Response
-            
-            if isinstance(frame, np.ndarray):
-                ret, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                if ret:
-                    response = Response(io.BytesIO(buffer).read(), mimetype="image/jpeg")
-                    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-                    response.headers["Pragma"] = "no-cache"
-                    response.headers["Expires"] = "0"
-                    return response
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error converting frame to response: {e}")
-            return None
+    def _get_recordings_dir(self):
+        """Resolve the recordings root, preferring the controller's session manager."""
+        session_manager = getattr(self.controller, "session_manager", None)
+        base_dir = getattr(session_manager, "base_recordings_dir", None)
+        if base_dir:
+            return os.path.abspath(str(base_dir))
+        return os.path.join(os.path.dirname(os.path.dirname(__file__)), "recordings")
     
-    def _convert_thermal_frame_to_response(self, thermal_data):
-        """Convert thermal data to HTTP response with thermal colormap."""
-        try:
-            import io
-            import cv2
-            import numpy as np
-            from flask import Response
-            
-            if isinstance(thermal_data, np.ndarray):
-                # Apply thermal colormap
-                colored_frame = self._apply_thermal_colormap_web(thermal_data)
-                
-                ret, buffer = cv2.imencode(".jpg", colored_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                if ret:
-                    response = Response(io.BytesIO(buffer).read(), mimetype="image/jpeg")
-                    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-                    response.headers["Pragma"] = "no-cache"  
-                    response.headers["Expires"] = "0"
-                    return response
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error converting thermal frame to response: {e}")
+    def _get_session_reader(self, session_id):
+        """Return a cached SessionReader, refusing ids that escape the recordings dir."""
+        recordings_dir = os.path.realpath(self._get_recordings_dir())
+        session_dir = os.path.realpath(os.path.join(recordings_dir, session_id))
+        if os.path.dirname(session_dir) != recordings_dir or not os.path.isdir(session_dir):
             return None
+        reader = self._session_readers.get(session_dir)
+        if reader is None:
+            reader = SessionReader(session_dir)
+            self._session_readers[session_dir] = reader
+        return reader
+    
+    @staticmethod
+    def _playback_session_summary(session_id, metadata):
+        return {
+            "id": session_id,
+            "name": metadata.get("session_name", session_id),
+            "start_time": metadata.get("start_time"),
+            "duration": metadata.get("duration") or 0,
+            "devices": list((metadata.get("devices") or {}).keys()),
+            "status": metadata.get("status", "unknown"),
+        }
+    
+    @staticmethod
+    def _playback_chart_column(summary):
+        """Map a recorded stream onto one of the playback page's chart series."""
+        chart_columns = (
+            ("gsr", "gsr", ("gsr_conductance_us", "gsr_us", "gsr")),
+            ("thermal", "thermal", ("mean_temp_c", "max_temp_c", "temperature")),
+            ("heart_rate", "heart", ("heart_rate_bpm", "heart_rate")),
+            ("shimmer", "shimmer", ("ppg_a13", "accel_magnitude_g")),
+        )
+        name = summary["stream"].lower()
+        for chart_key, marker, candidates in chart_columns:
+            if marker not in name:
+                continue
+            for column in candidates:
+                if column in summary["columns"]:
+                    return chart_key, column
+        return None, None
+    
+    def _jpeg_response(self, payload):
+        """Wrap already-encoded JPEG bytes in a non-cacheable HTTP response."""
+        from flask import Response
+        
+        response = Response(payload, mimetype="image/jpeg")
+        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        response.headers["Pragma"] = "no-cache"
+        response.headers["Expires"] = "0"
+        return response
+    
+    def _mjpeg_stream_response(self, broadcaster):
+        """Serve a multipart MJPEG stream fed from the broadcaster's latest slot."""
+        from flask import Response, stream_with_context
+        
+        tier = request.args.get("tier")
+        if tier is not None and tier not in broadcaster.tiers:
+            return jsonify({"success": False, "error": f"Unknown tier: {tier}"}), 400
+        response = Response(
+            stream_with_context(broadcaster.stream(tier)), mimetype=MJPEG_MIMETYPE
+        )
+        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        return response
     
     def _apply_thermal_colormap_web(self, thermal_array):
         """Apply thermal colormap to thermal data for web display."""
         try:
-            import numpy as np
-            
-            # Normalize to 0-255 if needed
-            if thermal_array.dtype != np.uint8:
-                thermal_normalized = ((thermal_array - thermal_array.min()) / 
-                                    (thermal_array.max() - thermal_array.min()) * 255).astype(np.uint8)
-            else:
-                thermal_normalized = thermal_array
-            
-            # Create RGB frame
-            height, width = thermal_normalized.shape
-            colored_frame = np.zeros((height, width, 3), dtype=np.uint8)
-            
-            # Apply heat map coloring: blue -> purple -> red -> orange -> yellow -> white
-            for y in range(height):
-                for x in range(width):
-                    intensity = thermal_normalized[y, x]
-                    
-                    if intensity < 51:  # Blue to purple (cold)
-                        colored_frame[y, x] = [intensity * 5, 0, 255]
-                    elif intensity < 102:  # Purple to red  
-                        factor = intensity - 51
-                        colored_frame[y, x] = [255, 0, 255 - factor * 5]
-                    elif intensity < 153:  # Red to orange
-                        factor = intensity - 102
-                        colored_frame[y, x] = [255, factor * 5, 0]
-                    elif intensity < 204:  # Orange to yellow
-                        factor = intensity - 153
-                        colored_frame[y, x] = [255, 255, factor * 5]
-                    else:  # Yellow to white (hot)
-                        colored_frame[y, x] = [255, 255, 255]
-            
-            return colored_frame
-            
+            return apply_thermal_lut(thermal_array)
         except Exception as e:
             logger.error(f"Error applying thermal colormap: {e}")
             return thermal_array
@@ -1233,6 +1328,13 @@ Generated at: {datetime.now().isoformat()}"""
             },
         )
 
+    def update_post_session_job(self, event: Dict[str, Any]):
+        self.post_session_jobs[event["job_id"]] = event
+        if len(self.post_session_jobs) > 200:
+            for job_id in sorted(self.post_session_jobs)[:-200]:
+                del self.post_session_jobs[job_id]
+        self.socketio.emit("post_session_job_update", event)
+
     def _broadcast_session_update(self):
         self.socketio.emit("session_info_update", self.session_info)
 
@@ -1258,6 +1360,8 @@ Generated at: {datetime.now().isoformat()}"""
             return
         self.running = False
         logger.info("Stopping web dashboard server")
+        self.rgb_preview.stop()
+        self.ir_preview.stop()
         if self.server_thread:
             self.server_thread.join(timeout=5)
 
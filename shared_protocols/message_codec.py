@@ -0,0 +1,276 @@
+"""
+Table-driven encoding and decoding of network messages.
+
+Message classes register with a ``CodecRegistry`` through a decorator that
+names the message types they carry. Registration compiles a ``MessageCodec``
+for the class once: the required-field set, a check or converter per field
+(enums, nested structures with ``from_dict``, lists of them) and optionally
+a binary struct layout. Decoding a message is then one dict lookup and one
+validator call instead of an ``if``/``elif`` chain over the message type.
+"""
+
+import dataclasses
+import struct
+import types
+import typing
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+Converter = Callable[[Any], Any]
+
+
+class MessageValidationError(ValueError):
+    """Raised when a payload does not match the schema of its message class."""
+
+
+def _unwrap_optional(hint) -> Tuple[Any, bool]:
+    """Split ``Optional[X]`` into ``(X, True)``; other hints are not optional."""
+    if typing.get_origin(hint) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        return (args[0] if len(args) == 1 else Any), len(args) < len(typing.get_args(hint))
+    return hint, False
+
+
+def _type_check(expected: Tuple[type, ...], allow_bool: bool = False) -> Converter:
+    def check(value):
+        if not isinstance(value, expected) or (not allow_bool and isinstance(value, bool)):
+            raise TypeError(f"expected {'/'.join(t.__name__ for t in expected)}, got {type(value).__name__}")
+        return value
+    return check
+
+
+def _compile_decoder(hint) -> Optional[Converter]:
+    """Converter from JSON values to ``hint``; None when any value is accepted."""
+    hint, _ = _unwrap_optional(hint)
+    origin = typing.get_origin(hint) or hint
+    if hint is Any:
+        return None
+    if isinstance(hint, type) and issubclass(hint, Enum):
+        return lambda value: value if isinstance(value, hint) else hint(value)
+    if isinstance(hint, type) and hasattr(hint, "from_dict"):
+        return lambda value: value if isinstance(value, hint) else hint.from_dict(value)
+    if origin in (list, List):
+        args = typing.get_args(hint)
+        item = _compile_decoder(args[0]) if args else None
+        check = _type_check((list,))
+        if item is None:
+            return check
+        return lambda value: [item(element) for element in check(value)]
+    if origin in (dict, Dict):
+        return _type_check((dict,))
+    if hint is bool:
+        return _type_check((bool,), allow_bool=True)
+    if hint is float:
+        return _type_check((int, float))
+    if hint in (int, str):
+        return _type_check((hint,))
+    return None
+
+
+def _compile_encoder(hint) -> Optional[Converter]:
+    """Converter from ``hint`` values to JSON values; None for plain values."""
+    hint, _ = _unwrap_optional(hint)
+    origin = typing.get_origin(hint) or hint
+    if isinstance(hint, type) and issubclass(hint, Enum):
+        return lambda value: value.value if isinstance(value, Enum) else value
+    if isinstance(hint, type) and hasattr(hint, "to_dict"):
+        return lambda value: value.to_dict() if hasattr(value, "to_dict") else value
+    if origin in (list, List):
+        args = typing.get_args(hint)
+        item = _compile_encoder(args[0]) if args else None
+        if item is not None:
+            return lambda value: [item(element) for element in value]
+    return None
+
+
+class BinaryLayout:
+    """Compact binary form of a message.
+
+    ``fields`` pairs field names with ``struct`` format characters and is
+    packed little-endian with no padding; ``strings`` are appended as UTF-8,
+    each prefixed by its length as a u16 (0xFFFF for None). Fields that are
+    not part of the layout take their defaults when unpacked.
+    """
+
+    _LENGTH = struct.Struct("<H")
+    _NONE = 0xFFFF
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], strings: Sequence[str] = ()):
+        self.names = tuple(name for name, _ in fields)
+        self.struct = struct.Struct("<" + "".join(code for _, code in fields))
+        self.strings = tuple(strings)
+
+    def pack(self, values: Dict[str, Any]) -> bytes:
+        """Pack the layout fields of an encoded message."""
+        parts = [self.struct.pack(*(values[name] for name in self.names))]
+        for name in self.strings:
+            value = values.get(name)
+            if value is None:
+                parts.append(self._LENGTH.pack(self._NONE))
+            else:
+                data = value.encode("utf-8")
+                if len(data) >= self._NONE:
+                    raise MessageValidationError(f"{name} is too long for the binary layout")
+                parts += [self._LENGTH.pack(len(data)), data]
+        return b"".join(parts)
+
+    def unpack(self, payload, offset: int = 0) -> Dict[str, Any]:
+        """Unpack a payload produced by ``pack``, starting at ``offset``."""
+        values = dict(zip(self.names, self.struct.unpack_from(payload, offset)))
+        offset += self.struct.size
+        for name in self.strings:
+            (length,) = self._LENGTH.unpack_from(payload, offset)
+            offset += self._LENGTH.size
+            if length == self._NONE:
+                values[name] = None
+            else:
+                values[name] = bytes(payload[offset:offset + length]).decode("utf-8")
+                offset += length
+        if offset != len(payload):
+            raise MessageValidationError(f"{len(payload) - offset} trailing bytes after binary message")
+        return values
+
+
+class MessageCodec:
+    """Schema of one message class, compiled once at registration."""
+
+    def __init__(self, cls: type, message_types: Iterable[Any] = (), binary_layout: Optional[BinaryLayout] = None):
+        hints = typing.get_type_hints(cls)
+        self.cls = cls
+        self.message_types = tuple(message_types)
+        self.binary_layout = binary_layout
+        fields = [field for field in dataclasses.fields(cls) if field.init]
+        self.fields = frozenset(field.name for field in fields)
+        self.required = frozenset(
+            field.name
+            for field in fields
+            if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+        )
+        decoders = []
+        encoders = []
+        for field in fields:
+            nullable = _unwrap_optional(hints[field.name])[1] or field.default is None
+            decoders.append((field.name, nullable, _compile_decoder(hints[field.name])))
+            encoders.append((field.name, _compile_encoder(hints[field.name])))
+        self._decoders = tuple(decoders)
+        self._encoders = tuple(encoders)
+
+    def validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Check a decoded payload and convert it into constructor arguments."""
+        if not self.required <= data.keys():
+            raise MessageValidationError(
+                f"{self.cls.__name__} is missing {', '.join(sorted(self.required - data.keys()))}"
+            )
+        if not data.keys() <= self.fields:
+            raise MessageValidationError(
+                f"{self.cls.__name__} has no field {', '.join(sorted(data.keys() - self.fields))}"
+            )
+        kwargs = dict(data)
+        for name, nullable, decode in self._decoders:
+            value = kwargs.get(name)
+            if value is None:
+                if not nullable and name in kwargs:
+                    raise MessageValidationError(f"{self.cls.__name__}.{name} may not be null")
+            elif decode is not None:
+                try:
+                    kwargs[name] = decode(value)
+                except (TypeError, ValueError, KeyError, AttributeError) as e:
+                    raise MessageValidationError(f"{self.cls.__name__}.{name}: {e}") from e
+        return kwargs
+
+    def decode(self, data: Dict[str, Any]):
+        """Build a message instance from a decoded JSON object."""
+        return self.cls(**self.validate(data))
+
+    def encode(self, message) -> Dict[str, Any]:
+        """JSON-ready dictionary of a message instance."""
+        result = {}
+        for name, encode in self._encoders:
+            value = getattr(message, name)
+            result[name] = value if encode is None or value is None else encode(value)
+        return result
+
+
+class CodecRegistry:
+    """Maps message types to the codecs of their classes.
+
+    Lookups accept either the enum member or its wire value. Binary frames
+    start with a one-byte type ID, the 1-based position of the type in the
+    enum, so new message types must be appended to the end of the enum.
+    """
+
+    _TYPE_ID = struct.Struct("<B")
+
+    def __init__(self, type_enum: Type[Enum]):
+        self.type_enum = type_enum
+        self.type_ids = {member: index for index, member in enumerate(type_enum, start=1)}
+        self._types_by_id = {index: member for member, index in self.type_ids.items()}
+        self._codecs: Dict[Any, MessageCodec] = {}
+        self._by_class: Dict[type, MessageCodec] = {}
+        self._default: Optional[MessageCodec] = None
+
+    def register(self, *message_types, binary_layout: Optional[BinaryLayout] = None, default: bool = False):
+        """Class decorator registering a message class for ``message_types``.
+
+        With ``default=True`` the class also decodes types that have no
+        class of their own.
+        """
+        def decorator(cls):
+            codec = MessageCodec(cls, message_types, binary_layout)
+            for message_type in message_types:
+                if message_type in self._codecs:
+                    raise ValueError(f"{message_type} is already registered to {self._codecs[message_type].cls.__name__}")
+                self._codecs[message_type] = codec
+                self._codecs[message_type.value] = codec
+            self._by_class[cls] = codec
+            if default:
+                self._default = codec
+            return cls
+        return decorator
+
+    def codec_for(self, message_type) -> MessageCodec:
+        """Codec for a message type (member or wire value)."""
+        codec = self._codecs.get(message_type)
+        if codec is not None:
+            return codec
+        # Validates the value, so unknown types fail even with a default
+        self.type_enum(message_type)
+        if self._default is None:
+            raise MessageValidationError(f"No codec registered for {message_type}")
+        return self._default
+
+    def codec_for_class(self, cls: type) -> MessageCodec:
+        """Codec compiled for a registered class."""
+        try:
+            return self._by_class[cls]
+        except KeyError:
+            raise MessageValidationError(f"{cls.__name__} is not a registered message class") from None
+
+    def decode(self, data: Dict[str, Any]):
+        """Build the message for a decoded JSON object."""
+        if not isinstance(data, dict):
+            raise MessageValidationError(f"Expected a JSON object, got {type(data).__name__}")
+        return self.codec_for(data.get("message_type")).decode(data)
+
+    def encode(self, message) -> Dict[str, Any]:
+        """JSON-ready dictionary of a message."""
+        return self.codec_for_class(type(message)).encode(message)
+
+    def to_bytes(self, message) -> bytes:
+        """Binary frame of a message whose class declares a binary layout."""
+        codec = self.codec_for_class(type(message))
+        if codec.binary_layout is None:
+            raise MessageValidationError(f"{type(message).__name__} has no binary layout")
+        values = codec.encode(message)
+        return self._TYPE_ID.pack(self.type_ids[message.message_type]) + codec.binary_layout.pack(values)
+
+    def from_bytes(self, payload):
+        """Build the message for a binary frame produced by ``to_bytes``."""
+        (type_id,) = self._TYPE_ID.unpack_from(payload, 0)
+        message_type = self._types_by_id.get(type_id)
+        codec = self._codecs.get(message_type)
+        if codec is None or codec.binary_layout is None:
+            raise MessageValidationError(f"No binary layout registered for type ID {type_id}")
+        values = codec.binary_layout.unpack(payload, self._TYPE_ID.size)
+        values["message_type"] = message_type
+        return codec.decode(values)
@@ -0,0 +1,266 @@
+"""
+Fixed-capacity, time-indexed storage for system performance metrics.
+
+Samples live in a structured NumPy ring at full resolution and are rolled up
+into coarser rings (min/mean/max per bucket), so memory stays bounded however
+long a session runs and time-range queries are binary searches rather than
+list scans.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fields stored per raw sample, in PerformanceMetrics order
+SAMPLE_FIELDS: Tuple[str, ...] = (
+    "cpu_percent",
+    "memory_mb",
+    "memory_percent",
+    "network_bytes_sent",
+    "network_bytes_recv",
+    "disk_io_read",
+    "disk_io_write",
+    "thread_count",
+    "process_count",
+    "gpu_usage",
+    "gpu_memory_mb",
+)
+
+# Gauges that are summarised in the rollups; cumulative counters are not
+ROLLUP_FIELDS: Tuple[str, ...] = (
+    "cpu_percent",
+    "memory_mb",
+    "memory_percent",
+    "thread_count",
+    "process_count",
+)
+
+SAMPLE_DTYPE = np.dtype([("timestamp", "f8")] + [(name, "f8") for name in SAMPLE_FIELDS])
+
+# (resolution in seconds, number of buckets kept)
+DEFAULT_ROLLUPS: Tuple[Tuple[float, int], ...] = (
+    (10.0, 8640),  # 24 hours
+    (60.0, 10080),  # 7 days
+)
+
+
+class TimeRing:
+    """Fixed-capacity ring of structured records ordered by ``timestamp``."""
+
+    def __init__(self, dtype: np.dtype, capacity: int):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+
+    def append(self, record) -> None:
+        """Store ``record``, overwriting the oldest one when full."""
+        self.data[self.head] = record
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def segments(self) -> Tuple[np.ndarray, ...]:
+        """The stored records as at most two chronological views."""
+        if self.count < self.capacity:
+            return (self.data[:self.count],)
+        return (self.data[self.head:], self.data[:self.head])
+
+    def last(self) -> Optional[np.void]:
+        """The most recent record, if any."""
+        if not self.count:
+            return None
+        return self.data[(self.head - 1) % self.capacity]
+
+    def oldest_timestamp(self) -> Optional[float]:
+        """Timestamp of the oldest stored record, if any."""
+        if not self.count:
+            return None
+        return float(self.segments()[0]["timestamp"][0])
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        """Records with ``start <= timestamp <= end``, in time order."""
+        parts = []
+        for segment in self.segments():
+            timestamps = segment["timestamp"]
+            lo = np.searchsorted(timestamps, start, side="left")
+            hi = np.searchsorted(timestamps, end, side="right")
+            if hi > lo:
+                parts.append(segment[lo:hi])
+        if not parts:
+            return self.data[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class RollupLevel:
+    """Min/mean/max of ``ROLLUP_FIELDS`` per fixed-width time bucket.
+
+    The bucket being filled is kept in small accumulators and written to the
+    ring when a sample for a later bucket arrives; queries include it.
+    """
+
+    def __init__(self, resolution: float, capacity: int, fields: Sequence[str] = ROLLUP_FIELDS):
+        self.resolution = resolution
+        self.fields = tuple(fields)
+        columns = [("timestamp", "f8"), ("count", "i8")]
+        for name in self.fields:
+            columns += [(f"{name}_min", "f8"), (f"{name}_mean", "f8"), (f"{name}_max", "f8")]
+        self.ring = TimeRing(np.dtype(columns), capacity)
+        self._bucket: Optional[float] = None
+        self._count = 0
+        self._min = np.empty(len(self.fields))
+        self._sum = np.empty(len(self.fields))
+        self._max = np.empty(len(self.fields))
+
+    def add(self, timestamp: float, values: np.ndarray) -> None:
+        """Fold one sample (values in ``fields`` order) into its bucket."""
+        bucket = timestamp - timestamp % self.resolution
+        if bucket != self._bucket:
+            self._flush()
+            self._bucket = bucket
+            self._min.fill(np.inf)
+            self._sum.fill(0.0)
+            self._max.fill(-np.inf)
+        np.fmin(self._min, values, out=self._min)
+        np.fmax(self._max, values, out=self._max)
+        self._sum += values
+        self._count += 1
+
+    def _flush(self) -> None:
+        if not self._count:
+            return
+        record = [self._bucket, self._count]
+        for low, total, high in zip(self._min, self._sum, self._max):
+            record += [low, total / self._count, high]
+        self.ring.append(tuple(record))
+        self._count = 0
+
+    def summarize(self, fields: Iterable[str], start: float, end: float) -> Dict[str, Dict[str, float]]:
+        """Count-weighted summary of the buckets overlapping ``[start, end]``."""
+        rows = self.ring.between(start - self.resolution + 1e-9, end)
+        partial = self._count and self._bucket is not None and self._bucket <= end and self._bucket + self.resolution > start
+        counts = rows["count"].astype(np.float64)
+        total = counts.sum() + (self._count if partial else 0)
+        summary = {}
+        for name in fields:
+            index = self.fields.index(name)
+            low = rows[f"{name}_min"].min() if len(rows) else np.inf
+            high = rows[f"{name}_max"].max() if len(rows) else -np.inf
+            weighted = float(np.dot(rows[f"{name}_mean"], counts))
+            if partial:
+                low = min(low, self._min[index])
+                high = max(high, self._max[index])
+                weighted += self._sum[index]
+            summary[name] = {
+                "min": float(low) if total else float("nan"),
+                "mean": weighted / total if total else float("nan"),
+                "max": float(high) if total else float("nan"),
+            }
+        summary["count"] = int(total)
+        return summary
+
+
+class MetricsStore:
+    """Bounded store of metric samples with multi-resolution rollups.
+
+    Raw samples (one per monitoring interval) are kept for ``raw_capacity``
+    samples; ``rollups`` lists ``(resolution_s, buckets)`` levels that are
+    fed from every sample. Window summaries use the finest level that still
+    covers the requested window, so a 24 hour health report reduces a few
+    thousand pre-aggregated rows instead of scanning every sample.
+    Timestamps are forced to be non-decreasing so binary search stays valid
+    if the wall clock steps back.
+    """
+
+    def __init__(self, raw_capacity: int = 3600, rollups: Sequence[Tuple[float, int]] = DEFAULT_ROLLUPS):
+        self.raw = TimeRing(SAMPLE_DTYPE, raw_capacity)
+        self.rollups: List[RollupLevel] = [RollupLevel(resolution, capacity) for resolution, capacity in rollups]
+        self._rollup_columns = [SAMPLE_FIELDS.index(name) for name in ROLLUP_FIELDS]
+        self._last_timestamp = -np.inf
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        """Add one sample; ``values`` follow ``SAMPLE_FIELDS`` (None is NaN)."""
+        row = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        with self._lock:
+            timestamp = max(timestamp, self._last_timestamp)
+            self._last_timestamp = timestamp
+            self.raw.append((timestamp, *row))
+            gauges = row[self._rollup_columns]
+            for level in self.rollups:
+                level.add(timestamp, gauges)
+
+    def latest(self) -> Optional[np.void]:
+        """Copy of the most recent raw sample."""
+        with self._lock:
+            record = self.raw.last()
+            return None if record is None else record.copy()
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        """Copy of the raw samples with ``start <= timestamp <= end``."""
+        with self._lock:
+            return self.raw.between(start, end).copy()
+
+    def rollup(self, resolution: float, start: float, end: float) -> np.ndarray:
+        """Copy of the completed buckets of one rollup level in a range."""
+        for level in self.rollups:
+            if level.resolution == resolution:
+                with self._lock:
+                    return level.ring.between(start, end).copy()
+        raise ValueError(f"No rollup with resolution {resolution}s")
+
+    @staticmethod
+    def _covers(ring: TimeRing, start: float) -> bool:
+        # Until a ring wraps it holds everything recorded so far
+        return len(ring) < ring.capacity or ring.oldest_timestamp() <= start
+
+    def summarize(
+        self,
+        window_seconds: float,
+        now: float,
+        fields: Sequence[str] = ROLLUP_FIELDS,
+        max_rows: int = 2000,
+    ) -> Dict[str, Dict[str, float]]:
+        """Min/mean/max of ``fields`` over ``[now - window_seconds, now]``.
+
+        Raw samples answer the query when they cover the window in at most
+        ``max_rows`` rows; otherwise the finest rollup that does is used (the
+        coarsest if none covers it). The result carries ``count`` and
+        ``resolution`` (0.0 for raw samples). Rollup answers are exact to
+        within one bucket at the window start.
+        """
+        start = now - window_seconds
+        with self._lock:
+            if self._covers(self.raw, start) or not self.rollups:
+                rows = self.raw.between(start, now)
+                if len(rows) <= max_rows or not self.rollups:
+                    summary = {}
+                    for name in fields:
+                        column = rows[name]
+                        summary[name] = {
+                            "min": float(column.min()) if len(column) else float("nan"),
+                            "mean": float(column.mean()) if len(column) else float("nan"),
+                            "max": float(column.max()) if len(column) else float("nan"),
+                        }
+                    summary["count"] = int(len(rows))
+                    summary["resolution"] = 0.0
+                    return summary
+            level = self.rollups[-1]
+            for candidate in self.rollups:
+                if self._covers(candidate.ring, start) and window_seconds / candidate.resolution <= max_rows:
+                    level = candidate
+                    break
+            summary = level.summarize(fields, start, now)
+            summary["resolution"] = level.resolution
+            return summary
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the preallocated rings."""
+        return self.raw.data.nbytes + sum(level.ring.data.nbytes for level in self.rollups)
+
+    def __len__(self) -> int:
+        return len(self.raw)
@@ -7,11 +7,12 @@ Android and Python applications to ensure consistency.
 
 import json
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import KW_ONLY, dataclass
 from typing import Dict, Any, Optional, List
 from enum import Enum
 
 from .data_structures import DeviceInfo, DeviceState, SessionConfig, SensorSample
+from .message_codec import BinaryLayout, CodecRegistry, MessageValidationError
 
 
 class MessageType(Enum):
@@ -47,10 +48,17 @@ class MessageType(Enum):
     ERROR = "error"
 
 
+# Message classes register here with the message types they carry
+MESSAGE_CODECS = CodecRegistry(MessageType)
+
+
+@MESSAGE_CODECS.register(default=True)
 @dataclass
 class BaseMessage:
     """Base message structure for all network communications."""
-    message_type: MessageType
+    # Common fields are keyword-only so subclasses can add required fields
+    _: KW_ONLY
+    message_type: MessageType = None
     timestamp: float = None
     session_id: Optional[str] = None
     device_id: Optional[str] = None
@@ -61,9 +69,7 @@ class BaseMessage:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        result = asdict(self)
-        result["message_type"] = self.message_type.value
-        return result
+        return MESSAGE_CODECS.codec_for_class(type(self)).encode(self)
     
     def to_json(self) -> str:
         """Convert to JSON string."""
@@ -72,10 +78,10 @@ class BaseMessage:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "BaseMessage":
         """Create from dictionary."""
-        data["message_type"] = MessageType(data["message_type"])
-        return cls(**data)
+        return MESSAGE_CODECS.codec_for_class(cls).decode(data)
 
 
+@MESSAGE_CODECS.register(MessageType.HELLO)
 @dataclass
 class HelloMessage(BaseMessage):
     """Device introduction message."""
@@ -89,6 +95,7 @@ class HelloMessage(BaseMessage):
         self.device_id = self.device_info.device_id
 
 
+@MESSAGE_CODECS.register(MessageType.DEVICE_STATUS)
 @dataclass
 class DeviceStatusMessage(BaseMessage):
     """Device status update message."""
@@ -104,6 +111,7 @@ class DeviceStatusMessage(BaseMessage):
             self.additional_info = {}
 
 
+@MESSAGE_CODECS.register(MessageType.SESSION_START, MessageType.SESSION_STOP)
 @dataclass
 class SessionControlMessage(BaseMessage):
     """Session control message (start/stop)."""
@@ -118,6 +126,7 @@ class SessionControlMessage(BaseMessage):
             self.message_type = MessageType.SESSION_STOP
 
 
+@MESSAGE_CODECS.register(MessageType.DATA_SAMPLE, MessageType.DATA_BATCH)
 @dataclass
 class DataMessage(BaseMessage):
     """Data streaming message."""
@@ -132,6 +141,7 @@ class DataMessage(BaseMessage):
             self.message_type = MessageType.DATA_BATCH
 
 
+@MESSAGE_CODECS.register(MessageType.CALIBRATION_START, MessageType.CALIBRATION_CAPTURE, MessageType.CALIBRATION_COMPLETE)
 @dataclass
 class CalibrationMessage(BaseMessage):
     """Calibration-related message."""
@@ -150,6 +160,7 @@ class CalibrationMessage(BaseMessage):
             self.message_type = MessageType.CALIBRATION_COMPLETE
 
 
+@MESSAGE_CODECS.register(MessageType.COMMAND)
 @dataclass
 class CommandMessage(BaseMessage):
     """Command message for device control."""
@@ -163,6 +174,7 @@ class CommandMessage(BaseMessage):
             self.parameters = {}
 
 
+@MESSAGE_CODECS.register(MessageType.RESPONSE)
 @dataclass
 class ResponseMessage(BaseMessage):
     """Response to a command message."""
@@ -176,6 +188,7 @@ class ResponseMessage(BaseMessage):
         self.message_type = MessageType.RESPONSE
 
 
+@MESSAGE_CODECS.register(MessageType.ERROR)
 @dataclass
 class ErrorMessage(BaseMessage):
     """Error notification message."""
@@ -188,31 +201,24 @@ class ErrorMessage(BaseMessage):
         self.message_type = MessageType.ERROR
 
 
+@MESSAGE_CODECS.register(
+    MessageType.HEARTBEAT,
+    binary_layout=BinaryLayout([("timestamp", "d"), ("sequence", "I")], strings=("device_id", "session_id")),
+)
+@dataclass
+class HeartbeatMessage(BaseMessage):
+    """Periodic keep-alive message; also has a compact binary form."""
+    sequence: int = 0
+    
+    def __post_init__(self):
+        super().__post_init__()
+        self.message_type = MessageType.HEARTBEAT
+
+
 def create_message_from_json(json_str: str) -> Optional[BaseMessage]:
     """Create appropriate message object from JSON string."""
     try:
-        data = json.loads(json_str)
-        message_type = MessageType(data.get("message_type"))
-        
-        if message_type == MessageType.HELLO:
-            return HelloMessage.from_dict(data)
-        elif message_type in [MessageType.DEVICE_STATUS]:
-            return DeviceStatusMessage.from_dict(data)
-        elif message_type in [MessageType.SESSION_START, MessageType.SESSION_STOP]:
-            return SessionControlMessage.from_dict(data)
-        elif message_type in [MessageType.DATA_SAMPLE, MessageType.DATA_BATCH]:
-            return DataMessage.from_dict(data)
-        elif message_type in [MessageType.CALIBRATION_START, MessageType.CALIBRATION_CAPTURE, MessageType.CALIBRATION_COMPLETE]:
-            return CalibrationMessage.from_dict(data)
-        elif message_type == MessageType.COMMAND:
-            return CommandMessage.from_dict(data)
-        elif message_type == MessageType.RESPONSE:
-            return ResponseMessage.from_dict(data)
-        elif message_type == MessageType.ERROR:
-            return ErrorMessage.from_dict(data)
-        else:
-            return BaseMessage.from_dict(data)
-            
+        return MESSAGE_CODECS.decode(json.loads(json_str))
     except (json.JSONDecodeError, KeyError, ValueError) as e:
         return ErrorMessage(
             error_code="INVALID_MESSAGE",
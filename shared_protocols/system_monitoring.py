@@ -18,6 +18,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
+
+from .metrics_store import SAMPLE_FIELDS, MetricsStore
+
 try:
     from ..utils.logging_config import get_logger
     logger = get_logger(__name__)
@@ -110,7 +114,15 @@ class UnifiedSystemMonitor:
         self.monitoring = False
         self.monitor_thread = None
         self.system_info = SystemInfo.get_current()
-        self.metrics_history = deque(maxlen=3600)  # 1 hour at 1 second intervals
+        # 1 hour of raw samples at 1 second intervals, plus 10 s and 1 min
+        # rollups; memory use is fixed however long monitoring runs
+        self.metrics_store = MetricsStore(raw_capacity=3600)
+        self._latest_metrics: Optional[PerformanceMetrics] = None
+        self._process = psutil.Process()
+        # Counting system processes walks /proc, so it is refreshed less often
+        self.process_count_interval = 30.0
+        self._process_count = 0
+        self._process_count_time = 0.0
         self.performance_callbacks = []
         self.resource_warnings = []
         self._lock = threading.Lock()
@@ -163,9 +175,7 @@ class UnifiedSystemMonitor:
         while self.monitoring:
             try:
                 metrics = self._collect_metrics()
-                
-                with self._lock:
-                    self.metrics_history.append(metrics)
+                self.record_metrics(metrics)
                 
                 # Check for resource issues
                 self._check_resource_thresholds(metrics)
@@ -202,11 +212,17 @@ class UnifiedSystemMonitor:
             # Disk I/O
             disk_io = psutil.disk_io_counters()
             
-            # Process info
-            process = psutil.Process()
+            # Per-process counters from one cached handle and one read
+            with self._process.oneshot():
+                thread_count = self._process.num_threads()
+            
+            now = time.time()
+            if now - self._process_count_time >= self.process_count_interval:
+                self._process_count = len(psutil.pids())
+                self._process_count_time = now
             
             return PerformanceMetrics(
-                timestamp=time.time(),
+                timestamp=now,
                 cpu_percent=cpu_percent,
                 memory_mb=memory.used / (1024 * 1024),
                 memory_percent=memory.percent,
@@ -214,8 +230,8 @@ class UnifiedSystemMonitor:
                 network_bytes_recv=net_io.bytes_recv if net_io else 0,
                 disk_io_read=disk_io.read_bytes if disk_io else 0,
                 disk_io_write=disk_io.write_bytes if disk_io else 0,
-                thread_count=process.num_threads(),
-                process_count=len(psutil.pids())
+                thread_count=thread_count,
+                process_count=self._process_count
             )
         
         except Exception as e:
@@ -275,14 +291,6 @@ class UnifiedSystemMonitor:
             collected = gc.collect()
             after_objects = len(gc.get_objects())
             
-            # Clear old metrics
-            if len(self.metrics_history) > 1800:  # Keep only 30 minutes
-                with self._lock:
-                    # Keep recent half
-                    recent_metrics = list(self.metrics_history)[-900:]
-                    self.metrics_history.clear()
-                    self.metrics_history.extend(recent_metrics)
-            
             # Clear old warnings
             current_time = time.time()
             self.resource_warnings = [
@@ -296,33 +304,62 @@ class UnifiedSystemMonitor:
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
     
+    def record_metrics(self, metrics: PerformanceMetrics):
+        """Add a metrics sample to the store."""
+        self.metrics_store.append(metrics.timestamp, [getattr(metrics, name) for name in SAMPLE_FIELDS])
+        self._latest_metrics = metrics
+    
+    @staticmethod
+    def _to_metrics(record: np.void) -> PerformanceMetrics:
+        values = {"timestamp": float(record["timestamp"])}
+        for name in SAMPLE_FIELDS:
+            value = float(record[name])
+            if name.startswith("gpu_"):
+                values[name] = None if np.isnan(value) else value
+            elif PerformanceMetrics.__dataclass_fields__[name].type is int:
+                values[name] = int(value)
+            else:
+                values[name] = value
+        return PerformanceMetrics(**values)
+    
+    @property
+    def metrics_history(self) -> List[PerformanceMetrics]:
+        """All raw samples in the store, oldest first."""
+        return [self._to_metrics(record) for record in self.metrics_store.range(-np.inf, np.inf)]
+    
     def get_current_metrics(self) -> Optional[PerformanceMetrics]:
         """Get the most recent performance metrics."""
-        with self._lock:
-            return self.metrics_history[-1] if self.metrics_history else None
+        return self._latest_metrics
+    
+    def get_metrics_array(self, duration_seconds: float = 300) -> np.ndarray:
+        """Raw samples of the last ``duration_seconds`` as a structured array."""
+        now = time.time()
+        return self.metrics_store.range(now - duration_seconds, now)
     
     def get_metrics_history(self, duration_seconds: int = 300) -> List[PerformanceMetrics]:
         """Get performance metrics for the specified duration."""
-        current_time = time.time()
-        cutoff_time = current_time - duration_seconds
-        
-        with self._lock:
-            return [
-                m for m in self.metrics_history 
-                if m.timestamp >= cutoff_time
-            ]
+        return [self._to_metrics(record) for record in self.get_metrics_array(duration_seconds)]
     
-    def get_system_health_report(self) -> Dict[str, Any]:
-        """Generate a comprehensive system health report."""
-        current_metrics = self.get_current_metrics()
-        recent_metrics = self.get_metrics_history(300)  # 5 minutes
+    def get_metrics_summary(self, window_seconds: float = 300) -> Dict[str, Any]:
+        """Min/mean/max of the gauges over the last ``window_seconds``."""
+        return self.metrics_store.summarize(window_seconds, time.time())
+    
+    def get_system_health_report(self, window_seconds: float = 300) -> Dict[str, Any]:
+        """Generate a comprehensive system health report.
+
+        Status is judged on 5 minute averages; ``summary`` covers
+        ``window_seconds``, which may span the 24 hours of rollups.
+        """
+        current_metrics = self._latest_metrics
+        now = time.time()
+        recent = self.metrics_store.summarize(300, now)
         
-        if not current_metrics or not recent_metrics:
+        if not current_metrics or not recent["count"]:
             return {"status": "insufficient_data"}
         
-        # Calculate averages
-        avg_cpu = sum(m.cpu_percent for m in recent_metrics) / len(recent_metrics)
-        avg_memory = sum(m.memory_percent for m in recent_metrics) / len(recent_metrics)
+        summary = recent if window_seconds == 300 else self.metrics_store.summarize(window_seconds, now)
+        avg_cpu = recent["cpu_percent"]["mean"]
+        avg_memory = recent["memory_percent"]["mean"]
         
         # Determine health status
         if avg_cpu > 80 or avg_memory > 85:
@@ -345,6 +382,7 @@ class UnifiedSystemMonitor:
                 "cpu_percent": avg_cpu,
                 "memory_percent": avg_memory
             },
+            "summary": dict(summary, window_seconds=window_seconds),
             "system_info": {
                 "platform": self.system_info.platform,
                 "cpu_count": self.system_info.cpu_count,
@@ -0,0 +1,45 @@
+"""
+Peak memory of the aligned export as sessions grow.
+"""
+
+import csv
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from PythonApp.session.aligned_export import AlignedExportConfig, AlignedExporter
+
+T0 = 1_700_000_000.0
+
+
+def _gsr(t):
+    return 5.0 + np.sin(2 * np.pi * 0.5 * (t - T0))
+
+
+def _ppg(t):
+    return np.sin(2 * np.pi * 5.0 * (t - T0))
+
+
+def _write_csv(path, header, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.mark.performance
+def test_memory_stays_flat_as_sessions_grow(tmp_path):
+    peaks = {}
+    for minutes in (2, 8):
+        session = tmp_path / f"s{minutes}" / "session"
+        master = T0 + np.arange(minutes * 60 * 256) / 256.0
+        _write_csv(session / "shimmer" / "gsr.csv", ["timestamp", "gsr", "ppg"], zip(master, _gsr(master), _ppg(master)))
+        exporter = AlignedExporter(session, tmp_path / f"out{minutes}", AlignedExportConfig(rate_hz=128.0, format="npz", chunk_seconds=10.0))
+        exporter.reader.describe()  # build the index outside the measurement
+        tracemalloc.start()
+        exporter.run()
+        peaks[minutes] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert peaks[8] < 1.5 * peaks[2]
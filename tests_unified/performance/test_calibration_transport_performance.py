@@ -0,0 +1,60 @@
+"""
+Capture fan-out latency of the cross-device calibration coordinator with unresponsive devices.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "PythonApp"))
+
+from calibration_quality_assessment import PatternType
+from calibration_transport import encode_frame, read_frame
+from cross_device_calibration_coordinator import CrossDeviceCalibrationCoordinator
+
+
+async def _silent_device(device_id, port):
+    """Registers, then ignores every command."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(encode_frame({
+        "type": "device_registration", "device_id": device_id, "device_name": device_id,
+        "device_type": "android", "cameras": ["rgb"],
+    }))
+    await writer.drain()
+    try:
+        while await read_frame(reader) is not None:
+            pass
+    finally:
+        writer.close()
+
+
+@pytest.mark.performance
+def test_silent_devices_cost_one_timeout_not_one_each():
+    coordinator = CrossDeviceCalibrationCoordinator(coordination_port=0, host="127.0.0.1")
+    assert coordinator.start_coordination_server()
+    device_ids = [f"phone-{i}" for i in range(8)]
+
+    async def scenario():
+        tasks = [asyncio.create_task(_silent_device(device_id, coordinator.coordination_port)) for device_id in device_ids]
+        deadline = time.monotonic() + 5.0
+        while len(coordinator.client_connections) < len(device_ids):
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+        assert coordinator.create_calibration_session("s1", PatternType.CHESSBOARD, target_images_per_camera=1)
+        coordinator.start_calibration_session("s1")
+        started = time.perf_counter()
+        summary = await asyncio.to_thread(coordinator.request_capture, "s1", {"count": 1}, None, 0.5)
+        elapsed = time.perf_counter() - started
+        coordinator.stop_coordination_server()
+        await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5.0)
+        return summary, elapsed
+
+    try:
+        summary, elapsed = asyncio.run(scenario())
+    finally:
+        coordinator.cleanup()
+    assert sorted(summary["timed_out"]) == device_ids
+    assert elapsed < 2 * 0.5
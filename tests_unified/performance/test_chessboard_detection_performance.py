@@ -0,0 +1,67 @@
+"""
+Serial full-resolution versus coarse-to-fine, parallel and cached chessboard detection.
+"""
+
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from PythonApp.calibration.pattern_detection import DEFAULT_CRITERIA, DETECTION_FLAGS, ChessboardDetector
+
+PATTERN = (9, 6)
+
+
+def _board_view(width, height, tilt=0.0, seed=0):
+    """A blurred, noisy chessboard seen under a perspective tilt."""
+    square = 40
+    cols, rows = PATTERN[0] + 1, PATTERN[1] + 1
+    board = np.full(((rows + 2) * square, (cols + 2) * square), 255, np.uint8)
+    for r in range(rows):
+        for c in range(cols):
+            if (r + c) % 2 == 0:
+                board[(r + 1) * square:(r + 2) * square, (c + 1) * square:(c + 2) * square] = 0
+    h, w = board.shape
+    target = np.float32([
+        [width * (0.2 + tilt), height * 0.15],
+        [width * 0.75, height * (0.2 - tilt / 2)],
+        [width * (0.8 - tilt), height * 0.85],
+        [width * 0.25, height * (0.8 + tilt / 2)],
+    ])
+    transform = cv2.getPerspectiveTransform(np.float32([[0, 0], [w, 0], [w, h], [0, h]]), target)
+    image = cv2.warpPerspective(board, transform, (width, height), flags=cv2.INTER_AREA, borderValue=128)
+    noise = np.random.default_rng(seed).integers(0, 20, image.shape, dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.add(image, noise), (5, 5), 1.5)
+
+
+def _clutter(width, height, seed=1):
+    noise = np.random.default_rng(seed).integers(0, 256, (height, width), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (31, 31), 10)
+
+
+def _legacy_detect(grey):
+    found, corners = cv2.findChessboardCorners(grey, PATTERN, DETECTION_FLAGS)
+    if not found:
+        return False, None
+    return True, cv2.cornerSubPix(grey, corners, (11, 11), (-1, -1), DEFAULT_CRITERIA)
+
+
+@pytest.mark.performance
+def test_parallel_coarse_detection_beats_serial_full_resolution():
+    images = [_board_view(3840, 2160, tilt=0.03, seed=i) for i in range(2)] + [_clutter(3840, 2160, seed=i) for i in range(4)]
+    start = time.perf_counter()
+    legacy = [_legacy_detect(image)[0] for image in images]
+    legacy_s = time.perf_counter() - start
+
+    detector = ChessboardDetector()
+    start = time.perf_counter()
+    results = detector.detect_many(images, PATTERN)
+    cold_s = time.perf_counter() - start
+    start = time.perf_counter()
+    detector.detect_many(images, PATTERN)
+    warm_s = time.perf_counter() - start
+
+    assert [found for found, _ in results] == legacy == [True, True, False, False, False, False]
+    assert cold_s < legacy_s / 3
+    assert warm_s < cold_s / 5
@@ -0,0 +1,31 @@
+"""
+Per-marker cost benchmark for the buffered stimulus event log.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from PythonApp.utils.event_log import BufferedEventLog, ClockCalibration, read_event_log
+
+
+@pytest.mark.performance
+def test_marker_cost_is_constant(tmp_path):
+    """Per-marker call cost must not grow with the number of logged events."""
+    calibration = ClockCalibration()
+    calibration.calibrate(samples=8, spacing_s=0.001)
+    total = 100_000
+    log = BufferedEventLog(
+        str(tmp_path / "bench.bin"), fmt="binary", capacity=131072, calibration=calibration
+    )
+    costs = np.empty(total, dtype=np.int64)
+    for i in range(total):
+        start = time.perf_counter_ns()
+        log.log("event_marker", video_position_ms=i)
+        costs[i] = time.perf_counter_ns() - start
+    log.close()
+    early = np.median(costs[:1000])
+    late = np.median(costs[-1000:])
+    assert late < early * 3
+    assert read_event_log(str(tmp_path / "bench.bin"))["footer"]["event_count"] == total
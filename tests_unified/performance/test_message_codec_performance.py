@@ -0,0 +1,116 @@
+"""
+Registry decode throughput against the if/elif dispatch it replaced.
+"""
+
+import dataclasses
+import json
+import time
+import typing
+
+import pytest
+
+from shared_protocols.data_structures import DeviceInfo, DeviceState, DeviceType, SensorSample
+from shared_protocols.network_protocol import (
+    BaseMessage,
+    CalibrationMessage,
+    CommandMessage,
+    DataMessage,
+    DeviceStatusMessage,
+    ErrorMessage,
+    HeartbeatMessage,
+    HelloMessage,
+    MessageType,
+    ResponseMessage,
+    SessionControlMessage,
+    create_message_from_json,
+    create_standard_hello_message,
+)
+
+
+def _sample(i):
+    return SensorSample("shimmer-1", DeviceType.SHIMMER_GSR, 1000 + i, {"gsr": 1.5 + i})
+
+
+def _messages():
+    device = DeviceInfo("phone-1", DeviceType.ANDROID_PHONE, ["rgb", "thermal"])
+    return [
+        create_standard_hello_message(device),
+        DeviceStatusMessage(device_state=DeviceState.STREAMING, battery_level=80.0),
+        SessionControlMessage(action="start", session_id="s1"),
+        DataMessage(samples=[_sample(0)]),
+        DataMessage(samples=[_sample(i) for i in range(8)], batch_id="b1"),
+        CalibrationMessage(action="capture", pattern_info={"rows": 6}),
+        CommandMessage(command="ping"),
+        ResponseMessage(original_command="ping", success=True, result={}),
+        ErrorMessage(error_code="E001", error_message="missing"),
+        HeartbeatMessage(sequence=7, device_id="phone-1"),
+        BaseMessage(message_type=MessageType.GOODBYE),
+    ]
+
+
+def _legacy_from_dict(cls, data):
+    """Per-call schema check: what every message paid before codecs were compiled."""
+    hints = typing.get_type_hints(cls)
+    kwargs = {}
+    for field in dataclasses.fields(cls):
+        if field.name not in data:
+            if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING:
+                raise KeyError(field.name)
+            continue
+        value, hint = data[field.name], hints[field.name]
+        if typing.get_origin(hint) is list and hasattr(typing.get_args(hint)[0], "from_dict"):
+            value = [typing.get_args(hint)[0].from_dict(item) for item in value]
+        for arg in typing.get_args(hint) or (hint,):
+            if isinstance(arg, type) and issubclass(arg, (MessageType, DeviceState)) and value is not None:
+                value = arg(value)
+            elif isinstance(arg, type) and hasattr(arg, "from_dict") and isinstance(value, dict):
+                value = arg.from_dict(value)
+        kwargs[field.name] = value
+    return cls(**kwargs)
+
+
+def _legacy_create_message_from_json(json_str):
+    """The if/elif dispatch create_message_from_json used before the registry."""
+    try:
+        data = json.loads(json_str)
+        message_type = MessageType(data.get("message_type"))
+        if message_type == MessageType.HELLO:
+            return _legacy_from_dict(HelloMessage, data)
+        elif message_type in [MessageType.DEVICE_STATUS]:
+            return _legacy_from_dict(DeviceStatusMessage, data)
+        elif message_type in [MessageType.SESSION_START, MessageType.SESSION_STOP]:
+            return _legacy_from_dict(SessionControlMessage, data)
+        elif message_type in [MessageType.DATA_SAMPLE, MessageType.DATA_BATCH]:
+            return _legacy_from_dict(DataMessage, data)
+        elif message_type in [MessageType.CALIBRATION_START, MessageType.CALIBRATION_CAPTURE, MessageType.CALIBRATION_COMPLETE]:
+            return _legacy_from_dict(CalibrationMessage, data)
+        elif message_type == MessageType.COMMAND:
+            return _legacy_from_dict(CommandMessage, data)
+        elif message_type == MessageType.RESPONSE:
+            return _legacy_from_dict(ResponseMessage, data)
+        elif message_type == MessageType.ERROR:
+            return _legacy_from_dict(ErrorMessage, data)
+        elif message_type == MessageType.HEARTBEAT:
+            return _legacy_from_dict(HeartbeatMessage, data)
+        else:
+            return _legacy_from_dict(BaseMessage, data)
+    except (json.JSONDecodeError, KeyError, ValueError) as e:
+        return ErrorMessage(error_code="INVALID_MESSAGE", error_message=f"Failed to parse message: {e}")
+
+
+@pytest.mark.performance
+def test_registry_parses_a_million_mixed_messages_faster_than_the_chain():
+    payloads = [message.to_json() for message in _messages()]
+    stream = [payloads[i % len(payloads)] for i in range(1_000_000)]
+    assert [_legacy_create_message_from_json(p) for p in payloads] == [create_message_from_json(p) for p in payloads]
+
+    start = time.perf_counter()
+    for payload in stream:
+        create_message_from_json(payload)
+    registry_rate = len(stream) / (time.perf_counter() - start)
+    # The old path is timed on a tenth of the stream to keep the run short
+    start = time.perf_counter()
+    for payload in stream[:100_000]:
+        _legacy_create_message_from_json(payload)
+    legacy_rate = 100_000 / (time.perf_counter() - start)
+    assert registry_rate > legacy_rate * 2
@@ -0,0 +1,39 @@
+"""
+Day-long health report benchmark for the ring-buffer metrics store.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from shared_protocols.metrics_store import SAMPLE_FIELDS
+from shared_protocols.system_monitoring import PerformanceMetrics, UnifiedSystemMonitor
+
+
+def _sample(cpu, memory_percent=50.0, threads=10):
+    values = dict.fromkeys(SAMPLE_FIELDS, 0.0)
+    values.update(cpu_percent=cpu, memory_percent=memory_percent, thread_count=threads, gpu_usage=None)
+    return [values[name] for name in SAMPLE_FIELDS]
+
+
+@pytest.mark.performance
+def test_day_long_health_report_runs_in_microseconds():
+    monitor = UnifiedSystemMonitor()
+    now = time.time()
+    rng = np.random.default_rng(0)
+    cpu = rng.uniform(0, 100, 86_400)
+    for i in range(86_400):
+        monitor.metrics_store.append(now - 86_399 + i, _sample(cpu=cpu[i]))
+    monitor.record_metrics(PerformanceMetrics(now, 50.0, 1.0, 50.0, 0, 0, 0, 0, 10, 100))
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        report = monitor.get_system_health_report(window_seconds=86_400)
+    per_report_us = (time.perf_counter() - start) / runs * 1e6
+
+    assert report["summary"]["resolution"] == 60.0
+    assert report["summary"]["cpu_percent"]["mean"] == pytest.approx(cpu.mean(), rel=0.01)
+    assert per_report_us < 1000
+    assert monitor.metrics_store.memory_bytes() < 8_000_000
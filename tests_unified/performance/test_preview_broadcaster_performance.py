@@ -0,0 +1,67 @@
+"""
+Viewer-scaling benchmark for the encode-once MJPEG preview broadcaster.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from PythonApp.web_ui.preview_broadcaster import PreviewBroadcaster, PreviewTier
+
+
+def _fake_encoder(image, tier):
+    return f"{tier.name}:{int(image.flat[0])}".encode()
+
+
+def _drain(broadcaster, frames, received, stop_event, delay=0.0):
+    gen = broadcaster.stream(None, idle_timeout=0.05)
+    try:
+        for part in gen:
+            received.append(part)
+            if delay:
+                time.sleep(delay)
+            if stop_event.is_set() or len(received) >= frames:
+                break
+    finally:
+        gen.close()
+
+
+@pytest.mark.performance
+def test_encode_count_flat_as_viewers_grow():
+    """20 simulated viewers must not multiply encoder work."""
+    frames = 30
+    results = {}
+    for viewers in (1, 20):
+        broadcaster = PreviewBroadcaster(
+            f"bench{viewers}", tiers=(PreviewTier("full"),), encoder=_fake_encoder
+        )
+        stop_event = threading.Event()
+        buckets = [[] for _ in range(viewers)]
+        readers = [
+            threading.Thread(
+                target=_drain,
+                args=(broadcaster, frames, bucket, stop_event),
+                kwargs={"delay": 0.02 if index % 5 == 0 else 0.0},
+            )
+            for index, bucket in enumerate(buckets)
+        ]
+        for reader in readers:
+            reader.start()
+        deadline = time.monotonic() + 2.0
+        while broadcaster.viewer_count < viewers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for value in range(frames):
+            broadcaster.publish_frame(np.full((2, 2), value, dtype=np.uint8))
+            time.sleep(0.005)
+        time.sleep(0.1)
+        stop_event.set()
+        broadcaster.stop()
+        for reader in readers:
+            reader.join(timeout=2.0)
+        stats = broadcaster.get_statistics()
+        results[viewers] = stats["encode_count"]
+        assert stats["encode_count"] <= frames
+        assert all(bucket for bucket in buckets)
+    assert results[20] <= results[1] + 2
@@ -0,0 +1,43 @@
+"""
+Throughput benchmark for binary AEAD framing against the JSON/base64 path.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from PythonApp.protocol.protocol import MessageType, ProtocolHandler
+
+
+def _paired_handlers(secure_framing=True):
+    initiator = ProtocolHandler("pc_controller")
+    responder = ProtocolHandler("android_1")
+    for handler in (initiator, responder):
+        handler.secure_framing = secure_framing
+    _, responder_public = responder.crypto.generate_rsa_keypair()
+    _, encrypted_key = initiator.perform_handshake(responder_public)
+    responder.complete_handshake(encrypted_key)
+    return initiator, responder
+
+
+@pytest.mark.performance
+def test_secure_framing_benchmark():
+    """Throughput and size overhead of binary framing versus the JSON/base64 path."""
+    legacy_tx, legacy_rx = _paired_handlers(secure_framing=False)
+    binary_tx, binary_rx = _paired_handlers()
+    for size in (1024, 64 * 1024, 1024 * 1024):
+        iterations = max(3, (8 * 1024 * 1024) // size)
+        results = {}
+        for name, tx, rx in (("legacy", legacy_tx, legacy_rx), ("binary", binary_tx, binary_rx)):
+            message = tx.create_message(MessageType.HEARTBEAT, {"blob": "x" * size})
+            plain = len(message.to_json().encode("utf-8"))
+            start = time.perf_counter()
+            for _ in range(iterations):
+                frame = tx.encrypt_message(message)
+                rx.decrypt_message(frame)
+            elapsed = time.perf_counter() - start
+            results[name] = (plain * iterations / elapsed / 1e6, len(frame) / plain - 1.0)
+        assert results["binary"][1] < results["legacy"][1]
+        assert results["binary"][0] > results["legacy"][0]
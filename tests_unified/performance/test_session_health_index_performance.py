@@ -0,0 +1,54 @@
+"""
+Cold versus warm scan benchmark for the incremental session-health index.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from PythonApp.session.health_index import SessionHealthIndex
+
+
+def _legacy_scan(root):
+    """The pre-index behaviour: parse every JSON file and walk every folder."""
+    size = 0
+    for session_folder in root.iterdir():
+        if not session_folder.is_dir():
+            continue
+        for json_file in session_folder.glob("*.json"):
+            with open(json_file, "r", encoding="utf-8") as f:
+                json.load(f)
+        for file_path in session_folder.rglob("*"):
+            if file_path.is_file():
+                size += file_path.stat().st_size
+    return size
+
+
+@pytest.mark.performance
+def test_warm_scan_of_100k_files_is_much_faster_than_cold(tmp_path):
+    root = tmp_path / "recordings"
+    payload = json.dumps({"samples": list(range(200))})
+    for s in range(100):
+        folder = root / f"session_{s:03d}"
+        (folder / "frames").mkdir(parents=True)
+        for i in range(100):
+            (folder / f"meta_{i:03d}.json").write_text(payload)
+        for i in range(900):
+            with open(os.path.join(folder, "frames", f"f_{i:04d}.csv"), "w") as f:
+                f.write("1,2\n")
+
+    start = time.perf_counter()
+    legacy_size = _legacy_scan(root)
+    legacy_s = time.perf_counter() - start
+    index = SessionHealthIndex(root)
+    cold = index.scan()
+    warm = index.scan()
+    index.close()
+
+    assert cold.added == warm.scanned == 100_000
+    assert warm.bytes_read == 0 and warm.modified == 0
+    assert warm.elapsed_s < cold.elapsed_s / 2
+    assert warm.elapsed_s < legacy_s
+    assert SessionHealthIndex(root).folder_size(root) == legacy_size
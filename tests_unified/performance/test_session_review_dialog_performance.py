@@ -0,0 +1,54 @@
+"""
+First-screen latency benchmark for the lazily loaded session review dialog.
+"""
+
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+from PythonApp.gui.session_review_dialog import SessionReviewDialog
+
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def _run_until(app, predicate, timeout_s=10.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return predicate()
+
+
+@pytest.mark.performance
+def test_first_screen_of_large_session_is_fast(app, tmp_path):
+    folder = tmp_path / "session"
+    folder.mkdir()
+    suffixes = (".csv", ".json", ".log", ".bin")
+    for i in range(50_000):
+        suffix = suffixes[i % len(suffixes)]
+        with open(folder / f"chunk_{i:06d}{suffix}", "w") as f:
+            f.write("timestamp_ms,gsr_us\n0,0.0\n" if suffix == ".csv" else "{}")
+    session_data = {"session": "synthetic", "events": [{"event": "session_start", "time": "00:00:00"}]}
+
+    start = time.perf_counter()
+    dialog = SessionReviewDialog(session_data, str(folder))
+    dialog.show()
+    try:
+        assert _run_until(app, lambda: dialog.file_model.rowCount() > 0, timeout_s=5.0)
+        app.processEvents()
+        assert time.perf_counter() - start < 0.2
+
+        assert _run_until(app, lambda: dialog.files_complete, timeout_s=30.0)
+        assert dialog.file_model.rowCount() == 50_000
+    finally:
+        dialog.done(0)
@@ -0,0 +1,63 @@
+"""
+Per-packet and per-sample Python loops against the vectorised PythonShimmerProcessor.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "PythonApp"))
+
+from native_backends.native_shimmer_wrapper import PythonShimmerProcessor, ShimmerProcessor
+
+
+def _packets(count, seed=0):
+    rng = np.random.default_rng(seed)
+    gsr = rng.integers(200, 3000, count)
+    accel = rng.integers(0, 65536, (count, 3))
+    packets = []
+    for i in range(count):
+        packet = [int(gsr[i]) & 0xFF, int(gsr[i]) >> 8, 0xDC, 0x05]
+        for value in accel[i]:
+            packet += [int(value) & 0xFF, int(value) >> 8]
+        packets.append(packet + [0] * 10 + [int(rng.integers(0, 100))])
+    return packets
+
+
+def _legacy_low_pass(signal, sampling_rate, cutoff_freq):
+    dt = 1.0 / sampling_rate
+    alpha = dt / (dt + 1.0 / (2.0 * np.pi * cutoff_freq))
+    filtered = [signal[0]]
+    for i in range(1, len(signal)):
+        filtered.append(alpha * signal[i] + (1.0 - alpha) * filtered[i - 1])
+    return filtered
+
+
+@pytest.mark.performance
+def test_vectorised_fallback_keeps_up_with_full_rate_streams():
+    packets = _packets(128 * 600)  # ten minutes at 128 Hz
+    signal = list(np.random.default_rng(5).normal(10.0, 1.0, 1_000_000))
+
+    legacy = PythonShimmerProcessor()
+    start = time.perf_counter()
+    for packet in packets:
+        legacy.process_raw_packet(packet)
+    per_packet_s = time.perf_counter() - start
+    start = time.perf_counter()
+    _legacy_low_pass(signal, 128.0, 5.0)
+    loop_filter_s = time.perf_counter() - start
+
+    python = ShimmerProcessor(force_python=True)
+    start = time.perf_counter()
+    python.process_batch(packets)
+    batch_s = time.perf_counter() - start
+    samples = np.asarray(signal)
+    start = time.perf_counter()
+    python.apply_low_pass_filter(samples, 5.0)
+    vector_filter_s = time.perf_counter() - start
+
+    assert batch_s < per_packet_s / 5
+    assert vector_filter_s < loop_filter_s / 20
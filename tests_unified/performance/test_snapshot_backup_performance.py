@@ -0,0 +1,45 @@
+"""
+Incremental snapshot cost against a full copytree of a large session.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from PythonApp.session.snapshot_backup import SnapshotStore
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    # Prefer tmpfs, which has hard links but no reflinks, so the copy fallback runs
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        path = shm / f"snapshot_test_{os.getpid()}_{time.monotonic_ns()}"
+        path.mkdir()
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        yield tmp_path
+
+
+@pytest.mark.performance
+def test_second_snapshot_of_a_large_session_copies_nothing(workdir):
+    session = workdir / "recordings" / "large"
+    (session / "video").mkdir(parents=True)
+    for i in range(16):
+        (session / "video" / f"chunk_{i:03d}.mp4").write_bytes(os.urandom(2 * 1024 * 1024))
+    store = SnapshotStore(workdir / "backups")
+    store.snapshot(session)
+
+    start = time.perf_counter()
+    shutil.copytree(session, workdir / "copytree")
+    copytree_s = time.perf_counter() - start
+    start = time.perf_counter()
+    result = store.snapshot(session)
+    snapshot_s = time.perf_counter() - start
+    assert result.bytes_copied == 0 and result.linked == 16
+    assert store.disk_usage("large") == 32 * 1024 * 1024
+    assert snapshot_s < copytree_s
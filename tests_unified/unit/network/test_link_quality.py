@@ -0,0 +1,112 @@
+"""
+Tests for the O(1) LinkQualityEstimator against synthetic RTT traces.
+"""
+
+import os
+import socket
+
+import numpy as np
+import pytest
+
+from PythonApp.network.link_quality import PREVIEW_PROFILES, LinkQualityEstimator
+
+
+@pytest.mark.unit
+def test_constant_rtt_has_no_jitter():
+    estimator = LinkQualityEstimator()
+    assert estimator.health_score() == pytest.approx(PREVIEW_PROFILES[1].min_score)
+    assert estimator.select_profile().name == "medium"
+    for _ in range(200):
+        estimator.update(20.0)
+    assert estimator.smoothed_latency == pytest.approx(20.0)
+    assert estimator.jitter == pytest.approx(0.0)
+    assert estimator.health_score() == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+def test_ewma_tracks_step_change():
+    estimator = LinkQualityEstimator()
+    for _ in range(50):
+        estimator.update(10.0)
+    for _ in range(50):
+        estimator.update(100.0)
+    assert estimator.smoothed_latency == pytest.approx(100.0, rel=0.01)
+    assert estimator.min_latency == 10.0
+    assert estimator.max_latency == 100.0
+
+
+@pytest.mark.unit
+def test_jitter_converges_to_rfc3550_estimate():
+    rng = np.random.default_rng(1)
+    trace = 40.0 + rng.normal(0.0, 5.0, 20_000)
+    estimator = LinkQualityEstimator()
+    for rtt in trace:
+        estimator.update(float(rtt))
+    expected = np.mean(np.abs(np.diff(trace)))
+    assert estimator.jitter == pytest.approx(expected, rel=0.25)
+
+
+@pytest.mark.unit
+def test_histogram_percentiles_match_numpy():
+    rng = np.random.default_rng(2)
+    trace = rng.lognormal(mean=3.0, sigma=0.5, size=50_000)
+    estimator = LinkQualityEstimator()
+    for rtt in trace:
+        estimator.update(float(rtt))
+    for p in (50, 95, 99):
+        assert estimator.percentile(p) == pytest.approx(np.percentile(trace, p), rel=0.1)
+
+
+@pytest.mark.unit
+def test_packet_loss_from_sequence_gaps():
+    estimator = LinkQualityEstimator()
+    for sequence in range(100):
+        if sequence % 10 != 0:
+            estimator.record_sequence(sequence)
+    assert estimator.packets_expected == 99
+    assert estimator.packet_loss == pytest.approx(9 / 99, rel=0.01)
+
+
+@pytest.mark.unit
+def test_profile_degrades_with_bad_link_and_recovers_with_hysteresis():
+    estimator = LinkQualityEstimator()
+    for _ in range(100):
+        estimator.update(10.0)
+    assert estimator.select_profile().name == "high"
+    for _ in range(100):
+        estimator.update(400.0)
+    assert estimator.select_profile("high").name == "low"
+    for _ in range(200):
+        estimator.update(10.0)
+    assert estimator.select_profile("low").name == "high"
+    assert [p.name for p in PREVIEW_PROFILES] == ["high", "medium", "low"]
+
+
+@pytest.mark.unit
+def test_device_server_requests_preview_profile_from_score():
+    pytest.importorskip("PyQt5")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PythonApp.network.device_server import DeviceServer, RemoteDevice
+
+    server = DeviceServer(port=0)
+    local, remote = socket.socketpair()
+    try:
+        device = RemoteDevice("phone_1", ["rgb_video"], local, ("127.0.0.1", 0))
+        server.devices[device.device_id] = device
+        # An unmeasured link keeps the default profile
+        assert not server.update_preview_profile(device)
+        assert device.streaming_quality == "medium"
+        for _ in range(100):
+            device.update_latency(500.0)
+        assert server.update_preview_profile(device)
+        assert device.streaming_quality == "low"
+        assert device.max_frame_rate == 5
+        message = device.get_next_message(timeout=1.0)
+        assert message.payload["command"] == "set_preview_quality"
+        assert (message.payload["width"], message.payload["height"]) == (320, 240)
+        assert not server.update_preview_profile(device)
+        summary = device.get_status_summary()
+        assert summary["link_quality"]["samples"] == 100
+    finally:
+        local.close()
+        remote.close()
@@ -0,0 +1,135 @@
+"""
+Round-trip tests for negotiated payload compression in DeviceServer.
+"""
+
+import base64
+import json
+import os
+import socket
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PythonApp.network.payload_compression import (
+    CompressionCodec,
+    CompressionError,
+    PayloadCompressor,
+    available_codecs,
+    compress_bytes,
+    decode_frame_body,
+    encode_frame,
+    parse_length_header,
+)
+
+
+def _status_payload(entries=200):
+    return {
+        "type": "status",
+        "timestamp": 1.0,
+        "history": [{"sensor": "gsr", "value": i % 10, "ok": True} for i in range(entries)],
+    }
+
+
+@pytest.fixture
+def server_and_device():
+    pytest.importorskip("PyQt5")
+    from PythonApp.network.device_server import DeviceServer, RemoteDevice
+
+    server = DeviceServer(port=0)
+    local, remote = socket.socketpair()
+    device = RemoteDevice("phone_1", ["rgb_video"], local, ("127.0.0.1", 0))
+    yield server, device, remote
+    local.close()
+    remote.close()
+
+
+def _round_trip(server, device, remote, payload):
+    from PythonApp.network.device_server import NetworkMessage
+
+    message = NetworkMessage(type=payload["type"], payload=payload)
+    assert server.send_message_immediate(device, message)
+    return server.receive_message(remote, timeout=2.0)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("codec_name", available_codecs())
+def test_round_trip_each_codec(server_and_device, codec_name):
+    server, device, remote = server_and_device
+    server.compression_codecs = [codec_name]
+    info = server.negotiate_compression(device, {"codecs": [codec_name]})
+    assert info["codecs"] == [codec_name]
+    payload = _status_payload()
+    assert _round_trip(server, device, remote, payload) == payload
+    stats = device.compressor.get_statistics()["message_types"]["status"]
+    assert stats["codecs"][codec_name]["ratio"] < 0.5
+    assert device.stats.bytes_sent < len(json.dumps(payload))
+
+
+@pytest.mark.unit
+def test_fallback_without_peer_support(server_and_device):
+    server, device, remote = server_and_device
+    info = server.negotiate_compression(device, None)
+    assert info["codecs"] == []
+    assert device.compressor is None
+    payload = _status_payload()
+    assert _round_trip(server, device, remote, payload) == payload
+    assert device.stats.bytes_sent == 4 + len(json.dumps(payload).encode())
+
+
+@pytest.mark.unit
+def test_fallback_when_no_common_codec(server_and_device):
+    server, device, remote = server_and_device
+    info = server.negotiate_compression(device, ["brotli"])
+    assert info["codecs"] == []
+    assert device.compressor is None
+
+
+@pytest.mark.unit
+def test_jpeg_payload_skips_compression():
+    compressor = PayloadCompressor(codecs=["zlib"], threshold=64)
+    jpeg_like = b"\xff\xd8\xff\xe0" + os.urandom(8000)
+    payload = json.dumps(
+        {"type": "preview_frame", "image_data": base64.b64encode(jpeg_like).decode()}
+    ).encode()
+    codec, body = compressor.encode("preview_frame", payload)
+    assert codec == CompressionCodec.NONE
+    assert body == payload
+    stats = compressor.get_statistics()["message_types"]["preview_frame"]
+    assert stats["precompressed_skips"] == 1
+
+
+@pytest.mark.unit
+def test_codec_choice_follows_link_cost():
+    data = json.dumps(_status_payload()).encode()
+    fast_link = PayloadCompressor(
+        codecs=["zlib"], threshold=64, probe_messages=2, bandwidth_bytes_per_s=1e15
+    )
+    slow_link = PayloadCompressor(
+        codecs=["zlib"], threshold=64, probe_messages=2, bandwidth_bytes_per_s=1e5
+    )
+    for _ in range(3):
+        fast_link.encode("status", data)
+        slow_link.encode("status", data)
+    assert fast_link.encode("status", data)[0] == CompressionCodec.NONE
+    assert slow_link.encode("status", data)[0] == CompressionCodec.ZLIB
+    assert fast_link.get_statistics()["message_types"]["status"]["uncompressed"] >= 1
+
+
+@pytest.mark.unit
+def test_small_messages_are_sent_plain():
+    compressor = PayloadCompressor(codecs=["zlib"], threshold=1024)
+    codec, body = compressor.encode("heartbeat", b'{"type":"heartbeat"}')
+    assert codec == CompressionCodec.NONE
+
+
+@pytest.mark.unit
+def test_frame_header_flag_and_size_limit():
+    body = compress_bytes(CompressionCodec.ZLIB, b"x" * 5000)
+    frame = encode_frame(CompressionCodec.ZLIB, body)
+    encoded, length = parse_length_header(frame[:4])
+    assert encoded and length == len(body) + 1
+    assert decode_frame_body(encoded, frame[4:]) == b"x" * 5000
+    bomb = compress_bytes(CompressionCodec.ZLIB, b"\0" * (11 * 1024 * 1024))
+    with pytest.raises(CompressionError):
+        decode_frame_body(True, bytes([CompressionCodec.ZLIB]) + bomb)
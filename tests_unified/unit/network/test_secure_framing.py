@@ -0,0 +1,104 @@
+"""
+Tests for binary AEAD framing of encrypted protocol messages.
+"""
+
+import struct
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from PythonApp.protocol.protocol import (
+    MessageType,
+    ProtocolHandler,
+    ReplayError,
+    SecureFrameCodec,
+    SecureFramingError,
+)
+
+
+def _paired_handlers(cipher="aes-gcm", secure_framing=True):
+    initiator = ProtocolHandler("pc_controller")
+    responder = ProtocolHandler("android_1")
+    for handler in (initiator, responder):
+        handler.aead_cipher = cipher
+        handler.secure_framing = secure_framing
+    _, responder_public = responder.crypto.generate_rsa_keypair()
+    _, encrypted_key = initiator.perform_handshake(responder_public)
+    responder.complete_handshake(encrypted_key)
+    return initiator, responder
+
+
+def _message(handler, size):
+    return handler.create_message(MessageType.HEARTBEAT, {"blob": "x" * size})
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("cipher", SecureFrameCodec.CIPHERS)
+def test_round_trip_in_both_directions(cipher):
+    initiator, responder = _paired_handlers(cipher)
+    frame = initiator.encrypt_message(_message(initiator, 100))
+    assert SecureFrameCodec.is_secure_frame(frame)
+    assert frame[4] & SecureFrameCodec.FLAG_CHACHA20 == (cipher == "chacha20-poly1305")
+    assert responder.decrypt_message(frame).payload == {"blob": "x" * 100}
+    reply = responder.encrypt_message(_message(responder, 10))
+    assert initiator.decrypt_message(reply).payload == {"blob": "x" * 10}
+    assert initiator.get_protocol_statistics()["secure_framing"]
+
+
+@pytest.mark.unit
+def test_frame_overhead_is_constant():
+    initiator, _ = _paired_handlers()
+    message = _message(initiator, 4096)
+    plain = len(message.to_json().encode("utf-8"))
+    assert len(initiator.encrypt_message(message)) == plain + SecureFrameCodec.OVERHEAD
+
+
+@pytest.mark.unit
+def test_tampered_frames_are_rejected():
+    initiator, responder = _paired_handlers()
+    frame = bytearray(initiator.encrypt_message(_message(initiator, 64)))
+    frame[-1] ^= 0x01
+    with pytest.raises(SecureFramingError):
+        responder.decrypt_message(bytes(frame))
+    header_flip = bytearray(initiator.encrypt_message(_message(initiator, 64)))
+    header_flip[4] ^= SecureFrameCodec.FLAG_CHACHA20
+    with pytest.raises(SecureFramingError):
+        responder.decrypt_message(bytes(header_flip))
+
+
+@pytest.mark.unit
+def test_replayed_and_reflected_frames_are_rejected():
+    initiator, responder = _paired_handlers()
+    first = initiator.encrypt_message(_message(initiator, 8))
+    second = initiator.encrypt_message(_message(initiator, 8))
+    responder.decrypt_message(second)
+    with pytest.raises(ReplayError):
+        responder.decrypt_message(second)
+    with pytest.raises(ReplayError):
+        responder.decrypt_message(first)
+    with pytest.raises(ReplayError):
+        initiator.decrypt_message(initiator.encrypt_message(_message(initiator, 8)))
+    assert responder.get_protocol_statistics()["replays_rejected"] == 2
+
+
+@pytest.mark.unit
+def test_legacy_framing_still_decodes():
+    initiator, responder = _paired_handlers(secure_framing=False)
+    frame = initiator.encrypt_message(_message(initiator, 32))
+    assert not SecureFrameCodec.is_secure_frame(frame)
+    assert responder.decrypt_message(frame).payload == {"blob": "x" * 32}
+    plain = ProtocolHandler("android_2")
+    message = _message(plain, 16)
+    assert plain.decrypt_message(plain.encrypt_message(message)).payload == message.payload
+
+
+@pytest.mark.unit
+def test_rejects_secure_frame_without_session_key():
+    initiator, _ = _paired_handlers()
+    frame = initiator.encrypt_message(_message(initiator, 8))
+    with pytest.raises(SecureFramingError):
+        ProtocolHandler("stranger").decrypt_message(frame)
+    with pytest.raises(SecureFramingError):
+        SecureFrameCodec(b"\0" * 32, role="responder").open(frame[:-1] + b"\0")
+    assert struct.unpack("!I", frame[:4])[0] == len(frame) - 4
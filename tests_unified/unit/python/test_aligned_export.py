@@ -0,0 +1,189 @@
+"""
+Tests for the multi-stream time-alignment and resampling export engine.
+"""
+
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from PythonApp.recording.audio_sink import StreamingAudioSink
+from PythonApp.session.aligned_export import (
+    AlignedExportConfig,
+    AlignedExporter,
+    ClockMap,
+    SessionClock,
+    load_npz_table,
+    save_clock_offsets,
+)
+from PythonApp.session.post_session_jobs import DEFAULT_HANDLERS, PostSessionJobQueue, execute_job
+from PythonApp.session.session_metadata import read_json
+
+T0 = 1_700_000_000.0
+MARKERS = [(T0 + 3.0, "stimulus_onset"), (T0 + 7.5, "stimulus_offset")]
+
+
+def _gsr(t):
+    return 5.0 + np.sin(2 * np.pi * 0.5 * (t - T0))
+
+
+def _ppg(t):
+    return np.sin(2 * np.pi * 5.0 * (t - T0))
+
+
+def _write_csv(path, header, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _make_session(root, seconds=12.0, alias=0.0):
+    """Shimmer GSR on a clock 250 ms behind the master, a 512 Hz PPG whose clock drifts,
+    25 Hz thermal on the master clock, a 30 fps webcam, audio and two markers."""
+    session = root / "session_001"
+    session.mkdir(parents=True)
+    master = T0 + 0.2 + np.arange(int(seconds * 128)) / 128.0
+    _write_csv(session / "shimmer_01" / "gsr.csv", ["timestamp_ms", "gsr_microsiemens"],
+               zip((master - 0.25) * 1000.0, _gsr(master)))
+    drift = ClockMap([T0, T0 + 60.0], [0.1, 0.16])
+    ppg_master = T0 + 0.5 + np.arange(int(seconds * 512)) / 512.0
+    values = _ppg(ppg_master) + alias * np.sin(2 * np.pi * 100.0 * (ppg_master - T0))
+    _write_csv(session / "shimmer_02" / "ppg.csv", ["timestamp", "ppg"], zip(drift.to_device(ppg_master), values))
+    save_clock_offsets(session, {"shimmer_01": 250.0, "shimmer_02": [(T0, 100.0), (T0 + 60.0, 160.0)]})
+
+    thermal = T0 + 1.0 + np.arange(int(seconds * 25)) / 25.0
+    _write_csv(session / "thermal" / "frames.csv", ["timestamp", "mean_temp"], zip(thermal, 30.0 + thermal - T0))
+    frames = T0 + 0.7 + np.arange(int(seconds * 30)) / 30.0
+    (session / "webcam").mkdir()
+    (session / "webcam" / "webcam_1.mp4").write_bytes(b"\0" * 64)
+    _write_csv(session / "webcam" / "frame_timestamps.csv", ["timestamp_ms", "video_filename", "frame_number"],
+               [(t * 1000.0, "webcam_1.mp4", i) for i, t in enumerate(frames)])
+
+    (session / "audio").mkdir()
+    sink = StreamingAudioSink(str(session / "audio" / "mic.wav"), 8000, block_frames=400)
+    for block in range(int(seconds * 20)):
+        sink.write_block(np.zeros(400, np.int16), T0 + 0.3 + block * 0.05)
+    sink.close()
+    with open(session / "session_001_log.json", "w") as f:
+        json.dump({"events": [{"event": "sync_marker", "marker": label, "timestamp": t} for t, label in MARKERS]
+                   + [{"event": "note", "timestamp": "2024-01-01T00:00:00"}]}, f)
+    return session
+
+
+def _export(session, output, **config):
+    config.setdefault("format", "npz")
+    manifest = AlignedExporter(session, output, AlignedExportConfig(**config)).run()
+    return manifest, load_npz_table(output), load_npz_table(output, "epochs")
+
+
+@pytest.mark.unit
+def test_every_stream_lands_on_the_master_timeline(tmp_path):
+    session = _make_session(tmp_path)
+    manifest, table, epochs = _export(session, tmp_path / "out", rate_hz=64.0, chunk_seconds=2.5)
+    t = table["t"]
+    assert manifest["t_start"] == pytest.approx(T0 + 0.2) and manifest["n_samples"] == len(t)
+    assert np.allclose(np.diff(t), 1 / 64.0)
+
+    gsr = table["shimmer_01__gsr.gsr_microsiemens"]
+    inside = (t >= T0 + 0.2) & (t <= T0 + 0.2 + 1535 / 128.0)
+    assert np.all(np.isnan(gsr[~inside])) and np.abs(gsr[inside] - _gsr(t[inside])).max() < 1e-3
+    ppg = table["shimmer_02__ppg.ppg"]
+    covered = ~np.isnan(ppg)
+    # The 100 ms offset drifts to 112 ms over the export; both are removed
+    assert covered.sum() > 0.9 * len(t) and np.abs(ppg[covered] - _ppg(t[covered])).max() < 0.01
+    temp = table["thermal__frames.mean_temp"]
+    assert np.allclose(temp[~np.isnan(temp)], 30.0 + t[~np.isnan(temp)] - T0, atol=0.02)
+
+    frame = table["webcam__webcam_1.frame_index"]
+    expected = np.floor((t - (T0 + 0.7)) * 30.0 + 1e-6)
+    valid = (expected >= 0) & (expected < 360)
+    assert np.array_equal(frame[valid], expected[valid]) and np.all(frame[~valid] == -1)
+    sample = table["audio__mic.sample_index"]
+    expected = np.floor((t - (T0 + 0.3)) * 8000.0 + 1e-6)
+    valid = (expected >= 0) & (expected < 240 * 400)
+    assert np.array_equal(sample[valid], expected[valid]) and np.all(sample[~valid] == -1)
+    assert "audio__mic_blocks.first_frame" not in table and "webcam__frame_timestamps.frame_number" not in table
+
+    # Epochs cover -1 s .. +2 s around each marker and copy the aligned rows
+    assert manifest["markers"] == 2 and set(np.unique(epochs["epoch"])) == {0, 1}
+    for epoch, (marker_time, label) in enumerate(MARKERS):
+        rows = epochs["epoch"] == epoch
+        assert rows.sum() == 3 * 64 and set(epochs["marker"][rows]) == {label}
+        assert epochs["t_rel"][rows].min() >= -1.0 and epochs["t_rel"][rows].max() <= 2.0
+        assert np.array_equal(epochs["shimmer_01__gsr.gsr_microsiemens"][rows], gsr[epochs["sample"][rows]])
+    assert manifest["streams"]["shimmer_02/ppg"]["clock"]["samples"] == [[T0, 100.0], [T0 + 60.0, 160.0]]
+
+
+@pytest.mark.unit
+def test_chunk_boundaries_do_not_change_the_output(tmp_path):
+    session = _make_session(tmp_path, alias=1.0)
+    methods = {"shimmer_02/ppg": "polyphase", "thermal/frames": "hold"}
+    _, whole, _ = _export(session, tmp_path / "whole", rate_hz=128.0, methods=methods, chunk_seconds=1000.0, epoch_window=None)
+    _, chunked, _ = _export(session, tmp_path / "chunked", rate_hz=128.0, methods=methods, chunk_seconds=1.37, epoch_window=None)
+    assert whole.keys() == chunked.keys()
+    for name in whole:
+        assert np.allclose(whole[name], chunked[name], rtol=0, atol=1e-9, equal_nan=True), name
+
+    # Polyphase removes the 100 Hz component that linear interpolation aliases to 28 Hz
+    _, linear, _ = _export(session, tmp_path / "linear", rate_hz=128.0, epoch_window=None)
+    t = whole["t"]
+    interior = (t > T0 + 1.0) & (t < T0 + 11.0)
+    polyphase_error = np.abs(whole["shimmer_02__ppg.ppg"][interior] - _ppg(t[interior])).max()
+    linear_error = np.abs(linear["shimmer_02__ppg.ppg"][interior] - _ppg(t[interior])).max()
+    assert polyphase_error < 0.05 < 0.5 < linear_error
+
+
+
+@pytest.mark.unit
+def test_polyphase_needs_an_exact_rate_ratio(tmp_path):
+    session = _make_session(tmp_path)
+    methods = {"shimmer_02/ppg": "polyphase"}
+    # 512 Hz to 100 Hz is exactly 25/128, so the output stays on the grid
+    manifest, table, _ = _export(session, tmp_path / "exact", rate_hz=100.0, methods=methods, epoch_window=None)
+    assert manifest["streams"]["shimmer_02/ppg"]["method"] == "polyphase"
+    t = table["t"]
+    interior = (t > T0 + 1.0) & (t < T0 + 11.0)
+    assert np.abs(table["shimmer_02__ppg.ppg"][interior] - _ppg(t[interior])).max() < 0.05
+
+    # 1021 Hz needs a denominator above 1000; rounding it would drift, so the stream is interpolated
+    rates = {"shimmer_02/ppg": 1021.0}
+    manifest, table, _ = _export(session, tmp_path / "inexact", rate_hz=100.0, methods=methods, source_rates=rates, epoch_window=None)
+    assert manifest["streams"]["shimmer_02/ppg"]["method"] == "linear"
+    _, linear, _ = _export(session, tmp_path / "linear", rate_hz=100.0, epoch_window=None)
+    assert np.array_equal(table["shimmer_02__ppg.ppg"], linear["shimmer_02__ppg.ppg"], equal_nan=True)
+
+@pytest.mark.unit
+def test_clock_offsets_come_from_file_or_metadata(tmp_path):
+    session = tmp_path / "session"
+    session.mkdir()
+    (session / "session_metadata.json").write_text(json.dumps({"clock_offsets": {"devices": {"android_1": 40}, "streams": {"phone/ir": "android_1"}}}))
+    clock = SessionClock.load(session)
+    assert clock.device_for("phone/ir") == "android_1" and clock.device_for("android_1_rgb/frames") == "android_1"
+    assert clock.device_for("android_10/frames") is None
+    assert float(clock.for_stream("phone/ir").to_master(10.0)) == pytest.approx(10.04)
+    save_clock_offsets(session, {"android_1": [(0.0, 0.0), (100.0, 50.0)]})
+    drift = SessionClock.load(session).for_stream("android_1/x")
+    assert float(drift.to_master(50.0)) == pytest.approx(50.025)
+    assert float(drift.to_device(drift.to_master(50.0))) == pytest.approx(50.0, abs=1e-4)
+
+
+@pytest.mark.unit
+def test_aligned_export_runs_as_a_post_session_job(tmp_path):
+    session = _make_session(tmp_path)
+    (session / "session_metadata.json").write_text(json.dumps({"session_id": "session_001"}))
+    queue = PostSessionJobQueue(tmp_path / "jobs.sqlite3")
+    job_id = queue.enqueue("aligned_export", "session_001", session, {"rate_hz": 32.0, "format": "npz", "epoch_window": [-0.5, 0.5]})
+    assert execute_job(queue, queue.claim("w0"), DEFAULT_HANDLERS) == "succeeded"
+    result = queue.get(job_id).result
+    assert result["format"] == "npz" and "shimmer_01/gsr" in result["streams"]
+    assert len(load_npz_table(result["output_dir"], "epochs")["epoch"]) == 2 * 32
+    metadata = read_json(session / "session_metadata.json")["post_processing"]["aligned_export"]
+    assert metadata["status"] == "succeeded" and metadata["rate_hz"] == 32.0
+
+    bad = queue.enqueue("aligned_export", "session_001", session, {"method": "cubic"})
+    assert execute_job(queue, queue.claim("w0"), DEFAULT_HANDLERS) == "failed"
+    assert "unknown resampling method 'cubic'" in queue.get(bad).error
+    queue.close()
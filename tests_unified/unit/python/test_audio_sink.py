@@ -0,0 +1,184 @@
+"""
+Tests for the streaming WAV sink behind AudioRecorder.
+"""
+
+import csv
+import struct
+import threading
+import time
+import tracemalloc
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from PythonApp.recording.audio_sink import AudioBlockRing, StreamingAudioSink
+from PythonApp.recording.data_recorder import AudioRecorder
+
+
+def _feed(sink, audio, rng, start_time=1000.0):
+    """Push ``audio`` in irregular callback-sized blocks, waiting when the ring is full."""
+    offset = 0
+    while offset < len(audio):
+        size = int(rng.integers(1, 3 * sink.ring.block_frames))
+        while len(sink.ring) >= sink.ring.capacity - 3:
+            time.sleep(0.0005)
+        assert sink.write_block(audio[offset:offset + size], start_time + offset / sink.sample_rate)
+        offset += size
+
+
+def _read_wav(path):
+    with wave.open(str(path), "rb") as wav:
+        return wav.getparams(), wav.readframes(wav.getnframes())
+
+
+@pytest.mark.unit
+def test_stream_is_sample_exact_and_block_stamped(tmp_path):
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-32768, 32768, (48_000 * 3, 2), dtype=np.int16)
+    path = tmp_path / "take.wav"
+    sink = StreamingAudioSink(str(path), 48_000, channels=2, block_frames=512, ring_blocks=16, header_interval=0.05)
+    _feed(sink, audio, rng)
+    stats = sink.close()
+
+    params, frames = _read_wav(path)
+    assert (params.nchannels, params.sampwidth, params.framerate) == (2, 2, 48_000)
+    assert frames == audio.tobytes()
+    assert stats["frames_recorded"] == len(audio) and stats["dropped_frames"] == 0
+    assert stats["peak_amplitude"] == np.abs(audio.astype(np.int64)).max()
+    assert stats["rms_amplitude"] == pytest.approx(np.sqrt(np.mean(audio.astype(np.float64) ** 2)))
+
+    with open(tmp_path / "take_blocks.csv") as f:
+        rows = list(csv.DictReader(f))
+    first = np.array([int(row["first_frame"]) for row in rows])
+    counts = np.array([int(row["frame_count"]) for row in rows])
+    stamps = np.array([float(row["host_timestamp_ms"]) for row in rows])
+    assert counts.max() <= 512 and counts.sum() == len(audio)
+    assert np.array_equal(first, np.concatenate([[0], np.cumsum(counts)[:-1]]))
+    # Every stamp is the host time of that block's first frame
+    assert np.allclose(stamps, 1_000_000.0 + first / 48.0, atol=0.001)
+
+
+@pytest.mark.unit
+def test_partial_file_is_playable_before_close(tmp_path):
+    rng = np.random.default_rng(1)
+    audio = rng.integers(-32768, 32768, 48_000, dtype=np.int16)
+    path = tmp_path / "crash.wav"
+    sink = StreamingAudioSink(str(path), 48_000, block_frames=1024, ring_blocks=8, header_interval=0.02)
+    _feed(sink, audio, rng)
+    deadline = time.monotonic() + 5.0
+    while sink.writer.data_bytes < audio.nbytes or len(sink.ring):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    # Read as if the process had died here: the last patched header is valid
+    params, frames = _read_wav(path)
+    assert params.nframes == len(audio) and frames == audio.tobytes()
+    sink.close()
+
+
+@pytest.mark.unit
+def test_float_24_bit_and_rf64_layouts(tmp_path):
+    ramp = np.linspace(-1.0, 1.0, 5000)[:, np.newaxis]
+    path = tmp_path / "hd.wav"
+    sink = StreamingAudioSink(str(path), 96_000, bit_depth=24, block_frames=256, max_riff_bytes=10_000)
+    sink.write_block(ramp.astype(np.float32), 0.0)
+    stats = sink.close()
+    assert stats["file_format"] == "RF64" and stats["frames_recorded"] == 5000
+
+    data = path.read_bytes()
+    assert data[:4] == b"RF64" and data[12:16] == b"ds64"
+    riff_size, data_size, frames = struct.unpack_from("<QQQ", data, 20)
+    assert (riff_size, data_size, frames) == (len(data) - 8, 15_000, 5000)
+    assert data[72:80] == b"data" + b"\xff\xff\xff\xff"
+    samples = np.frombuffer(data[80:], dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+    decoded = (samples[:, 0] | samples[:, 1] << 8 | samples[:, 2] << 16) << 8 >> 8
+    expected = np.rint(ramp[:, 0].astype(np.float32).astype(np.float64) * 2147483647.0).astype(np.int64) >> 8
+    assert np.array_equal(decoded, expected) and decoded[-1] == 8388607
+    assert stats["peak_amplitude"] == pytest.approx(8388607.0, abs=1)
+
+
+@pytest.mark.unit
+def test_ring_drops_instead_of_blocking_and_memory_stays_bounded(tmp_path):
+    ring = AudioBlockRing(capacity=2, block_frames=4, channels=1, dtype=np.int16)
+    assert ring.push(np.ones((4, 1)), 0.0) and ring.push(np.ones((3, 1)), 0.1)
+    assert not ring.push(np.ones((4, 1)), 0.2)
+    assert (ring.dropped_blocks, ring.dropped_frames) == (1, 4)
+    assert ring.peek(0) == 0 and ring.frames[0] == 4
+    ring.release()
+    assert ring.push(np.ones((4, 1)), 0.3)
+
+    # Ten minutes of 48 kHz stereo: traced memory is the ring, not the audio
+    block = np.random.default_rng(2).integers(-1000, 1000, (1024, 2), dtype=np.int16)
+    sink = StreamingAudioSink(str(tmp_path / "long.wav"), 48_000, channels=2, ring_blocks=64)
+    tracemalloc.start()
+    for index in range(48_000 * 600 // 1024):
+        while len(sink.ring) >= 60:
+            time.sleep(0.0005)
+        sink.write_block(block, index * 1024 / 48_000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = sink.close()
+    assert stats["frames_recorded"] == 48_000 * 600 // 1024 * 1024
+    assert peak < 2_000_000
+
+
+
+@pytest.mark.unit
+def test_writer_errors_are_reported_not_counted_as_drops(tmp_path):
+    sink = StreamingAudioSink(str(tmp_path / "full_disk.wav"), 16_000, block_frames=160)
+
+    def no_space(data):
+        raise OSError(28, "No space left on device")
+
+    sink.writer.write = no_space
+    assert sink.write_block(np.zeros(160, np.int16), 0.0)
+    deadline = time.monotonic() + 5.0
+    while sink.error is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    assert not sink.write_block(np.zeros(160, np.int16), 0.01)
+    stats = sink.close()
+    assert "No space left on device" in stats["error"]
+    assert stats["dropped_frames"] == 0 and stats["frames_recorded"] == 0
+
+    # A writer that cannot drain in time finalises the file itself afterwards
+    stalled = StreamingAudioSink(str(tmp_path / "stalled.wav"), 16_000, block_frames=160)
+    release = threading.Event()
+    write = stalled.writer.write
+    stalled.writer.write = lambda data: (release.wait(5.0), write(data))
+    stalled.write_block(np.ones(160, np.int16), 0.0)
+    stats = stalled.close(timeout=0.05)
+    assert stats["error"].startswith("Writer still draining")
+    assert not stalled.writer._file.closed
+    release.set()
+    stalled._thread.join(5.0)
+    assert stalled.writer._file.closed
+    params, frames = _read_wav(tmp_path / "stalled.wav")
+    assert params.nframes == 160 and frames == np.ones(160, np.int16).tobytes()
+
+@pytest.mark.unit
+def test_audio_recorder_streams_to_disk(tmp_path):
+    recorder = AudioRecorder(sample_rate=16_000, channels=2)
+    path = tmp_path / "session_audio.wav"
+    assert recorder.start_recording(str(path))
+    time.sleep(0.35)
+    metadata = recorder.stop_recording()
+    params, _ = _read_wav(path)
+    assert metadata["frames_recorded"] == params.nframes >= 1600 * 3
+    assert metadata["samples_recorded"] == 2 * params.nframes
+    assert metadata["timestamps_file"] == "session_audio_blocks.csv"
+    assert metadata["error"] is None and metadata["input_overflows"] == 0
+    assert recorder.stop_recording() is None
+
+    # Callback path: the stream clock of the first frame maps to wall time
+    recorder.sink = StreamingAudioSink(str(tmp_path / "callback.wav"), 16_000, channels=2)
+    before = time.time()
+    recorder._audio_callback(np.zeros((160, 2), np.int16), 160, SimpleNamespace(currentTime=10.5, inputBufferAdcTime=10.0), None)
+    assert before - 0.5 <= recorder.sink.ring.timestamps[0] <= time.time() - 0.5
+    # PortAudio reports an input overflow through the callback status
+    recorder._audio_callback(np.zeros((160, 2), np.int16), 160, SimpleNamespace(currentTime=10.5, inputBufferAdcTime=10.0), SimpleNamespace(input_overflow=True))
+    assert recorder.input_overflows == 1
+    recorder.sink.close()
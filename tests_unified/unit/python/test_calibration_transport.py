@@ -0,0 +1,185 @@
+"""
+Tests for the framed asyncio transport of the cross-device calibration coordinator.
+"""
+
+import asyncio
+import base64
+import random
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "PythonApp"))
+
+from calibration_quality_assessment import PatternType
+from calibration_transport import FrameError, MalformedFrame, encode_frame, read_frame
+from cross_device_calibration_coordinator import CrossDeviceCalibrationCoordinator
+
+
+def _jpeg(seed, width=640, height=480):
+    image = np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+
+async def _write_fragmented(writer, data, rng):
+    """Write ``data`` in small random pieces so frames straddle TCP segments."""
+    offset = 0
+    while offset < len(data):
+        size = rng.choice([1, 3, 7, 512, 4095, 4097, 65536])
+        writer.write(data[offset:offset + size])
+        await writer.drain()
+        offset += size
+        if rng.random() < 0.3:
+            await asyncio.sleep(0)
+
+
+class FakeDevice:
+    """A device client that answers capture commands with JPEG attachments."""
+
+    def __init__(self, device_id, images, behaviour="ok", seed=0):
+        self.device_id = device_id
+        self.images = images
+        self.behaviour = behaviour
+        self.rng = random.Random(seed)
+        self.commands = []
+
+    async def run(self, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        registration = {
+            "type": "device_registration", "device_id": self.device_id, "device_name": self.device_id,
+            "device_type": "android", "cameras": ["rgb"],
+        }
+        await _write_fragmented(writer, encode_frame(registration), self.rng)
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    return
+                command, _ = frame
+                self.commands.append(command)
+                if command["command_type"] != "capture_image" or self.behaviour == "silent":
+                    continue
+                await self._answer(writer, command)
+        finally:
+            writer.close()
+
+    async def _answer(self, writer, command):
+        header = {
+            "type": "image_data", "session_id": command["session_id"], "device_id": self.device_id,
+            "camera_id": "rgb", "quality_result": {"overall_quality_score": 0.9},
+        }
+        for index, jpeg in enumerate(self.images):
+            if index == 0:
+                # A legacy base64 message, far larger than one 4 KB read
+                legacy = dict(header, index=index, image_data=base64.b64encode(jpeg).decode("ascii"))
+                await _write_fragmented(writer, encode_frame(legacy), self.rng)
+            else:
+                await _write_fragmented(writer, encode_frame(dict(header, index=index), jpeg), self.rng)
+        response = {
+            "type": "calibration_response", "response_type": "image_captured", "session_id": command["session_id"],
+            "device_id": self.device_id, "request_id": command["request_id"],
+            "success": self.behaviour != "fail", "error_message": "lens cap on" if self.behaviour == "fail" else None,
+        }
+        await _write_fragmented(writer, encode_frame(response), self.rng)
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = CrossDeviceCalibrationCoordinator(coordination_port=0, host="127.0.0.1", max_attachment_bytes=4 << 20)
+    assert coordinator.start_coordination_server()
+    yield coordinator
+    coordinator.cleanup()
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.unit
+def test_read_frame_reassembles_split_frames_and_stays_in_sync():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        data = encode_frame({"n": 1}, b"\xff\xd8" * 5000) + b"\0\0\0\x03\0\0\0\0{x}" + encode_frame({"n": 2})
+        for i in range(0, len(data), 7):
+            reader.feed_data(data[i:i + 7])
+        reader.feed_eof()
+        first = await read_frame(reader)
+        with pytest.raises(MalformedFrame):
+            await read_frame(reader)
+        second = await read_frame(reader)
+        end = await read_frame(reader)
+
+        truncated = asyncio.StreamReader()
+        truncated.feed_data(encode_frame({"n": 3}, b"abc")[:-1])
+        truncated.feed_eof()
+        with pytest.raises(FrameError):
+            await read_frame(truncated)
+        oversized = asyncio.StreamReader()
+        oversized.feed_data(encode_frame({}, b"x" * 100))
+        with pytest.raises(FrameError):
+            await read_frame(oversized, max_attachment=99)
+        return first, second, end
+
+    first, second, end = asyncio.run(scenario())
+    assert first == ({"n": 1}, b"\xff\xd8" * 5000)
+    assert second == ({"n": 2}, None) and end is None
+
+
+@pytest.mark.unit
+def test_capture_fans_out_and_reassembles_every_image(coordinator):
+    received = {}
+    coordinator.add_image_callback(lambda header, data: received.setdefault(header["device_id"], {}).update({header["index"]: data}))
+    images = {f"phone-{i}": [_jpeg(10 * i + k) for k in range(3)] for i in range(3)}
+    devices = [FakeDevice(device_id, frames, seed=n) for n, (device_id, frames) in enumerate(images.items())]
+    devices.append(FakeDevice("phone-failing", [_jpeg(99)], behaviour="fail", seed=7))
+    devices.append(FakeDevice("phone-silent", [], behaviour="silent", seed=8))
+
+    async def scenario():
+        tasks = [asyncio.create_task(device.run(coordinator.coordination_port)) for device in devices]
+        await _wait_for(lambda: len(coordinator.client_connections) == len(devices))
+        assert coordinator.create_calibration_session("s1", PatternType.CHESSBOARD, target_images_per_camera=3, quality_threshold=0.5)
+        coordinator.start_calibration_session("s1")
+        summary = await asyncio.to_thread(coordinator.request_capture, "s1", {"count": 3}, None, 1.0)
+        coordinator.stop_coordination_server()
+        await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5.0)
+        return summary
+
+    summary = asyncio.run(scenario())
+    assert set(summary["responses"]) == set(images) | {"phone-failing"}
+    assert summary["failed"] == {"phone-failing": "lens cap on"}
+    assert summary["timed_out"] == ["phone-silent"] and not summary["success"]
+    for device_id, frames in images.items():
+        assert received[device_id] == dict(enumerate(frames))
+        assert len(coordinator.active_sessions["s1"].collected_images[f"{device_id}_rgb"]) == 3
+    assert all(device.commands[0]["command_type"] == "start_calibration" for device in devices)
+
+
+@pytest.mark.unit
+def test_oversized_frame_drops_only_that_client(coordinator):
+    async def scenario():
+        good = FakeDevice("phone-good", [_jpeg(1)])
+        good_task = asyncio.create_task(good.run(coordinator.coordination_port))
+        reader, writer = await asyncio.open_connection("127.0.0.1", coordinator.coordination_port)
+        writer.write(encode_frame({"type": "device_registration", "device_id": "phone-bad", "device_name": "bad", "device_type": "android"}))
+        await _wait_for(lambda: len(coordinator.client_connections) == 2)
+        # Declares an attachment beyond the coordinator's limit
+        writer.write(encode_frame({"type": "image_data"})[:4] + (8 << 20).to_bytes(4, "big") + b"{}")
+        await writer.drain()
+        await _wait_for(lambda: coordinator.connected_devices["phone-bad"].status == "disconnected")
+        assert await reader.read() == b""
+        coordinator.create_calibration_session("s2", PatternType.CHESSBOARD, target_images_per_camera=1)
+        summary = await asyncio.to_thread(coordinator.request_capture, "s2", None, None, 2.0)
+        coordinator.stop_coordination_server()
+        await asyncio.wait_for(good_task, 5.0)
+        return summary
+
+    summary = asyncio.run(scenario())
+    assert summary["success"] and list(summary["responses"]) == ["phone-good"]
+    assert coordinator.request_capture("s2") is None
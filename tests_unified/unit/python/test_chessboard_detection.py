@@ -0,0 +1,126 @@
+"""
+Tests for coarse-to-fine, parallel and cached chessboard detection.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from PythonApp.calibration.calibration import CalibrationManager
+from PythonApp.calibration.pattern_detection import (
+    DEFAULT_CRITERIA,
+    DETECTION_FLAGS,
+    ChessboardDetector,
+    detect_chessboard,
+)
+
+PATTERN = (9, 6)
+
+
+def _board_view(width, height, tilt=0.0, seed=0):
+    """A blurred, noisy chessboard seen under a perspective tilt."""
+    square = 40
+    cols, rows = PATTERN[0] + 1, PATTERN[1] + 1
+    board = np.full(((rows + 2) * square, (cols + 2) * square), 255, np.uint8)
+    for r in range(rows):
+        for c in range(cols):
+            if (r + c) % 2 == 0:
+                board[(r + 1) * square:(r + 2) * square, (c + 1) * square:(c + 2) * square] = 0
+    h, w = board.shape
+    target = np.float32([
+        [width * (0.2 + tilt), height * 0.15],
+        [width * 0.75, height * (0.2 - tilt / 2)],
+        [width * (0.8 - tilt), height * 0.85],
+        [width * 0.25, height * (0.8 + tilt / 2)],
+    ])
+    transform = cv2.getPerspectiveTransform(np.float32([[0, 0], [w, 0], [w, h], [0, h]]), target)
+    image = cv2.warpPerspective(board, transform, (width, height), flags=cv2.INTER_AREA, borderValue=128)
+    noise = np.random.default_rng(seed).integers(0, 20, image.shape, dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.add(image, noise), (5, 5), 1.5)
+
+
+def _clutter(width, height, seed=1):
+    noise = np.random.default_rng(seed).integers(0, 256, (height, width), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (31, 31), 10)
+
+
+def _legacy_detect(grey):
+    found, corners = cv2.findChessboardCorners(grey, PATTERN, DETECTION_FLAGS)
+    if not found:
+        return False, None
+    return True, cv2.cornerSubPix(grey, corners, (11, 11), (-1, -1), DEFAULT_CRITERIA)
+
+
+@pytest.mark.unit
+def test_coarse_to_fine_matches_full_resolution_refinement():
+    image = _board_view(3840, 2160)
+    found, corners = detect_chessboard(image, PATTERN)
+    legacy_found, legacy_corners = _legacy_detect(image)
+    assert found and legacy_found
+    assert corners.shape == (54, 1, 2)
+    assert np.abs(corners.reshape(-1, 2) - legacy_corners.reshape(-1, 2)).max() < 0.05
+
+    assert detect_chessboard(_clutter(3840, 2160), PATTERN) == (False, None)
+    # Small frames take the full-resolution path unchanged
+    small = _board_view(640, 480)
+    found, corners = detect_chessboard(small, PATTERN)
+    assert found and np.array_equal(corners.reshape(-1, 2), _legacy_detect(small)[1].reshape(-1, 2))
+
+
+@pytest.mark.unit
+def test_detect_many_keeps_order_and_caches_by_content():
+    images = [_board_view(1600, 900, tilt=0.02 * i, seed=i) for i in range(4)] + [_clutter(1600, 900)]
+    detector = ChessboardDetector(workers=4)
+    results = detector.detect_many(images, PATTERN)
+    assert [found for found, _ in results] == [True, True, True, True, False]
+    assert detector.cache.misses == 5 and detector.cache.hits == 0
+
+    # Same content, new arrays: every detection comes from the cache
+    again = detector.detect_many([image.copy() for image in images[1:]], PATTERN)
+    assert detector.cache.hits == 4
+    assert all(np.array_equal(a[1], b[1]) for a, b in zip(results[1:4], again[:3]))
+    again[0][1][:] = 0
+    assert detector.detect(images[1], PATTERN)[1].any()
+    detector.detect(images[1], (7, 6))
+    assert detector.cache.misses == 6
+
+
+@pytest.mark.unit
+def test_detect_files_in_worker_processes(tmp_path):
+    paths = []
+    for i, image in enumerate([_board_view(1600, 900), _clutter(1600, 900), _board_view(1600, 900, tilt=0.05)]):
+        path = tmp_path / f"frame_{i}.png"
+        cv2.imwrite(str(path), image)
+        paths.append(path)
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    paths.append(tmp_path / "broken.png")
+
+    detector = ChessboardDetector(workers=2)
+    results = detector.detect_files(paths, PATTERN)
+    assert [(found, size) for found, _, size in results] == [
+        (True, (1600, 900)), (False, (1600, 900)), (True, (1600, 900)), (False, None)
+    ]
+    assert np.abs(results[0][1] - detect_chessboard(_board_view(1600, 900), PATTERN)[1]).max() < 1e-3
+    assert len(detector.cache) == 3
+    detector.detect_files(paths[:3], PATTERN)
+    assert detector.cache.hits == 3
+
+
+@pytest.mark.unit
+def test_complete_calibration_reuses_detections_after_dropping_frames(tmp_path):
+    for i in range(12):
+        cv2.imwrite(str(tmp_path / f"view_{i:02d}_rgb.png"), _board_view(1280, 720, tilt=0.012 * i - 0.06, seed=i))
+    manager = CalibrationManager()
+    manager.detector.workers = 2
+    rgb_images, thermal_images = manager.load_calibration_images_from_directory(str(tmp_path), rgb_pattern="*rgb*.png")
+    assert len(rgb_images) == 12 and thermal_images == []
+    misses = manager.detector.cache.misses
+    assert misses == 12
+
+    results = manager.perform_complete_calibration(rgb_images)
+    assert results["success"] and results["rgb_calibration"]["camera_matrix"] is not None
+    assert manager.detector.cache.misses == misses
+
+    assert manager.perform_complete_calibration(rgb_images[1:])["success"]
+    assert manager.detector.cache.misses == misses
+    assert manager.detector.cache.hits >= 11
@@ -0,0 +1,128 @@
+"""
+Tests for the write-behind atomic JSON store behind ConfigurationManager.
+"""
+
+import json
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from PythonApp.config.config_store import ConfigStoreError, JsonConfigStore
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.mark.unit
+def test_burst_of_changes_is_coalesced(tmp_path):
+    store = JsonConfigStore(tmp_path / "app.json", debounce=0.1)
+    for value in range(50):
+        store.set("preview_fps", value)
+    assert store.get("preview_fps") == 49
+    assert _wait_until(lambda: not store.dirty)
+    assert store.flush_count <= 2
+    document = json.loads((tmp_path / "app.json").read_text())
+    assert document == {"schema_version": 1, "data": {"preview_fps": 49}}
+    store.close()
+
+
+@pytest.mark.unit
+def test_crash_mid_flush_keeps_previous_version(tmp_path):
+    path = tmp_path / "device_configs.json"
+    script = textwrap.dedent(
+        f"""
+        import os, sys
+        sys.path.insert(0, {str(REPO_ROOT)!r})
+        from PythonApp.config.config_store import JsonConfigStore
+        store = JsonConfigStore({str(path)!r}, debounce=60)
+        store.set("phone_1", {{"port": 9000}})
+        store.flush()
+        def crash(f, payload):
+            f.write(payload[: len(payload) // 2])
+            f.flush()
+            os._exit(1)
+        store._write_payload = crash
+        store.set("phone_1", {{"port": 9100}})
+        store.flush()
+        """
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, timeout=30)
+    assert result.returncode == 1, result.stderr.decode()
+    reloaded = JsonConfigStore(path)
+    assert reloaded.loaded_from == path
+    assert reloaded.get("phone_1") == {"port": 9000}
+
+
+@pytest.mark.unit
+def test_corrupt_document_falls_back_to_backup(tmp_path):
+    path = tmp_path / "sessions.json"
+    store = JsonConfigStore(path, debounce=60)
+    for version in range(1, 4):
+        store.set("version", version)
+        store.flush()
+    assert [json.loads(p.read_text())["data"]["version"] for p in store.backup_paths()[:2]] == [2, 1]
+    path.write_text('{"schema_version": 1, "data": {"vers')
+    reloaded = JsonConfigStore(path)
+    assert reloaded.loaded_from == store.backup_paths()[0]
+    assert reloaded.get("version") == 2
+
+
+@pytest.mark.unit
+def test_legacy_files_are_migrated(tmp_path):
+    path = tmp_path / "app_settings.json"
+    path.write_text(json.dumps({"preview_scale": 0.5}))
+    migrations = {1: lambda data: {**data, "preview_scale": int(data["preview_scale"] * 100)}}
+    store = JsonConfigStore(path, schema_version=2, migrations=migrations)
+    assert store.get("preview_scale") == 50
+    path.write_text(json.dumps({"schema_version": 3, "data": {}}))
+    with pytest.raises(ConfigStoreError):
+        store._migrate(json.loads(path.read_text()))
+
+
+@pytest.mark.unit
+def test_subscribers_receive_changes(tmp_path):
+    store = JsonConfigStore(tmp_path / "app.json", debounce=60)
+    everything, fps_only = [], []
+    unsubscribe = store.subscribe(lambda *change: everything.append(change))
+    store.subscribe(lambda *change: fps_only.append(change), key="preview_fps")
+    store.set("preview_fps", 15)
+    store.set("preview_fps", 15)
+    store.set("log_level", "INFO")
+    store.delete("log_level")
+    unsubscribe()
+    store.set("preview_fps", 30)
+    assert everything == [
+        ("preview_fps", None, 15),
+        ("log_level", None, "INFO"),
+        ("log_level", "INFO", None),
+    ]
+    assert fps_only == [("preview_fps", None, 15), ("preview_fps", 15, 30)]
+
+
+@pytest.mark.unit
+def test_configuration_manager_persists_through_store(tmp_path):
+    from PythonApp.config.configuration_manager import ConfigurationManager, DeviceConfig
+
+    manager = ConfigurationManager(str(tmp_path), write_delay=60)
+    changes = []
+    manager.subscribe("app_settings", lambda *change: changes.append(change), key="theme")
+    device = DeviceConfig("phone_1", "android", "10.0.0.2", 9000, ["rgb"], {}, "now")
+    assert manager.save_device_configuration(device)
+    for value in ("dark", "light"):
+        assert manager.update_app_setting("theme", value)
+    assert changes == [("theme", None, "dark"), ("theme", "dark", "light")]
+    manager.close()
+
+    reloaded = ConfigurationManager(str(tmp_path))
+    assert reloaded.get_device_configuration("phone_1") == device
+    assert reloaded.get_app_setting("theme") == "light"
@@ -0,0 +1,71 @@
+"""
+Tests for the buffered stimulus event log used by EnhancedTimingLogger.
+"""
+
+import time
+
+import pytest
+
+from PythonApp.utils.event_log import BufferedEventLog, ClockCalibration, read_event_log
+
+
+@pytest.fixture
+def calibration():
+    clock = ClockCalibration()
+    clock.calibrate(samples=8, spacing_s=0.001)
+    return clock
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("fmt", ["ndjson", "binary"])
+def test_events_round_trip_with_header_and_footer(tmp_path, calibration, fmt):
+    path = tmp_path / f"log.{fmt}"
+    log = BufferedEventLog(
+        str(path), header={"experiment_info": {"stimulus_file": "a.mp4"}}, fmt=fmt,
+        calibration=calibration,
+    )
+    log.log("stimulus_start", video_duration_ms=60_000, frame_rate=30.0)
+    stamps = [log.log("event_marker", label=f"m{i}", video_position_ms=i * 10) for i in range(5)]
+    log.log("stimulus_end", label="completed", video_position_ms=60_000)
+    log.close(footer={"end_reason": "completed"})
+
+    result = read_event_log(str(path))
+    assert result["header"]["experiment_info"]["stimulus_file"] == "a.mp4"
+    assert result["footer"]["event_count"] == 7
+    assert result["footer"]["end_reason"] == "completed"
+    events = result["events"]
+    assert len(events) == 7
+    if fmt == "binary":
+        assert list(events["perf_ns"][1:6]) == stamps
+        assert events["label"][3] == b"m2"
+        assert events["video_position_ms"][5] == 40
+    else:
+        assert [e["perf_ns"] for e in events[1:6]] == stamps
+        assert events[0]["event_type"] == "stimulus_start"
+        assert events[0]["frame_rate"] == 30.0
+        assert events[3]["label"] == "m2"
+        assert events[-1]["event_type"] == "stimulus_end"
+
+
+@pytest.mark.unit
+def test_wall_clock_mapping_tracks_time_time(calibration):
+    perf_ns = time.perf_counter_ns()
+    wall_ns = time.time_ns()
+    assert abs(int(calibration.to_wall_ns(perf_ns)) - wall_ns) < 2_000_000
+    info = calibration.describe()
+    assert info["samples"] == 8
+    assert abs(info["drift_ppm"]) < 1000
+
+
+@pytest.mark.unit
+def test_ring_wraps_and_stalls_instead_of_dropping(tmp_path, calibration):
+    path = tmp_path / "small.ndjson"
+    log = BufferedEventLog(
+        str(path), capacity=8, flush_interval=0.001, calibration=calibration
+    )
+    for i in range(100):
+        log.log("event_marker", label=str(i))
+    log.close()
+    events = read_event_log(str(path))["events"]
+    assert [e["seq"] for e in events] == list(range(100))
+    assert [e["label"] for e in events][-3:] == ["97", "98", "99"]
@@ -0,0 +1,166 @@
+"""
+Headless tests for the asynchronous file preview pipeline behind FileBrowserDialog.
+"""
+
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from PythonApp.gui.file_browser_dialog import FileBrowserDialog
+from PythonApp.gui.preview_service import (
+    CV2_AVAILABLE,
+    FilePreviewService,
+    ThumbnailDiskCache,
+    read_text_preview,
+)
+
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def _run_until(app, predicate, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return predicate()
+
+
+def _save_image(path, width=1200, height=800):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(0x2266AA)
+    assert image.save(str(path))
+
+
+@pytest.mark.unit
+def test_text_preview_reads_only_head_and_tail(tmp_path):
+    path = tmp_path / "big.csv"
+    with open(path, "w") as f:
+        f.write("timestamp_ms,gsr_us\n")
+        for i in range(200_000):
+            f.write(f"{i},{i * 0.25}\n")
+
+    preview = read_text_preview(str(path), head_bytes=1024, tail_bytes=512)
+
+    assert preview["truncated"]
+    assert preview["text"].startswith("timestamp_ms,gsr_us\n0,0.0\n")
+    assert preview["text"].rstrip().endswith("199999,49999.75")
+    assert "100000," not in preview["text"]
+    assert len(preview["text"]) < 2000
+    assert read_text_preview(str(tmp_path / "big.csv"), head_bytes=10**9)["truncated"] is False
+
+
+@pytest.mark.unit
+def test_thumbnail_cache_is_keyed_by_mtime_and_bounded(app, tmp_path):
+    source = tmp_path / "frame.png"
+    _save_image(source)
+    cache = ThumbnailDiskCache(tmp_path / "thumbs", max_bytes=10_000)
+    key = cache.key(str(source), os.stat(source))
+    thumbnail = QImage(64, 64, QImage.Format_RGB32)
+    thumbnail.fill(0)
+    cache.put(key, thumbnail)
+    assert cache.get(key).size() == QSize(64, 64)
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.key(str(source), os.stat(source)) != key
+
+    noisy = QImage(200, 200, QImage.Format_RGB32)
+    noisy.fill(0)
+    for i in range(8):
+        for y in range(200):
+            for x in range(0, 200, 7):
+                noisy.setPixel(x, y, (x * 7919 + y * 104729 + i * 13) & 0xFFFFFF)
+        cache.put(f"entry{i}", noisy)
+    assert cache.total_bytes() <= 10_000
+    assert cache.get("entry7") is not None
+    assert cache.get(key) is None
+
+
+@pytest.mark.unit
+def test_service_caches_thumbnails_and_drops_cancelled_requests(app, tmp_path):
+    first, second = tmp_path / "a.png", tmp_path / "b.png"
+    _save_image(first)
+    _save_image(second, 300, 200)
+    service = FilePreviewService(ThumbnailDiskCache(tmp_path / "thumbs"), max_workers=1)
+    delivered = []
+    service.preview_ready.connect(lambda request_id, path, result: delivered.append((request_id, path, result)))
+    try:
+        cancelled_id = service.request(str(first))
+        wanted_id = service.request(str(second))
+        assert _run_until(app, lambda: delivered)
+        app.processEvents()
+        assert [entry[0] for entry in delivered] == [wanted_id]
+        assert cancelled_id != wanted_id
+        assert service.cancelled == 1
+        result = delivered[0][2]
+        assert result["kind"] == "image" and not result["cached"]
+        assert result["image"].size() == QSize(300, 200)
+
+        delivered.clear()
+        service.request(str(first))
+        assert _run_until(app, lambda: delivered)
+        assert delivered[0][2]["image"].size() == QSize(600, 400)
+        delivered.clear()
+        service.request(str(first))
+        assert _run_until(app, lambda: delivered)
+        assert delivered[0][2]["cached"]
+        assert service.cache_hits == 1
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not CV2_AVAILABLE, reason="OpenCV not available")
+def test_video_preview_decodes_one_representative_frame(app, tmp_path):
+    import cv2
+    import numpy as np
+
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (160, 120))
+    for i in range(30):
+        writer.write(np.full((120, 160, 3), i * 8, dtype=np.uint8))
+    writer.release()
+    service = FilePreviewService(ThumbnailDiskCache(tmp_path / "thumbs"))
+    delivered = []
+    service.preview_ready.connect(lambda request_id, path, result: delivered.append(result))
+    try:
+        service.request(str(path))
+        assert _run_until(app, lambda: delivered)
+        result = delivered[0]
+        assert result["kind"] == "video"
+        assert result["frame_count"] == 30
+        assert result["image"].size() == QSize(160, 120)
+        # Seeking to 10% of the clip skips the black first frame
+        assert QImage(result["image"]).pixelColor(80, 60).red() > 0
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.unit
+def test_directory_listing_streams_in_chunks(app, tmp_path):
+    for i in range(450):
+        (tmp_path / f"file_{i:04d}.log").write_text("x")
+    for i in range(3):
+        (tmp_path / f"dir_{i}").mkdir()
+    dialog = FileBrowserDialog(initial_path=str(tmp_path))
+    try:
+        assert _run_until(app, lambda: dialog.status_label.text() == "3 folders, 450 files")
+        assert dialog.file_list.count() == 453
+        assert all(dialog.file_list.item(i).text().startswith("[FOLDER]") for i in range(3))
+        item = dialog.file_list.item(3)
+        dialog.on_file_selected(item)
+        assert _run_until(app, lambda: dialog.preview_widget.preview_label.text() == "x")
+    finally:
+        dialog.done(0)
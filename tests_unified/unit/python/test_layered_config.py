@@ -0,0 +1,115 @@
+"""
+Tests for the layered, hot-reloadable SystemConfiguration.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from PythonApp.config.system_configuration import DeviceType, SystemConfiguration, ThesisVerifiedConfigurations
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+    # Make sure the modification time moves even on coarse-grained filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.mark.unit
+def test_layers_apply_in_order_and_explain_reports_source(tmp_path):
+    site = tmp_path / "site.json"
+    _write(site, {"network": {"streaming_port": 9100}, "runtime": {"preview_fps": 20}})
+    config = SystemConfiguration(
+        site_config_path=site,
+        session_override={"runtime.preview_fps": 25},
+        environ={"MSR_CONFIG__RUNTIME__PREVIEW_FPS": "30", "MSR_CONFIG__SECURITY__USE_TLS": "yes"},
+    )
+
+    assert config.network.streaming_port == 9100
+    assert config.runtime.preview_fps == 30
+    assert config.security.use_tls is True
+
+    explained = config.explain("runtime.preview_fps")
+    assert explained["layer"] == "environment"
+    assert [entry["layer"] for entry in explained["chain"]] == ["defaults", "site", "session", "environment"]
+    assert [entry["value"] for entry in explained["chain"]] == [15, 20, 25, 30]
+
+    diff = config.diff()
+    assert diff["network.streaming_port"] == {"base": 9003, "effective": 9100, "layer": "site"}
+    assert "security.use_tls" not in diff
+
+
+@pytest.mark.unit
+def test_invalid_values_are_rejected_at_load(tmp_path):
+    site = tmp_path / "site.json"
+    _write(site, {
+        "network": {"pc_controller_port": 70000, "streaming_port": "not-a-port"},
+        "runtime": {"log_level": "CHATTY", "frame_buffer_size": 64},
+        "unknown": {"key": 1},
+    })
+    config = SystemConfiguration(site_config_path=site, environ={})
+
+    assert config.network.pc_controller_port == 9000
+    assert config.network.streaming_port == 9003
+    assert config.runtime.log_level == "INFO"
+    assert config.runtime.frame_buffer_size == 64
+    errors = config.get_layer_errors()["site"]
+    assert len(errors) == 4
+    assert any("unknown.key" in error for error in errors)
+
+
+@pytest.mark.unit
+def test_device_overrides_do_not_touch_shared_defaults():
+    config = SystemConfiguration(session_override={"devices": {"topdon_tc001": {"sampling_rate_hz": 50}}}, environ={})
+
+    assert config.get_device_config(DeviceType.TOPDON_TC001).sampling_rate_hz == 50.0
+    assert ThesisVerifiedConfigurations.THERMAL_CAMERA_CONFIG.sampling_rate_hz == 25.0
+    assert any("Thermal sampling rate" in issue for issue in config.validate_configuration())
+
+
+@pytest.mark.unit
+def test_hot_reload_applies_safe_keys_and_rejects_unsafe_ones_while_recording(tmp_path):
+    session = tmp_path / "session.json"
+    _write(session, {})
+    config = SystemConfiguration(session_override=session, environ={})
+    changes = []
+    config.subscribe(lambda key, old, new: changes.append((key, old, new)))
+
+    config.set_recording_active(True)
+    _write(session, {"runtime": {"preview_fps": 5, "sample_buffer_size": 2048}, "network": {"streaming_port": 9500}})
+    assert config.check_for_changes()
+
+    assert config.runtime.preview_fps == 5
+    assert config.runtime.sample_buffer_size == 2048
+    assert config.network.streaming_port == 9003
+    assert ("runtime.preview_fps", 15, 5) in changes
+    assert all(key.startswith("runtime.") for key, _, _ in changes)
+    assert config.layers.rejected_changes[-1]["key"] == "network.streaming_port"
+    assert config.explain("network.streaming_port")["layer"] == "defaults"
+
+    config.set_recording_active(False)
+    assert config.network.streaming_port == 9500
+    assert ("network.streaming_port", 9003, 9500) in changes
+    assert not config.check_for_changes()
+
+
+@pytest.mark.unit
+def test_watcher_thread_picks_up_site_file_changes(tmp_path):
+    site = tmp_path / "site.json"
+    config = SystemConfiguration(site_config_path=site, environ={})
+    seen = []
+    config.subscribe(lambda key, old, new: seen.append(new), "runtime.frame_buffer_size")
+    config.start_watching(interval=0.05)
+    try:
+        _write(site, {"runtime": {"frame_buffer_size": 256}})
+        deadline = time.monotonic() + 3.0
+        while not seen and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        config.stop_watching()
+
+    assert seen == [256]
+    assert config.runtime.frame_buffer_size == 256
@@ -0,0 +1,173 @@
+"""
+Tests for the lazy-import startup path used by main.py and main_with_web.py.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+from PythonApp.startup import BackendLoader, StartupTask
+from PythonApp.utils.lazy_import import LazyAttributes, format_import_profile, profile_imports
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def _run_until(app, predicate, timeout_s=10.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return predicate()
+
+
+def _env():
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+@pytest.mark.unit
+def test_core_window_module_does_not_import_cv2_or_scipy():
+    script = (
+        "import json, sys; import PythonApp.gui.main_window; "
+        "print(json.dumps({m: m in sys.modules for m in ('cv2', 'scipy', 'numpy')}))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, env=_env(), cwd=REPO_ROOT
+    )
+    assert completed.returncode == 0, completed.stderr
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert loaded == {"cv2": False, "scipy": False, "numpy": False}
+
+
+@pytest.mark.unit
+def test_import_profile_reports_importtime_breakdown():
+    rows = profile_imports(["PythonApp.gui.main_window"], env=_env(), cwd=str(REPO_ROOT))
+    modules = {row["module"]: row for row in rows}
+    assert "PythonApp.gui.main_window" in modules
+    assert modules["PythonApp.gui.main_window"]["depth"] == 0
+    assert modules["PythonApp.gui.main_window"]["cumulative_us"] >= modules["PythonApp.gui.main_window"]["self_us"]
+    report = format_import_profile(rows, watch=("cv2", "scipy"))
+    assert "cv2: not loaded" in report
+    assert "scipy: not loaded" in report
+
+
+@pytest.mark.unit
+def test_lazy_attributes_resolve_once_and_tolerate_missing_modules():
+    attributes = LazyAttributes({
+        "OrderedDict": (("no_such_module_for_lazy_test", None), ("collections", None)),
+        "Missing": (("no_such_module_for_lazy_test", None),),
+    })
+    assert not attributes.is_loaded("OrderedDict")
+    from collections import OrderedDict
+    assert attributes.getattr("demo", "OrderedDict") is OrderedDict
+    assert attributes.getattr("demo", "Missing") is None
+    assert attributes.preload() == {"OrderedDict": True, "Missing": False}
+    with pytest.raises(AttributeError):
+        attributes.getattr("demo", "Unknown")
+
+
+@pytest.mark.unit
+def test_backend_loader_reports_progress_and_stops_on_critical_failure(app):
+    calls = []
+
+    def fail():
+        raise RuntimeError("insecure")
+
+    loader = BackendLoader([
+        StartupTask("first", lambda: calls.append("first") or 1),
+        StartupTask("optional", fail),
+        StartupTask("security", fail, critical=True),
+        StartupTask("never", lambda: calls.append("never")),
+    ])
+    progress, aborted, finished = [], [], []
+    loader.progress.connect(lambda done, total, label: progress.append((done, total, label)))
+    loader.loading_aborted.connect(lambda label, error: aborted.append((label, str(error))))
+    loader.loading_finished.connect(finished.append)
+    loader.start()
+    assert _run_until(app, lambda: aborted)
+    loader.wait(2000)
+    app.processEvents()
+
+    assert calls == ["first"]
+    assert aborted == [("security", "insecure")]
+    assert not finished
+    assert [p[2] for p in progress] == ["first", "optional", "security"]
+    assert isinstance(loader.results["optional"], RuntimeError)
+
+
+@pytest.mark.unit
+def test_window_shell_shows_before_backends_are_created(app):
+    from PythonApp.gui import main_window as main_window_module
+
+    window = main_window_module.MainWindow(defer_backends=True)
+    try:
+        window.show()
+        app.processEvents()
+        assert not window.backends_ready
+        assert window.webcam_capture is None and window.session_manager is None
+
+        loader = BackendLoader([StartupTask("Loading services", main_window_module.BACKENDS.preload)])
+        loader.loading_finished.connect(lambda results: window.init_backends())
+        loader.start()
+        assert _run_until(app, lambda: window.backends_ready)
+        loader.wait(2000)
+        assert window.session_manager is not None
+        assert loader.results["Loading services"]["SessionManager"]
+    finally:
+        window.performance_timer.stop()
+        window.preview_timer.stop()
+        window.close()
+
+
+@pytest.mark.unit
+def test_web_app_builds_non_qt_services_on_the_loader_thread(app, monkeypatch):
+    import threading
+
+    from PythonApp import main_with_web
+
+    threads = {}
+
+    def recorder(name):
+        class Service:
+            def __init__(self, **kwargs):
+                self.kwargs = kwargs
+                threads[name] = threading.current_thread()
+        return Service
+
+    services = ("SessionManager", "ShimmerManager", "AndroidDeviceManager", "JsonSocketServer")
+    fakes = {name: recorder(name) for name in services}
+    monkeypatch.setattr(main_with_web.COMPONENTS, "resolve", fakes.get)
+
+    application = main_with_web.EnhancedApplicationWithWebUI()
+    loader = BackendLoader([
+        StartupTask(main_with_web.BACKEND_SERVICES_TASK, application.create_backend_services)
+    ])
+    finished = []
+    loader.loading_finished.connect(finished.append)
+    loader.start()
+    assert _run_until(app, lambda: finished)
+    loader.wait(2000)
+
+    assert set(threads) == set(services)
+    assert all(thread is not threading.main_thread() for thread in threads.values())
+    assert application.session_manager is None
+    assert application.setup_backend_services(finished[0][main_with_web.BACKEND_SERVICES_TASK])
+    assert application.session_manager.kwargs == {"base_recordings_dir": "recordings"}
+    assert application.json_server.kwargs == {"host": "0.0.0.0", "port": 9000}
@@ -0,0 +1,136 @@
+"""
+Tests for the NumPy batching outlet layer of the LSL integration.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from PythonApp.network.lsl_integration import (
+    BatchingOutlet,
+    DefaultLSLStreams,
+    LSLStreamer,
+    MockPyLSL,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _streamer():
+    streamer = LSLStreamer(backend=MockPyLSL())
+    assert streamer.create_outlet("gsr", DefaultLSLStreams.shimmer_gsr_stream("dev", 512.0))
+    return streamer
+
+
+@pytest.mark.unit
+def test_samples_are_pushed_in_chunks_by_size_and_deadline():
+    clock = _Clock()
+    outlet = MockPyLSL.StreamOutlet(None)
+    batcher = BatchingOutlet(outlet, 4, max_samples=8, max_latency=0.010, clock=clock)
+
+    for i in range(20):
+        batcher.append([i, i + 0.5, 1.0, 90.0])
+        clock.now += 0.001
+    assert outlet.chunk_sizes == [8, 8]
+    assert batcher.pending == 4
+
+    # Nothing is due until the oldest buffered sample is 10 ms old
+    assert batcher.flush_if_due() == 0
+    clock.now += 0.007
+    assert batcher.flush_if_due() == 4
+    # A sample appended past the deadline flushes the buffer it lands in
+    batcher.append([0, 0, 0, 0])
+    clock.now += 0.011
+    batcher.append([1, 1, 1, 1])
+    assert outlet.chunk_sizes == [8, 8, 4, 2]
+
+    data = np.concatenate(outlet.chunks)
+    assert data.dtype == np.float32
+    assert data[:20, 0].tolist() == list(range(20))
+    stamps = np.concatenate(outlet.chunk_timestamps)
+    assert np.all(np.diff(stamps[:20]) > 0)
+    assert batcher.samples_pushed == 22 and batcher.chunks_pushed == 4
+
+
+@pytest.mark.unit
+def test_push_array_is_zero_copy_and_keeps_order():
+    clock = _Clock()
+    seen = []
+
+    class _Outlet(MockPyLSL.StreamOutlet):
+        def push_chunk(self, data, timestamps=None):
+            seen.append(data)
+            super().push_chunk(data, timestamps)
+
+    outlet = _Outlet(None)
+    batcher = BatchingOutlet(outlet, 4, max_samples=16, clock=clock)
+    batcher.append([9, 9, 9, 9])
+    block = np.arange(40, dtype=np.float32).reshape(10, 4)
+    assert batcher.push_array(block, np.arange(10.0)) == 10
+
+    assert outlet.chunk_sizes == [1, 10]
+    assert seen[1] is block
+    # Non-contiguous or differently typed input is converted once
+    batcher.push_array(np.arange(80, dtype=np.float64).reshape(10, 8)[:, ::2])
+    assert seen[2] is not block and seen[2].dtype == np.float32 and seen[2].flags.c_contiguous
+    with pytest.raises(ValueError):
+        batcher.push_array(np.zeros((3, 5)))
+
+
+@pytest.mark.unit
+def test_streamer_batches_push_sample_within_latency_bound():
+    streamer = _streamer()
+    outlet = streamer.outlets["gsr"]
+    assert streamer.enable_batching("gsr", max_samples=256, max_latency=0.010)
+    try:
+        # 512 Hz for 0.2 s in bursts, as a BLE callback would deliver them
+        for burst in range(20):
+            for i in range(5):
+                assert streamer.push_sample("gsr", [burst, i, 1.0, 80.0])
+            time.sleep(0.01)
+        assert not streamer.push_sample("gsr", [1.0, 2.0])
+        deadline = time.monotonic() + 1.0
+        while sum(outlet.chunk_sizes) < 100 and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        streamer.cleanup()
+
+    assert sum(outlet.chunk_sizes) == 100
+    assert len(outlet.chunk_sizes) < 40
+    assert outlet.samples == []
+    # Each chunk leaves within the latency bound of its oldest sample; the
+    # slack only absorbs scheduler jitter on a loaded machine
+    for stamps, pushed_at in zip(outlet.chunk_timestamps, outlet.push_times):
+        assert pushed_at - stamps[0] < 0.010 + 0.05
+
+
+@pytest.mark.unit
+def test_unbatched_streams_and_cleanup_flush():
+    streamer = _streamer()
+    outlet = streamer.outlets["gsr"]
+    assert streamer.push_sample("gsr", [1.0, 2.0, 3.0, 4.0])
+    assert streamer.push_chunk("gsr", np.ones((3, 4), dtype=np.float32))
+    assert streamer.push_chunk("gsr", [[1.0, 2.0, 3.0, 4.0]])
+    assert outlet.samples == [([1.0, 2.0, 3.0, 4.0], None)]
+    assert outlet.chunk_sizes == [3, 1]
+
+    assert streamer.enable_batching("gsr", max_samples=64, max_latency=5.0)
+    streamer.push_sample("gsr", [5.0, 6.0, 7.0, 8.0], timestamp=12.5)
+    assert streamer.flush() == 1
+    assert outlet.chunk_timestamps[-1].tolist() == [12.5]
+    streamer.push_sample("gsr", [5.0, 6.0, 7.0, 8.0])
+    streamer.cleanup()
+    assert outlet.chunk_sizes == [3, 1, 1, 1]
+    assert streamer.get_active_streams() == []
+
+    markers = LSLStreamer(backend=MockPyLSL())
+    markers.create_outlet("notes", DefaultLSLStreams.sync_markers_stream())
+    markers.stream_configs["notes"].channel_format = "string"
+    assert not markers.enable_batching("notes")
@@ -0,0 +1,105 @@
+"""
+Tests for the table-driven network message codec registry.
+"""
+
+import typing
+from dataclasses import dataclass
+
+import pytest
+
+from shared_protocols.data_structures import DeviceInfo, DeviceState, DeviceType, SensorSample
+from shared_protocols.message_codec import BinaryLayout, CodecRegistry, MessageValidationError
+from shared_protocols.network_protocol import (
+    MESSAGE_CODECS,
+    BaseMessage,
+    CalibrationMessage,
+    CommandMessage,
+    DataMessage,
+    DeviceStatusMessage,
+    ErrorMessage,
+    HeartbeatMessage,
+    MessageType,
+    ResponseMessage,
+    SessionControlMessage,
+    create_message_from_json,
+    create_standard_hello_message,
+)
+
+
+def _sample(i):
+    return SensorSample("shimmer-1", DeviceType.SHIMMER_GSR, 1000 + i, {"gsr": 1.5 + i})
+
+
+def _messages():
+    device = DeviceInfo("phone-1", DeviceType.ANDROID_PHONE, ["rgb", "thermal"])
+    return [
+        create_standard_hello_message(device),
+        DeviceStatusMessage(device_state=DeviceState.STREAMING, battery_level=80.0),
+        SessionControlMessage(action="start", session_id="s1"),
+        DataMessage(samples=[_sample(0)]),
+        DataMessage(samples=[_sample(i) for i in range(8)], batch_id="b1"),
+        CalibrationMessage(action="capture", pattern_info={"rows": 6}),
+        CommandMessage(command="ping"),
+        ResponseMessage(original_command="ping", success=True, result={}),
+        ErrorMessage(error_code="E001", error_message="missing"),
+        HeartbeatMessage(sequence=7, device_id="phone-1"),
+        BaseMessage(message_type=MessageType.GOODBYE),
+    ]
+
+
+@pytest.mark.unit
+def test_every_message_round_trips_through_json():
+    for message in _messages():
+        decoded = create_message_from_json(message.to_json())
+        assert type(decoded) is type(message)
+        assert decoded == message
+    hello = create_message_from_json(_messages()[0].to_json())
+    assert isinstance(hello.device_info, DeviceInfo) and hello.device_id == "phone-1"
+    batch = create_message_from_json(_messages()[4].to_json())
+    assert batch.message_type is MessageType.DATA_BATCH and isinstance(batch.samples[3], SensorSample)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("payload, reason", [
+    ("not json", "Expecting value"),
+    ("[1, 2]", "Expected a JSON object"),
+    ('{"message_type": "bogus"}', "not a valid MessageType"),
+    ('{"message_type": "command"}', "missing command"),
+    ('{"message_type": "command", "command": 3}', "expected str"),
+    ('{"message_type": "command", "command": "ping", "extra": 1}', "no field extra"),
+    ('{"message_type": "device_status", "device_state": "melted"}', "device_state"),
+    ('{"message_type": "response", "original_command": "x", "success": null}', "may not be null"),
+])
+def test_invalid_payloads_become_error_messages(payload, reason):
+    message = create_message_from_json(payload)
+    assert isinstance(message, ErrorMessage) and message.error_code == "INVALID_MESSAGE"
+    assert reason in message.error_message
+
+
+@pytest.mark.unit
+def test_registry_is_extensible_and_supports_binary_layouts():
+    registry = CodecRegistry(MessageType)
+
+    @registry.register(MessageType.SESSION_STATUS, binary_layout=BinaryLayout([("elapsed", "f")], strings=("label",)))
+    @dataclass
+    class StatusMessage:
+        message_type: MessageType
+        elapsed: float
+        label: typing.Optional[str] = None
+
+    with pytest.raises(ValueError):
+        registry.register(MessageType.SESSION_STATUS)(StatusMessage)
+    message = registry.decode({"message_type": "session_status", "elapsed": 2, "label": "réglage"})
+    assert message == StatusMessage(MessageType.SESSION_STATUS, 2, "réglage")
+    assert registry.from_bytes(registry.to_bytes(message)) == StatusMessage(MessageType.SESSION_STATUS, 2.0, "réglage")
+    with pytest.raises(MessageValidationError):
+        registry.decode({"message_type": "goodbye"})
+
+    heartbeat = HeartbeatMessage(sequence=42, device_id="phone-1", session_id=None)
+    frame = MESSAGE_CODECS.to_bytes(heartbeat)
+    assert frame[0] == MESSAGE_CODECS.type_ids[MessageType.HEARTBEAT] and len(frame) == 1 + 12 + 2 + 7 + 2
+    assert MESSAGE_CODECS.from_bytes(frame) == heartbeat
+    with pytest.raises(MessageValidationError):
+        MESSAGE_CODECS.from_bytes(frame + b"\0")
+    with pytest.raises(MessageValidationError):
+        MESSAGE_CODECS.to_bytes(CommandMessage(command="ping"))
@@ -0,0 +1,97 @@
+"""
+Tests for the ring-buffer metrics store behind UnifiedSystemMonitor.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from shared_protocols.metrics_store import SAMPLE_FIELDS, MetricsStore
+from shared_protocols.system_monitoring import PerformanceMetrics, UnifiedSystemMonitor
+
+
+def _sample(cpu, memory_percent=50.0, threads=10):
+    values = dict.fromkeys(SAMPLE_FIELDS, 0.0)
+    values.update(cpu_percent=cpu, memory_percent=memory_percent, thread_count=threads, gpu_usage=None)
+    return [values[name] for name in SAMPLE_FIELDS]
+
+
+@pytest.mark.unit
+def test_ring_keeps_capacity_and_answers_ranges_in_order():
+    store = MetricsStore(raw_capacity=100, rollups=((10.0, 5),))
+    for t in range(250):
+        store.append(1000.0 + t, _sample(cpu=t))
+    assert len(store) == 100
+    assert store.latest()["cpu_percent"] == 249
+    rows = store.range(1195.0, 1204.5)
+    assert rows["cpu_percent"].tolist() == list(range(195, 205))
+    assert store.range(0.0, 1149.0).size == 0
+    assert np.isnan(store.latest()["gpu_usage"])
+
+    # Ten-second buckets keep the last five complete buckets
+    buckets = store.rollup(10.0, 0.0, 2000.0)
+    assert buckets["timestamp"].tolist() == [1190.0, 1200.0, 1210.0, 1220.0, 1230.0]
+    assert buckets["count"].tolist() == [10] * 5
+    assert buckets["cpu_percent_min"][0] == 190 and buckets["cpu_percent_max"][0] == 199
+    assert buckets["cpu_percent_mean"][0] == pytest.approx(194.5)
+
+    # A clock step backwards does not break the time order
+    store.append(900.0, _sample(cpu=1.0))
+    assert store.latest()["timestamp"] == 1249.0
+    with pytest.raises(ValueError):
+        store.rollup(1.0, 0.0, 1.0)
+
+
+@pytest.mark.unit
+def test_summaries_pick_a_resolution_that_covers_the_window():
+    store = MetricsStore(raw_capacity=600, rollups=((10.0, 360), (60.0, 1440)))
+    start = 10_000.0
+    for t in range(7200):
+        store.append(start + t, _sample(cpu=t % 100, memory_percent=40.0 + (t >= 3600) * 20))
+    now = start + 7199
+
+    recent = store.summarize(300, now)
+    assert recent["resolution"] == 0.0 and recent["count"] == 301
+    assert recent["memory_percent"]["mean"] == 60.0
+
+    hour = store.summarize(3600, now)
+    assert hour["resolution"] == 10.0
+    assert hour["cpu_percent"]["min"] == 0 and hour["cpu_percent"]["max"] == 99
+    two_hours = store.summarize(7200, now)
+    assert two_hours["resolution"] == 60.0
+    assert two_hours["count"] == 7200
+    assert two_hours["memory_percent"]["mean"] == pytest.approx(50.0)
+    assert two_hours["cpu_percent"]["mean"] == pytest.approx(np.mean(np.arange(7200) % 100))
+
+    # The bucket still being filled is part of rollup answers
+    store.append(now + 1, _sample(cpu=500))
+    assert store.summarize(7200, now + 1)["cpu_percent"]["max"] == 500
+
+
+@pytest.mark.unit
+def test_monitor_records_into_store_and_reports_health():
+    monitor = UnifiedSystemMonitor()
+    assert monitor.get_system_health_report() == {"status": "insufficient_data"}
+    now = time.time()
+    for i in range(600):
+        monitor.record_metrics(PerformanceMetrics(
+            timestamp=now - 599 + i, cpu_percent=90.0 if i >= 400 else 10.0, memory_mb=1000.0,
+            memory_percent=30.0, network_bytes_sent=i, network_bytes_recv=0, disk_io_read=0,
+            disk_io_write=0, thread_count=12, process_count=200,
+        ))
+
+    history = monitor.get_metrics_history(60)
+    assert 60 <= len(history) <= 61
+    assert isinstance(history[-1], PerformanceMetrics) and history[-1].network_bytes_sent == 599
+    assert history[-1].gpu_usage is None and isinstance(history[-1].thread_count, int)
+    assert len(monitor.metrics_history) == 600
+
+    report = monitor.get_system_health_report(window_seconds=600)
+    assert report["status"] == "warning"
+    assert report["averages_5min"]["cpu_percent"] == pytest.approx((100 * 10 + 200 * 90) / 300, abs=0.5)
+    assert report["summary"]["cpu_percent"]["min"] == 10.0
+    assert report["summary"]["count"] == 600
+
+    metrics = monitor._collect_metrics()
+    assert metrics.thread_count >= 1 and metrics.process_count > 0
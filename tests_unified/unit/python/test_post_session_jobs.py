@@ -0,0 +1,230 @@
+"""
+Tests for the SQLite-backed post-session job queue and merged session metadata writes.
+"""
+
+import json
+import threading
+import time
+import zipfile
+
+import pytest
+
+from PythonApp.error_handling.recovery_scheduler import BackoffPolicy
+from PythonApp.session.post_session_jobs import (
+    MANIFEST_FILENAME,
+    JobContext,
+    JobInterrupted,
+    PostSessionJobQueue,
+    PostSessionJobRunner,
+    run_package,
+)
+from PythonApp.session.session_manager import SessionManager
+from PythonApp.session.session_metadata import read_json, update_metadata_file
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _make_session(manager, files):
+    session = manager.create_session("jobs test")
+    folder = manager.get_session_folder()
+    for name, content in files.items():
+        path = folder / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    manager.end_session()
+    return session["session_id"], folder
+
+
+@pytest.mark.unit
+def test_queue_dedupes_claims_and_retries_with_backoff(tmp_path):
+    clock = _Clock()
+    queue = PostSessionJobQueue(tmp_path / "jobs.sqlite3", clock=clock)
+    job_id = queue.enqueue("package", "s1", tmp_path, {"a": 1}, max_attempts=2)
+    assert queue.enqueue("package", "s1", tmp_path, {"a": 1}) == job_id
+    assert queue.enqueue("package", "s1", tmp_path, {"a": 2}) != job_id
+
+    job = queue.claim("w0")
+    assert job.id == job_id and job.state == "running" and job.attempts == 1
+    assert queue.fail(job_id, "disk busy", retry_delay=30.0) == "queued"
+    other = queue.claim("w0")
+    assert other.id != job_id
+    queue.complete(other.id, {"ok": True})
+    assert queue.claim("w0") is None
+
+    clock.now += 31.0
+    job = queue.claim("w1")
+    assert job.id == job_id and job.attempts == 2
+    assert queue.fail(job_id, "disk busy", retry_delay=30.0) == "failed"
+    assert queue.get(job_id).error == "disk busy"
+    states = [event["state"] for event in queue.events_since(0) if event["job_id"] == job_id]
+    assert states == ["queued", "running", "queued", "running", "failed"]
+    queue.close()
+
+
+@pytest.mark.unit
+def test_interrupted_job_resumes_from_checkpoint_after_restart(tmp_path):
+    manager = SessionManager(str(tmp_path / "recordings"), use_job_processes=False)
+    session_id, folder = _make_session(manager, {"a.csv": b"1,2\n" * 100, "b.csv": b"3,4\n" * 50})
+    db_path = tmp_path / "recordings" / "post_session_jobs.sqlite3"
+
+    # First "run": the worker hashes a.csv, checkpoints, then the app dies
+    queue = PostSessionJobQueue(db_path)
+    job_id = queue.enqueue("integrity_manifest", session_id, folder)
+    job = queue.claim("crashed-worker")
+    stat = (folder / "a.csv").stat()
+    queue.save_checkpoint(job.id, {"files": {"a.csv": {"sha256": "from-checkpoint", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}}})
+    queue.close()
+
+    runner = PostSessionJobRunner(db_path, workers=1, use_processes=False, poll_interval=0.02)
+    runner.start()
+    try:
+        job = runner.wait_for(job_id, timeout=10)
+    finally:
+        runner.close()
+    assert job.state == "succeeded"
+    assert job.attempts == 2
+    manifest = json.loads((folder / MANIFEST_FILENAME).read_text())
+    assert manifest["files"]["a.csv"]["sha256"] == "from-checkpoint"
+    assert len(manifest["files"]["b.csv"]["sha256"]) == 64
+    assert "session_metadata.json" not in manifest["files"]
+
+
+@pytest.mark.unit
+def test_running_job_can_be_cancelled_and_reports_progress(tmp_path):
+    started = threading.Event()
+
+    def slow_handler(context):
+        step = 0
+        while True:
+            step += 1
+            context.progress(min(step / 1000, 0.99), f"step {step}")
+            started.set()
+            time.sleep(0.005)
+
+    manager = SessionManager(str(tmp_path / "recordings"), use_job_processes=False)
+    session_id, folder = _make_session(manager, {"data.csv": b"x"})
+    runner = PostSessionJobRunner(
+        tmp_path / "jobs.sqlite3", handlers={"slow": slow_handler}, workers=1, use_processes=False, poll_interval=0.02
+    )
+    events = []
+    runner.subscribe(events.append)
+    runner.start()
+    try:
+        job_id = runner.enqueue("slow", session_id, folder)
+        assert started.wait(5)
+        assert runner.cancel(job_id)
+        job = runner.wait_for(job_id, timeout=5)
+    finally:
+        runner.close()
+    assert job.state == "cancelled"
+    assert any(e["state"] == "running" and e["progress"] > 0 for e in events)
+    assert events[-1]["state"] == "cancelled"
+    metadata = read_json(folder / "session_metadata.json")
+    assert metadata["post_processing"]["slow"]["status"] == "cancelled"
+    assert metadata["session_id"] == session_id
+
+
+@pytest.mark.unit
+def test_worker_processes_package_session_and_merge_metadata(tmp_path):
+    manager = SessionManager(str(tmp_path / "recordings"), job_workers=2, use_job_processes=True)
+    session_id, folder = _make_session(manager, {"gsr.csv": b"t,v\n" * 1000, "video/rgb.mp4": b"\0" * 4096})
+    try:
+        result = manager.trigger_post_session_processing(
+            session_id, enable_hand_segmentation=False, extra_jobs=["integrity_manifest", "package"]
+        )
+        jobs = result["jobs"]
+        for job_id in jobs.values():
+            assert manager.job_runner.wait_for(job_id, timeout=60).state == "succeeded"
+        package = manager.get_post_session_job(jobs["package"])
+    finally:
+        manager.shutdown_post_session_jobs()
+    with zipfile.ZipFile(package.result["archive_path"]) as archive:
+        names = set(archive.namelist())
+        assert {"gsr.csv", "video/rgb.mp4", "session_metadata.json"} <= names
+        assert archive.getinfo("video/rgb.mp4").compress_type == zipfile.ZIP_STORED
+    metadata = read_json(folder / "session_metadata.json")
+    assert metadata["status"] == "completed"
+    assert set(metadata["post_processing"]) == {"integrity_manifest", "package"}
+
+
+
+@pytest.mark.unit
+def test_package_interrupted_mid_batch_resumes_without_duplicates(tmp_path):
+    folder = tmp_path / "session"
+    folder.mkdir()
+    names = [f"f{i}.csv" for i in range(8)]
+    for name in names:
+        (folder / name).write_bytes(name.encode() * 25)
+    queue = PostSessionJobQueue(tmp_path / "jobs.sqlite3")
+    job_id = queue.enqueue("package", "s1", folder)
+    calls = []
+
+    def stop_in_second_batch():
+        calls.append(1)
+        return len(calls) >= 5
+
+    # Batches of two files: the checkpoint lists f0-f1, the archive also holds f2 and f3
+    context = JobContext(queue, queue.claim("w0"), stopping=stop_in_second_batch, progress_interval=0.0)
+    with pytest.raises(JobInterrupted):
+        run_package(context, batch_bytes=250)
+    assert queue.get(job_id).checkpoint == {"added": names[:2]}
+
+    result = run_package(JobContext(queue, queue.get(job_id), progress_interval=0.0), batch_bytes=250)
+    with zipfile.ZipFile(result["archive_path"]) as archive:
+        assert archive.namelist() == names
+        assert archive.read("f3.csv") == b"f3.csv" * 25
+    assert result["file_count"] == 8
+    queue.close()
+
+@pytest.mark.unit
+def test_concurrent_metadata_updates_are_merged(tmp_path):
+    path = tmp_path / "session_metadata.json"
+    path.write_text(json.dumps({"session_id": "s", "post_processing": {}}))
+
+    def writer(index):
+        for step in range(20):
+            update_metadata_file(path, {"post_processing": {f"job{index}": step}})
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metadata = read_json(path)
+    assert metadata["session_id"] == "s"
+    assert metadata["post_processing"] == {f"job{i}": 19 for i in range(4)}
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+@pytest.mark.unit
+def test_backoff_policy_drives_retry_delay(tmp_path):
+    calls = []
+
+    def flaky(context):
+        calls.append(context.job.attempts)
+        if len(calls) < 2:
+            raise OSError("transient")
+        return {"attempts": len(calls)}
+
+    runner = PostSessionJobRunner(
+        tmp_path / "jobs.sqlite3",
+        handlers={"flaky": flaky},
+        workers=1,
+        use_processes=False,
+        poll_interval=0.02,
+        policy=BackoffPolicy(base_delay=0.05, jitter=0.0),
+    )
+    runner.start()
+    try:
+        job = runner.wait_for(runner.enqueue("flaky", "s1"), timeout=5)
+    finally:
+        runner.close()
+    assert job.state == "succeeded"
+    assert job.result == {"attempts": 2}
+    assert calls == [1, 2]
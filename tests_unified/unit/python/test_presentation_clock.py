@@ -0,0 +1,118 @@
+"""
+Headless tests for frame-timed stimulus presentation in StimulusManager.
+"""
+
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+from PythonApp.presentation_clock import FlipTimingEstimator
+from PythonApp.stimulus_manager import StimulusConfig, StimulusManager
+
+
+@pytest.fixture
+def manager():
+    app = QApplication.instance() or QApplication([])
+    stimulus_manager = StimulusManager()
+    assert stimulus_manager.initialize()
+    yield app, stimulus_manager
+    stimulus_manager.cleanup()
+
+
+def _run_until(app, predicate, timeout_s=3.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.0005)
+    return predicate()
+
+
+@pytest.mark.unit
+def test_flip_estimator_snaps_to_refresh_grid():
+    estimator = FlipTimingEstimator(refresh_hz=60.0)
+    assert estimator.predict_flip(1_000) == 1_000
+    period = 16_666_667
+    for frame in range(10):
+        estimator.observe(frame * period)
+    assert estimator.refresh_hz == pytest.approx(60.0, rel=1e-3)
+    assert estimator.predict_flip(9 * period + 1) == 10 * period
+
+
+@pytest.mark.unit
+def test_presentation_reports_onset_error_and_duration(manager):
+    app, stimulus_manager = manager
+    markers = []
+    stimulus_manager.add_marker_sink(lambda name, details: markers.append((name, details)))
+    durations_ms = [100, 250]
+    for duration in durations_ms:
+        config = StimulusConfig(
+            stimulus_type="text", text_content="+", duration_ms=duration, fullscreen=False
+        )
+        assert stimulus_manager.present_stimulus(config)
+        assert _run_until(app, lambda: not stimulus_manager.stimulus_windows)
+
+    stats = stimulus_manager.get_timing_statistics()["monitors"][0]
+    assert stats["presentations"] == 2
+    assert stats["onset_error_ms"]["count"] == 2
+    assert stats["onset_error_ms"]["max_abs"] < 20.0
+    assert stats["duration_error_ms"]["count"] == 2
+    assert stats["duration_error_ms"]["max_abs"] < 20.0
+
+    history = stimulus_manager.get_presentation_history()
+    starts = [e for e in history if e.event_type == "stimulus_start"]
+    stops = [e for e in history if e.event_type == "stimulus_stop"]
+    assert len(starts) == len(stops) == 2
+    for start, stop, duration in zip(starts, stops, durations_ms):
+        assert start.onset_error_ms is not None
+        assert stop.duration_actual_ms == pytest.approx(duration, abs=20.0)
+    assert [name for name, _ in markers] == ["stimulus_onset", "stimulus_offset"] * 2
+    assert markers[0][1]["onset_error_ms"] == starts[0].onset_error_ms
+
+
+@pytest.mark.unit
+def test_synchronised_presentation_shares_deadline(manager):
+    app, stimulus_manager = manager
+    configs = [
+        StimulusConfig(stimulus_type="pattern", duration_ms=80, fullscreen=False),
+        StimulusConfig(stimulus_type="text", duration_ms=40, fullscreen=False),
+    ]
+    assert stimulus_manager.present_synchronized_stimuli(configs)
+    assert _run_until(app, lambda: not stimulus_manager.stimulus_windows)
+    records = stimulus_manager.presentation_clock.records
+    assert records[0].onset_deadline_ns == records[-1].onset_deadline_ns
+    assert all(r.requested_duration_ms == 80 for r in records)
+
+
+@pytest.mark.unit
+def test_lsl_markers_are_stamped_at_the_flip(manager):
+    app, stimulus_manager = manager
+
+    class FakeStreamer:
+        def __init__(self):
+            self.samples = []
+
+        def local_clock(self):
+            return 1000.0
+
+        def push_sample(self, stream_id, data, timestamp=None):
+            self.samples.append((data[0], timestamp))
+
+    streamer = FakeStreamer()
+    stimulus_manager.attach_lsl_streamer(streamer)
+    pushed_ns = []
+    stimulus_manager.add_marker_sink(lambda name, details: pushed_ns.append(time.perf_counter_ns()))
+    config = StimulusConfig(stimulus_type="text", text_content="+", duration_ms=50, fullscreen=False)
+    assert stimulus_manager.present_stimulus(config)
+    assert _run_until(app, lambda: not stimulus_manager.stimulus_windows)
+
+    onset = next(e for e in stimulus_manager.get_presentation_history() if e.event_type == "stimulus_start")
+    assert [code for code, _ in streamer.samples] == [40.0, 41.0]
+    expected = 1000.0 - (pushed_ns[0] - onset.perf_counter_ns) / 1e9
+    assert streamer.samples[0][1] == pytest.approx(expected, abs=0.005)
@@ -0,0 +1,218 @@
+"""
+Deterministic tests for the recovery scheduler behind ErrorRecoveryManager.
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from PythonApp.error_handling.recovery_scheduler import (
+    BackoffPolicy,
+    CircuitState,
+    FakeClock,
+    InlineExecutor,
+    RecoveryScheduler,
+)
+
+
+def _scheduler(clock, **kwargs):
+    return RecoveryScheduler(
+        clock=clock,
+        executor=InlineExecutor(),
+        rng=random.Random(0),
+        start_worker=False,
+        **kwargs,
+    )
+
+
+class _Script:
+    def __init__(self, clock, outcomes, elapsed=0.0):
+        self.clock = clock
+        self.outcomes = list(outcomes)
+        self.elapsed = elapsed
+        self.calls = []
+
+    def __call__(self):
+        self.calls.append(self.clock.now())
+        self.clock.advance(self.elapsed)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, f"outcome {len(self.calls)}"
+
+
+@pytest.mark.unit
+def test_retries_follow_exponential_backoff():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, failure_threshold=10)
+    policy = BackoffPolicy(base_delay=1.0, factor=2.0, jitter=0.0, max_attempts=5)
+    action = _Script(clock, [False, RuntimeError("busy"), True])
+    results = []
+    future = scheduler.submit("camera:0", action, policy=policy, callback=results.append)
+    assert scheduler.run_due() == 1
+    assert scheduler.next_deadline() == pytest.approx(1.0)
+    clock.advance(0.5)
+    assert scheduler.run_due() == 0
+    clock.advance(0.5)
+    scheduler.run_due()
+    assert scheduler.next_deadline() == pytest.approx(3.0)
+    clock.advance(2.0)
+    scheduler.run_due()
+    assert action.calls == [0.0, 1.0, 3.0]
+    assert future.result(timeout=0) == (True, "outcome 3")
+    assert results == [(True, "outcome 3")]
+    assert scheduler.breaker("camera:0").state == CircuitState.CLOSED
+    assert scheduler.pending() == 0
+
+
+@pytest.mark.unit
+def test_jitter_stays_within_bounds():
+    policy = BackoffPolicy(base_delay=2.0, factor=2.0, jitter=0.25, max_delay=10.0)
+    rng = random.Random(1)
+    for attempt in range(1, 8):
+        nominal = min(2.0 * 2 ** (attempt - 1), 10.0)
+        assert nominal * 0.75 <= policy.delay(attempt, rng) <= nominal * 1.25
+
+
+@pytest.mark.unit
+def test_circuit_breaker_open_half_open_closed():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, failure_threshold=2, reset_timeout=10.0)
+    policy = BackoffPolicy(base_delay=1.0, jitter=0.0, max_attempts=5)
+    action = _Script(clock, [False, False, False, True])
+    future = scheduler.submit("device:phone", action, policy=policy)
+    scheduler.run_due()
+    clock.advance(1.0)
+    scheduler.run_due()
+    breaker = scheduler.breaker("device:phone")
+    assert breaker.state == CircuitState.OPEN
+    assert future.result(timeout=0)[0] is False
+
+    rejected = scheduler.submit("device:phone", action, policy=policy)
+    assert rejected.result(timeout=0) == (False, "Recovery circuit open for device:phone")
+    assert len(action.calls) == 2
+
+    clock.advance(10.0)
+    probe = scheduler.submit("device:phone", action, policy=policy)
+    assert breaker.state == CircuitState.HALF_OPEN
+    scheduler.run_due()
+    assert breaker.state == CircuitState.OPEN
+    assert probe.result(timeout=0)[0] is False
+
+    clock.advance(10.0)
+    recovered = scheduler.submit("device:phone", action, policy=policy)
+    scheduler.run_due()
+    assert recovered.result(timeout=0) == (True, "outcome 4")
+    assert breaker.state == CircuitState.CLOSED
+    assert scheduler.get_status()["breakers"]["device:phone"]["trips"] == 2
+
+
+@pytest.mark.unit
+def test_slow_attempt_counts_as_timeout_and_requests_coalesce():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    policy = BackoffPolicy(base_delay=1.0, jitter=0.0, max_attempts=2, timeout=5.0)
+    action = _Script(clock, [True, True], elapsed=6.0)
+    first = scheduler.submit("codec:XVID", action, policy=policy)
+    assert scheduler.submit("codec:XVID", action, policy=policy) is first
+    scheduler.run_due()
+    clock.advance(1.0)
+    scheduler.run_due()
+    assert first.result(timeout=0) == (False, "Recovery attempt timed out")
+    assert scheduler.timeouts == 2
+
+
+@pytest.mark.unit
+def test_worker_thread_times_out_hung_attempt():
+    scheduler = RecoveryScheduler(rng=random.Random(0))
+    release = threading.Event()
+    policy = BackoffPolicy(max_attempts=1, timeout=0.05)
+    try:
+        start = time.monotonic()
+        future = scheduler.submit("camera:1", lambda: release.wait(2.0), policy=policy)
+        assert future.result(timeout=1.0) == (False, "Recovery attempt timed out")
+        assert time.monotonic() - start < 1.0
+    finally:
+        release.set()
+        scheduler.shutdown()
+
+
+@pytest.mark.unit
+def test_camera_probe_runs_outside_resource_lock(monkeypatch):
+    pytest.importorskip("cv2")
+    from PythonApp.error_handling.recovery_manager import CameraResourceManager
+
+    manager = CameraResourceManager()
+    probing = threading.Event()
+    release = threading.Event()
+
+    def slow_probe(camera_index):
+        probing.set()
+        release.wait(2.0)
+        return True, None
+
+    monkeypatch.setattr(manager, "_test_camera_availability", slow_probe)
+    results = []
+    requester = threading.Thread(
+        target=lambda: results.append(manager.request_camera_access(0, "capture"))
+    )
+    requester.start()
+    assert probing.wait(1.0)
+    start = time.monotonic()
+    assert manager.get_camera_status()["active_cameras"] == {0: "capture"}
+    assert manager.request_camera_access(0, "other")[0] is False
+    assert time.monotonic() - start < 0.5
+    release.set()
+    requester.join()
+    assert results == [(True, None)]
+
+
+@pytest.mark.unit
+def test_registered_strategy_runs_as_scheduled_task():
+    pytest.importorskip("cv2")
+    from PythonApp.error_handling.recovery_manager import ErrorCategory, ErrorRecoveryManager
+
+    clock = FakeClock()
+    manager = ErrorRecoveryManager(scheduler=_scheduler(clock))
+    outcomes = [(False, "still down"), (True, "reconnected")]
+    manager.register_recovery_strategy(
+        ErrorCategory.NETWORK_CONNECTION,
+        lambda event: outcomes.pop(0),
+        policy=BackoffPolicy(base_delay=2.0, jitter=0.0, max_attempts=3),
+    )
+    callbacks = []
+    future = manager.handle_error_async(
+        "Network connection lost", {"device_id": "phone_1"}, callback=callbacks.append
+    )
+    manager.scheduler.run_due()
+    assert not future.done()
+    clock.advance(2.0)
+    manager.scheduler.run_due()
+    assert future.result(timeout=0) == (True, "reconnected")
+    assert callbacks == [(True, "reconnected")]
+    assert manager.error_history[-1].recovery_successful
+
+
+@pytest.mark.unit
+def test_blocking_handle_error_makes_a_single_attempt():
+    pytest.importorskip("cv2")
+    from PythonApp.error_handling.recovery_manager import ErrorCategory, ErrorRecoveryManager
+
+    manager = ErrorRecoveryManager(scheduler=RecoveryScheduler(rng=random.Random(0)))
+    calls = []
+    manager.register_recovery_strategy(
+        ErrorCategory.NETWORK_CONNECTION,
+        lambda event: calls.append(event) or (False, "still down"),
+        policy=BackoffPolicy(base_delay=5.0, jitter=0.0, max_attempts=5, timeout=1.0),
+    )
+    try:
+        start = time.monotonic()
+        result = manager.handle_error("Network connection lost", {"device_id": "phone_1"})
+        assert result == (False, "still down")
+        assert time.monotonic() - start < 1.0
+        assert len(calls) == 1
+        assert manager.scheduler.pending() == 0
+    finally:
+        manager.scheduler.shutdown()
@@ -0,0 +1,121 @@
+"""
+Tests for the incremental session-health index behind SessionRecoveryManager.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+from PythonApp.session.health_index import InotifyWatcher, SessionHealthIndex
+from PythonApp.session.session_recovery import SessionRecoveryManager
+
+
+def _walk_size(folder):
+    return sum(p.stat().st_size for p in folder.rglob("*") if p.is_file() and not p.name.startswith("."))
+
+
+def _make_tree(root, sessions=3, files_per_session=20):
+    for s in range(sessions):
+        folder = root / f"session_{s:03d}"
+        (folder / "sensors").mkdir(parents=True)
+        (folder / "session_metadata.json").write_text(json.dumps({"session_id": folder.name}))
+        for i in range(files_per_session):
+            (folder / "sensors" / f"gsr_{i:04d}.csv").write_text("t,v\n" + f"{i},{i * 0.5}\n" * (i + 1))
+    (root / "recovery.log").write_text("not session data\n")
+
+
+def _wait_for(app, predicate, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.mark.unit
+def test_rescan_only_reads_changed_files_and_keeps_aggregates(tmp_path):
+    root = tmp_path / "recordings"
+    _make_tree(root)
+    index = SessionHealthIndex(root)
+
+    cold = index.scan()
+    assert cold.added == 63 and cold.corrupted == [] and cold.bytes_read > 0
+    warm = index.scan()
+    assert (warm.scanned, warm.added, warm.modified, warm.removed, warm.bytes_read) == (63, 0, 0, 0, 0)
+    session = root / "session_001"
+    assert index.folder_size(session) == _walk_size(session)
+    assert index.folder_size(root) == sum(_walk_size(root / f"session_{s:03d}") for s in range(3))
+    assert index.folder_stats(session / "sensors")[1] == 20
+
+    (session / "session_metadata.json").write_text('{"session_id": "trunc')
+    (session / "sensors" / "gsr_0000.csv").unlink()
+    (session / "sensors" / "extra.csv").write_text("t,v\n1,2\n")
+    changed = index.scan()
+    assert (changed.added, changed.modified, changed.removed) == (1, 1, 1)
+    assert changed.corrupted == ["session_001/session_metadata.json"]
+    assert index.file_health(session / "session_metadata.json").valid is False
+    assert index.folder_size(session) == _walk_size(session)
+    index.close()
+
+    reopened = SessionHealthIndex(root)
+    assert reopened.scan().bytes_read == 0
+    assert reopened.corrupted_files() == [session / "session_metadata.json"]
+    assert reopened.forget(session) == 21
+    assert reopened.folder_size(root) == _walk_size(root / "session_000") + _walk_size(root / "session_002")
+    reopened.close()
+
+
+@pytest.mark.unit
+def test_recovery_manager_reports_each_corruption_once(tmp_path):
+    root = tmp_path / "recordings"
+    _make_tree(root, sessions=2, files_per_session=3)
+    broken = root / "session_000" / "session_metadata.json"
+    broken.write_text('{"session_id": "session_000"}\x00\x00garbage')
+    manager = SessionRecoveryManager(str(root))
+    reported = []
+    manager.file_corruption_detected.connect(lambda path, reason: reported.append(path))
+
+    manager.scan_for_corrupted_files()
+    manager.scan_for_corrupted_files()
+
+    assert reported == [str(broken)]
+    assert json.loads(broken.read_text()) == {"session_id": "session_000"}
+    assert manager.health_index.file_health(broken).valid is True
+    assert manager.get_folder_size(root / "session_001") == _walk_size(root / "session_001")
+    assert manager.get_recovery_statistics()["health_index"]["corrupted_files"] == 0
+    manager.health_index.close()
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify not available")
+def test_watcher_keeps_index_fresh_while_recording(tmp_path):
+    # Signals emitted on the watcher thread are queued to this thread
+    app = QApplication.instance() or QApplication([])
+    root = tmp_path / "recordings"
+    _make_tree(root, sessions=1, files_per_session=2)
+    manager = SessionRecoveryManager(str(root))
+    reported = []
+    manager.file_corruption_detected.connect(lambda path, reason: reported.append(path))
+    assert manager.start_health_watcher(flush_interval=0.05)
+    try:
+        session = root / "session_000"
+        new_dir = session / "thermal"
+        new_dir.mkdir()
+        with open(new_dir / "frames.csv", "w") as f:
+            f.write("t,v\n" * 500)
+        (session / "events.json").write_text("{not json")
+        assert _wait_for(app, lambda: manager.health_index.folder_size(session) == _walk_size(session))
+        assert _wait_for(app, lambda: reported == [str(session / "events.json")])
+        # The watcher keeps aggregates current, so no walk is needed here
+        assert manager.get_folder_size(new_dir) == 2000
+    finally:
+        manager.stop_health_watcher()
+        manager.health_index.close()
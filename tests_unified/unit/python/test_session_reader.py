@@ -0,0 +1,122 @@
+"""
+Tests for the indexed SessionReader used by the playback API.
+"""
+
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from PythonApp.session.session_reader import SessionReader, lttb_indices
+
+
+def _write_gsr_csv(path, rows, start_ms=1_000_000, step_ms=8):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp_ms", "gsr_conductance_us", "device_id"])
+        for i in range(rows):
+            writer.writerow([start_ms + i * step_ms, f"{np.sin(i / 50.0):.6f}", "shimmer_1"])
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    folder = tmp_path / "session_20250101_120000"
+    folder.mkdir()
+    with open(folder / "session_metadata.json", "w") as f:
+        json.dump({"session_id": folder.name, "start_time": "2025-01-01T12:00:00"}, f)
+    _write_gsr_csv(folder / "shimmer_gsr.csv", 5000)
+    return folder
+
+
+@pytest.mark.unit
+def test_read_range_matches_brute_force(session_dir):
+    reader = SessionReader(session_dir, stride=64)
+    result = reader.read_range("shimmer_gsr", 1000.5, 1010.0)
+    expected = [
+        (1_000_000 + i * 8) / 1000.0
+        for i in range(5000)
+        if 1000.5 <= (1_000_000 + i * 8) / 1000.0 <= 1010.0
+    ]
+    assert result["total_points"] == len(expected)
+    assert np.allclose(result["timestamps"], expected)
+    assert list(result["columns"]) == ["gsr_conductance_us"]
+    assert not result["decimated"]
+
+
+@pytest.mark.unit
+def test_index_persisted_and_invalidated_on_change(session_dir):
+    reader = SessionReader(session_dir, stride=100)
+    index = reader.get_index("shimmer_gsr")
+    sidecar = session_dir / ".index" / "shimmer_gsr.idx.json"
+    assert sidecar.exists()
+    assert index.row_count == 5000
+    assert len(index.checkpoint_offsets) == 50
+
+    reloaded = SessionReader(session_dir, stride=100).get_index("shimmer_gsr")
+    assert reloaded.checkpoint_offsets == index.checkpoint_offsets
+
+    time.sleep(0.01)
+    _write_gsr_csv(session_dir / "shimmer_gsr.csv", 200)
+    os.utime(session_dir / "shimmer_gsr.csv", None)
+    assert reader.get_index("shimmer_gsr").row_count == 200
+
+
+@pytest.mark.unit
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.zeros_like(x)
+    y[4321] = 50.0
+    y[7000] = -30.0
+    selected = lttb_indices(x, y, 100)
+    assert len(selected) == 100
+    assert selected[0] == 0 and selected[-1] == len(x) - 1
+    assert np.all(np.diff(selected) > 0)
+    assert 4321 in selected and 7000 in selected
+
+
+@pytest.mark.unit
+def test_read_range_decimates_to_max_points(session_dir):
+    reader = SessionReader(session_dir)
+    result = reader.read_range("shimmer_gsr", max_points=250)
+    assert result["total_points"] == 5000
+    assert result["decimated"]
+    assert len(result["timestamps"]) == 250
+    assert len(result["columns"]["gsr_conductance_us"]) == 250
+
+
+@pytest.mark.unit
+def test_binary_stream_range(session_dir):
+    data = np.zeros(3000, dtype=[("timestamp", "f8"), ("value", "f4")])
+    data["timestamp"] = np.arange(3000) * 0.01
+    data["value"] = np.arange(3000)
+    np.save(session_dir / "markers.npy", data)
+    reader = SessionReader(session_dir, stride=128)
+    result = reader.read_range("markers", 10.0, 12.0)
+    assert result["timestamps"][0] == pytest.approx(10.0)
+    assert result["timestamps"][-1] == pytest.approx(12.0)
+    assert result["columns"]["value"][0] == 1000
+
+
+@pytest.mark.unit
+def test_video_frames_indexed_from_frame_csv(session_dir):
+    cv2 = pytest.importorskip("cv2")
+    video_path = session_dir / "rgb_video.avi"
+    writer = cv2.VideoWriter(
+        str(video_path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24)
+    )
+    for i in range(10):
+        writer.write(np.full((24, 32, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    with open(session_dir / "rgb_camera.csv", "w", newline="") as f:
+        frames = csv.writer(f)
+        frames.writerow(["timestamp_ms", "frame_id", "video_filename"])
+        for i in range(10):
+            frames.writerow([5000 + i * 100, i, "rgb_video.avi"])
+    reader = SessionReader(session_dir)
+    assert reader.frame_index_at("rgb_video", 5.35) == 3
+    frame = reader.read_frame("rgb_video", 5.35)
+    assert frame is not None
+    assert abs(int(frame.mean()) - 60) < 10
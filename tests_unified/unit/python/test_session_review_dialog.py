@@ -0,0 +1,108 @@
+"""
+Headless tests for the lazily loaded session review dialog.
+"""
+
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from PythonApp.gui.session_file_model import PreviewCache
+from PythonApp.gui.session_review_dialog import SessionReviewDialog
+
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def make_synthetic_session(folder, file_count, csv_rows=100):
+    """Create a session folder with ``file_count`` small files of mixed types."""
+    folder.mkdir(parents=True, exist_ok=True)
+    csv_body = "timestamp_ms,gsr_us\n" + "".join(f"{i},{i * 0.5}\n" for i in range(csv_rows))
+    suffixes = (".csv", ".json", ".log", ".bin")
+    for i in range(file_count):
+        suffix = suffixes[i % len(suffixes)]
+        with open(folder / f"chunk_{i:06d}{suffix}", "w") as f:
+            f.write(csv_body if suffix == ".csv" else "{}")
+    return folder
+
+
+def _run_until(app, predicate, timeout_s=10.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return predicate()
+
+
+def _session_data():
+    return {"session": "synthetic", "events": [{"event": "session_start", "time": "00:00:00"}]}
+
+
+@pytest.mark.unit
+def test_statistics_are_accumulated_in_background(app, tmp_path):
+    folder = make_synthetic_session(tmp_path / "session", 40, csv_rows=25)
+    dialog = SessionReviewDialog(_session_data(), str(folder))
+    results = []
+    dialog.statistics_ready.connect(results.append)
+    try:
+        assert _run_until(app, lambda: results)
+        statistics = results[0]
+        assert statistics["complete"]
+        assert statistics["total_files"] == 40
+        assert statistics["by_type"]["CSV"]["count"] == 10
+        assert statistics["csv_rows"] == 10 * 25
+        assert dialog.total_files_label.text() == "40"
+        assert dialog.file_model.rowCount() == 40
+        names = [f["name"] for f in dialog.session_files]
+        assert names == sorted(names)
+    finally:
+        dialog.done(0)
+
+
+@pytest.mark.unit
+def test_previews_load_on_demand_into_cache(app, tmp_path):
+    folder = make_synthetic_session(tmp_path / "session", 4, csv_rows=5)
+    image = QImage(640, 480, QImage.Format_RGB32)
+    image.fill(0xFF3366)
+    image.save(str(folder / "frame.png"))
+    dialog = SessionReviewDialog(_session_data(), str(folder))
+    try:
+        assert _run_until(app, lambda: dialog.files_complete)
+        names = [f["name"] for f in dialog.session_files]
+        dialog.file_list.setCurrentIndex(dialog.file_model.index(names.index("chunk_000000.csv")))
+        assert dialog.preview_text.toPlainText() == "Loading preview..."
+        assert _run_until(app, lambda: "timestamp_ms" in dialog.preview_text.toPlainText())
+
+        dialog.file_list.setCurrentIndex(dialog.file_model.index(names.index("frame.png")))
+        assert _run_until(app, lambda: dialog.preview_image.pixmap() is not None and not dialog.preview_image.pixmap().isNull())
+        assert dialog.preview_image.pixmap().width() == 256
+        assert dialog.preview_text.toPlainText() == "640x480"
+
+        dialog.file_list.setCurrentIndex(dialog.file_model.index(names.index("chunk_000000.csv")))
+        assert "timestamp_ms" in dialog.preview_text.toPlainText()
+        assert dialog.preview_loader.cache.hits >= 1
+    finally:
+        dialog.done(0)
+
+
+@pytest.mark.unit
+def test_preview_cache_is_bounded_lru():
+    cache = PreviewCache(max_entries=2, max_bytes=1000)
+    cache.put(("a",), {"text": "x" * 10})
+    cache.put(("b",), {"text": "y" * 10})
+    assert cache.get(("a",)) is not None
+    cache.put(("c",), {"text": "z" * 10})
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+    cache.put(("d",), {"text": "w" * 900})
+    assert len(cache) == 1
+    assert cache.current_bytes <= 1000
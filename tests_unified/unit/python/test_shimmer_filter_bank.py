@@ -0,0 +1,121 @@
+"""
+Tests for the vectorised, stateful signal processing in PythonShimmerProcessor.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "PythonApp"))
+
+from native_backends.native_shimmer_wrapper import (
+    LowPassFilterBank,
+    ProcessingConfig,
+    PythonShimmerProcessor,
+)
+
+
+def _packets(count, seed=0):
+    rng = np.random.default_rng(seed)
+    gsr = rng.integers(200, 3000, count)
+    accel = rng.integers(0, 65536, (count, 3))
+    packets = []
+    for i in range(count):
+        packet = [int(gsr[i]) & 0xFF, int(gsr[i]) >> 8, 0xDC, 0x05]
+        for value in accel[i]:
+            packet += [int(value) & 0xFF, int(value) >> 8]
+        packets.append(packet + [0] * 10 + [int(rng.integers(0, 100))])
+    return packets
+
+
+def _legacy_low_pass(signal, sampling_rate, cutoff_freq):
+    dt = 1.0 / sampling_rate
+    alpha = dt / (dt + 1.0 / (2.0 * np.pi * cutoff_freq))
+    filtered = [signal[0]]
+    for i in range(1, len(signal)):
+        filtered.append(alpha * signal[i] + (1.0 - alpha) * filtered[i - 1])
+    return filtered
+
+
+def _chunks(values, rng):
+    start = 0
+    while start < len(values):
+        size = int(rng.integers(1, 300))
+        yield values[start:start + size]
+        start += size
+
+
+@pytest.mark.unit
+def test_chunked_filtering_matches_one_call():
+    rng = np.random.default_rng(1)
+    signal = np.cumsum(rng.normal(size=(20_000, 3)), axis=0)
+    one_shot = LowPassFilterBank(128.0, 5.0, channels=3).process(signal)
+
+    bank = LowPassFilterBank(128.0, 5.0, channels=3)
+    chunked = np.concatenate([bank.process(chunk) for chunk in _chunks(signal, rng)])
+    assert np.array_equal(chunked, one_shot)
+    # Steady-state start: a constant input passes through unchanged
+    assert np.allclose(LowPassFilterBank(128.0, 5.0).process(np.full(50, 7.5)), 7.5)
+
+    bank.reset()
+    assert np.array_equal(bank.process(signal[:10]), one_shot[:10])
+    with pytest.raises(ValueError):
+        bank.process(signal[:, :2])
+    with pytest.raises(ValueError):
+        LowPassFilterBank(128.0, 64.0)
+
+
+@pytest.mark.unit
+def test_batches_reproduce_the_per_packet_stream():
+    packets = _packets(1000) + [[1, 2, 3]] + [packet[:20] for packet in _packets(5, seed=1)]
+    per_packet = PythonShimmerProcessor()
+    expected = [per_packet.process_raw_packet(packet).to_dict() for packet in packets]
+
+    batched = PythonShimmerProcessor()
+    rng = np.random.default_rng(2)
+    readings = [reading.to_dict() for chunk in _chunks(packets, rng) for reading in batched.process_batch(chunk)]
+    assert len(readings) == len(expected) and batched.get_packets_processed() == len(packets)
+    for name in ("gsr_value", "ppg_value", "accel_x", "accel_y", "accel_z", "battery_level"):
+        assert np.allclose([r[name] for r in readings], [e[name] for e in expected], rtol=0, atol=1e-9), name
+    assert readings[1000]["gsr_value"] == 0.0 and readings[-1]["battery_level"] == 100.0
+    uniform = PythonShimmerProcessor()
+    assert np.allclose(uniform.process_batch_arrays(packets[:1000])["gsr_value"], [e["gsr_value"] for e in expected[:1000]],
+                       rtol=0, atol=1e-9)
+
+    unfiltered = PythonShimmerProcessor()
+    unfiltered.configure(ProcessingConfig(enable_filtering=False))
+    gsr = unfiltered.process_batch_arrays(packets[:5])["gsr_value"]
+    assert gsr.tolist() == [unfiltered._convert_gsr_raw_to_microsiemens((p[1] << 8) | p[0]) for p in packets[:5]]
+
+
+@pytest.mark.unit
+def test_low_pass_and_artifact_removal_keep_their_contracts():
+    processor = PythonShimmerProcessor()
+    signal = list(np.random.default_rng(3).normal(10.0, 2.0, 500))
+    filtered = processor.apply_low_pass_filter(signal, 5.0)
+    assert isinstance(filtered, list)
+    assert np.allclose(filtered, _legacy_low_pass(signal, 128.0, 5.0), rtol=0, atol=1e-12)
+    assert processor.apply_low_pass_filter([], 5.0) == []
+
+    stream = PythonShimmerProcessor()
+    chunked = np.concatenate([stream.filter_chunk(chunk) for chunk in np.array_split(np.array(signal), 7)])
+    assert np.array_equal(chunked, PythonShimmerProcessor().filter_chunk(np.array(signal)))
+
+    processor.configure(ProcessingConfig(artifact_threshold=1.0, artifact_window=31))
+    rng = np.random.default_rng(4)
+    gsr = 5.0 + np.sin(np.linspace(0, 6, 2000)) + rng.normal(0, 0.05, 2000)
+    spiky = gsr.copy()
+    spikes = rng.choice(np.arange(10, 1990), 20, replace=False)
+    spiky[spikes] += rng.choice([-1, 1], 20) * rng.uniform(3.0, 8.0, 20)
+    clean = processor.remove_artifacts(spiky)
+    assert isinstance(clean, np.ndarray)
+    changed = np.flatnonzero(clean != spiky)
+    assert set(changed) == set(spikes)
+    assert np.abs(clean - gsr).max() < 0.5
+
+    # The short example the native backend is checked with
+    default = PythonShimmerProcessor()
+    cleaned = default.remove_artifacts([10.0, 12.0, 15.0, 8.0, 9.0, 11.0, 13.0, 10.0, 150.0, 10.0])
+    assert cleaned[8] < 20.0 and cleaned[:8] == [10.0, 12.0, 15.0, 8.0, 9.0, 11.0, 13.0, 10.0]
@@ -0,0 +1,158 @@
+"""
+Tests for incremental hard-link snapshot backups of session folders.
+"""
+
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from PythonApp.session.snapshot_backup import RetentionPolicy, SnapshotStore
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    # Prefer tmpfs, which has hard links but no reflinks, so the copy fallback runs
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        path = shm / f"snapshot_test_{os.getpid()}_{time.monotonic_ns()}"
+        path.mkdir()
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        yield tmp_path
+
+
+def _make_session(root, name="session_001"):
+    session = root / "recordings" / name
+    (session / "video").mkdir(parents=True)
+    (session / "empty").mkdir()
+    (session / "session_metadata.json").write_text('{"session_id": "%s"}' % name)
+    (session / "video" / "rgb.mp4").write_bytes(os.urandom(256 * 1024))
+    (session / "video" / "thermal.raw").write_bytes(os.urandom(128 * 1024))
+    (session / "gsr.csv").write_text("t,v\n" + "".join(f"{i},{i * 0.5}\n" for i in range(1000)))
+    os.symlink("video/rgb.mp4", session / "latest.mp4")
+    return session
+
+
+def _tree(folder):
+    return {
+        p.relative_to(folder).as_posix(): (os.readlink(p) if p.is_symlink() else p.read_bytes())
+        for p in folder.rglob("*") if p.is_symlink() or p.is_file()
+    }
+
+
+def _inode(path):
+    return os.lstat(path).st_ino
+
+
+@pytest.mark.unit
+def test_unchanged_files_are_linked_and_every_snapshot_restores(workdir):
+    session = _make_session(workdir)
+    store = SnapshotStore(workdir / "backups")
+    first = store.snapshot(session)
+    first_tree = _tree(session)
+    assert (first.copied + first.reflinked, first.linked) == (4, 0)
+
+    (session / "gsr.csv").write_text("t,v\n0,9.9\n")
+    (session / "video" / "thermal.raw").unlink()
+    (session / "notes.txt").write_text("late annotation")
+    second = store.snapshot(session)
+    second_tree = _tree(session)
+    assert (second.linked, second.copied + second.reflinked) == (2, 2)
+    assert second.bytes_linked == 256 * 1024 + len(first_tree["session_metadata.json"])
+
+    old, new = store.snapshot_path(session.name, first.snapshot_id), second.path
+    assert _inode(old / "video" / "rgb.mp4") == _inode(new / "video" / "rgb.mp4")
+    assert _inode(old / "gsr.csv") != _inode(new / "gsr.csv")
+    # No snapshot file shares an inode with the live session
+    assert _inode(new / "video" / "rgb.mp4") != _inode(session / "video" / "rgb.mp4")
+    assert store.disk_usage(session.name) < 2 * 400 * 1024
+    assert store.load_manifest(session.name).parent == first.snapshot_id
+
+    # Writing into the live session in place leaves both snapshots intact
+    with open(session / "video" / "rgb.mp4", "r+b") as f:
+        f.write(b"\0" * 1024)
+    restored_first = store.restore(session.name, workdir / "restore_1", first.snapshot_id, verify=True)
+    restored_latest = store.restore(session.name, workdir / "restore_2", verify=True)
+    assert _tree(restored_first) == first_tree and _tree(restored_latest) == second_tree
+    assert (restored_first / "empty").is_dir() and (restored_first / "latest.mp4").is_symlink()
+    assert _inode(restored_latest / "gsr.csv") != _inode(new / "gsr.csv")
+    with pytest.raises(FileExistsError):
+        store.restore(session.name, restored_first)
+
+
+@pytest.mark.unit
+def test_content_verification_catches_same_size_same_mtime_edits(workdir):
+    session = _make_session(workdir)
+    target = session / "video" / "thermal.raw"
+    quick, verified = SnapshotStore(workdir / "quick"), SnapshotStore(workdir / "verified", verify_content=True)
+    quick.snapshot(session)
+    verified.snapshot(session)
+    info = target.stat()
+    target.write_bytes(os.urandom(info.st_size))
+    os.utime(target, ns=(info.st_atime_ns, info.st_mtime_ns))
+
+    unchanged = quick.snapshot(session)
+    assert unchanged.linked == 4 and unchanged.bytes_copied == 0
+    result = verified.snapshot(session)
+    assert result.linked == 3 and result.copied + result.reflinked == 1
+    assert (result.path / "video" / "thermal.raw").read_bytes() == target.read_bytes()
+
+
+@pytest.mark.unit
+def test_retention_prunes_without_breaking_linked_snapshots(workdir):
+    store = SnapshotStore(workdir / "backups")
+    now = datetime(2024, 3, 15, 12, 0)
+    ids = [(now - timedelta(hours=6 * i)).strftime("%Y%m%dT%H%M%S_%f") for i in range(40)][::-1]
+    pruned = store.select_for_pruning(ids, RetentionPolicy(keep_last=2, keep_daily=3), now)
+    kept = sorted(set(ids) - set(pruned))
+    # Two newest, plus the newest of 15, 14 and 13 March (18:00 on the earlier days)
+    assert kept == sorted({ids[-1], ids[-2], ids[-4], ids[-8]})
+    assert store.select_for_pruning(ids, RetentionPolicy(keep_last=10, max_age_days=1), now) == ids[:-5]
+    assert store.select_for_pruning(ids, RetentionPolicy(keep_last=0, max_age_days=0), now) == ids[:-1]
+
+    session = _make_session(workdir)
+    snapshots = [store.snapshot(session).snapshot_id for _ in range(3)]
+    assert store.prune(session.name, RetentionPolicy(keep_last=1)) == snapshots[:2]
+    assert store.list_snapshots(session.name) == snapshots[2:]
+    assert not store.snapshot_path(session.name, snapshots[0]).exists()
+    assert _tree(store.restore(session.name, workdir / "after_prune")) == _tree(session)
+
+    # An interrupted snapshot leaves no manifest, so it is neither listed nor linked against
+    store.snapshot_path(session.name, "20990101T000000_000000").mkdir()
+    assert store.snapshot(session).linked == 4
+
+
+@pytest.mark.unit
+def test_recovery_manager_backs_up_incrementally_and_restores(workdir):
+    pytest.importorskip("PyQt5")
+    from PyQt5.QtWidgets import QApplication
+
+    from PythonApp.session.session_recovery import SessionRecoveryManager
+
+    app = QApplication.instance() or QApplication([])
+    session = _make_session(workdir)
+    manager = SessionRecoveryManager(
+        str(workdir / "recordings"), str(workdir / "backups"), backup_retention=RetentionPolicy(keep_last=2)
+    )
+    completed = []
+    manager.backup_completed.connect(lambda name, path: completed.append(path))
+    expected = _tree(session)
+    for _ in range(3):
+        assert manager.backup_session(session)
+        app.processEvents()
+    snapshots = manager.list_session_backups(session.name)
+    assert len(snapshots) == 2 and completed[-1].endswith(snapshots[-1])
+
+    shutil.rmtree(session)
+    assert manager.restore_session(session.name) == session
+    assert _tree(session) == expected
+    assert manager.restore_session(session.name) is None
+    assert "backup_restored" in manager.recovery_log_file.read_text()
+    manager.health_index.close()
@@ -0,0 +1,104 @@
+"""
+Tests for the precomputed-remap thermal/RGB fusion engine.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from PythonApp.calibration.calibration_manager import CalibrationManager
+from PythonApp.calibration.calibration_result import CalibrationResult
+from PythonApp.calibration.thermal_fusion import ThermalFusionEngine
+
+
+def _legacy_overlay(rgb, thermal, homography, alpha=0.3):
+    """The per-frame path apply_thermal_overlay used before the engine."""
+    warped = cv2.warpPerspective(thermal, homography, (rgb.shape[1], rgb.shape[0]))
+    colored = cv2.applyColorMap(warped, cv2.COLORMAP_JET)
+    return cv2.addWeighted(rgb, 1.0 - alpha, colored, alpha, 0)
+
+
+def _frames(width, height, thermal_size=(256, 192), seed=0):
+    rng = np.random.default_rng(seed)
+    rgb = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    thermal = cv2.GaussianBlur(rng.integers(0, 256, thermal_size[::-1], dtype=np.uint8), (15, 15), 4)
+    scale = width / thermal_size[0] * 0.6
+    homography = np.array([[scale, 0.02 * scale, width * 0.15], [0.01 * scale, scale, height * 0.1], [0.0, 0.0, 1.0]])
+    return rgb, thermal, homography
+
+
+def _result(homography, device_id="dev"):
+    result = CalibrationResult(device_id)
+    result.homography_matrix = homography
+    return result
+
+
+@pytest.mark.unit
+def test_engine_matches_warp_perspective_path():
+    rgb, thermal, homography = _frames(640, 480)
+    engine = ThermalFusionEngine(_result(homography))
+    expected = _legacy_overlay(rgb, thermal, homography)
+
+    fused = engine.fuse(rgb, thermal)
+    assert np.abs(fused.astype(int) - expected).max() <= 2
+    x0, y0, x1, y1 = engine.roi
+    # The footprint includes the one-pixel bilinear fringe; outside it only
+    # the empty-pixel colour is blended
+    assert (x0, y0) == (95, 47) and x1 < 640 and y1 < 480
+    assert np.array_equal(fused[:y0], expected[:y0])
+
+    # Buffers are reused and in-place blending writes into the RGB frame
+    assert engine.fuse(rgb, thermal) is fused
+    target = rgb.copy()
+    assert engine.fuse(target, cv2.cvtColor(thermal, cv2.COLOR_GRAY2BGR), out=target) is target
+    assert np.abs(target.astype(int) - expected).max() <= 2
+
+
+@pytest.mark.unit
+def test_reduced_resolution_and_undistortion():
+    rgb, thermal, homography = _frames(1280, 720)
+    expected = _legacy_overlay(rgb, thermal, homography)
+    for scale in (0.5, None):
+        fused = ThermalFusionEngine(_result(homography), scale=scale).fuse(rgb, thermal)
+        assert np.abs(fused.astype(float) - expected).mean() < 1.0
+
+    result = _result(homography)
+    result.thermal_camera_matrix = np.array([[200.0, 0, 128], [0, 200.0, 96], [0, 0, 1]])
+    result.thermal_distortion_coeffs = np.zeros(5)
+    plain = ThermalFusionEngine(result).fuse(rgb, thermal).copy()
+    # A lens model with no distortion leaves the composed table unchanged
+    assert np.abs(ThermalFusionEngine(result, undistort=True).fuse(rgb, thermal).astype(int) - plain).max() <= 1
+    result.thermal_distortion_coeffs = np.array([-0.3, 0.1, 0, 0, 0])
+    assert not np.array_equal(ThermalFusionEngine(result, undistort=True).fuse(rgb, thermal), plain)
+    with pytest.raises(ValueError):
+        ThermalFusionEngine(CalibrationResult("empty"))
+
+
+@pytest.mark.unit
+def test_manager_caches_engines_until_recalibration(tmp_path):
+    manager = CalibrationManager(str(tmp_path / "calibration"))
+    rgb, thermal, homography = _frames(640, 480)
+    assert manager.apply_thermal_overlay("dev", rgb, thermal) is None
+    manager.calibration_results["dev"] = _result(homography)
+
+    overlay = manager.apply_thermal_overlay("dev", rgb, thermal, alpha=0.5)
+    assert np.abs(overlay.astype(int) - _legacy_overlay(rgb, thermal, homography, 0.5)).max() <= 2
+    engine = manager.fusion_engines["dev"]
+    kept = overlay.copy()
+    manager.apply_thermal_overlay("dev", rgb, thermal)
+    assert manager.fusion_engines["dev"] is engine
+    # A returned frame survives later overlays; ``out`` is filled in place
+    assert np.array_equal(overlay, kept)
+    out = np.empty_like(rgb)
+    assert manager.apply_thermal_overlay("dev", rgb, thermal, alpha=0.5, out=out) is out
+    assert np.array_equal(out, kept)
+
+    shifted = homography.copy()
+    shifted[0, 2] += 40
+    path = tmp_path / "calibration_dev.json"
+    _result(shifted).save_to_file(str(path))
+    assert manager.load_calibration_result("dev", str(path))
+    assert "dev" not in manager.fusion_engines
+    overlay = manager.apply_thermal_overlay("dev", rgb, thermal)
+    assert np.abs(overlay.astype(int) - _legacy_overlay(rgb, thermal, shifted)).max() <= 2
+    assert manager.apply_thermal_overlay("dev", rgb, thermal.astype(np.uint16)) is None
@@ -0,0 +1,132 @@
+"""
+Tests for the encode-once MJPEG preview broadcaster used by the web dashboard.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from PythonApp.web_ui.preview_broadcaster import (
+    MJPEG_BOUNDARY,
+    PreviewBroadcaster,
+    PreviewTier,
+    THERMAL_LUT,
+    apply_thermal_lut,
+)
+
+
+def _fake_encoder(image, tier):
+    return f"{tier.name}:{int(image.flat[0])}".encode()
+
+
+def _drain(broadcaster, tier, frames, received, stop_event, delay=0.0):
+    gen = broadcaster.stream(tier, idle_timeout=0.05)
+    try:
+        for part in gen:
+            received.append(part)
+            if delay:
+                time.sleep(delay)
+            if stop_event.is_set() or len(received) >= frames:
+                break
+    finally:
+        gen.close()
+
+
+@pytest.mark.unit
+def test_thermal_lut_matches_reference_colormap():
+    ramp = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    coloured = apply_thermal_lut(ramp)
+    assert coloured.shape == (16, 16, 3)
+    assert coloured.dtype == np.uint8
+    assert list(THERMAL_LUT[0]) == [0, 0, 255]
+    assert list(THERMAL_LUT[60]) == [255, 0, 210]
+    assert list(THERMAL_LUT[110]) == [255, 40, 0]
+    assert list(THERMAL_LUT[250]) == [255, 255, 255]
+
+
+@pytest.mark.unit
+def test_thermal_lut_normalises_float_input():
+    data = np.linspace(20.0, 40.0, 100, dtype=np.float32).reshape(10, 10)
+    coloured = apply_thermal_lut(data)
+    assert list(coloured[0, 0]) == list(THERMAL_LUT[0])
+    assert list(coloured[-1, -1]) == list(THERMAL_LUT[255])
+    flat = apply_thermal_lut(np.full((4, 4), 30.0))
+    assert (flat == THERMAL_LUT[0]).all()
+
+
+@pytest.mark.unit
+def test_published_frame_encoded_once_per_tier():
+    tiers = (PreviewTier("full"), PreviewTier("low", quality=50, max_width=8))
+    broadcaster = PreviewBroadcaster("test", tiers=tiers, encoder=_fake_encoder)
+    broadcaster.acquire_viewer()
+    try:
+        broadcaster.publish_frame(np.full((4, 4), 7, dtype=np.uint8))
+        version, payload = broadcaster.wait_for_frame("low", 0, timeout=2.0)
+        assert version == 1
+        assert payload == b"low:7"
+        assert broadcaster.latest("full") == (1, b"full:7")
+        assert broadcaster.get_statistics()["encode_count"] == 2
+    finally:
+        broadcaster.release_viewer()
+        broadcaster.stop()
+
+
+@pytest.mark.unit
+def test_unchanged_polled_frame_is_not_re_encoded():
+    frame = np.full((4, 4), 3, dtype=np.uint8)
+    broadcaster = PreviewBroadcaster(
+        "poll",
+        frame_source=lambda: frame,
+        tiers=(PreviewTier("full"),),
+        max_fps=200.0,
+        encoder=_fake_encoder,
+    )
+    try:
+        assert broadcaster.snapshot(timeout=2.0) == b"full:3"
+        time.sleep(0.1)
+        assert broadcaster.snapshot() == b"full:3"
+        assert broadcaster.get_statistics()["encode_count"] == 1
+    finally:
+        broadcaster.stop()
+
+
+@pytest.mark.unit
+def test_snapshot_returns_none_without_source_frames():
+    broadcaster = PreviewBroadcaster(
+        "empty", frame_source=lambda: None, encoder=_fake_encoder, max_fps=100.0
+    )
+    try:
+        start = time.monotonic()
+        assert broadcaster.snapshot(timeout=1.0) is None
+        assert time.monotonic() - start < 0.5
+    finally:
+        broadcaster.stop()
+
+
+@pytest.mark.unit
+def test_stream_yields_multipart_parts():
+    broadcaster = PreviewBroadcaster(
+        "stream", tiers=(PreviewTier("full"),), encoder=_fake_encoder
+    )
+    received = []
+    stop_event = threading.Event()
+    reader = threading.Thread(
+        target=_drain, args=(broadcaster, None, 1, received, stop_event)
+    )
+    reader.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while broadcaster.viewer_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        broadcaster.publish_frame(np.full((2, 2), 9, dtype=np.uint8))
+        reader.join(timeout=2.0)
+    finally:
+        stop_event.set()
+        broadcaster.stop()
+    assert len(received) == 1
+    part = received[0]
+    assert part.startswith(f"--{MJPEG_BOUNDARY}\r\n".encode())
+    assert b"Content-Type: image/jpeg" in part
+    assert part.endswith(b"full:9\r\n")